@@ -40,6 +40,50 @@ the k-mers will be ignored.
 If the delete flag is used, then all input files will be deleted after they
 aggregated.
 
+The outputs of several aggregations may be aggregated again as partial inputs,
+which adds their inclusion and exclusion counts together. This allows a large
+number of files to be aggregated in several levels, each of which opens only a
+few files at once.
+
+The aggregation may be limited to the k-mers of a range [start, end), so that
+several aggregations of the same inputs may run in parallel, each producing an
+independent slice of the output. Concatenating the slices in order produces
+the complete aggregation. Sorted uncompressed text files and binary files are
+searched for the start of the range, rather than read from their beginning.
+
+Inclusion and exclusion files may also be removed from an aggregation. The
+k-mers of removed files are subtracted from the counts of a partial input, and
+k-mers which are then contained in no file are not written. This allows an
+aggregation to be updated as genomes are added and removed, without
+aggregating the remaining genomes again.
+
+When inclusion and exclusion hit thresholds are provided, only the k-mers that
+may be used by signature extraction are written: those observed in at least the
+inclusion threshold of inclusion files or at least the exclusion threshold of
+exclusion files. The thresholds must only be applied to complete aggregations,
+since the counts of a partial aggregation may still grow.
+
+The input files may be either text or binary k-mer files (see BinaryKMers.py).
+The output is written as text unless the binary format is specified.
+
+The k-mers are aggregated by one of two engines. The heap engine merges the
+sorted files one k-mer at a time, holding only the head of each file in
+memory. The NumPy engine loads the encoded k-mers of every file into memory at
+once and computes their union and counts with vectorized operations, which is
+considerably faster when the k-mers of all the files, or of the aggregated
+range, fit in memory. The NumPy engine supports k-mers no larger than
+BinaryKMers.MAXIMUM_K and falls back to the heap engine for larger k-mers. The
+output is identical for both engines.
+
+The aggregation may also write the presence bitsets of the k-mers, which record
+which inclusion and exclusion files contain each k-mer, rather than only their
+number (see PresenceBitsets.py).
+
+The aggregation may also write the statistics of the written k-mers beside the
+output: a histogram of their inclusion and exclusion counts, and the number of
+k-mers and bytes written (see AggregateStatistics.py). These show how many
+k-mers any hit thresholds keep, without reading the output.
+
 INPUT (one file):
 
 AAAAA
@@ -62,17 +106,42 @@ USAGE:
 
 script.py -h
 script.py -i [INCLUSION] [...] -e [EXCLUSION] [...] -o [OUTPUT] [--delete]
+    [--format FORMAT] [--compress] [--partial PARTIAL [...]]
+    [--start START] [--end END] [--inhits INHITS] [--exhits EXHITS]
+    [--remove-inclusion REMOVED [...]] [--remove-exclusion REMOVED [...]]
+    [--engine ENGINE] [--presence PRESENCE] [--statistics]
 
 EXAMPLE:
 
 script.py -i inclusion1.kmers inclusion2.kmers -e exclusion1.kmers -o out.kmers
 script.py -i inclusion1.kmers -e exclusion1.kmers -o out.kmers --delete
+script.py -i inclusion1.kmers -e exclusion1.kmers -o out.kmers --format binary
+script.py --partial part1.kmers part2.kmers -o out.kmers
+script.py -i inclusion1.kmers -e exclusion1.kmers -o out.kmers --start CGT
+script.py -i inclusion1.kmers -e exclusion1.kmers -o out.kmers --inhits 2 \
+    --exhits 1
+script.py --partial old.kmers -i new.kmers --remove-exclusion gone.kmers \
+    -o out.kmers
+script.py -i inclusion1.kmers -e exclusion1.kmers -o out.kmers --engine numpy
+script.py -i inclusion1.kmers -e exclusion1.kmers -o out.kmers \
+    --presence out.bitsets
+script.py -i inclusion1.kmers -e exclusion1.kmers -o out.kmers --statistics
 
 # =============================================================================
 """
 
 import os
 import argparse
+import bisect
+import heapq
+import itertools
+
+import numpy
+
+import AggregateStatistics
+import BinaryKMers
+import PresenceBitsets
+import Utility
 
 """
 # =============================================================================
@@ -85,13 +154,36 @@ GLOBALS
 # DEFAULTS #
 
 DELETE_DEFAULT = False
+FORMAT_DEFAULT = BinaryKMers.FORMAT_TEXT
+COMPRESS_DEFAULT = False
+
+# ENGINES #
+
+ENGINE_HEAP = "heap"
+ENGINE_NUMPY = "numpy"
+ENGINES = [ENGINE_HEAP, ENGINE_NUMPY]
+
+ENGINE_DEFAULT = ENGINE_HEAP
+
+# BUFFERING #
+
+# The number of bytes buffered from all the k-mer files together.
+READ_BUFFER_SIZE = 64 * 1048576
+
+# The bounds on the number of bytes read from a single k-mer file at once.
+READ_SIZE_MINIMUM = 65536
+READ_SIZE_MAXIMUM = 4 * 1048576
+
+# The number of aggregated k-mers written at once.
+WRITE_BATCH_SIZE = 65536
 
 # ARGUMENTS #
 
 PROGRAM_DESCRIPTION = 'This script aggregates one or more inclusion k-mer \
     files with one or more exclusion files. The number of distinct inclusion \
     and exclusion k-mer observations per file will be reported immediately \
-    following each k-mer in the output.'
+    following each k-mer in the output. Partially aggregated files may be \
+    aggregated again, adding their counts together.'
 
 LONG = "--"
 SHORT = "-"
@@ -122,338 +214,1585 @@ DELETE_LONG = LONG + DELETE
 DELETE_HELP = "Specifying this flag will cause the input files to be deleted \
     after execution."
 
+# Format
+FORMAT = "format"
+FORMAT_LONG = LONG + FORMAT
+FORMAT_HELP = "The format of the aggregated k-mer output. The input files \
+    may be in either format. The default format is '" + FORMAT_DEFAULT + "'."
+
+# Compress
+COMPRESS = "compress"
+COMPRESS_LONG = LONG + COMPRESS
+COMPRESS_HELP = "Compresses the aggregated k-mer output with gzip. This is \
+    only supported by the '" + BinaryKMers.FORMAT_TEXT + "' format. The input \
+    files may be compressed whether or not this is specified."
+
+# Partial
+PARTIAL = "partial"
+PARTIAL_LONG = LONG + PARTIAL
+PARTIAL_HELP = "Aggregated k-mer files produced by earlier aggregations of \
+    other inclusion and exclusion files. Their inclusion and exclusion counts \
+    are added to the counts of the output. This allows thousands of files to \
+    be aggregated in several levels, without opening all of them at once."
+
+# Start
+START = "start"
+START_LONG = LONG + START
+START_HELP = "The smallest k-mer of the range to aggregate. Lexicographically \
+    smaller k-mers are ignored."
+
+# End
+END = "end"
+END_LONG = LONG + END
+END_HELP = "The k-mer following the range to aggregate. This k-mer and all \
+    lexicographically larger k-mers are ignored."
+
+# Inclusion Hits
+INHITS = "inhits"
+INHITS_LONG = LONG + INHITS
+INHITS_HELP = "The minimum number of inclusion files that must contain a \
+    k-mer for signature extraction to use it as an inclusion k-mer. When both \
+    this and the exclusion hits are specified, k-mers that are neither \
+    inclusion nor exclusion k-mers are not written to the output."
+
+# Exclusion Hits
+EXHITS = "exhits"
+EXHITS_LONG = LONG + EXHITS
+EXHITS_HELP = "The minimum number of exclusion files that must contain a \
+    k-mer for signature extraction to use it as an exclusion k-mer. When both \
+    this and the inclusion hits are specified, k-mers that are neither \
+    inclusion nor exclusion k-mers are not written to the output."
+
+# Remove Inclusion
+REMOVE_INCLUSION = "remove-inclusion"
+REMOVE_INCLUSION_LONG = LONG + REMOVE_INCLUSION
+REMOVE_INCLUSION_HELP = "Inclusion k-mer files to remove from the partially \
+    aggregated files. Their k-mers are subtracted from the inclusion counts."
+
+# Remove Exclusion
+REMOVE_EXCLUSION = "remove-exclusion"
+REMOVE_EXCLUSION_LONG = LONG + REMOVE_EXCLUSION
+REMOVE_EXCLUSION_HELP = "Exclusion k-mer files to remove from the partially \
+    aggregated files. Their k-mers are subtracted from the exclusion counts."
+
+# Engine
+ENGINE = "engine"
+ENGINE_LONG = LONG + ENGINE
+ENGINE_HELP = "The k-mer aggregation engine. The '" + ENGINE_HEAP + "' \
+    engine merges the sorted k-mer files one k-mer at a time. The '" + \
+    ENGINE_NUMPY + "' engine loads the encoded k-mers of every file into \
+    memory and counts them with vectorized operations, which is considerably \
+    faster when they fit in memory. The '" + ENGINE_NUMPY + "' engine \
+    supports k-mers no larger than " + str(BinaryKMers.MAXIMUM_K) + ". The \
+    default engine is '" + ENGINE_DEFAULT + "'."
+
+# Presence
+PRESENCE = "presence"
+PRESENCE_LONG = LONG + PRESENCE
+PRESENCE_HELP = "The location to write the presence bitsets of the \
+    aggregated k-mers, which record the inclusion and exclusion files \
+    containing each k-mer (see PresenceBitsets.py). This is not supported \
+    with partially aggregated or removed files."
+
+# Statistics
+STATISTICS = "statistics"
+STATISTICS_LONG = LONG + STATISTICS
+STATISTICS_HELP = "Write the statistics of the aggregated k-mers beside the \
+    output, at the output location followed by '" + \
+    AggregateStatistics.EXTENSION + "'."
+STATISTICS_DEFAULT = False
+
 
 """
 # =============================================================================
 
-FIND SMALLEST
--------------
+READ K-MERS
+-----------
 
 
 PURPOSE
 -------
 
-Locates the lexicographically smallest element in a list of strings.
+Reads the k-mers of a k-mer file, in either the text or binary format.
 
-The function ignores empty strings and uses a sentinel value to determine if
-all the strings are empty. This sentinel value must always be
-lexicographically larger than all string values.
+The k-mers are read in large batches. Text files are read in blocks of about
+[size] bytes, and when every line of a block has as many columns as its first
+line, the k-mers of the block are taken from a single split of the block. The
+memory-mapped codes of binary files are decoded [size] bytes at a time.
 
 
 INPUT
 -----
 
-[STRING ITERABLE] [strings]
-    An iterable strings object from which to locate the smallest element.
+[FILE LOCATION] [location]
+    The location of the k-mer file.
 
-[STRING] [SENTINEL]
-    A sentinel value, which must be lexicographically larger than all
-    [strings].
+[INT >= 1 -- OPTIONAL] [size]
+    The number of bytes read at once.
+
+[STRING -- OPTIONAL] [start]
+    The smallest k-mer to read, or None to read from the first k-mer.
+
+[STRING -- OPTIONAL] [end]
+    The k-mer at which reading stops, or None to read to the last k-mer.
 
 
 RETURN
 ------
 
-[STRING] [smallest]
-    The lexicographically smallest value of all the strings or SENTINEL if all
-    strings are empty.
+[STRING ITERATOR] [kmers]
+    The k-mers of the file within [start, end), in the order they are stored.
+    The counts following the k-mers are ignored.
 
 # =============================================================================
 """
-def findSmallest(strings, SENTINEL):
+def readKMers(location, size=READ_SIZE_MAXIMUM, start=None, end=None):
+
+    if BinaryKMers.isBinary(location):
+
+        kmers = BinaryKMers.KMers(location)
+        length = max(size // BinaryKMers.CODE_TYPE.itemsize, 1)
 
-    smallest = SENTINEL     # The lexicographically smallest observed string.
+        first = 0 if start is None else \
+            searchCodes(kmers.codes, kmers.k, start)
+        last = len(kmers.codes) if end is None else \
+            searchCodes(kmers.codes, kmers.k, end)
 
-    for string in strings:
-        if string != "" and string < smallest:
-            smallest = string
+        decoded = itertools.chain.from_iterable(
+            Utility.decodeKMers(
+                kmers.codes[index:min(index + length, last)], kmers.k)
+            for index in range(first, last, length))
 
-    return smallest
+        ambiguous = [
+            record[0] for record in kmers.ambiguous
+            if (start is None or record[0] >= start) and
+            (end is None or record[0] < end)]
+
+        if not ambiguous:
+            return decoded
+
+        return heapq.merge(decoded, ambiguous)
+
+    def batches():
+
+        with Utility.openInput(location) as kmerFile:
+
+            # compressed files cannot be searched and are read from the start
+            if start is not None and not Utility.isCompressed(location):
+                seekKMer(kmerFile, start)
+
+            for block in Utility.readLineBlocks(kmerFile, size):
+
+                tokens = block.split()
+
+                stop = block.find("\n")
+                columns = len(block[:stop].split() if stop >= 0 else tokens)
+                lines = block.count("\n") + (not block.endswith("\n"))
+
+                # every line has the columns of the first line
+                if columns > 0 and len(tokens) == columns * lines:
+                    kmers = tokens[::columns]
+
+                else:
+                    kmers = [
+                        line.split()[0] for line in block.splitlines()
+                        if line.strip()]
+
+                if start is not None and kmers and kmers[0] < start:
+                    kmers = kmers[bisect.bisect_left(kmers, start):]
+
+                if end is not None and kmers and kmers[-1] >= end:
+                    yield kmers[:bisect.bisect_left(kmers, end)]
+                    return
+
+                yield kmers
+
+    return itertools.chain.from_iterable(batches())
 
 
 """
 # =============================================================================
 
-AGGREGATE KMER
---------------
+SEARCH CODES
+------------
 
 
 PURPOSE
 -------
 
-Reports the number of files that contain a specified k-mer at their current
-position and then advances these files. This function operates on a list of
-files and a corresponding list containing "pointers" to the next k-mer in the
-file.
+Locates the first encoded k-mer which is not lexicographically smaller than a
+k-mer, by binary search. The k-mer need not be encodable.
+
 
-The function observes all the k-mers in [kmers] and compares them with the
-[kmer] parameter. When there is a match, the function increases the observation
-count and advances the [files] associated with the k-mer.
+INPUT
+-----
+
+[UINT64 ARRAY] [codes]
+    The sorted k-mer codes.
+
+[1 <= INT] [k]
+    The k-mer size of the [codes].
+
+[STRING] [kmer]
+    The k-mer to locate.
+
+
+RETURN
+------
+
+[0 <= INT <= len(codes)] [index]
+    The index of the first code whose k-mer is not smaller than the [kmer].
+
+# =============================================================================
+"""
+def searchCodes(codes, k, kmer):
+
+    low = 0
+    high = len(codes)
+
+    while low < high:
 
-The [kmers] parameter corresponds to the heads of all the k-mer files. The
-files MUST be read and advanced when there is a k-mer match found in a
-corresponding [kmers] array. This is because each k-mer in each file is only
-ever observed once.
+        middle = (low + high) // 2
 
-This function assumes: len([kmers]) == len([files])
+        if Utility.decodeKMer(int(codes[middle]), k) < kmer:
+            low = middle + 1
+
+        else:
+            high = middle
+
+    return low
+
+
+"""
+# =============================================================================
+
+SEEK K-MER
+----------
+
+
+PURPOSE
+-------
+
+Positions an uncompressed text k-mer file at the first line whose k-mer is not
+lexicographically smaller than a k-mer, by binary search over the bytes of the
+file.
 
 
 INPUT
 -----
 
-[STRING] [kmer]
-    The k-mer to compare against all other k-mers in [kmers] and count when
-    observed.
-
-[STRING LIST] [kmers]
-    A list of k-mers as string objects, which should understood as "pointers"
-    to the first next k-mer in each of the [files]. When a position in [kmers]
-    is empty, then it should be understood that the corresponding k-mer file in
-    [files] is empty.
+[FILE] [kmerFile]
+    The open, seekable text k-mer file, sorted by k-mer.
 
-[FILE LIST] [files]
-    A list of open files associated with the [kmers] list. It is assumed:
-    len([kmers]) == len([files])
+[STRING] [kmer]
+    The k-mer to locate.
 
 
 RETURN
 ------
 
-[INT >= 0] [count]
-    The number of exact [kmer] matches found in the list of [kmers].
+[NONE]
 
 
 POST
 ----
 
-The positions in [kmers] and their corresponding positions in [files] will be
-modified when there is a match in [kmers] with [kmer]. The matching k-mers in
-[kmers] will be replaced with the next k-mer in their corresponding file in
-[files], which is obtained by reading one line of the file. This has the effect
-of advancing the files in [files] when there is a k-mer match.
+The [kmerFile] will be positioned at the start of the first line whose k-mer
+is not smaller than the [kmer], or at the end of the file.
 
 # =============================================================================
 """
-def aggregateKMer(kmer, kmers, files):
+def seekKMer(kmerFile, kmer):
 
-    count = 0
+    # positions the file at the first line starting at or after the position
+    def seekLine(position):
 
-    # iterate over all k-mers
-    for i in range(len(kmers)):
+        if position == 0:
+            kmerFile.seek(0)
 
-        # check for empty string
-        if kmers[i] != "" and kmers[i] == kmer:
+        else:
+            kmerFile.seek(position - 1)
+            kmerFile.readline()
 
-            count += 1
+    kmerFile.seek(0, os.SEEK_END)
 
-            # advance file
-            line = files[i].readline()
+    low = 0
+    high = kmerFile.tell()
 
-            # check for end of file and assign next k-mer
-            kmers[i] = line.split()[0] if line.split() else line
+    while low < high:
 
-    return count
+        middle = (low + high) // 2
+
+        seekLine(middle)
+        tokens = kmerFile.readline().split()
+
+        if tokens and tokens[0] < kmer:
+            low = middle + 1
+
+        else:
+            high = middle
+
+    seekLine(low)
 
 
 """
 # =============================================================================
 
-AGGREGATE
----------
+SAMPLE K-MERS
+-------------
 
 
 PURPOSE
 -------
 
-Aggregates the k-mers in the inclusion and exclusion files and produces a file
-containing the k-mers and their inclusion and exclusion counts. The input
-inclusion and exclusion files must contain only distinct and lexicographically
-sorted k-mers.
+Samples k-mers evenly spaced throughout a sorted k-mer file, without reading
+the whole file. Only binary files and uncompressed text files are sampled,
+since compressed files cannot be searched.
 
 
 INPUT
 -----
 
-[FILE LIST] [inclusionLocations]
-    The list of openable inclusion k-mer files locations.
+[FILE LOCATION] [location]
+    The location of the k-mer file.
 
-[FILE LIST] [exclusionLocations]
-    The list of openable exclusion k-mer files locations.
+[1 <= INT] [size]
+    The number of k-mers to sample.
 
-[FILE] [outputLocation]
-    The file location to write the aggregated k-mers.
 
-[BOOL] [delete]
-    Whether or not to delete the [inclusionLocations] and [exclusionLocations]
-    after aggregation is complete.
+RETURN
+------
 
+[STRING LIST] [sample]
+    The sampled k-mers, in sorted order. The sample is empty when the file is
+    compressed.
 
-NOTE: The input files must contain only distinct and lexicographically sorted
-k-mers. These k-mers must appear first on every line and be preceded by no
-spaces or special characters. Any characters following the k-mers, including
-k-mer counts, will be ignored.
+# =============================================================================
+"""
+def sampleKMers(location, size):
 
+    if BinaryKMers.isBinary(location):
 
-POST
-----
+        kmers = BinaryKMers.KMers(location)
+        records = len(kmers.codes)
+        size = min(size, records)
+
+        if size == 0:
+            return []
+
+        indices = [(i * records) // size for i in range(size)]
+
+        return Utility.decodeKMers(kmers.codes[indices], kmers.k)
+
+    if Utility.isCompressed(location):
+        return []
+
+    sample = []
+
+    with open(location, "r") as kmerFile:
+
+        length = os.path.getsize(location)
+
+        for i in range(size):
+
+            position = (i * length) // size
+
+            # the first line starting at or after the position
+            if position > 0:
+                kmerFile.seek(position - 1)
+                kmerFile.readline()
+
+            tokens = kmerFile.readline().split()
+
+            if tokens and (not sample or sample[-1] != tokens[0]):
+                sample.append(tokens[0])
+
+    return sample
 
-The k-mers and their aggregate counts value will be written to a file at the
-[outputLocation].
 
-# =============================================================================
 """
-def aggregate(inclusionLocations, exclusionLocations, outputLocation, delete):
+# =============================================================================
 
-    SENTINEL = "~"              # sentinel value
+READ PARTIAL
+------------
 
-    inclusionKMers = []         # current k-mer of inclusion files
-    exclusionKMers = []         # current k-mer of exclusion files
 
-    # open files
-    inclusionFiles = []
-    exclusionFiles = []
+PURPOSE
+-------
+
+Reads the records of a partially aggregated k-mer file, in either the text or
+binary format. Text files are read in blocks of about [size] bytes.
 
-    # open inclusion files
-    for location in inclusionLocations:
 
-        if not os.path.isfile(location):
-            raise RuntimeError(
-                "ERROR: Could not open inclusion file: " +
-                str(location) + "\n")
+INPUT
+-----
 
-        inclusionFiles.append(open(location, 'r'))
+[FILE LOCATION] [location]
+    The location of the aggregated k-mer file.
 
-    # open exclusion files
-    for location in exclusionLocations:
+[INT >= 1 -- OPTIONAL] [size]
+    The number of bytes read at once.
 
-        if not os.path.isfile(location):
-            raise RuntimeError(
-                "ERROR: Could not open exclusion file: " +
-                str(location) + "\n")
+[STRING -- OPTIONAL] [start]
+    The smallest k-mer to read, or None to read from the first k-mer.
 
-        exclusionFiles.append(open(location, 'r'))
+[STRING -- OPTIONAL] [end]
+    The k-mer at which reading stops, or None to read to the last k-mer.
 
-    outputFile = open(outputLocation, 'w')
 
-    # initialize k-mers:
-    for inclusionFile in inclusionFiles:
+RETURN
+------
 
-        line = inclusionFile.readline()
+[(STRING, INT, INT) ITERATOR] [records]
+    The (kmer, inclusion count, exclusion count) records of the file within
+    [start, end), in the order they are stored.
 
-        # check for end of file and assign next k-mer
-        kmer = line.split()[0] if line.split() else line
-        inclusionKMers.append(kmer)
+RuntimeError if a text record does not have three columns.
 
-    for exclusionFile in exclusionFiles:
+# =============================================================================
+"""
+def readPartial(location, size=READ_SIZE_MAXIMUM, start=None, end=None):
 
-        line = exclusionFile.readline()
+    records = readAggregated(location, size)
 
-        # check for end of file and assign next k-mer
-        kmer = line.split()[0] if line.split() else line
-        exclusionKMers.append(kmer)
+    # partial files are usually produced from the same range, and so are not
+    # searched for its start
+    if start is not None:
+        records = itertools.dropwhile(
+            lambda record: record[0] < start, records)
 
-    # aggregate values:
-    while(1):
+    if end is not None:
+        records = itertools.takewhile(lambda record: record[0] < end, records)
 
-        kmer = findSmallest((inclusionKMers + exclusionKMers), SENTINEL)
+    return records
 
-        # inclusion aggregation:
-        incounts = aggregateKMer(kmer, inclusionKMers, inclusionFiles)
 
-        # exclusion aggregation:
-        excounts = aggregateKMer(kmer, exclusionKMers, exclusionFiles)
+"""
+# =============================================================================
 
-        # are all files at end of the file?
-        if kmer == SENTINEL:
-            break
+READ AGGREGATED
+---------------
 
-        # write aggregated k-mer to output
-        outputString = str(kmer) + " " + str(incounts) + " " + str(excounts)
-        outputFile.write(outputString + "\n")
 
-    # close files
-    for inclusion in inclusionFiles:
+PURPOSE
+-------
 
-        inclusion.close()
+Reads all the records of an aggregated k-mer file, in either the text or binary
+format. Text files are read in blocks of about [size] bytes.
 
-    for exclusion in exclusionFiles:
 
-        exclusion.close()
+INPUT
+-----
 
-    outputFile.close()
+[FILE LOCATION] [location]
+    The location of the aggregated k-mer file.
 
-    # delete input files
-    if delete:
+[INT >= 1] [size]
+    The number of bytes read at once.
 
-        for filename in inclusionLocations + exclusionLocations:
 
-            if os.path.exists(filename):
-                    os.remove(filename)
+RETURN
+------
+
+[(STRING, INT, INT) ITERATOR] [records]
+    The (kmer, inclusion count, exclusion count) records of the file, in the
+    order they are stored.
+
+RuntimeError if a text record does not have three columns.
+
+# =============================================================================
+"""
+def readAggregated(location, size):
+
+    if BinaryKMers.isBinary(location):
+        return BinaryKMers.readRecords(location)
+
+    def batches():
+
+        with Utility.openInput(location) as aggregateFile:
+
+            for block in Utility.readLineBlocks(aggregateFile, size):
+
+                tokens = block.split()
+
+                lines = block.count("\n") + (not block.endswith("\n"))
+
+                if len(tokens) != 3 * lines:
+                    raise RuntimeError(
+                        "ERROR: Malformed aggregated k-mer file: " +
+                        str(location))
+
+                yield itertools.izip(
+                    tokens[0::3],
+                    [int(token) for token in tokens[1::3]],
+                    [int(token) for token in tokens[2::3]])
+
+    return itertools.chain.from_iterable(batches())
 
 
 """
 # =============================================================================
 
-PARSE
+AGGREGATE RECORDS
+-----------------
+
+
+PURPOSE
+-------
+
+Produces the aggregated k-mers of the inclusion and exclusion k-mer files,
+along with the number of inclusion and exclusion files containing each k-mer.
+
+The heads of the files are kept in a heap of (k-mer, file index) pairs, so
+that producing each k-mer costs time logarithmic in the number of files, rather
+than linear. Every file containing the smallest k-mer is advanced exactly once
+per produced k-mer.
+
+
+INPUT
+-----
+
+[(STRING ITERATOR) LIST] [inclusionFiles]
+    The k-mer iterators of the inclusion files.
+
+[(STRING ITERATOR) LIST] [exclusionFiles]
+    The k-mer iterators of the exclusion files.
+
+[((STRING, INT, INT) ITERATOR) LIST -- OPTIONAL] [partialFiles]
+    The record iterators of partially aggregated files, as produced by
+    readPartial(...). Their counts are added to the counts of each k-mer.
+
+[(STRING ITERATOR) LIST -- OPTIONAL] [removedInclusionFiles]
+    The k-mer iterators of inclusion files removed from the [partialFiles].
+
+[(STRING ITERATOR) LIST -- OPTIONAL] [removedExclusionFiles]
+    The k-mer iterators of exclusion files removed from the [partialFiles].
+
+
+RETURN
+------
+
+[(STRING, INT, INT) ITERATOR] [records]
+    The (kmer, inclusion count, exclusion count) records, in lexicographically
+    sorted order. The k-mers whose counts are both zero, after the removed
+    files are subtracted, are not produced.
 
 # =============================================================================
 """
-def parse(parameters):
+def aggregateRecords(
+        inclusionFiles, exclusionFiles, partialFiles=[],
+        removedInclusionFiles=[], removedExclusionFiles=[]):
 
-    inclusionLocations = parameters[INCLUSION]
-    exclusionLocations = parameters[EXCLUSION]
-    outputLocation = parameters[OUTPUT]
+    files = inclusionFiles + exclusionFiles + partialFiles + \
+        removedInclusionFiles + removedExclusionFiles
+    inclusions = len(inclusionFiles)
+    partials = inclusions + len(exclusionFiles)
+    removals = partials + len(partialFiles)
+    exclusionRemovals = removals + len(removedInclusionFiles)
 
-    delete = parameters[DELETE] \
-        if parameters[DELETE] else DELETE_DEFAULT
+    counts = [None] * len(files)    # the counts of the partial files
 
-    # aggregate
-    aggregate(inclusionLocations, exclusionLocations, outputLocation, delete)
+    # initialize k-mers:
+    heap = []
+
+    for index, kmers in enumerate(files):
+
+        kmer = next(kmers, "")
+
+        if partials <= index < removals and kmer != "":
+            kmer, counts[index] = kmer[0], kmer[1:]
+
+        if kmer != "":
+            heap.append((kmer, index))
+
+    heapq.heapify(heap)
+
+    # aggregate values:
+    while heap:
+
+        kmer, index = heapq.heappop(heap)
+        indices = [index]
+
+        # all files at the same k-mer
+        while heap and heap[0][0] == kmer:
+            indices.append(heapq.heappop(heap)[1])
+
+        incounts = 0
+        excounts = 0
+
+        for index in indices:
+
+            if index < inclusions:
+                incounts += 1
+
+            elif index < partials:
+                excounts += 1
+
+            elif index < removals:
+                incounts += counts[index][0]
+                excounts += counts[index][1]
+
+            elif index < exclusionRemovals:
+                incounts -= 1
+
+            else:
+                excounts -= 1
+
+            # advance file, dropping it at the end of the file
+            following = next(files[index], "")
+
+            if partials <= index < removals and following != "":
+                following, counts[index] = following[0], following[1:]
+
+            if following != "":
+                heapq.heappush(heap, (following, index))
+
+        # k-mers of removed files only
+        if incounts == 0 and excounts == 0:
+            continue
+
+        yield kmer, incounts, excounts
 
 
 """
 # =============================================================================
 
-MAIN
+PRUNE RECORDS
+-------------
+
+
+PURPOSE
+-------
+
+Removes the aggregated records which cannot affect signature extraction.
+Extraction only uses the k-mers observed in at least [inhits] inclusion files
+or at least [exhits] exclusion files, and every other k-mer is removed. When
+either threshold is None, any k-mer may be used, and no records are removed.
+
+
+INPUT
+-----
+
+[(STRING, INT, INT) ITERATOR] [records]
+    The (kmer, inclusion count, exclusion count) records.
+
+[INT >= 0 -- OPTIONAL] [inhits]
+    The minimum inclusion count of the inclusion k-mers used by extraction.
+
+[INT >= 0 -- OPTIONAL] [exhits]
+    The minimum exclusion count of the exclusion k-mers used by extraction.
+
+
+RETURN
+------
+
+[(STRING, INT, INT) ITERATOR] [records]
+    The records which may be used by extraction, in their original order.
 
 # =============================================================================
 """
-def main():
+def pruneRecords(records, inhits=None, exhits=None):
 
-    parser = argparse.ArgumentParser(description=PROGRAM_DESCRIPTION)
+    if inhits is None or exhits is None:
+        return records
 
-    # REQUIRED #
+    return (
+        record for record in records
+        if record[1] >= inhits or record[2] >= exhits)
 
-    parser.add_argument(
-        INCLUSION_SHORT,
-        INCLUSION_LONG,
-        dest=INCLUSION,
-        help=INCLUSION_HELP,
-        type=str, required=True, nargs='+')
 
-    parser.add_argument(
-        EXCLUSION_SHORT,
-        EXCLUSION_LONG,
-        dest=EXCLUSION,
-        help=EXCLUSION_HELP,
-        type=str, required=True, nargs='+')
+"""
+# =============================================================================
 
-    parser.add_argument(
-        OUTPUT_SHORT,
-        OUTPUT_LONG,
-        dest=OUTPUT,
-        help=OUTPUT_HELP,
-        type=str, required=True)
+FIND K
+------
 
-    # OPTIONAL #
 
-    parser.add_argument(
-        DELETE_LONG,
-        dest=DELETE,
-        help=DELETE_HELP,
-        action='store_true')
+PURPOSE
+-------
+
+Determines the k-mer size of a collection of k-mer files from the first file
+containing k-mers. Only the header of binary files and the first line of text
+files are read.
+
+
+INPUT
+-----
+
+[(FILE LOCATION) LIST] [locations]
+    The locations of the k-mer files, in either format.
+
+
+RETURN
+------
+
+[1 <= INT] [k]
+    The k-mer size of the files, or None when every file is empty.
+
+# =============================================================================
+"""
+def findK(locations):
+
+    for location in locations:
+
+        if BinaryKMers.isBinary(location):
+
+            with open(location, 'rb') as inputFile:
+                k = BinaryKMers.readHeader(inputFile)[2]
+
+        else:
+
+            with Utility.openInput(location) as inputFile:
+                tokens = next(
+                    (line.split() for line in inputFile if line.strip()), [])
+
+            k = len(tokens[0]) if tokens else 0
+
+        if k > 0:
+            return k
+
+    return None
+
+
+"""
+# =============================================================================
+
+LOAD ARRAYS
+-----------
+
+
+PURPOSE
+-------
+
+Loads the encoded k-mers of a k-mer file, or of a partially aggregated k-mer
+file, into memory. The codes of binary files are copied from the file within
+the range, which is located by binary search. The k-mers of text files are
+read and encoded in batches.
+
+
+INPUT
+-----
+
+[FILE LOCATION] [location]
+    The location of the k-mer file, in either format.
+
+[1 <= INT <= BinaryKMers.MAXIMUM_K] [k]
+    The k-mer size of the file.
+
+[INT] [columns]
+    The number of counts to load: 0 for a k-mer file and 2 for a partially
+    aggregated k-mer file.
+
+[INT >= 1 -- OPTIONAL] [size]
+    The number of bytes read at once from text files.
+
+[STRING -- OPTIONAL] [start]
+    The smallest k-mer to load, or None to load from the first k-mer.
+
+[STRING -- OPTIONAL] [end]
+    The k-mer at which loading stops, or None to load to the last k-mer.
+
+
+RETURN
+------
+
+[(UINT64 ARRAY, (INT64 ARRAY) LIST, LIST)] [(codes, counts, ambiguous)]
+    The sorted codes of the encodable k-mers within [start, end), the
+    [columns] count arrays of the codes, and the k-mers which cannot be
+    encoded. The ambiguous k-mers are strings when [columns] is 0, and
+    (kmer, inclusion count, exclusion count) records otherwise.
+
+RuntimeError if the k-mer size of a binary file is not [k].
+
+# =============================================================================
+"""
+def loadArrays(location, k, columns, size=READ_SIZE_MAXIMUM, start=None,
+               end=None):
+
+    if BinaryKMers.isBinary(location):
+
+        kmers = BinaryKMers.KMers(location)
+
+        if len(kmers.codes) > 0 and kmers.k != k:
+            raise RuntimeError(
+                "ERROR: The k-mer size of the file does not match the other " +
+                "files: " + str(location))
+
+        first = 0 if start is None else \
+            searchCodes(kmers.codes, kmers.k, start)
+        last = len(kmers.codes) if end is None else \
+            searchCodes(kmers.codes, kmers.k, end)
+
+        codes = numpy.array(kmers.codes[first:last], dtype=numpy.uint64)
+        counts = [
+            numpy.array(column[first:last], dtype=numpy.int64)
+            for column in kmers.counts[:columns]]
+
+        ambiguous = [
+            record[:columns + 1] if columns else record[0]
+            for record in kmers.ambiguous
+            if (start is None or record[0] >= start) and
+            (end is None or record[0] < end)]
+
+        return codes, counts, ambiguous
+
+    records = readPartial(location, size, start, end) if columns \
+        else readKMers(location, size, start, end)
+
+    codes = [numpy.empty(0, dtype=numpy.uint64)]
+    counts = [[numpy.empty(0, dtype=numpy.int64)] for i in range(columns)]
+    ambiguous = []
+
+    while True:
+
+        batch = list(itertools.islice(records, BinaryKMers.BATCH_SIZE))
+
+        if not batch:
+            break
+
+        kmers = [record[0] for record in batch] if columns else batch
+        batchCodes, valid = Utility.encodeKMers(kmers, k)
+
+        codes.append(batchCodes[valid])
+
+        for i in range(columns):
+            counts[i].append(numpy.array(
+                [record[i + 1] for record in batch],
+                dtype=numpy.int64)[valid])
+
+        ambiguous.extend(batch[i] for i in numpy.flatnonzero(~valid))
+
+    return numpy.concatenate(codes), \
+        [numpy.concatenate(column) for column in counts], ambiguous
+
+
+"""
+# =============================================================================
+
+AGGREGATE ARRAYS
+----------------
+
+
+PURPOSE
+-------
+
+Aggregates the k-mers of the inclusion, exclusion, partial, and removed files
+with vectorized operations, as the NumPy engine counterpart of
+aggregateRecords(...). The encoded k-mers of every file are loaded into memory
+and their union is found by sorting them together. Each file then adds its
+counts to the union at the positions of its codes, located by binary search.
+Since the codes of a file are distinct, no position is incremented twice by
+the same file.
+
+The few k-mers which cannot be encoded are aggregated by aggregateRecords(...).
+
+
+INPUT
+-----
+
+[(FILE LOCATION) LIST] [inclusionLocations]
+    The locations of the inclusion k-mer files.
+
+[(FILE LOCATION) LIST] [exclusionLocations]
+    The locations of the exclusion k-mer files.
+
+[(FILE LOCATION) LIST] [partialLocations]
+    The locations of the partially aggregated k-mer files.
+
+[(FILE LOCATION) LIST] [removedInclusionLocations]
+    The locations of the inclusion k-mer files removed from the
+    [partialLocations].
+
+[(FILE LOCATION) LIST] [removedExclusionLocations]
+    The locations of the exclusion k-mer files removed from the
+    [partialLocations].
+
+[1 <= INT <= BinaryKMers.MAXIMUM_K] [k]
+    The k-mer size of the files.
+
+[INT >= 1 -- OPTIONAL] [size]
+    The number of bytes read at once from text files.
+
+[STRING -- OPTIONAL] [start]
+    The smallest k-mer to aggregate, or None to aggregate from the first k-mer.
+
+[STRING -- OPTIONAL] [end]
+    The k-mer at which aggregation stops, or None to aggregate to the last
+    k-mer.
+
+[INT >= 0 -- OPTIONAL] [inhits]
+    The minimum inclusion count of the k-mers used by extraction, as in
+    pruneRecords(...).
+
+[INT >= 0 -- OPTIONAL] [exhits]
+    The minimum exclusion count of the k-mers used by extraction, as in
+    pruneRecords(...).
+
+[BOOL -- OPTIONAL] [presence]
+    Whether to record which inclusion and exclusion files contain each k-mer.
+
+
+RETURN
+------
+
+[(UINT64 ARRAY, INT64 ARRAY, INT64 ARRAY, (STRING, INT, INT) ITERATOR,
+    (UINT64 ARRAY, UINT8 ARRAY, UINT8 ARRAY))]
+[(codes, incounts, excounts, ambiguous, bitsets)]
+    The sorted codes of the aggregated k-mers, their inclusion and exclusion
+    counts, and the aggregated records of the k-mers which cannot be encoded.
+    As with aggregateRecords(...), the k-mers whose counts are both zero are
+    not produced, and neither are the k-mers removed by pruneRecords(...).
+
+    When [presence] is True, the [bitsets] are the sorted codes of every
+    aggregated k-mer, including those removed by pruneRecords(...), and their
+    inclusion and exclusion presence bitsets, with one row of packed bits per
+    code and one bit per file, as described in PresenceBitsets.py. Otherwise,
+    the [bitsets] are None.
+
+# =============================================================================
+"""
+def aggregateArrays(
+        inclusionLocations, exclusionLocations, partialLocations,
+        removedInclusionLocations, removedExclusionLocations, k,
+        size=READ_SIZE_MAXIMUM, start=None, end=None, inhits=None,
+        exhits=None, presence=False):
+
+    # the (locations, columns, inclusion weight, exclusion weight) of the files
+    groups = [
+        (inclusionLocations, 0, 1, 0),
+        (exclusionLocations, 0, 0, 1),
+        (partialLocations, 2, None, None),
+        (removedInclusionLocations, 0, -1, 0),
+        (removedExclusionLocations, 0, 0, -1)]
+
+    loaded = [
+        [loadArrays(location, k, columns, size, start, end)
+            for location in locations]
+        for locations, columns, inweight, exweight in groups]
+
+    # the union of all the k-mers
+    codes = numpy.unique(numpy.concatenate(
+        [numpy.empty(0, dtype=numpy.uint64)] +
+        [arrays[0] for files in loaded for arrays in files]))
+
+    incounts = numpy.zeros(len(codes), dtype=numpy.int64)
+    excounts = numpy.zeros(len(codes), dtype=numpy.int64)
+
+    # the presence bitsets of the inclusion and exclusion files
+    bitsets = [
+        numpy.zeros(
+            (len(codes), PresenceBitsets.getWidth(len(locations))),
+            dtype=numpy.uint8)
+        for locations, columns, inweight, exweight in groups[:2]] \
+        if presence else None
+
+    for group, ((locations, columns, inweight, exweight), files) in \
+            enumerate(itertools.izip(groups, loaded)):
+
+        for index, (fileCodes, counts, ambiguous) in enumerate(files):
+
+            indices = numpy.searchsorted(codes, fileCodes)
+
+            if presence and group < 2:
+                bitsets[group][indices, index // 8] |= \
+                    numpy.uint8(0x80 >> (index % 8))
+
+            if columns:
+                incounts[indices] += counts[0]
+                excounts[indices] += counts[1]
+
+            elif inweight:
+                incounts[indices] += inweight
+
+            else:
+                excounts[indices] += exweight
+
+    # k-mers of removed files only
+    kept = (incounts != 0) | (excounts != 0)
+
+    # every k-mer is recorded, so that the genomes of any signature are found
+    if presence:
+        bitsets = (codes[kept], bitsets[0][kept], bitsets[1][kept])
+
+    if inhits is not None and exhits is not None:
+        kept &= (incounts >= inhits) | (excounts >= exhits)
+
+    ambiguous = pruneRecords(
+        aggregateRecords(*[
+            [iter(arrays[2]) for arrays in files] for files in loaded]),
+        inhits, exhits)
+
+    return codes[kept], incounts[kept], excounts[kept], ambiguous, bitsets
+
+
+"""
+# =============================================================================
+
+WRITE RECORDS
+-------------
+
+
+PURPOSE
+-------
+
+Writes aggregated k-mer records to a file.
+
+
+INPUT
+-----
+
+[(STRING, INT, INT) ITERATOR] [records]
+    The (kmer, inclusion count, exclusion count) records, in sorted order.
+
+[FILE LOCATION] [outputLocation]
+    The location to write the aggregated k-mers.
+
+[STRING] [outputFormat]
+    The format of the output; one of BinaryKMers.FORMATS.
+
+[BOOL] [compress]
+    Whether to compress the output with gzip. This requires the text
+    [outputFormat].
+
+
+RETURN
+------
+
+[NONE]
+
+# =============================================================================
+"""
+def writeRecords(records, outputLocation, outputFormat, compress):
+
+    if outputFormat == BinaryKMers.FORMAT_BINARY:
+        BinaryKMers.write(records, outputLocation, 2)
+        return
+
+    outputFile = Utility.openOutput(outputLocation, compress)
+
+    while True:
+
+        batch = list(itertools.islice(records, WRITE_BATCH_SIZE))
+
+        if not batch:
+            break
+
+        outputFile.write("".join(
+            [kmer + " " + str(incounts) + " " + str(excounts) + "\n"
+                for kmer, incounts, excounts in batch]))
+
+    outputFile.close()
+
+
+"""
+# =============================================================================
+
+WRITE ARRAYS
+------------
+
+
+PURPOSE
+-------
+
+Writes the k-mers aggregated by the NumPy engine to a file. The codes are
+written to binary files directly, without being decoded, and are decoded in
+batches for text files.
+
+
+INPUT
+-----
+
+[UINT64 ARRAY] [codes]
+    The sorted codes of the aggregated k-mers.
+
+[INT64 ARRAY] [incounts]
+    The inclusion counts of the [codes].
+
+[INT64 ARRAY] [excounts]
+    The exclusion counts of the [codes].
+
+[(STRING, INT, INT) ITERATOR] [ambiguous]
+    The sorted records of the aggregated k-mers which cannot be encoded.
+
+[1 <= INT <= BinaryKMers.MAXIMUM_K] [k]
+    The k-mer size, or None when there are no k-mers.
+
+[FILE LOCATION] [outputLocation]
+    The location to write the aggregated k-mers.
+
+[STRING] [outputFormat]
+    The format of the output; one of BinaryKMers.FORMATS.
+
+[BOOL] [compress]
+    Whether to compress the output with gzip.
+
+
+RETURN
+------
+
+[NONE]
+
+# =============================================================================
+"""
+def writeArrays(
+        codes, incounts, excounts, ambiguous, k, outputLocation, outputFormat,
+        compress):
+
+    batches = range(0, len(codes), BinaryKMers.BATCH_SIZE)
+
+    if outputFormat == BinaryKMers.FORMAT_BINARY:
+
+        writer = BinaryKMers.Writer(outputLocation, k if k else 0, 2)
+
+        for index in batches:
+
+            end = index + BinaryKMers.BATCH_SIZE
+            writer.write(
+                codes[index:end], [incounts[index:end], excounts[index:end]])
+
+        for record in ambiguous:
+            writer.writeAmbiguous(record[0], record[1:])
+
+        writer.close()
+        return
+
+    size = BinaryKMers.BATCH_SIZE
+
+    decoded = itertools.chain.from_iterable(
+        itertools.izip(
+            Utility.decodeKMers(codes[index:index + size], k),
+            incounts[index:index + size].tolist(),
+            excounts[index:index + size].tolist())
+        for index in batches)
+
+    writeRecords(
+        heapq.merge(decoded, ambiguous), outputLocation, outputFormat,
+        compress)
+
+
+"""
+# =============================================================================
+
+AGGREGATE
+---------
+
+
+PURPOSE
+-------
+
+Aggregates the k-mers in the inclusion and exclusion files and produces a file
+containing the k-mers and their inclusion and exclusion counts. The input
+inclusion and exclusion files must contain only distinct and lexicographically
+sorted k-mers.
+
+
+INPUT
+-----
+
+[FILE LIST] [inclusionLocations]
+    The list of openable inclusion k-mer files locations.
+
+[FILE LIST] [exclusionLocations]
+    The list of openable exclusion k-mer files locations.
+
+[FILE] [outputLocation]
+    The file location to write the aggregated k-mers.
+
+[BOOL] [delete]
+    Whether or not to delete the [inclusionLocations] and [exclusionLocations]
+    after aggregation is complete.
+
+[STRING -- OPTIONAL] [outputFormat]
+    The format of the output; one of BinaryKMers.FORMATS.
+
+[BOOL -- OPTIONAL] [compress]
+    Whether to compress the output with gzip. This requires the text
+    [outputFormat].
+
+[FILE LIST -- OPTIONAL] [partialLocations]
+    The list of openable partially aggregated k-mer file locations. These are
+    the outputs of earlier aggregations, and their inclusion and exclusion
+    counts are added to the output counts. They are deleted with the other
+    input files.
+
+[STRING -- OPTIONAL] [start]
+    The smallest k-mer to aggregate, or None to aggregate from the first k-mer.
+
+[STRING -- OPTIONAL] [end]
+    The k-mer at which aggregation stops, or None to aggregate to the last
+    k-mer.
+
+[INT >= 0 -- OPTIONAL] [inhits]
+    The minimum inclusion count of the k-mers used by extraction, or None to
+    write every k-mer. The k-mers are only pruned when [exhits] is also given.
+
+[INT >= 0 -- OPTIONAL] [exhits]
+    The minimum exclusion count of the k-mers used by extraction, or None to
+    write every k-mer. The k-mers are only pruned when [inhits] is also given.
+
+[FILE LIST -- OPTIONAL] [removedInclusionLocations]
+    The list of openable inclusion k-mer file locations to remove from the
+    [partialLocations]. Their k-mers are subtracted from the inclusion counts.
+    They are deleted with the other input files.
+
+[FILE LIST -- OPTIONAL] [removedExclusionLocations]
+    The list of openable exclusion k-mer file locations to remove from the
+    [partialLocations]. Their k-mers are subtracted from the exclusion counts.
+    They are deleted with the other input files.
+
+[STRING -- OPTIONAL] [engine]
+    The aggregation engine; one of ENGINES. The NumPy engine falls back to the
+    heap engine when the k-mers are larger than BinaryKMers.MAXIMUM_K.
+
+[FILE LOCATION -- OPTIONAL] [presenceLocation]
+    The location to write the presence bitsets of the aggregated k-mers, which
+    record the inclusion and exclusion files containing each k-mer, or None.
+    The bitsets are computed by the NumPy engine, whichever [engine] is given,
+    and require the inclusion and exclusion files alone: the files of a
+    partial aggregation are not known. Every aggregated k-mer is recorded,
+    including those not written because of [inhits] and [exhits].
+
+[BOOL -- OPTIONAL] [statistics]
+    Whether to write the statistics of the written k-mers beside the output,
+    at AggregateStatistics.locate([outputLocation]).
+
+
+NOTE: The input files must contain only distinct and lexicographically sorted
+k-mers. These k-mers must appear first on every line and be preceded by no
+spaces or special characters. Any characters following the k-mers, including
+k-mer counts, will be ignored.
+
+
+POST
+----
+
+The k-mers and their aggregate counts value will be written to a file at the
+[outputLocation]. Only the k-mers within [start, end) will be written, and
+only those which may be used by extraction when [inhits] and [exhits] are
+given.
+
+# =============================================================================
+"""
+def aggregate(
+        inclusionLocations, exclusionLocations, outputLocation, delete,
+        outputFormat=FORMAT_DEFAULT, compress=COMPRESS_DEFAULT,
+        partialLocations=[], start=None, end=None, inhits=None, exhits=None,
+        removedInclusionLocations=[], removedExclusionLocations=[],
+        engine=ENGINE_DEFAULT, presenceLocation=None,
+        statistics=STATISTICS_DEFAULT):
+
+    if outputFormat not in BinaryKMers.FORMATS:
+        raise RuntimeError(
+            "ERROR: Unknown k-mer file format: " + str(outputFormat))
+
+    if compress and outputFormat == BinaryKMers.FORMAT_BINARY:
+        raise RuntimeError(
+            "ERROR: Compression is only supported by the text format.")
+
+    if engine not in ENGINES:
+        raise RuntimeError(
+            "ERROR: Unknown aggregation engine: " + str(engine))
+
+    if presenceLocation and (
+            partialLocations or removedInclusionLocations or
+            removedExclusionLocations):
+        raise RuntimeError(
+            "ERROR: Presence bitsets cannot be computed from partial " +
+            "aggregations.")
+
+    # check inclusion files
+    for location in inclusionLocations:
+
+        if not os.path.isfile(location):
+            raise RuntimeError(
+                "ERROR: Could not open inclusion file: " +
+                str(location) + "\n")
+
+    # check exclusion files
+    for location in exclusionLocations:
+
+        if not os.path.isfile(location):
+            raise RuntimeError(
+                "ERROR: Could not open exclusion file: " +
+                str(location) + "\n")
+
+    # check partial files
+    for location in partialLocations:
+
+        if not os.path.isfile(location):
+            raise RuntimeError(
+                "ERROR: Could not open partial file: " +
+                str(location) + "\n")
+
+    # check removed files
+    for location in removedInclusionLocations + removedExclusionLocations:
+
+        if not os.path.isfile(location):
+            raise RuntimeError(
+                "ERROR: Could not open removed file: " +
+                str(location) + "\n")
+
+    locations = inclusionLocations + exclusionLocations + partialLocations + \
+        removedInclusionLocations + removedExclusionLocations
+
+    histogram = {}
+
+    # share the read buffer among the files
+    size = READ_BUFFER_SIZE // max(len(locations), 1)
+    size = min(max(size, READ_SIZE_MINIMUM), READ_SIZE_MAXIMUM)
+
+    k = findK(locations) \
+        if engine == ENGINE_NUMPY or presenceLocation else None
+
+    if presenceLocation and k is not None and k > BinaryKMers.MAXIMUM_K:
+        raise RuntimeError(
+            "ERROR: Presence bitsets support k-mers no larger than " +
+            str(BinaryKMers.MAXIMUM_K) + ".")
+
+    # NumPy engine
+    if (engine == ENGINE_NUMPY or presenceLocation) and \
+            (k is None or k <= BinaryKMers.MAXIMUM_K):
+
+        codes, incounts, excounts, ambiguous, bitsets = aggregateArrays(
+            inclusionLocations, exclusionLocations, partialLocations,
+            removedInclusionLocations, removedExclusionLocations, k, size,
+            start, end, inhits, exhits, bool(presenceLocation))
+
+        if statistics:
+            AggregateStatistics.tallyArrays(incounts, excounts, histogram)
+            ambiguous = AggregateStatistics.tallyRecords(ambiguous, histogram)
+
+        writeArrays(
+            codes, incounts, excounts, ambiguous, k, outputLocation,
+            outputFormat, compress)
+
+        if presenceLocation:
+            PresenceBitsets.write(
+                presenceLocation, k if k else 0, [bitsets[0]], [bitsets[1]],
+                [bitsets[2]], inclusionLocations, exclusionLocations)
+
+    # heap engine
+    else:
+
+        inclusionFiles = [
+            readKMers(location, size, start, end)
+            for location in inclusionLocations]
+        exclusionFiles = [
+            readKMers(location, size, start, end)
+            for location in exclusionLocations]
+        partialFiles = [
+            readPartial(location, size, start, end)
+            for location in partialLocations]
+        removedInclusionFiles = [
+            readKMers(location, size, start, end)
+            for location in removedInclusionLocations]
+        removedExclusionFiles = [
+            readKMers(location, size, start, end)
+            for location in removedExclusionLocations]
+
+        records = pruneRecords(
+            aggregateRecords(
+                inclusionFiles, exclusionFiles, partialFiles,
+                removedInclusionFiles, removedExclusionFiles),
+            inhits, exhits)
+
+        if statistics:
+            records = AggregateStatistics.tallyRecords(records, histogram)
+
+        writeRecords(records, outputLocation, outputFormat, compress)
+
+    if statistics:
+        AggregateStatistics.writeFileStatistics(outputLocation, histogram)
+
+    # delete input files
+    if delete:
+
+        for filename in locations:
+
+            if os.path.exists(filename):
+                    os.remove(filename)
+
+
+"""
+# =============================================================================
+
+PARSE
+
+# =============================================================================
+"""
+def parse(parameters):
+
+    inclusionLocations = parameters[INCLUSION] \
+        if parameters.get(INCLUSION) else []
+
+    exclusionLocations = parameters[EXCLUSION] \
+        if parameters.get(EXCLUSION) else []
+
+    outputLocation = parameters[OUTPUT]
+
+    delete = parameters[DELETE] \
+        if parameters[DELETE] else DELETE_DEFAULT
+
+    outputFormat = parameters.get(FORMAT) \
+        if parameters.get(FORMAT) else FORMAT_DEFAULT
+
+    compress = parameters.get(COMPRESS) \
+        if parameters.get(COMPRESS) else COMPRESS_DEFAULT
+
+    partialLocations = parameters[PARTIAL] \
+        if parameters.get(PARTIAL) else []
+
+    start = parameters.get(START)
+    end = parameters.get(END)
+
+    inhits = parameters.get(INHITS)
+    exhits = parameters.get(EXHITS)
+
+    removedInclusionLocations = parameters[REMOVE_INCLUSION] \
+        if parameters.get(REMOVE_INCLUSION) else []
+
+    removedExclusionLocations = parameters[REMOVE_EXCLUSION] \
+        if parameters.get(REMOVE_EXCLUSION) else []
+
+    engine = parameters.get(ENGINE) \
+        if parameters.get(ENGINE) else ENGINE_DEFAULT
+
+    presenceLocation = parameters.get(PRESENCE)
+
+    statistics = parameters.get(STATISTICS) \
+        if parameters.get(STATISTICS) else STATISTICS_DEFAULT
+
+    # aggregate
+    aggregate(
+        inclusionLocations, exclusionLocations, outputLocation, delete,
+        outputFormat, compress, partialLocations, start, end, inhits, exhits,
+        removedInclusionLocations, removedExclusionLocations, engine,
+        presenceLocation, statistics)
+
+
+"""
+# =============================================================================
+
+MAIN
+
+# =============================================================================
+"""
+def main():
+
+    parser = argparse.ArgumentParser(description=PROGRAM_DESCRIPTION)
+
+    # INPUT (at least one of inclusion, exclusion, or partial) #
+
+    parser.add_argument(
+        INCLUSION_SHORT,
+        INCLUSION_LONG,
+        dest=INCLUSION,
+        help=INCLUSION_HELP,
+        type=str, nargs='+')
+
+    parser.add_argument(
+        EXCLUSION_SHORT,
+        EXCLUSION_LONG,
+        dest=EXCLUSION,
+        help=EXCLUSION_HELP,
+        type=str, nargs='+')
+
+    parser.add_argument(
+        PARTIAL_LONG,
+        dest=PARTIAL,
+        help=PARTIAL_HELP,
+        type=str, nargs='+')
+
+    # REQUIRED #
+
+    parser.add_argument(
+        OUTPUT_SHORT,
+        OUTPUT_LONG,
+        dest=OUTPUT,
+        help=OUTPUT_HELP,
+        type=str, required=True)
+
+    # OPTIONAL #
+
+    parser.add_argument(
+        DELETE_LONG,
+        dest=DELETE,
+        help=DELETE_HELP,
+        action='store_true')
+
+    parser.add_argument(
+        FORMAT_LONG,
+        dest=FORMAT,
+        help=FORMAT_HELP,
+        type=str, choices=BinaryKMers.FORMATS)
+
+    parser.add_argument(
+        COMPRESS_LONG,
+        dest=COMPRESS,
+        help=COMPRESS_HELP,
+        action='store_true')
+
+    parser.add_argument(
+        START_LONG,
+        dest=START,
+        help=START_HELP,
+        type=str)
+
+    parser.add_argument(
+        END_LONG,
+        dest=END,
+        help=END_HELP,
+        type=str)
+
+    parser.add_argument(
+        REMOVE_INCLUSION_LONG,
+        dest=REMOVE_INCLUSION,
+        help=REMOVE_INCLUSION_HELP,
+        type=str, nargs='+')
+
+    parser.add_argument(
+        REMOVE_EXCLUSION_LONG,
+        dest=REMOVE_EXCLUSION,
+        help=REMOVE_EXCLUSION_HELP,
+        type=str, nargs='+')
+
+    parser.add_argument(
+        INHITS_LONG,
+        dest=INHITS,
+        help=INHITS_HELP,
+        type=int)
+
+    parser.add_argument(
+        EXHITS_LONG,
+        dest=EXHITS,
+        help=EXHITS_HELP,
+        type=int)
+
+    parser.add_argument(
+        ENGINE_LONG,
+        dest=ENGINE,
+        help=ENGINE_HELP,
+        type=str, choices=ENGINES)
+
+    parser.add_argument(
+        PRESENCE_LONG,
+        dest=PRESENCE,
+        help=PRESENCE_HELP,
+        type=str)
+
+    parser.add_argument(
+        STATISTICS_LONG,
+        dest=STATISTICS,
+        help=STATISTICS_HELP,
+        action='store_true')
 
     args = parser.parse_args()
+
+    if not (args.inclusion or args.exclusion or args.partial):
+        parser.error(
+            "at least one of " + INCLUSION_LONG + ", " + EXCLUSION_LONG +
+            ", or " + PARTIAL_LONG + " is required")
+
     parameters = vars(args)
     parse(parameters)
 
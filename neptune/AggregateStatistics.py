@@ -0,0 +1,581 @@
+#!/usr/bin/env python
+
+"""
+# =============================================================================
+
+Copyright Government of Canada 2015-2017
+
+Written by: Eric Marinier, Public Health Agency of Canada,
+    National Microbiology Laboratory
+
+Funded by the National Micriobiology Laboratory and the Genome Canada / Alberta
+    Innovates Bio Solutions project "Listeria Detection and Surveillance
+    using Next Generation Genomics"
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at:
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+# =============================================================================
+"""
+
+"""
+# =============================================================================
+
+This module reads and writes the statistics of aggregated k-mer files. The
+statistics are gathered while the k-mers are aggregated and are written beside
+the aggregated k-mer file, at its location followed by ".stats". They allow the
+number of k-mers kept by any inclusion and exclusion hit thresholds to be found
+without reading the aggregated k-mers.
+
+The statistics file is a text file. Its first line is "#statistics", and every
+other line has tab-separated columns and is one of:
+
+partition   [name] [k-mers] [bytes]
+counts      [inclusion count] [exclusion count] [k-mers]
+
+The partition lines describe the aggregated k-mer files, by name, with the
+number of distinct k-mers and bytes written to each. The counts lines form a
+histogram of the number of k-mers with each pair of inclusion and exclusion
+counts.
+
+# =============================================================================
+"""
+
+import math
+import os
+
+import numpy
+
+"""
+# =============================================================================
+
+GLOBALS
+
+# =============================================================================
+"""
+
+EXTENSION = ".stats"
+
+HEADER = "#statistics"
+PARTITION = "partition"
+COUNTS = "counts"
+SEPARATOR = "\t"
+
+
+"""
+# =============================================================================
+
+LOCATE
+------
+
+
+PURPOSE
+-------
+
+Determines the location of the statistics of an aggregated k-mer file.
+
+
+INPUT
+-----
+
+[FILE LOCATION] [kmerLocation]
+    The location of the aggregated k-mer file.
+
+
+RETURN
+------
+
+[FILE LOCATION] [location]
+    The location of the statistics of the aggregated k-mer file.
+
+# =============================================================================
+"""
+def locate(kmerLocation):
+
+    return kmerLocation + EXTENSION
+
+
+"""
+# =============================================================================
+
+TALLY RECORDS
+-------------
+
+
+PURPOSE
+-------
+
+Adds the inclusion and exclusion counts of aggregated k-mer records to a
+histogram as the records are produced.
+
+
+INPUT
+-----
+
+[TUPLE ITERATOR] [records]
+    The (kmer, incount, excount) aggregated k-mer records.
+
+[(INT, INT) -> (INT) DICTIONARY] [histogram]
+    The number of k-mers with each (incount, excount) pair.
+
+
+RETURN
+------
+
+[TUPLE ITERATOR] [records]
+    The [records], unchanged.
+
+
+POST
+----
+
+The [histogram] will count every produced record.
+
+# =============================================================================
+"""
+def tallyRecords(records, histogram):
+
+    for record in records:
+
+        key = (record[1], record[2])
+        histogram[key] = histogram.get(key, 0) + 1
+
+        yield record
+
+
+"""
+# =============================================================================
+
+TALLY ARRAYS
+------------
+
+
+PURPOSE
+-------
+
+Adds the inclusion and exclusion counts of encoded aggregated k-mers to a
+histogram.
+
+
+INPUT
+-----
+
+[NUMPY ARRAY] [incounts]
+    The inclusion counts of the k-mers.
+
+[NUMPY ARRAY] [excounts]
+    The exclusion counts of the k-mers.
+
+[(INT, INT) -> (INT) DICTIONARY] [histogram]
+    The number of k-mers with each (incount, excount) pair.
+
+
+RETURN
+------
+
+[NONE]
+
+
+POST
+----
+
+The [histogram] will count every k-mer.
+
+# =============================================================================
+"""
+def tallyArrays(incounts, excounts, histogram):
+
+    if len(incounts) == 0:
+        return
+
+    width = int(excounts.max()) + 1
+    pairs, counts = numpy.unique(
+        incounts.astype(numpy.uint64) * numpy.uint64(width) +
+        excounts.astype(numpy.uint64), return_counts=True)
+
+    for pair, count in zip(pairs.tolist(), counts.tolist()):
+
+        key = (int(pair // width), int(pair % width))
+        histogram[key] = histogram.get(key, 0) + count
+
+
+"""
+# =============================================================================
+
+WRITE
+-----
+
+
+PURPOSE
+-------
+
+Writes a statistics file.
+
+
+INPUT
+-----
+
+[FILE LOCATION] [location]
+    The location to write the statistics.
+
+[(INT, INT) -> (INT) DICTIONARY] [histogram]
+    The number of k-mers with each (incount, excount) pair.
+
+[(STRING, INT, INT) LIST] [partitions]
+    The (name, k-mers, bytes) of each aggregated k-mer file described.
+
+
+RETURN
+------
+
+[NONE]
+
+
+POST
+----
+
+The statistics will be written to the [location].
+
+# =============================================================================
+"""
+def write(location, histogram, partitions):
+
+    with open(location, "w") as statisticsFile:
+
+        statisticsFile.write(HEADER + "\n")
+
+        for partition in partitions:
+            statisticsFile.write(SEPARATOR.join(
+                [PARTITION] + [str(value) for value in partition]) + "\n")
+
+        for (incount, excount), kmers in sorted(histogram.items()):
+            statisticsFile.write(SEPARATOR.join(
+                [COUNTS, str(incount), str(excount), str(kmers)]) + "\n")
+
+
+"""
+# =============================================================================
+
+WRITE FILE STATISTICS
+---------------------
+
+
+PURPOSE
+-------
+
+Writes the statistics of a single aggregated k-mer file beside it.
+
+
+INPUT
+-----
+
+[FILE LOCATION] [kmerLocation]
+    The location of the written aggregated k-mer file.
+
+[(INT, INT) -> (INT) DICTIONARY] [histogram]
+    The number of k-mers of the file with each (incount, excount) pair.
+
+
+RETURN
+------
+
+[NONE]
+
+
+POST
+----
+
+The statistics of the file will be written to locate([kmerLocation]).
+
+# =============================================================================
+"""
+def writeFileStatistics(kmerLocation, histogram):
+
+    partition = (
+        os.path.basename(kmerLocation), sum(histogram.values()),
+        os.path.getsize(kmerLocation))
+
+    write(locate(kmerLocation), histogram, [partition])
+
+
+"""
+# =============================================================================
+
+READ
+----
+
+
+PURPOSE
+-------
+
+Reads a statistics file.
+
+
+INPUT
+-----
+
+[FILE LOCATION] [location]
+    The location of the statistics.
+
+
+RETURN
+------
+
+[((INT, INT) -> (INT) DICTIONARY, (STRING, INT, INT) LIST)]
+[(histogram, partitions)]
+    The histogram of the (incount, excount) pairs of the k-mers and the
+    (name, k-mers, bytes) of each aggregated k-mer file described.
+
+RuntimeError if the statistics file is malformed.
+
+# =============================================================================
+"""
+def read(location):
+
+    with open(location, "r") as statisticsFile:
+
+        lines = statisticsFile.read().splitlines()
+
+    if not lines or lines[0] != HEADER:
+        raise RuntimeError(
+            "ERROR: Malformed k-mer statistics: " + str(location))
+
+    histogram = {}
+    partitions = []
+
+    for line in lines[1:]:
+
+        tokens = line.split(SEPARATOR)
+
+        if len(tokens) == 4 and tokens[0] == PARTITION:
+            partitions.append((tokens[1], int(tokens[2]), int(tokens[3])))
+
+        elif len(tokens) == 4 and tokens[0] == COUNTS:
+            key = (int(tokens[1]), int(tokens[2]))
+            histogram[key] = histogram.get(key, 0) + int(tokens[3])
+
+        else:
+            raise RuntimeError(
+                "ERROR: Malformed k-mer statistics: " + str(location))
+
+    return histogram, partitions
+
+
+"""
+# =============================================================================
+
+COMBINE
+-------
+
+
+PURPOSE
+-------
+
+Combines the statistics of several aggregated k-mer files, such as the
+partitions of a partitioned aggregated k-mer file.
+
+
+INPUT
+-----
+
+[(FILE LOCATION) LIST] [inputLocations]
+    The locations of the statistics to combine, in order.
+
+[FILE LOCATION] [outputLocation]
+    The location to write the combined statistics.
+
+
+RETURN
+------
+
+[NONE]
+
+
+POST
+----
+
+The combined statistics will describe every partition of the inputs, in
+order, and will count the k-mers of every input.
+
+# =============================================================================
+"""
+def combine(inputLocations, outputLocation):
+
+    histogram = {}
+    partitions = []
+
+    for location in inputLocations:
+
+        inputHistogram, inputPartitions = read(location)
+
+        for key, kmers in inputHistogram.items():
+            histogram[key] = histogram.get(key, 0) + kmers
+
+        partitions += inputPartitions
+
+    write(outputLocation, histogram, partitions)
+
+
+"""
+# =============================================================================
+
+COUNT KEPT
+----------
+
+
+PURPOSE
+-------
+
+Counts the k-mers kept by every inclusion and exclusion hit threshold. As in
+signature extraction, a k-mer is kept by an inclusion threshold when its
+inclusion count is at least the threshold, and likewise for exclusion.
+
+
+INPUT
+-----
+
+[(INT, INT) -> (INT) DICTIONARY] [histogram]
+    The number of k-mers with each (incount, excount) pair.
+
+
+RETURN
+------
+
+[((INT) LIST, (INT) LIST)] [(inclusionKept, exclusionKept)]
+    The number of k-mers kept by each inclusion and exclusion threshold, such
+    that inclusionKept[t] k-mers have an inclusion count of at least t. Each
+    list extends to the largest count of the [histogram].
+
+# =============================================================================
+"""
+def countKept(histogram):
+
+    kept = []
+
+    for column in [0, 1]:
+
+        largest = max([key[column] for key in histogram] + [0])
+        totals = [0] * (largest + 1)
+
+        for key, kmers in histogram.items():
+            totals[key[column]] += kmers
+
+        # cumulative from the largest count downward
+        for count in range(largest - 1, -1, -1):
+            totals[count] += totals[count + 1]
+
+        kept.append(totals)
+
+    return kept[0], kept[1]
+
+
+"""
+# =============================================================================
+
+KEPT BY
+-------
+
+
+PURPOSE
+-------
+
+Finds the number of k-mers kept by a hit threshold.
+
+
+INPUT
+-----
+
+[(INT) LIST] [kept]
+    The number of k-mers kept by each threshold, as produced by
+    countKept(...).
+
+[FLOAT] [threshold]
+    The hit threshold, which may be fractional.
+
+
+RETURN
+------
+
+[INT >= 0] [kmers]
+    The number of k-mers with a count of at least the [threshold].
+
+# =============================================================================
+"""
+def keptBy(kept, threshold):
+
+    # counts are whole numbers, so fractional thresholds round up
+    index = max(int(math.ceil(threshold)), 0)
+
+    return kept[index] if index < len(kept) else 0
+
+
+"""
+# =============================================================================
+
+REPORT THRESHOLDS
+-----------------
+
+
+PURPOSE
+-------
+
+Reports the number of k-mers kept by every inclusion and exclusion hit
+threshold, starting from the thresholds with which the k-mers were aggregated.
+The k-mers that fell below both aggregation thresholds were not written, so
+only the number kept by larger thresholds is known.
+
+
+INPUT
+-----
+
+[FILE] [reportFile]
+    The writable file-like object to write the report.
+
+[(INT, INT) -> (INT) DICTIONARY] [histogram]
+    The number of k-mers with each (incount, excount) pair.
+
+[FLOAT -- OPTIONAL] [inhits]
+    The inclusion hit threshold of the aggregation, or None when every k-mer
+    was written.
+
+[FLOAT -- OPTIONAL] [exhits]
+    The exclusion hit threshold of the aggregation, or None when every k-mer
+    was written.
+
+
+RETURN
+------
+
+[NONE]
+
+
+POST
+----
+
+The number of k-mers kept by each threshold will be written to [reportFile].
+
+# =============================================================================
+"""
+def reportThresholds(reportFile, histogram, inhits=None, exhits=None):
+
+    inclusionKept, exclusionKept = countKept(histogram)
+
+    for name, kept, hits in [
+            ("Inclusion", inclusionKept, inhits),
+            ("Exclusion", exclusionKept, exhits)]:
+
+        # thresholds are whole numbers of at least one target
+        first = max(int(math.ceil(hits)), 1) if hits is not None else 1
+
+        for threshold in range(first, len(kept)):
+            reportFile.write(
+                name + " Hits " + str(threshold) + " = " +
+                str(kept[threshold]) + " k-mers\n")
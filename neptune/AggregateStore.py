@@ -0,0 +1,544 @@
+#!/usr/bin/env python
+
+"""
+# =============================================================================
+
+Copyright Government of Canada 2015-2017
+
+Written by: Eric Marinier, Public Health Agency of Canada,
+    National Microbiology Laboratory
+
+Funded by the National Micriobiology Laboratory and the Genome Canada / Alberta
+    Innovates Bio Solutions project "Listeria Detection and Surveillance
+    using Next Generation Genomics"
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at:
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+# =============================================================================
+"""
+
+"""
+# =============================================================================
+
+This module manages a persistent aggregate store: a directory holding the
+complete aggregation of a collection of inclusion and exclusion genomes, the
+k-mer file of every genome, and a manifest of the genomes it covers.
+
+When genomes are added to or removed from the collection, only their k-mer
+files are merged into the existing aggregation, instead of counting and
+aggregating every genome again. A genome whose file has changed since it was
+stored is removed and added again.
+
+The manifest is a text file. Its first line holds the k-mer size, and its
+second line the name of the aggregated k-mer file. Every other line describes
+one genome with tab-separated columns:
+
+[role] [k-mer file name] [size] [modification time] [genome location]
+
+An update writes the new aggregation beside the previous one and then replaces
+the manifest, which names the new aggregation, at once. An interrupted update
+therefore leaves the previous aggregation and manifest in place.
+
+# =============================================================================
+"""
+
+import errno
+import os
+import shutil
+
+"""
+# =============================================================================
+
+GLOBALS
+
+# =============================================================================
+"""
+
+# FILE NAMES #
+
+MANIFEST = "genomes.txt"
+KMERS = "kmers"
+
+# The aggregation of a store is named [AGGREGATE_PREFIX][number][.KMERS]. The
+# manifests of older stores do not name their aggregation, which is AGGREGATE.
+AGGREGATE = "aggregate.kmers"
+AGGREGATE_PREFIX = "aggregate."
+
+# ROLES #
+
+INCLUSION = "inclusion"
+EXCLUSION = "exclusion"
+ROLES = [INCLUSION, EXCLUSION]
+
+# MANIFEST #
+
+K = "k"
+AGGREGATION = "aggregate"
+SEPARATOR = "\t"
+
+
+"""
+# =============================================================================
+
+READ MANIFEST
+-------------
+
+
+PURPOSE
+-------
+
+Reads the manifest of an aggregate store.
+
+
+INPUT
+-----
+
+[DIRECTORY LOCATION] [directory]
+    The location of the aggregate store.
+
+
+RETURN
+------
+
+[(INT, (STRING, STRING, INT, INT, FILE LOCATION) LIST)] [(k, genomes)]
+    The k-mer size of the store and its (role, k-mer file name, size,
+    modification time, genome location) genome records. When the store does
+    not exist yet, the k-mer size is None and there are no genomes.
+
+RuntimeError if the manifest is malformed.
+
+# =============================================================================
+"""
+def readManifest(directory):
+
+    return readStore(directory)[:2]
+
+
+"""
+# =============================================================================
+
+READ AGGREGATE
+--------------
+
+
+PURPOSE
+-------
+
+Reads the name of the aggregated k-mer file of an aggregate store from its
+manifest.
+
+
+INPUT
+-----
+
+[DIRECTORY LOCATION] [directory]
+    The location of the aggregate store.
+
+
+RETURN
+------
+
+[STRING] [aggregate]
+    The name of the aggregated k-mer file within the store, which is AGGREGATE
+    when the manifest does not name one or the store does not exist yet.
+
+RuntimeError if the manifest is malformed.
+
+# =============================================================================
+"""
+def readAggregate(directory):
+
+    return readStore(directory)[2]
+
+
+"""
+# =============================================================================
+
+READ STORE
+----------
+
+
+PURPOSE
+-------
+
+Reads the manifest of an aggregate store, as readManifest(...), along with the
+name of its aggregated k-mer file.
+
+
+INPUT
+-----
+
+[DIRECTORY LOCATION] [directory]
+    The location of the aggregate store.
+
+
+RETURN
+------
+
+[(INT, (STRING, STRING, INT, INT, FILE LOCATION) LIST, STRING)]
+[(k, genomes, aggregate)]
+    The k-mer size, genome records, and aggregated k-mer file name of the
+    store.
+
+RuntimeError if the manifest is malformed.
+
+# =============================================================================
+"""
+def readStore(directory):
+
+    location = os.path.join(directory, MANIFEST)
+
+    if not os.path.isfile(location):
+        return None, [], AGGREGATE
+
+    with open(location, "r") as manifestFile:
+
+        lines = manifestFile.read().splitlines()
+
+    header = lines[0].split(SEPARATOR) if lines else []
+
+    if len(header) != 2 or header[0] != K:
+        raise RuntimeError(
+            "ERROR: Malformed aggregate store manifest: " + str(location))
+
+    k = int(header[1])
+    genomes = []
+    aggregate = AGGREGATE
+
+    # the manifests of older stores do not name their aggregation
+    if len(lines) > 1 and lines[1].startswith(AGGREGATION + SEPARATOR):
+        aggregate = lines.pop(1).split(SEPARATOR, 1)[1]
+
+    for line in lines[1:]:
+
+        tokens = line.split(SEPARATOR, 4)
+
+        if len(tokens) != 5 or tokens[0] not in ROLES:
+            raise RuntimeError(
+                "ERROR: Malformed aggregate store manifest: " + str(location))
+
+        genomes.append(
+            (tokens[0], tokens[1], int(tokens[2]), int(tokens[3]), tokens[4]))
+
+    return k, genomes, aggregate
+
+
+"""
+# =============================================================================
+
+WRITE MANIFEST
+--------------
+
+
+PURPOSE
+-------
+
+Writes the manifest of an aggregate store. The manifest is replaced at once,
+so that an interrupted write leaves the previous manifest in place.
+
+
+INPUT
+-----
+
+[DIRECTORY LOCATION] [directory]
+    The location of the aggregate store.
+
+[1 <= INT] [k]
+    The k-mer size of the store.
+
+[(STRING, STRING, INT, INT, FILE LOCATION) LIST] [genomes]
+    The (role, k-mer file name, size, modification time, genome location)
+    records of the genomes in the store.
+
+[STRING -- OPTIONAL] [aggregate]
+    The name of the aggregated k-mer file of the [genomes] within the store.
+
+
+RETURN
+------
+
+[NONE]
+
+
+POST
+----
+
+The manifest of the store will describe the [genomes] and their [aggregate].
+
+# =============================================================================
+"""
+def writeManifest(directory, k, genomes, aggregate=AGGREGATE):
+
+    location = os.path.join(directory, MANIFEST)
+
+    with open(location + ".tmp", "w") as manifestFile:
+
+        manifestFile.write(K + SEPARATOR + str(k) + "\n")
+        manifestFile.write(AGGREGATION + SEPARATOR + aggregate + "\n")
+
+        for genome in genomes:
+            manifestFile.write(
+                SEPARATOR.join(str(value) for value in genome) + "\n")
+
+    os.rename(location + ".tmp", location)
+
+
+"""
+# =============================================================================
+
+LIST AGGREGATES
+---------------
+
+
+PURPOSE
+-------
+
+Lists the aggregated k-mer files of an aggregate store. Besides the current
+aggregation, these may include the previous aggregation and the aggregation of
+an interrupted update.
+
+
+INPUT
+-----
+
+[DIRECTORY LOCATION] [directory]
+    The location of the aggregate store.
+
+
+RETURN
+------
+
+[STRING LIST] [aggregates]
+    The names of the aggregated k-mer files within the store, in sorted order.
+
+# =============================================================================
+"""
+def listAggregates(directory):
+
+    if not os.path.isdir(directory):
+        return []
+
+    return sorted(
+        name for name in os.listdir(directory)
+        if name == AGGREGATE or (
+            name.startswith(AGGREGATE_PREFIX) and
+            name.endswith("." + KMERS) and
+            name[len(AGGREGATE_PREFIX):-len(KMERS) - 1].isdigit()))
+
+
+"""
+# =============================================================================
+
+NAME AGGREGATE
+--------------
+
+
+PURPOSE
+-------
+
+Names the aggregated k-mer file written by the next update of an aggregate
+store, such that it differs from every existing aggregated k-mer file.
+
+
+INPUT
+-----
+
+[DIRECTORY LOCATION] [directory]
+    The location of the aggregate store.
+
+
+RETURN
+------
+
+[STRING] [aggregate]
+    The name of the next aggregated k-mer file within the store.
+
+# =============================================================================
+"""
+def nameAggregate(directory):
+
+    numbers = [
+        int(name[len(AGGREGATE_PREFIX):-len(KMERS) - 1])
+        for name in listAggregates(directory) if name != AGGREGATE]
+
+    return AGGREGATE_PREFIX + str(max(numbers + [-1]) + 1) + "." + KMERS
+
+
+"""
+# =============================================================================
+
+DESCRIBE GENOME
+---------------
+
+
+PURPOSE
+-------
+
+Describes the current state of a genome file, so that changes to the file
+since it was stored may be detected.
+
+
+INPUT
+-----
+
+[FILE LOCATION] [location]
+    The location of the genome.
+
+
+RETURN
+------
+
+[(INT, INT)] [(size, modified)]
+    The size of the file in bytes and its modification time in whole seconds.
+
+# =============================================================================
+"""
+def describeGenome(location):
+
+    status = os.stat(location)
+
+    return status.st_size, int(status.st_mtime)
+
+
+"""
+# =============================================================================
+
+PLAN UPDATE
+-----------
+
+
+PURPOSE
+-------
+
+Compares the genomes of an aggregate store with the genomes of an execution
+and determines how the store must be updated. Genomes are identified by their
+absolute location.
+
+A stored genome which has changed, or whose role has changed, is removed and
+added again. The k-mers of a genome whose role alone has changed are reused,
+rather than counted again.
+
+
+INPUT
+-----
+
+[(STRING, STRING, INT, INT, FILE LOCATION) LIST] [genomes]
+    The genome records of the store, as produced by readManifest(...).
+
+[(FILE LOCATION) LIST] [inclusionLocations]
+    The inclusion genomes of the execution.
+
+[(FILE LOCATION) LIST] [exclusionLocations]
+    The exclusion genomes of the execution.
+
+
+RETURN
+------
+
+[(RECORD LIST, (STRING, FILE LOCATION, RECORD) LIST, RECORD LIST)]
+[(kept, added, removed)]
+    The records of the unchanged genomes, the (role, location, record) of every
+    genome to add, and the records of the genomes to remove. The record of an
+    added genome is the stored record whose k-mers may be reused, or None when
+    the genome must be counted. The added inclusion genomes precede the added
+    exclusion genomes, in the order of the execution.
+
+# =============================================================================
+"""
+def planUpdate(genomes, inclusionLocations, exclusionLocations):
+
+    stored = dict((genome[4], genome) for genome in genomes)
+
+    kept = []
+    added = []
+    current = set()
+
+    for role, locations in [
+            (INCLUSION, inclusionLocations),
+            (EXCLUSION, exclusionLocations)]:
+
+        for location in locations:
+
+            location = os.path.abspath(location)
+            current.add(location)
+
+            record = stored.get(location)
+
+            if record is not None and \
+                    record[2:4] != describeGenome(location):
+                record = None
+
+            if record is not None and record[0] == role:
+                kept.append(record)
+
+            else:
+                added.append((role, location, record))
+
+    keptLocations = set(record[4] for record in kept)
+
+    removed = [
+        genome for genome in genomes
+        if genome[4] not in keptLocations]
+
+    return kept, added, removed
+
+
+"""
+# =============================================================================
+
+LINK FILE
+---------
+
+
+PURPOSE
+-------
+
+Makes a file available at a second location without copying it, by creating
+a hard link. The file is copied when a link cannot be created, such as when
+the locations are on different file systems.
+
+
+INPUT
+-----
+
+[FILE LOCATION] [source]
+    The location of the existing file.
+
+[FILE LOCATION] [destination]
+    The new location of the file, which must not exist.
+
+
+RETURN
+------
+
+[NONE]
+
+
+POST
+----
+
+The contents of the [source] will be available at the [destination]. Removing
+either location leaves the other in place.
+
+# =============================================================================
+"""
+def linkFile(source, destination):
+
+    try:
+        os.link(source, destination)
+
+    except OSError as error:
+
+        if error.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+            raise
+
+        shutil.copyfile(source, destination)
@@ -0,0 +1,1164 @@
+#!/usr/bin/env python
+
+"""
+# =============================================================================
+
+Copyright Government of Canada 2015-2017
+
+Written by: Eric Marinier, Public Health Agency of Canada,
+    National Microbiology Laboratory
+
+Funded by the National Micriobiology Laboratory and the Genome Canada / Alberta
+    Innovates Bio Solutions project "Listeria Detection and Surveillance
+    using Next Generation Genomics"
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at:
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+# =============================================================================
+"""
+
+"""
+# =============================================================================
+
+This script reads and writes k-mer files in a compact binary format and
+converts k-mer files between the binary format and the text format.
+
+The text format contains one k-mer per line, followed by one or more counts:
+
+AAAAA 3 1
+AAAAC 1 2
+
+The binary format is little-endian and begins with a 40-byte header:
+
+magic       4 bytes     The byte 0x89 followed by "NKM".
+version     1 byte      The format version.
+k           1 byte      The k-mer size, no larger than 32.
+columns     1 byte      The number of count columns.
+width       1 byte      The number of bytes of each count.
+records     8 bytes     The number of encoded k-mers.
+ambiguous   8 bytes     The number of ambiguous k-mers.
+tag         16 bytes    The organization tag, padded with null bytes.
+
+The header is followed by the distinct and sorted two-bit k-mer codes, as
+unsigned 64-bit integers, and then by each of the count columns, as unsigned
+integers of [width] bytes. The codes and counts may therefore be memory-mapped
+and used without being parsed.
+
+The k-mers containing characters other than A, C, G, or T cannot be encoded.
+These ambiguous k-mers are written at the end of the file, in the text format
+and in sorted order.
+
+A k-mer file may also be partitioned into several k-mer files, in either
+format, described by a manifest. The manifest is a text file whose first line
+is "#partitions", followed by the location of one partition per line, in k-mer
+order. Relative locations are relative to the directory of the manifest. A
+manifest may be used wherever a k-mer file is read.
+
+USAGE:
+
+script.py -h
+script.py -i INPUT -o OUTPUT -f FORMAT
+
+EXAMPLES:
+
+script.py -i reference.kmers -o reference.bin -f binary
+script.py -i reference.bin -o reference.kmers -f text
+
+# =============================================================================
+"""
+
+import argparse
+import heapq
+import itertools
+import os
+import shutil
+import struct
+import tempfile
+
+import numpy
+
+import Utility
+
+"""
+# =============================================================================
+
+GLOBALS
+
+# =============================================================================
+"""
+
+PROGRAM_DESCRIPTION = "Converts k-mer files between the text format and the \
+    compact binary format."
+
+# FORMATS
+
+FORMAT_TEXT = "text"
+FORMAT_BINARY = "binary"
+FORMATS = [FORMAT_TEXT, FORMAT_BINARY]
+
+# BINARY FORMAT
+
+MAGIC = "\x89NKM"
+VERSION = 1
+
+HEADER = struct.Struct("<4sBBBBQQ16s")
+
+# The largest k-mer that fits in the 64-bit codes.
+MAXIMUM_K = 32
+
+# The largest organization tag.
+MAXIMUM_TAG = 16
+
+CODE_TYPE = numpy.dtype("<u8")
+
+# The possible widths of the count columns, in bytes.
+WIDTHS = [1, 2, 4, 8]
+
+# The number of k-mers encoded, decoded, or copied at once.
+BATCH_SIZE = 65536
+
+# PARTITIONED FORMAT
+
+MANIFEST_HEADER = "#partitions"
+
+# ARGUMENTS
+
+LONG = "--"
+SHORT = "-"
+
+# Input
+INPUT = "input"
+INPUT_LONG = LONG + INPUT
+INPUT_SHORT = SHORT + "i"
+INPUT_HELP = "The location of the k-mer file to convert, in either format."
+
+# Output
+OUTPUT = "output"
+OUTPUT_LONG = LONG + OUTPUT
+OUTPUT_SHORT = SHORT + "o"
+OUTPUT_HELP = "The location to write the converted k-mer file."
+
+# Format
+FORMAT = "format"
+FORMAT_LONG = LONG + FORMAT
+FORMAT_SHORT = SHORT + "f"
+FORMAT_HELP = "The format of the converted k-mer file."
+
+
+"""
+# =============================================================================
+
+K-MERS
+------
+
+
+PURPOSE
+-------
+
+The contents of a binary k-mer file. The codes and counts are memory-mapped
+from the file, rather than read into memory.
+
+
+INPUT
+-----
+
+[FILE LOCATION] [location]
+    The location of the binary k-mer file.
+
+
+POST
+----
+
+The [k], [columns], [tag], [codes], [counts], and [ambiguous] attributes will
+describe the contents of the file. The [counts] are a list of arrays, one for
+each count column. The [ambiguous] k-mers are a sorted list of (kmer, count,
+...) tuples.
+
+# =============================================================================
+"""
+class KMers():
+
+    def __init__(self, location):
+
+        with open(location, 'rb') as inputFile:
+            header = readHeader(inputFile)
+
+        (magic, version, self.k, self.columns, width, records, ambiguous,
+            tag) = header
+
+        self.tag = tag.rstrip("\0")
+
+        countType = numpy.dtype("<u" + str(width))
+        offset = HEADER.size
+
+        self.codes = mapArray(location, CODE_TYPE, offset, records)
+        offset += CODE_TYPE.itemsize * records
+
+        self.counts = []
+
+        for i in range(self.columns):
+
+            self.counts.append(mapArray(location, countType, offset, records))
+            offset += countType.itemsize * records
+
+        with open(location, 'rb') as inputFile:
+
+            inputFile.seek(offset)
+            self.ambiguous = [parseLine(line) for line in inputFile]
+
+    def __len__(self):
+
+        return len(self.codes) + len(self.ambiguous)
+
+
+"""
+# =============================================================================
+
+WRITER
+------
+
+
+PURPOSE
+-------
+
+Writes a binary k-mer file. The k-mer codes are written directly to the file,
+while the counts and ambiguous k-mers are held in temporary files until the
+writer is closed, at which point the narrowest count width able to represent
+every count is chosen.
+
+
+INPUT
+-----
+
+[FILE LOCATION] [location]
+    The location to write the binary k-mer file.
+
+[0 <= INT <= MAXIMUM_K] [k]
+    The k-mer size, or 0 when the file will contain no k-mers.
+
+[INT >= 0] [columns]
+    The number of count columns.
+
+[STRING -- OPTIONAL] [tag]
+    The organization tag of the k-mers, no longer than MAXIMUM_TAG.
+
+
+POST
+----
+
+The file will be complete only once close() has been called.
+
+# =============================================================================
+"""
+class Writer():
+
+    def __init__(self, location, k, columns, tag=""):
+
+        if k < 0 or k > MAXIMUM_K:
+            raise RuntimeError(
+                "ERROR: The k-mer size is out of range for the binary " +
+                "format: " + str(k))
+
+        if len(tag) > MAXIMUM_TAG:
+            raise RuntimeError(
+                "ERROR: The tag is too long for the binary format: " + tag)
+
+        self.k = k
+        self.columns = columns
+        self.tag = tag
+
+        self.records = 0
+        self.ambiguous = 0
+        self.maximum = 0
+
+        directory = os.path.dirname(os.path.abspath(location))
+
+        self.outputFile = open(location, 'wb')
+        self.outputFile.write(HEADER.pack(
+            MAGIC, VERSION, k, columns, WIDTHS[0], 0, 0, tag))
+
+        self.columnFiles = [
+            tempfile.TemporaryFile(dir=directory) for i in range(columns)]
+        self.ambiguousFile = tempfile.TemporaryFile(dir=directory)
+
+    """
+    # =========================================================================
+
+    WRITE
+
+    PURPOSE:
+        Writes encoded k-mers and their counts. The codes must follow all
+        previously written codes in sorted order.
+
+    INPUT:
+        [UINT64 ARRAY] [codes] - The sorted and distinct k-mer codes.
+        [(INT ARRAY) LIST] [counts] - The count columns of the [codes].
+
+    RETURN:
+        [NONE]
+
+    # =========================================================================
+    """
+    def write(self, codes, counts):
+
+        self.outputFile.write(
+            numpy.asarray(codes, dtype=CODE_TYPE).tobytes())
+
+        for columnFile, column in itertools.izip(self.columnFiles, counts):
+
+            column = numpy.asarray(column, dtype=CODE_TYPE)
+
+            if len(column) > 0:
+                self.maximum = max(self.maximum, int(column.max()))
+
+            columnFile.write(column.tobytes())
+
+        self.records += len(codes)
+
+    """
+    # =========================================================================
+
+    WRITE AMBIGUOUS
+
+    PURPOSE:
+        Writes a k-mer which cannot be encoded. The k-mer must follow all
+        previously written ambiguous k-mers in sorted order.
+
+    INPUT:
+        [STRING] [kmer] - The ambiguous k-mer.
+        [INT ITERABLE] [counts] - The counts of the k-mer.
+
+    RETURN:
+        [NONE]
+
+    # =========================================================================
+    """
+    def writeAmbiguous(self, kmer, counts):
+
+        self.ambiguousFile.write(formatLine([kmer] + list(counts)))
+        self.ambiguous += 1
+
+    """
+    # =========================================================================
+
+    CLOSE
+
+    PURPOSE:
+        Completes and closes the binary k-mer file.
+
+    INPUT:
+        [NONE]
+
+    RETURN:
+        [NONE]
+
+    # =========================================================================
+    """
+    def close(self):
+
+        width = next(
+            width for width in WIDTHS if self.maximum < 256 ** width)
+        countType = numpy.dtype("<u" + str(width))
+
+        # count columns
+        for columnFile in self.columnFiles:
+
+            columnFile.seek(0)
+
+            while True:
+
+                block = columnFile.read(BATCH_SIZE * CODE_TYPE.itemsize)
+
+                if not block:
+                    break
+
+                column = numpy.frombuffer(block, dtype=CODE_TYPE)
+                self.outputFile.write(column.astype(countType).tobytes())
+
+            columnFile.close()
+
+        # ambiguous k-mers
+        self.ambiguousFile.seek(0)
+        shutil.copyfileobj(self.ambiguousFile, self.outputFile)
+        self.ambiguousFile.close()
+
+        # header
+        self.outputFile.seek(0)
+        self.outputFile.write(HEADER.pack(
+            MAGIC, VERSION, self.k, self.columns, width, self.records,
+            self.ambiguous, self.tag))
+
+        self.outputFile.close()
+
+
+"""
+# =============================================================================
+
+READ HEADER
+-----------
+
+
+PURPOSE
+-------
+
+Reads and validates the header of a binary k-mer file.
+
+
+INPUT
+-----
+
+[FILE] [inputFile]
+    The readable binary k-mer file, positioned at its start.
+
+
+RETURN
+------
+
+[TUPLE] [header]
+    The (magic, version, k, columns, width, records, ambiguous, tag) fields of
+    the header.
+
+# =============================================================================
+"""
+def readHeader(inputFile):
+
+    block = inputFile.read(HEADER.size)
+
+    if len(block) < HEADER.size or block[:len(MAGIC)] != MAGIC:
+        raise RuntimeError("ERROR: The file is not a binary k-mer file.")
+
+    header = HEADER.unpack(block)
+
+    if header[1] != VERSION:
+        raise RuntimeError(
+            "ERROR: The binary k-mer file version is not supported: " +
+            str(header[1]))
+
+    return header
+
+
+"""
+# =============================================================================
+
+MAP ARRAY
+---------
+
+
+PURPOSE
+-------
+
+Memory-maps an array from a file.
+
+
+INPUT
+-----
+
+[FILE LOCATION] [location]
+    The location of the file.
+
+[NUMPY DTYPE] [dtype]
+    The type of the array elements.
+
+[INT >= 0] [offset]
+    The byte offset of the array in the file.
+
+[INT >= 0] [length]
+    The number of elements in the array.
+
+
+RETURN
+------
+
+[ARRAY] [array]
+    The read-only, memory-mapped array.
+
+# =============================================================================
+"""
+def mapArray(location, dtype, offset, length):
+
+    # empty arrays cannot be mapped
+    if length == 0:
+        return numpy.empty(0, dtype=dtype)
+
+    return numpy.memmap(
+        location, dtype=dtype, mode='r', offset=offset, shape=(length,))
+
+
+"""
+# =============================================================================
+
+IS BINARY
+---------
+
+
+PURPOSE
+-------
+
+Determines whether or not a file is a binary k-mer file.
+
+
+INPUT
+-----
+
+[FILE LOCATION] [location]
+    The location of the file.
+
+
+RETURN
+------
+
+[BOOL] [binary]
+    Whether or not the file begins with the binary k-mer file magic number.
+
+# =============================================================================
+"""
+def isBinary(location):
+
+    with open(location, 'rb') as inputFile:
+        return inputFile.read(len(MAGIC)) == MAGIC
+
+
+"""
+# =============================================================================
+
+IS MANIFEST
+-----------
+
+
+PURPOSE
+-------
+
+Determines whether or not a file is the manifest of a partitioned k-mer file.
+
+
+INPUT
+-----
+
+[FILE LOCATION] [location]
+    The location of the file.
+
+
+RETURN
+------
+
+[BOOL] [manifest]
+    Whether or not the file begins with the manifest header.
+
+# =============================================================================
+"""
+def isManifest(location):
+
+    with open(location, 'rb') as inputFile:
+        header = inputFile.read(len(MANIFEST_HEADER) + 1)
+
+    return header.rstrip("\r\n") == MANIFEST_HEADER
+
+
+"""
+# =============================================================================
+
+WRITE MANIFEST
+--------------
+
+
+PURPOSE
+-------
+
+Writes the manifest of a partitioned k-mer file. Partitions within the
+directory of the manifest are recorded by name, so that the directory may be
+moved.
+
+
+INPUT
+-----
+
+[FILE LOCATION] [location]
+    The location to write the manifest.
+
+[(FILE LOCATION) LIST] [partitionLocations]
+    The locations of the k-mer file partitions, in k-mer order.
+
+
+RETURN
+------
+
+[NONE]
+
+
+POST
+----
+
+The manifest will describe the partitions, in order.
+
+# =============================================================================
+"""
+def writeManifest(location, partitionLocations):
+
+    directory = os.path.dirname(os.path.abspath(location))
+
+    with open(location, 'w') as manifestFile:
+
+        manifestFile.write(MANIFEST_HEADER + "\n")
+
+        for partitionLocation in partitionLocations:
+
+            partitionLocation = os.path.abspath(partitionLocation)
+
+            if os.path.dirname(partitionLocation) == directory:
+                partitionLocation = os.path.basename(partitionLocation)
+
+            manifestFile.write(partitionLocation + "\n")
+
+
+"""
+# =============================================================================
+
+READ PARTITIONS
+---------------
+
+
+PURPOSE
+-------
+
+Determines the k-mer files making up a k-mer file, which is either the file
+itself or the partitions listed in its manifest.
+
+
+INPUT
+-----
+
+[FILE LOCATION] [location]
+    The location of the k-mer file or manifest.
+
+
+RETURN
+------
+
+[(FILE LOCATION) LIST] [partitionLocations]
+    The locations of the k-mer files, in k-mer order.
+
+RuntimeError if a partition of the manifest does not exist.
+
+# =============================================================================
+"""
+def readPartitions(location):
+
+    if not isManifest(location):
+        return [location]
+
+    directory = os.path.dirname(os.path.abspath(location))
+
+    with open(location, 'r') as manifestFile:
+
+        lines = manifestFile.read().splitlines()[1:]
+
+    partitionLocations = [
+        os.path.join(directory, line) for line in lines if line.strip()]
+
+    for partitionLocation in partitionLocations:
+
+        if not os.path.isfile(partitionLocation):
+            raise RuntimeError(
+                "ERROR: Could not open k-mer file partition: " +
+                str(partitionLocation) + "\n")
+
+    return partitionLocations
+
+
+"""
+# =============================================================================
+
+COUNT RECORDS
+-------------
+
+
+PURPOSE
+-------
+
+Counts the records of a k-mer file in either format, or of every partition of
+a partitioned k-mer file. The records of a binary file are counted from its
+header, without reading the file.
+
+
+INPUT
+-----
+
+[FILE LOCATION] [location]
+    The location of the k-mer file.
+
+
+RETURN
+------
+
+[INT >= 0] [records]
+    The number of k-mers in the file.
+
+# =============================================================================
+"""
+def countRecords(location):
+
+    if isManifest(location):
+        return sum(
+            countRecords(partition) for partition in readPartitions(location))
+
+    if isBinary(location):
+
+        with open(location, 'rb') as inputFile:
+            header = readHeader(inputFile)
+
+        return header[5] + header[6]
+
+    with Utility.openInput(location) as inputFile:
+        return sum(1 for line in inputFile if line.strip())
+
+
+"""
+# =============================================================================
+
+PARSE LINE
+----------
+
+
+PURPOSE
+-------
+
+Parses a line of a text k-mer file.
+
+
+INPUT
+-----
+
+[STRING] [line]
+    The line to parse.
+
+
+RETURN
+------
+
+[TUPLE] [record]
+    The (kmer, count, ...) record of the line.
+
+# =============================================================================
+"""
+def parseLine(line):
+
+    tokens = line.split()
+
+    return (tokens[0],) + tuple(int(token) for token in tokens[1:])
+
+
+"""
+# =============================================================================
+
+FORMAT LINE
+-----------
+
+
+PURPOSE
+-------
+
+Formats a k-mer record as a line of a text k-mer file.
+
+
+INPUT
+-----
+
+[ITERABLE] [record]
+    The (kmer, count, ...) record to format.
+
+
+RETURN
+------
+
+[STRING] [line]
+    The line of the record, including its line terminator.
+
+# =============================================================================
+"""
+def formatLine(record):
+
+    return " ".join(str(item) for item in record) + "\n"
+
+
+"""
+# =============================================================================
+
+READ RECORDS
+------------
+
+
+PURPOSE
+-------
+
+Reads the records of a k-mer file in either format, or of a partitioned k-mer
+file.
+
+
+INPUT
+-----
+
+[FILE LOCATION] [location]
+    The location of the k-mer file.
+
+
+RETURN
+------
+
+[TUPLE ITERATOR] [records]
+    The (kmer, count, ...) records of the file, in the order they are stored.
+    The k-mers of a binary file are produced in sorted order. The records of
+    the partitions of a partitioned file are merged in sorted order.
+
+# =============================================================================
+"""
+def readRecords(location):
+
+    if isManifest(location):
+
+        partitions = [
+            readRecords(partition) for partition in readPartitions(location)]
+
+        for record in heapq.merge(*partitions):
+            yield record
+
+        return
+
+    if not isBinary(location):
+
+        with Utility.openInput(location) as inputFile:
+
+            for line in inputFile:
+
+                if line.strip():
+                    yield parseLine(line)
+
+        return
+
+    kmers = KMers(location)
+
+    def decoded():
+
+        for start in range(0, len(kmers.codes), BATCH_SIZE):
+
+            end = start + BATCH_SIZE
+            columns = [column[start:end].tolist() for column in kmers.counts]
+
+            for record in itertools.izip(
+                    Utility.decodeKMers(kmers.codes[start:end], kmers.k),
+                    *columns):
+
+                yield record
+
+    for record in heapq.merge(decoded(), kmers.ambiguous):
+        yield record
+
+
+"""
+# =============================================================================
+
+WRITE RECORDS
+-------------
+
+
+PURPOSE
+-------
+
+Encodes and writes k-mer records with a binary k-mer file writer.
+
+
+INPUT
+-----
+
+[ITERABLE ITERABLE] [records]
+    The (kmer, count, ...) records to write, in sorted order. Every record
+    must have [writer.columns] counts.
+
+[WRITER] [writer]
+    The open binary k-mer file writer.
+
+
+RETURN
+------
+
+[NONE]
+
+# =============================================================================
+"""
+def writeRecords(records, writer):
+
+    records = iter(records)
+
+    while True:
+
+        batch = list(itertools.islice(records, BATCH_SIZE))
+
+        if not batch:
+            break
+
+        kmers = [record[0] for record in batch]
+        codes, valid = Utility.encodeKMers(kmers, writer.k)
+
+        counts = numpy.array(
+            [record[1:] for record in batch],
+            dtype=numpy.uint64).reshape(len(batch), writer.columns)
+
+        writer.write(codes[valid], counts[valid].T)
+
+        for i in numpy.flatnonzero(~valid):
+            writer.writeAmbiguous(kmers[i], batch[i][1:])
+
+
+"""
+# =============================================================================
+
+WRITE
+-----
+
+
+PURPOSE
+-------
+
+Writes k-mer records to a binary k-mer file. The k-mer size is taken from the
+first record when it is not provided.
+
+
+INPUT
+-----
+
+[ITERABLE ITERABLE] [records]
+    The (kmer, count, ...) records to write, in sorted order.
+
+[FILE LOCATION] [location]
+    The location to write the binary k-mer file.
+
+[INT >= 0] [columns]
+    The number of counts of every record.
+
+[1 <= INT <= MAXIMUM_K -- OPTIONAL] [k]
+    The k-mer size.
+
+[STRING -- OPTIONAL] [tag]
+    The organization tag of the k-mers.
+
+
+RETURN
+------
+
+[NONE]
+
+# =============================================================================
+"""
+def write(records, location, columns, k=None, tag=""):
+
+    records = iter(records)
+
+    if k is None:
+
+        first = next(records, None)
+
+        if first is None:
+            k = 0
+
+        else:
+            k = len(first[0])
+            records = itertools.chain([first], records)
+
+    writer = Writer(location, k, columns, tag)
+    writeRecords(records, writer)
+    writer.close()
+
+
+"""
+# =============================================================================
+
+CONCATENATE
+-----------
+
+
+PURPOSE
+-------
+
+Concatenates binary k-mer files, such that every encoded k-mer of a file is
+larger than every encoded k-mer of the files preceding it. This is the case
+for the organized k-mer files of a single genome or aggregation.
+
+
+INPUT
+-----
+
+[(FILE LOCATION) LIST] [inputLocations]
+    The locations of the binary k-mer files to concatenate, in order.
+
+[FILE LOCATION] [outputLocation]
+    The location to write the concatenated binary k-mer file.
+
+
+RETURN
+------
+
+[NONE]
+
+# =============================================================================
+"""
+def concatenate(inputLocations, outputLocation):
+
+    inputs = [KMers(location) for location in inputLocations]
+
+    k = max([kmers.k for kmers in inputs] + [0])
+    columns = max([kmers.columns for kmers in inputs] + [0])
+
+    writer = Writer(outputLocation, k, columns)
+
+    for kmers in inputs:
+
+        for start in range(0, len(kmers.codes), BATCH_SIZE):
+
+            end = start + BATCH_SIZE
+            writer.write(
+                kmers.codes[start:end],
+                [column[start:end] for column in kmers.counts])
+
+    for record in heapq.merge(*[kmers.ambiguous for kmers in inputs]):
+        writer.writeAmbiguous(record[0], record[1:])
+
+    writer.close()
+
+
+"""
+# =============================================================================
+
+CONVERT
+-------
+
+
+PURPOSE
+-------
+
+Converts a k-mer file in either format to the specified format.
+
+
+INPUT
+-----
+
+[FILE LOCATION] [inputLocation]
+    The location of the k-mer file to convert.
+
+[FILE LOCATION] [outputLocation]
+    The location to write the converted k-mer file.
+
+[STRING] [outputFormat]
+    The format of the converted file; one of FORMATS.
+
+
+RETURN
+------
+
+[NONE]
+
+
+POST
+----
+
+The converted k-mer file will be written to the [outputLocation]. Text files
+must be sorted and contain distinct k-mers to be converted to binary.
+
+# =============================================================================
+"""
+def convert(inputLocation, outputLocation, outputFormat):
+
+    if not os.path.isfile(inputLocation):
+        raise RuntimeError(
+            "ERROR: Could not open input file: " + inputLocation + "\n")
+
+    if outputFormat not in FORMATS:
+        raise RuntimeError(
+            "ERROR: Unknown k-mer file format: " + str(outputFormat))
+
+    records = readRecords(inputLocation)
+
+    if outputFormat == FORMAT_TEXT:
+
+        with open(outputLocation, 'w') as outputFile:
+
+            for record in records:
+                outputFile.write(formatLine(record))
+
+        return
+
+    first = next(records, None)
+    columns = len(first) - 1 if first else 0
+
+    write(
+        itertools.chain([first], records) if first else [],
+        outputLocation, columns)
+
+
+"""
+# =============================================================================
+
+PARSE
+
+# =============================================================================
+"""
+def parse(parameters):
+
+    inputLocation = parameters[INPUT]
+    outputLocation = parameters[OUTPUT]
+    outputFormat = parameters[FORMAT]
+
+    convert(inputLocation, outputLocation, outputFormat)
+
+
+"""
+# =============================================================================
+
+MAIN
+
+# =============================================================================
+"""
+def main():
+
+    parser = argparse.ArgumentParser(description=PROGRAM_DESCRIPTION)
+
+    parser.add_argument(
+        INPUT_SHORT,
+        INPUT_LONG,
+        dest=INPUT,
+        help=INPUT_HELP,
+        type=str, required=True)
+
+    parser.add_argument(
+        OUTPUT_SHORT,
+        OUTPUT_LONG,
+        dest=OUTPUT,
+        help=OUTPUT_HELP,
+        type=str, required=True)
+
+    parser.add_argument(
+        FORMAT_SHORT,
+        FORMAT_LONG,
+        dest=FORMAT,
+        help=FORMAT_HELP,
+        type=str, choices=FORMATS, required=True)
+
+    args = parser.parse_args()
+    parameters = vars(args)
+    parse(parameters)
+
+
+"""
+# =============================================================================
+# =============================================================================
+"""
+if __name__ == '__main__':
+
+    main()
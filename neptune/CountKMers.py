@@ -39,6 +39,13 @@ specified. The number of output files is: (4^[organization]). Increasing the
 degree of organization will not speed up k-mer counting. However, it may
 improve the speed of tools which use these k-mers, such as AggregateKMers.
 
+Alternatively, the k-mers may be divided among output files by a file of
+sorted splitter k-mers. When there are S splitters, (S + 1) output files are
+written and output file i contains the k-mers which are no smaller than
+splitter (i - 1) and smaller than splitter i. Splitters chosen by sampling the
+input produce output files of similar size, regardless of the composition of
+the input.
+
 INPUT:
 
 reference.fasta
@@ -56,21 +63,40 @@ reference.kmers.T
 
 Such that all k-mers in reference.kmers.A begin with "A".
 
+OUTPUT (splitters file of 3 k-mers):
+
+reference.kmers.0
+reference.kmers.1
+reference.kmers.2
+reference.kmers.3
+
 script.py -h
-script.py -k K -i INPUT -o OUTPUT [-p ORGANIZATION]
+script.py -k K -i INPUT -o OUTPUT [-p ORGANIZATION] [--engine ENGINE]
+    [--memory-limit MEGABYTES] [--format FORMAT] [--splitters SPLITTERS]
+    [--workers WORKERS] [--compress] [--min-count COUNT] [--presence]
 
 EXAMPLES:
 
 script.py -k 21 -i path/to/reference.FASTA -o path/to/output.kmers
 script.py -k 21 -i reference.FASTA -o output.kmers -p 3
+script.py -k 21 -i reference.FASTA -o output.kmers --engine numpy
+script.py -k 21 -i reference.FASTA -o output.kmers --memory-limit 2048
+script.py -k 21 -i reference.FASTA -o output.kmers --format binary
+script.py -k 21 -i reference.FASTA -o output.kmers --splitters splitters.kmers
 
 # =============================================================================
 """
 
 import argparse
+import heapq
+import itertools
+import multiprocessing
 import os
-import operator
+import tempfile
+
+import numpy
 
+import BinaryKMers
 import Utility
 
 """
@@ -81,14 +107,92 @@ GLOBALS
 # =============================================================================
 """
 
-PROGRAM_DESCRIPTION = "Counts k-mers in a FASTA or multi FASTA file and \
+PROGRAM_DESCRIPTION = "Counts k-mers in a FASTA or FASTQ file and \
     writes them to either one or multiple files. Only the lexicographically \
     smaller of a k-mer and its reverse is reported. The k-mers are reported \
     in sorted order."
 
+# ENGINES
+
+ENGINE_DICTIONARY = "dictionary"
+ENGINE_NUMPY = "numpy"
+ENGINES = [ENGINE_DICTIONARY, ENGINE_NUMPY]
+
+# The largest k-mer that fits in the 64-bit codes of the NumPy engine.
+NUMPY_MAXIMUM_K = 32
+
+# The number of k-mers decoded at once when writing the NumPy engine output.
+DECODE_BATCH_SIZE = 65536
+
+# MEMORY
+
+# The approximate number of bytes of memory used by each k-mer held by the
+# dictionary engine and by each k-mer position held by the NumPy engine,
+# including the temporary arrays created while counting.
+DICTIONARY_BYTES_PER_KMER = 100
+NUMPY_BYTES_PER_KMER = 48
+
+# The number of bytes in a megabyte.
+MEGABYTE = 1048576
+
+# The fraction of the k-mer capacity counted between checks of the memory
+# limit.
+PIECES_PER_CAPACITY = 4
+
+# The suffix of the temporary sorted k-mer run files. Runs of k-mers no larger
+# than BinaryKMers.MAXIMUM_K are written in the binary format, and larger
+# k-mers in the text format.
+RUN_SUFFIX = ".run"
+
+# The largest number of run files opened at once when merging runs.
+MERGE_FAN_IN = 64
+
+# The approximate number of k-mer codes merged at once from binary runs.
+MERGE_BATCH_SIZE = 1048576
+
+# The approximate number of bases between the checkpoints of an input, from
+# which a counting worker may start reading its range of the input.
+CHECKPOINT_SIZE = 65536
+
+# The approximate number of bases of short records, such as reads, joined
+# together and encoded at once by the NumPy engine and the sketch. The joined
+# records are separated by RECORD_SEPARATOR, which never appears within a
+# record.
+RECORD_BATCH_SIZE = 1048576
+RECORD_SEPARATOR = "\n"
+
+# SKETCH
+
+# The count-min sketch of the abundance pre-pass has one row of 16-bit
+# saturating counters for each of these multiply-shift hash multipliers.
+SKETCH_MULTIPLIERS = numpy.array([
+    0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F,
+    0x165667B19E3779F9, 0xD6E8FEB86659FD93], dtype=numpy.uint64)
+SKETCH_MAXIMUM = numpy.iinfo(numpy.uint16).max
+
+# The number of bytes used by the sketch when there is no memory limit, and
+# the fraction of the memory limit used by the sketch otherwise.
+SKETCH_BYTES_DEFAULT = 64 * MEGABYTE
+SKETCH_FRACTION = 4
+
+# The largest number of k-mer codes added to the sketch at once, and the
+# approximate peak number of bytes used for each of them while they are
+# encoded and hashed. Smaller batches are used to stay within a memory limit.
+SKETCH_BATCH_SIZE = 1048576
+SKETCH_BYTES_PER_KMER = 64
+
+# The suffix of the sketch file shared by several workers.
+SKETCH_SUFFIX = ".sketch"
+
 # DEFAULTS
 
 ORGANIZATION_DEFAULT = 0
+ENGINE_DEFAULT = ENGINE_DICTIONARY
+FORMAT_DEFAULT = BinaryKMers.FORMAT_TEXT
+WORKERS_DEFAULT = 1
+COMPRESS_DEFAULT = False
+MIN_COUNT_DEFAULT = 1
+PRESENCE_DEFAULT = False
 
 # ARGUMENTS
 
@@ -101,7 +205,8 @@ SHORT = "-"
 INPUT = "input"
 INPUT_LONG = LONG + INPUT
 INPUT_SHORT = SHORT + "i"
-INPUT_HELP = "The file location of a FASTA file from which to count k-mers."
+INPUT_HELP = "The file location of a FASTA or FASTQ file from which to count \
+    k-mers."
 
 # Output
 OUTPUT = "output"
@@ -129,6 +234,77 @@ ORGANIZATION_HELP = "The degree of k-mer organization in the output files.\
     files directly corresponds to the amount of parallelization in the k-mer \
     aggregation process."
 
+# Engine
+ENGINE = "engine"
+ENGINE_LONG = LONG + ENGINE
+ENGINE_HELP = "The k-mer counting engine. The '" + ENGINE_DICTIONARY + "' \
+    engine counts k-mers one position at a time in a dictionary. The '" + \
+    ENGINE_NUMPY + "' engine computes all the k-mers of a contig with \
+    vectorized operations and counts them by sorting, but is limited to \
+    k-mers no larger than " + str(NUMPY_MAXIMUM_K) + ". The default engine is \
+    '" + ENGINE_DEFAULT + "'."
+
+# Memory Limit
+MEMORY_LIMIT = "memory_limit"
+MEMORY_LIMIT_LONG = LONG + "memory-limit"
+MEMORY_LIMIT_HELP = "The approximate amount of memory, in megabytes, to use \
+    when counting k-mers. When the k-mer table reaches this limit, it is \
+    sorted and written to a temporary run file beside the output, and the \
+    runs are merged into the final output when counting is complete. There is \
+    no limit by default."
+
+# Format
+FORMAT = "format"
+FORMAT_LONG = LONG + FORMAT
+FORMAT_HELP = "The format of the k-mer output files. The '" + \
+    BinaryKMers.FORMAT_BINARY + "' format stores the k-mers as sorted 2-bit \
+    codes with fixed-width counts, which is considerably smaller and faster \
+    to read than the '" + BinaryKMers.FORMAT_TEXT + "' format, but is limited \
+    to k-mers no larger than " + str(BinaryKMers.MAXIMUM_K) + ". The default \
+    format is '" + FORMAT_DEFAULT + "'."
+
+# Splitters
+SPLITTERS = "splitters"
+SPLITTERS_LONG = LONG + SPLITTERS
+SPLITTERS_HELP = "A file of sorted k-mers, one per line, which divide the \
+    k-mers among several output files. When there are S splitters, (S + 1) \
+    output files will be written, numbered from 0. This overrides the degree \
+    of organization."
+
+# Workers
+WORKERS = "workers"
+WORKERS_LONG = LONG + WORKERS
+WORKERS_HELP = "The number of worker processes counting the input. The input \
+    is divided into chunks of similar size, by contig or by sub-ranges of a \
+    contig which overlap by k-1 bases, and the sorted k-mers of every chunk \
+    are merged into the output. The memory limit is divided among the \
+    workers."
+
+# Compress
+COMPRESS = "compress"
+COMPRESS_LONG = LONG + COMPRESS
+COMPRESS_HELP = "Compresses the k-mer output files with gzip. This is only \
+    supported by the '" + BinaryKMers.FORMAT_TEXT + "' format. Compressed \
+    k-mer files are read transparently by the other Neptune programs."
+
+# Minimum count
+MIN_COUNT = "min_count"
+MIN_COUNT_LONG = LONG + "min-count"
+MIN_COUNT_HELP = "The smallest count of a reported k-mer. K-mers observed \
+    fewer times, such as those created by sequencing errors in reads, are \
+    not reported. When k is no larger than " + str(NUMPY_MAXIMUM_K) + ", a \
+    count-min sketch of the input is built first and k-mers which are \
+    certainly rarer than this are never added to the k-mer table. The \
+    default is " + str(MIN_COUNT_DEFAULT) + "."
+
+# Presence
+PRESENCE = "presence"
+PRESENCE_LONG = LONG + PRESENCE
+PRESENCE_HELP = "Records only whether each k-mer is present, rather than its \
+    count. The k-mers are written without a count column, which is all that \
+    is needed to aggregate k-mer files. This cannot be combined with a \
+    minimum count."
+
 """
 # =============================================================================
 
@@ -159,6 +335,12 @@ INPUT
     The degree of organization. This will produce 4^[organization] output
     files.
 
+[BOOL -- OPTIONAL] [compress]
+    Whether to compress the output files with gzip.
+
+[BOOL -- OPTIONAL] [presence]
+    Whether the k-mers are presence records, which are written without a count.
+
 
 RETURN
 ------
@@ -181,7 +363,8 @@ characters (e.g. N).
 
 # =============================================================================
 """
-def writeMultipleFiles(kmers, outputLocation, organization):
+def writeMultipleFiles(
+        kmers, outputLocation, organization, compress=False, presence=False):
 
     outputFiles = {}
     tags = Utility.getAggregationTags(organization)
@@ -190,23 +373,22 @@ def writeMultipleFiles(kmers, outputLocation, organization):
     for tag in tags:
 
         outputName = outputLocation + "." + tag
-        outputFiles[tag] = open(outputName, 'w')
+        outputFiles[tag] = Utility.openOutput(outputName, compress)
 
     # write k-mers to output
     for item in kmers:
 
         kmer = str(item[0])
-        count = str(item[1])
+        line = kmer + "\n" if presence else kmer + " " + str(item[1]) + "\n"
 
         tag = kmer[:organization]
 
         if tag in outputFiles:
-            outputFiles[tag].write(kmer + " " + count + "\n")
+            outputFiles[tag].write(line)
 
         # handle special characters
         else:
-            outputFiles[Utility.AGGREGATE_OTHER].write(
-                kmer + " " + count + "\n")
+            outputFiles[Utility.AGGREGATE_OTHER].write(line)
 
     # close files
     for item in outputFiles:
@@ -236,6 +418,9 @@ INPUT
 [STRING] [outputFile]
     A writable file-like object to write output.
 
+[BOOL -- OPTIONAL] [presence]
+    Whether the k-mers are presence records, which are written without a count.
+
 
 RETURN
 ------
@@ -251,7 +436,15 @@ their [kmers] data structure.
 
 # =============================================================================
 """
-def writeSingleFile(kmers, outputFile):
+def writeSingleFile(kmers, outputFile, presence=False):
+
+    if presence:
+
+        for kmer in kmers:
+
+            outputFile.write(str(kmer[0]) + "\n")
+
+        return
 
     for kmer in kmers:
 
@@ -261,31 +454,209 @@ def writeSingleFile(kmers, outputFile):
 """
 # =============================================================================
 
-COUNT
+WRITE BINARY FILES
+------------------
+
+
+PURPOSE
+-------
+
+Writes the k-mers to one or several binary k-mer files, as determined by the
+degree of organization. The output files are named as they are when writing
+text files.
+
+
+INPUT
 -----
 
+[(STRING, INT) ITERABLE] [kmers]
+    The k-mers to write, in lexicographically sorted order.
+
+[STRING] [outputLocation]
+    The file path to write the output file, or the base file path to write the
+    output files.
+
+[1 <= INT <= BinaryKMers.MAXIMUM_K] [k]
+    The k-mer size.
+
+[INT >= 0] [organization]
+    The degree of organization. When this is larger than 0, this will produce
+    4^[organization] output files and one file for all k-mers which begin with
+    special characters.
+
+[BOOL -- OPTIONAL] [presence]
+    Whether the k-mers are presence records, which are written without a count.
+
+
+RETURN
+------
+
+[NONE]
+
+
+POST
+----
+
+The k-mers will be written to binary k-mer files with one count column, or no
+count columns when the k-mers are presence records.
+
+# =============================================================================
+"""
+def writeBinaryFiles(kmers, outputLocation, k, organization, presence=False):
+
+    columns = 0 if presence else 1
+
+    if organization == 0:
+        BinaryKMers.write(kmers, outputLocation, columns, k)
+        return
+
+    writers = {}
+
+    # initialize output files
+    for tag in Utility.getAggregationTags(organization):
+
+        writers[tag] = BinaryKMers.Writer(
+            outputLocation + "." + tag, k, columns, tag)
+
+    # write k-mers to output
+    for tag, group in itertools.groupby(
+            kmers, key=lambda item: item[0][:organization]):
+
+        writer = writers.get(tag, writers[Utility.AGGREGATE_OTHER])
+        BinaryKMers.writeRecords(group, writer)
+
+    # close files
+    for tag in writers:
+
+        writers[tag].close()
+
+
+"""
+# =============================================================================
+
+WRITE PARTITIONS
+----------------
+
 
 PURPOSE
 -------
 
-Counts the k-mers in a file and outputs the k-mer counts.
+Writes the k-mers to several output files, one for each of the partitions
+defined by the splitters.
 
 
 INPUT
 -----
 
-[FILE LOCATION] [inputLocation]
-    The location of the input in FASTA format.
+[(STRING, INT) ITERABLE] [kmers]
+    The k-mers to write, in lexicographically sorted order.
 
-[FILE LOCATION] [outputLocation]
-    The output location of the k-mer counts.
+[STRING] [outputLocation]
+    The base file path to write the output files.
+
+[STRING LIST] [splitters]
+    The sorted splitters. This will produce (len(splitters) + 1) output files.
+
+[1 <= INT] [k]
+    The k-mer size.
+
+[STRING] [outputFormat]
+    The format of the output files; one of BinaryKMers.FORMATS.
+
+[BOOL -- OPTIONAL] [compress]
+    Whether to compress the text output files with gzip.
+
+[BOOL -- OPTIONAL] [presence]
+    Whether the k-mers are presence records, which are written without a count.
+
+
+RETURN
+------
+
+[NONE]
+
+
+POST
+----
+
+The output files will be named by appending the tags produced by
+Utility.getPartitionTags(...) to the [outputLocation]. Output file i will
+contain the k-mers which are no smaller than splitter (i - 1) and smaller than
+splitter i.
+
+# =============================================================================
+"""
+def writePartitions(
+        kmers, outputLocation, splitters, k, outputFormat, compress=False,
+        presence=False):
+
+    tags = Utility.getPartitionTags(len(splitters) + 1)
+    outputs = []
+    columns = 0 if presence else 1
+
+    # initialize output files
+    for tag in tags:
+
+        outputName = outputLocation + "." + tag
+
+        if outputFormat == BinaryKMers.FORMAT_BINARY:
+            outputs.append(BinaryKMers.Writer(outputName, k, columns, tag))
+
+        else:
+            outputs.append(Utility.openOutput(outputName, compress))
+
+    # write k-mers to output
+    for partition, group in itertools.groupby(
+            kmers, key=lambda item: Utility.getPartition(item[0], splitters)):
+
+        if outputFormat == BinaryKMers.FORMAT_BINARY:
+            BinaryKMers.writeRecords(group, outputs[partition])
+
+        else:
+            writeSingleFile(group, outputs[partition], presence)
+
+    # close files
+    for output in outputs:
+
+        output.close()
+
+
+"""
+# =============================================================================
+
+COUNT SEQUENCE
+--------------
+
+
+PURPOSE
+-------
+
+Counts the canonical k-mers in a single sequence.
+
+The k-mers are encoded as integers using two bits per nucleotide. The forward
+and reverse complement encodings are updated with a rolling shift as the
+sequence is traversed, so the canonical k-mer is simply the smaller of two
+integers. The k-mers which contain characters other than A, C, G, or T cannot
+be encoded and are instead counted by their sequence.
+
+
+INPUT
+-----
+
+[STRING] [sequence]
+    The sequence from which to count k-mers.
 
 [INT >= 1] [k]
     The k-mer size.
 
-[INT >= 0] [organization]
-    The degree of organization. This is responsible for the number of output
-    files.
+[(INT) -> (INT) DICTIONARY or INT SET] [kmers]
+    The k-mer table to update. This maps the encoding of each canonical k-mer
+    to its count. When this is a set, only the encodings of the canonical
+    k-mers are recorded.
+
+[(STRING) -> (INT) DICTIONARY] [ambiguous]
+    The k-mer table to update with k-mers containing characters other than A,
+    C, G, or T. This maps each canonical k-mer sequence to its count.
 
 
 RETURN
@@ -297,122 +668,2569 @@ RETURN
 POST
 ----
 
-The k-mers located in the input will be output to the [outputLocation] in
-sorted order.
+The [kmers] and [ambiguous] tables will be updated with the counts of all the
+canonical k-mers in the [sequence].
 
 # =============================================================================
 """
-def count(inputLocation, outputLocation, k, organization):
+def countSequence(sequence, k, kmers, ambiguous):
 
-    # check input file
-    if not os.path.isfile(inputLocation):
-        raise RuntimeError(
-            "ERROR: Could not open input file: " + inputLocation + "\n")
+    ENCODING = Utility.ENCODING
 
-    inputFile = open(inputLocation, 'r')
+    mask = (1 << (2 * k)) - 1
+    shift = 2 * (k - 1)
 
-    references = Utility.buildReferences(inputFile)
+    forward = 0     # encoding of the current k-mer
+    reverse = 0     # encoding of the reverse complement of the current k-mer
+    valid = 0       # number of consecutive encodable characters
 
-    kmers = {}
+    presence = isinstance(kmers, set)
 
-    # iterate all references
-    for ref in references:
+    for i, character in enumerate(sequence):
 
-        # next reference
-        reference = references[ref]
+        base = ENCODING.get(character)
 
-        # every kmer in reference
-        for i in range(len(reference.strip()) - k + 1):
+        if base is None:
+            valid = 0
 
-            # k-mer and reverse complement
-            kmer = reference[i:i + k]
-            reverse = Utility.reverseComplement(kmer)
+        else:
+            forward = ((forward << 2) | base) & mask
+            reverse = (reverse >> 2) | ((3 - base) << shift)
+            valid += 1
 
-            kmer = min(kmer, reverse)
+        # not yet a complete k-mer
+        if i < k - 1:
+            continue
 
-            if kmer in kmers:
-                kmers[kmer] += 1
+        if valid >= k:
 
-            else:
-                kmers[kmer] = 1
+            code = min(forward, reverse)
 
-    # sort k-mers
-    sortedKMers = sorted(kmers.items(), key=operator.itemgetter(0))
+            if presence:
+                kmers.add(code)
 
-    # write k-mers out
-    if organization == 0:
-        outputFile = open(outputLocation, 'w')
-        writeSingleFile(sortedKMers, outputFile)
-        outputFile.close()
+            else:
+                kmers[code] = kmers.get(code, 0) + 1
 
-    else:
-        writeMultipleFiles(sortedKMers, outputLocation, organization)
+        # the k-mer contains a character that cannot be encoded
+        else:
 
-    # close input file
-    inputFile.close()
+            kmer = sequence[i - k + 1:i + 1]
+            kmer = min(kmer, Utility.reverseComplement(kmer))
+            ambiguous[kmer] = ambiguous.get(kmer, 0) + 1
 
 
 """
 # =============================================================================
 
-PARSE
+TABLE K-MERS
+------------
+
+
+PURPOSE
+-------
+
+Converts the k-mers counted by the dictionary engine into a table of sorted
+codes, as counted by the NumPy engine. The codes of k-mers no larger than
+NUMPY_MAXIMUM_K are held in arrays.
+
+
+INPUT
+-----
+
+[(INT) -> (INT) DICTIONARY or INT SET] [kmers]
+    The table of encoded k-mers and their counts, or the set of encoded k-mers.
+
+[(STRING) -> (INT) DICTIONARY] [ambiguous]
+    The table of k-mers which could not be encoded and their counts.
+
+[INT >= 1] [k]
+    The k-mer size.
+
+
+RETURN
+------
+
+[(UINT64 ARRAY, INT ARRAY, (STRING) -> (INT) DICTIONARY)]
+[(codes, counts, ambiguous)]
+    The sorted and distinct k-mer codes, their counts, and the [ambiguous]
+    k-mers. The [counts] are None when [kmers] is a set. When [k] is larger
+    than NUMPY_MAXIMUM_K, the codes and counts are lists instead of arrays.
 
 # =============================================================================
 """
-def parse(parameters):
+def tableKMers(kmers, ambiguous, k):
 
-    inputLocation = parameters[INPUT]
-    outputLocation = parameters[OUTPUT]
-    k = parameters[KMER]
+    presence = isinstance(kmers, set)
 
-    organization = parameters[ORGANIZATION] \
-        if parameters[ORGANIZATION] else ORGANIZATION_DEFAULT
+    if k > NUMPY_MAXIMUM_K:
+
+        codes = sorted(kmers)
+        counts = None if presence else [kmers[code] for code in codes]
+
+        return codes, counts, ambiguous
+
+    codes = numpy.fromiter(kmers, dtype=numpy.uint64, count=len(kmers))
+    order = numpy.argsort(codes)
 
-    count(inputLocation, outputLocation, k, organization)
+    if presence:
+        return codes[order], None, ambiguous
+
+    counts = numpy.fromiter(
+        kmers.itervalues(), dtype=numpy.int64, count=len(kmers))
+
+    return codes[order], counts[order], ambiguous
 
 
 """
 # =============================================================================
 
-MAIN
+COUNT SEQUENCE VECTORIZED
+-------------------------
+
+
+PURPOSE
+-------
+
+Computes the canonical k-mer codes of every k-mer in a single sequence using
+vectorized operations. This is the NumPy engine counterpart of
+countSequence(...).
+
+The codes of all windows are computed together, one k-mer position at a time,
+rather than one sequence position at a time. Windows which contain characters
+other than A, C, G, or T are masked out of the codes and counted by their
+sequence instead. Windows which span the RECORD_SEPARATOR of joined records
+are not k-mers and are ignored.
+
+
+INPUT
+-----
+
+[STRING] [sequence]
+    The sequence from which to compute k-mers.
+
+[1 <= INT <= NUMPY_MAXIMUM_K] [k]
+    The k-mer size.
+
+[(STRING) -> (INT) DICTIONARY] [ambiguous]
+    The k-mer table to update with k-mers containing characters other than A,
+    C, G, or T. This maps each canonical k-mer sequence to its count. When
+    this is None, these k-mers are ignored.
+
+
+RETURN
+------
+
+[UINT64 ARRAY] [codes]
+    The unsorted canonical k-mer codes of all the encodable k-mers in the
+    [sequence], with one code per occurrence.
+
+
+POST
+----
+
+The [ambiguous] table will be updated with the counts of all canonical k-mers
+that could not be encoded.
 
 # =============================================================================
 """
-def main():
+def countSequenceVectorized(sequence, k, ambiguous):
 
-    # description
-    parser = argparse.ArgumentParser(description=PROGRAM_DESCRIPTION)
+    n = len(sequence) - k + 1
 
-    # input location
-    parser.add_argument(
-        INPUT_SHORT,
-        INPUT_LONG,
-        dest=INPUT,
-        help=INPUT_HELP,
-        type=str, required=True)
+    if n < 1:
+        return numpy.empty(0, dtype=numpy.uint64)
 
-    # output location
-    parser.add_argument(
-        OUTPUT_SHORT,
-        OUTPUT_LONG,
-        dest=OUTPUT,
-        help=OUTPUT_HELP,
-        type=str, required=True)
+    forward, reverse, masked = Utility.encodeWindows(sequence, k)
+    ambiguousWindows = masked if ambiguous is not None else []
 
-    # k-mer size
-    parser.add_argument(
-        KMER_SHORT,
-        KMER_LONG,
-        dest=KMER,
-        help="k-mer size",
-        type=int, required=True)
+    # windows spanning the separator of joined records
+    if ambiguous is not None and RECORD_SEPARATOR in sequence:
 
-    # organization
-    parser.add_argument(
-        ORGANIZATION_LONG,
-        dest=ORGANIZATION,
-        help=ORGANIZATION_HELP,
-        type=int)
+        separators = numpy.frombuffer(sequence, dtype=numpy.uint8) == \
+            ord(RECORD_SEPARATOR)
+        separatorSums = numpy.concatenate(([0], numpy.cumsum(separators)))
+        ambiguousWindows = masked & \
+            ((separatorSums[k:] - separatorSums[:n]) == 0)
+
+    for i in numpy.flatnonzero(ambiguousWindows):
+
+        kmer = sequence[i:i + k]
+        kmer = min(kmer, Utility.reverseComplement(kmer))
+        ambiguous[kmer] = ambiguous.get(kmer, 0) + 1
+
+    return numpy.minimum(forward, reverse)[~masked]
+
+
+"""
+# =============================================================================
+
+SORT K-MERS VECTORIZED
+----------------------
+
+
+PURPOSE
+-------
+
+Produces the k-mers counted by the NumPy engine in lexicographically sorted
+order, converting the encoded k-mers back into their sequences.
+
+
+INPUT
+-----
+
+[UINT64 ARRAY] [codes]
+    The sorted and distinct k-mer codes.
+
+[INT ARRAY] [counts]
+    The counts associated with the [codes], or None to produce presence
+    records.
+
+[(STRING) -> (INT) DICTIONARY] [ambiguous]
+    The table of k-mers which could not be encoded and their counts.
+
+[1 <= INT <= NUMPY_MAXIMUM_K] [k]
+    The k-mer size.
+
+
+RETURN
+------
+
+[(STRING, INT) ITERABLE] [sortedKMers]
+    The k-mers and their counts, in lexicographically sorted order. When
+    [counts] is None, these are (STRING) presence records instead.
+
+# =============================================================================
+"""
+def sortKMersVectorized(codes, counts, ambiguous, k):
+
+    def decoded():
+
+        for start in range(0, len(codes), DECODE_BATCH_SIZE):
+
+            end = start + DECODE_BATCH_SIZE
+            kmers = Utility.decodeKMers(codes[start:end], k)
+
+            if counts is None:
+                items = itertools.izip(kmers)
+
+            else:
+                items = itertools.izip(kmers, counts[start:end].tolist())
+
+            for item in items:
+                yield item
+
+    if not ambiguous:
+        return decoded()
+
+    if counts is None:
+        return heapq.merge(decoded(), ((kmer,) for kmer in sorted(ambiguous)))
+
+    return heapq.merge(decoded(), sorted(ambiguous.iteritems()))
+
+
+"""
+# =============================================================================
+
+SORT TABLE
+----------
+
+
+PURPOSE
+-------
+
+Produces the k-mers of a table of sorted codes in lexicographically sorted
+order, converting the encoded k-mers back into their sequences.
+
+
+INPUT
+-----
+
+[(UINT64 ARRAY, INT ARRAY, (STRING) -> (INT) DICTIONARY)]
+[(codes, counts, ambiguous)]
+    The k-mer table, as produced by tableKMers(...) or countVectorized(...).
+
+[INT >= 1] [k]
+    The k-mer size.
+
+
+RETURN
+------
+
+[(STRING, INT) ITERABLE] [sortedKMers]
+    The k-mers and their counts, in lexicographically sorted order. When the
+    [counts] are None, these are (STRING) presence records instead.
+
+# =============================================================================
+"""
+def sortTable(table, k):
+
+    codes, counts, ambiguous = table
+
+    if isinstance(codes, numpy.ndarray):
+        return sortKMersVectorized(codes, counts, ambiguous, k)
+
+    if counts is None:
+
+        decoded = ((Utility.decodeKMer(code, k),) for code in codes)
+
+        return heapq.merge(decoded, ((kmer,) for kmer in sorted(ambiguous)))
+
+    decoded = (
+        (Utility.decodeKMer(code, k), count)
+        for code, count in itertools.izip(codes, counts))
+
+    return heapq.merge(decoded, sorted(ambiguous.iteritems()))
+
+
+"""
+# =============================================================================
+
+SLICE SEQUENCE
+--------------
+
+
+PURPOSE
+-------
+
+Slices a sequence into overlapping pieces, such that every k-mer of the
+sequence is found in exactly one piece.
+
+
+INPUT
+-----
+
+[STRING] [sequence]
+    The sequence to slice.
+
+[INT >= 1] [k]
+    The k-mer size.
+
+[INT >= 1 -- OPTIONAL] [size]
+    The number of k-mers in each piece. When this is None, the whole sequence
+    is produced as a single piece.
+
+
+RETURN
+------
+
+[STRING ITERATOR] [pieces]
+    The pieces of the sequence. Consecutive pieces overlap by (k - 1)
+    characters.
+
+# =============================================================================
+"""
+def sliceSequence(sequence, k, size):
+
+    if size is None or len(sequence) - k + 1 <= size:
+        yield sequence
+        return
+
+    for start in range(0, len(sequence) - k + 1, size):
+
+        yield sequence[start:start + size + k - 1]
+
+
+"""
+# =============================================================================
+
+CREATE RUN
+----------
+
+
+PURPOSE
+-------
+
+Creates a new and empty temporary run file, located in the same directory as
+the output.
+
+
+INPUT
+-----
+
+[FILE LOCATION] [outputLocation]
+    The output location of the k-mer counts.
+
+
+RETURN
+------
+
+[FILE LOCATION] [runLocation]
+    The location of the created run file.
+
+# =============================================================================
+"""
+def createRun(outputLocation):
+
+    directory, name = os.path.split(os.path.abspath(outputLocation))
+
+    descriptor, runLocation = tempfile.mkstemp(
+        suffix=RUN_SUFFIX, prefix=name + ".", dir=directory)
+
+    os.close(descriptor)
+
+    return runLocation
+
+
+"""
+# =============================================================================
+
+WRITE RUN
+---------
+
+
+PURPOSE
+-------
+
+Writes sorted k-mers to a new temporary run file in the text format, located in
+the same directory as the output.
+
+
+INPUT
+-----
+
+[(STRING, INT) ITERABLE] [kmers]
+    The k-mers and their counts, in lexicographically sorted order.
+
+[FILE LOCATION] [outputLocation]
+    The output location of the k-mer counts.
+
+[BOOL -- OPTIONAL] [presence]
+    Whether the k-mers are presence records, which are written without a count.
+
+
+RETURN
+------
+
+[FILE LOCATION] [runLocation]
+    The location of the written run file.
+
+# =============================================================================
+"""
+def writeRun(kmers, outputLocation, presence=False):
+
+    runLocation = createRun(outputLocation)
+
+    with open(runLocation, 'w') as runFile:
+        writeSingleFile(kmers, runFile, presence)
+
+    return runLocation
+
+
+"""
+# =============================================================================
+
+WRITE TABLE RUN
+---------------
+
+
+PURPOSE
+-------
+
+Writes a table of counted k-mers to a new temporary run file, located in the
+same directory as the output. Tables of k-mer code arrays are written in the
+binary format, without decoding the k-mers, and other tables in the text
+format.
+
+
+INPUT
+-----
+
+[(UINT64 ARRAY, INT ARRAY, (STRING) -> (INT) DICTIONARY)]
+[(codes, counts, ambiguous)]
+    The k-mer table, as produced by tableKMers(...) or countVectorized(...).
+
+[INT >= 1] [k]
+    The k-mer size.
+
+[FILE LOCATION] [outputLocation]
+    The output location of the k-mer counts.
+
+[BOOL -- OPTIONAL] [presence]
+    Whether the k-mers are presence records, which are written without a count.
+
+
+RETURN
+------
+
+[FILE LOCATION] [runLocation]
+    The location of the written run file.
+
+# =============================================================================
+"""
+def writeTableRun(table, k, outputLocation, presence=False):
+
+    codes, counts, ambiguous = table
+
+    if not isinstance(codes, numpy.ndarray):
+        return writeRun(sortTable(table, k), outputLocation, presence)
+
+    runLocation = createRun(outputLocation)
+
+    writer = BinaryKMers.Writer(runLocation, k, 0 if presence else 1)
+    writer.write(codes, [] if presence else [counts])
+
+    for kmer in sorted(ambiguous):
+        writer.writeAmbiguous(kmer, [] if presence else [ambiguous[kmer]])
+
+    writer.close()
+
+    return runLocation
+
+
+"""
+# =============================================================================
+
+READ RUN
+--------
+
+
+PURPOSE
+-------
+
+Reads the k-mers and counts of a run file, in either format.
+
+
+INPUT
+-----
+
+[FILE LOCATION] [runLocation]
+    The location of the run file.
+
+[BOOL -- OPTIONAL] [presence]
+    Whether the run contains presence records, which have no count.
+
+
+RETURN
+------
+
+[(STRING, INT) ITERATOR] [kmers]
+    The k-mers and their counts, or the (STRING) presence records, in the
+    order they appear in the run.
+
+# =============================================================================
+"""
+def readRun(runLocation, presence=False):
+
+    if BinaryKMers.isBinary(runLocation):
+
+        for record in BinaryKMers.readRecords(runLocation):
+            yield record
+
+        return
+
+    with open(runLocation, 'r') as runFile:
+
+        if presence:
+
+            for line in runFile:
+                yield (line.rstrip(),)
+
+            return
+
+        for line in runFile:
+
+            kmer, count = line.split()
+            yield kmer, int(count)
+
+
+"""
+# =============================================================================
+
+MERGE CODES
+-----------
+
+
+PURPOSE
+-------
+
+Merges the encoded k-mers of several binary runs, summing the counts of k-mers
+which appear in more than one run. The codes are merged in windows of about
+MERGE_BATCH_SIZE codes, which are bounded by codes sampled from every run, so
+that the memory used does not grow with the size of the runs.
+
+
+INPUT
+-----
+
+[BinaryKMers.KMers LIST] [runs]
+    The memory-mapped binary runs.
+
+[BOOL -- OPTIONAL] [presence]
+    Whether the runs contain presence records, which have no count.
+
+
+RETURN
+------
+
+[(UINT64 ARRAY, INT64 ARRAY) ITERATOR] [windows]
+    The sorted and distinct codes of each window, and their total counts, in
+    sorted order. The counts are None when [presence] is True.
+
+# =============================================================================
+"""
+def mergeCodes(runs, presence=False):
+
+    empty = numpy.empty(0, dtype=numpy.uint64)
+    step = max(MERGE_BATCH_SIZE // max(len(runs), 1), 1)
+
+    # every run has no more than [step] codes between consecutive boundaries
+    boundaries = numpy.unique(numpy.concatenate(
+        [empty] + [run.codes[step::step] for run in runs]))
+
+    starts = [0] * len(runs)
+
+    for boundary in itertools.chain(boundaries, [None]):
+
+        ends = [
+            len(run.codes) if boundary is None else
+            int(numpy.searchsorted(run.codes, boundary))
+            for run in runs]
+
+        codes = numpy.concatenate([empty] + [
+            run.codes[start:end]
+            for run, start, end in itertools.izip(runs, starts, ends)])
+
+        if len(codes) > 0 and presence:
+            yield numpy.unique(codes), None
+
+        elif len(codes) > 0:
+
+            counts = numpy.concatenate([
+                run.counts[0][start:end].astype(numpy.int64)
+                for run, start, end in itertools.izip(runs, starts, ends)])
+
+            order = numpy.argsort(codes, kind="mergesort")
+            codes = codes[order]
+
+            firsts = numpy.flatnonzero(
+                numpy.concatenate(([True], codes[1:] != codes[:-1])))
+
+            yield codes[firsts], numpy.add.reduceat(counts[order], firsts)
+
+        starts = ends
+
+
+"""
+# =============================================================================
+
+MERGE AMBIGUOUS
+---------------
+
+
+PURPOSE
+-------
+
+Merges the ambiguous k-mers of several binary runs, summing the counts of
+k-mers which appear in more than one run.
+
+
+INPUT
+-----
+
+[BinaryKMers.KMers LIST] [runs]
+    The binary runs.
+
+[BOOL -- OPTIONAL] [presence]
+    Whether the runs contain presence records, which have no count.
+
+
+RETURN
+------
+
+[(STRING) -> (INT) DICTIONARY] [ambiguous]
+    The ambiguous k-mers and their total counts. The counts are 1 when
+    [presence] is True.
+
+# =============================================================================
+"""
+def mergeAmbiguous(runs, presence=False):
+
+    ambiguous = {}
+
+    for run in runs:
+
+        for record in run.ambiguous:
+
+            count = 1 if presence else record[1]
+            ambiguous[record[0]] = ambiguous.get(record[0], 0) + count
+
+    return ambiguous
+
+
+"""
+# =============================================================================
+
+MERGE RUNS
+----------
+
+
+PURPOSE
+-------
+
+Merges several sorted run files into a single sorted sequence of k-mers,
+summing the counts of k-mers which appear in more than one run. Binary runs
+are merged with vectorized operations by mergeCodes(...), and other runs one
+k-mer at a time.
+
+
+INPUT
+-----
+
+[FILE LOCATION LIST] [runLocations]
+    The locations of the run files to merge.
+
+[BOOL -- OPTIONAL] [presence]
+    Whether the runs contain presence records, which have no count.
+
+
+RETURN
+------
+
+[(STRING, INT) ITERATOR] [sortedKMers]
+    The distinct k-mers and their total counts, or their (STRING) presence
+    records, in lexicographically sorted order.
+
+# =============================================================================
+"""
+def mergeRuns(runLocations, presence=False):
+
+    if runLocations and all(
+            BinaryKMers.isBinary(location) for location in runLocations):
+
+        runs = [BinaryKMers.KMers(location) for location in runLocations]
+        k = runs[0].k
+
+        decoded = (
+            record
+            for codes, counts in mergeCodes(runs, presence)
+            for record in sortKMersVectorized(codes, counts, {}, k))
+
+        ambiguous = mergeAmbiguous(runs, presence)
+
+        if not ambiguous:
+            merged = decoded
+
+        elif presence:
+            merged = heapq.merge(
+                decoded, ((kmer,) for kmer in sorted(ambiguous)))
+
+        else:
+            merged = heapq.merge(decoded, sorted(ambiguous.iteritems()))
+
+        for record in merged:
+            yield record
+
+        return
+
+    merged = heapq.merge(
+        *[readRun(location, presence) for location in runLocations])
+
+    for kmer, group in itertools.groupby(merged, key=lambda item: item[0]):
+
+        if presence:
+            yield (kmer,)
+
+        else:
+            yield kmer, sum(item[1] for item in group)
+
+
+"""
+# =============================================================================
+
+MERGE TABLE RUN
+---------------
+
+
+PURPOSE
+-------
+
+Merges several sorted run files into a single new run file. Binary runs are
+merged into a binary run without decoding their k-mers.
+
+
+INPUT
+-----
+
+[FILE LOCATION LIST] [runLocations]
+    The locations of the run files to merge.
+
+[FILE LOCATION] [outputLocation]
+    The output location of the k-mer counts.
+
+[BOOL -- OPTIONAL] [presence]
+    Whether the runs contain presence records, which have no count.
+
+
+RETURN
+------
+
+[FILE LOCATION] [runLocation]
+    The location of the merged run file.
+
+# =============================================================================
+"""
+def mergeTableRun(runLocations, outputLocation, presence=False):
+
+    if not runLocations or not all(
+            BinaryKMers.isBinary(location) for location in runLocations):
+        return writeRun(
+            mergeRuns(runLocations, presence), outputLocation, presence)
+
+    runLocation = createRun(outputLocation)
+    writeBinaryRuns(runLocations, runLocation, presence=presence)
+
+    return runLocation
+
+
+"""
+# =============================================================================
+
+WRITE BINARY RUNS
+-----------------
+
+
+PURPOSE
+-------
+
+Merges several binary run files into a single binary k-mer file, without
+decoding their k-mers.
+
+
+INPUT
+-----
+
+[FILE LOCATION LIST] [runLocations]
+    The locations of the binary run files to merge. There must be at least
+    one.
+
+[FILE LOCATION] [location]
+    The location to write the merged binary k-mer file.
+
+[INT >= 1 -- OPTIONAL] [minCount]
+    The smallest count of a written k-mer.
+
+[BOOL -- OPTIONAL] [presence]
+    Whether the runs contain presence records, which have no count.
+
+
+RETURN
+------
+
+[NONE]
+
+# =============================================================================
+"""
+def writeBinaryRuns(
+        runLocations, location, minCount=MIN_COUNT_DEFAULT, presence=False):
+
+    runs = [BinaryKMers.KMers(runLocation) for runLocation in runLocations]
+    writer = BinaryKMers.Writer(location, runs[0].k, 0 if presence else 1)
+
+    for codes, counts in mergeCodes(runs, presence):
+
+        if presence:
+            writer.write(codes, [])
+
+        else:
+            selected = counts >= minCount
+            writer.write(codes[selected], [counts[selected]])
+
+    ambiguous = mergeAmbiguous(runs, presence)
+
+    for kmer in sorted(ambiguous):
+
+        if presence:
+            writer.writeAmbiguous(kmer, [])
+
+        elif ambiguous[kmer] >= minCount:
+            writer.writeAmbiguous(kmer, [ambiguous[kmer]])
+
+    writer.close()
+
+
+"""
+# =============================================================================
+
+COUNT DICTIONARY
+----------------
+
+
+PURPOSE
+-------
+
+Counts the k-mers of several references with the dictionary engine. When the
+k-mer table would grow beyond its capacity, it is written to a run file and
+counting continues with an empty table.
+
+
+INPUT
+-----
+
+[(STRING, STRING) ITERABLE] [references]
+    The (name, sequence) pairs of the references.
+
+[INT >= 1] [k]
+    The k-mer size.
+
+[INT >= 1 -- OPTIONAL] [capacity]
+    The largest number of k-mers to hold in memory, or None for no limit.
+
+[FILE LOCATION] [outputLocation]
+    The output location of the k-mer counts, beside which runs are written.
+
+[FILE LOCATION LIST] [runs]
+    The list to extend with the locations of written runs.
+
+[BOOL -- OPTIONAL] [presence]
+    Whether to record only the presence of the k-mers, in a set, rather than
+    their counts.
+
+[UINT16 ARRAY -- OPTIONAL] [sketch]
+    A count-min sketch of the input. When provided, the k-mers whose
+    estimated count is smaller than [minCount] are not counted. This requires
+    [k] to be no larger than NUMPY_MAXIMUM_K.
+
+[INT >= 1 -- OPTIONAL] [minCount]
+    The smallest count of a k-mer kept by the [sketch].
+
+
+RETURN
+------
+
+[(UINT64 ARRAY, INT ARRAY, (STRING) -> (INT) DICTIONARY)]
+[(codes, counts, ambiguous)]
+    The table of the k-mers counted since the last run was written, as
+    produced by tableKMers(...).
+
+# =============================================================================
+"""
+def countDictionary(
+        references, k, capacity, outputLocation, runs, presence=False,
+        sketch=None, minCount=MIN_COUNT_DEFAULT):
+
+    kmers = set() if presence else {}
+    ambiguous = {}
+
+    size = max(capacity // PIECES_PER_CAPACITY, 1) if capacity else None
+
+    # the sketch encodes many short records at once
+    if sketch is not None:
+        references = batchRecords(references, RECORD_BATCH_SIZE)
+
+    # iterate all references
+    for name, reference in references:
+
+        for piece in sliceSequence(reference, k, size):
+
+            # the piece may not fit in the table
+            if (capacity and
+                    len(kmers) + len(ambiguous) + len(piece) - k + 1 >
+                    capacity):
+
+                runs.append(writeTableRun(
+                    tableKMers(kmers, ambiguous, k), k, outputLocation,
+                    presence))
+
+                kmers = set() if presence else {}
+                ambiguous = {}
+
+            if sketch is None:
+                countSequence(piece, k, kmers, ambiguous)
+                continue
+
+            # k-mers which are certainly too rare
+            codes = countSequenceVectorized(piece, k, ambiguous)
+            codes = codes[querySketch(sketch, codes) >= minCount].tolist()
+
+            if presence:
+                kmers.update(codes)
+
+            else:
+
+                for code in codes:
+                    kmers[code] = kmers.get(code, 0) + 1
+
+    return tableKMers(kmers, ambiguous, k)
+
+
+"""
+# =============================================================================
+
+BATCH RECORDS
+-------------
+
+
+PURPOSE
+-------
+
+Joins consecutive short records, such as sequencing reads, into larger
+sequences separated by RECORD_SEPARATOR, so that the NumPy engine counts many
+records at once. Records which are at least [size] bases long are produced
+unchanged.
+
+
+INPUT
+-----
+
+[(STRING, STRING) ITERABLE] [references]
+    The (name, sequence) pairs of the records.
+
+[INT >= 1] [size]
+    The approximate number of bases in each batch.
+
+
+RETURN
+------
+
+[(STRING, STRING) ITERATOR] [batches]
+    The (name, sequence) pairs of the batches. The name of a batch is the name
+    of its first record.
+
+# =============================================================================
+"""
+def batchRecords(references, size):
+
+    name = None
+    batch = []
+    pending = 0
+
+    for reference in references:
+
+        if len(reference[1]) >= size:
+            yield reference
+            continue
+
+        if pending + len(reference[1]) > size:
+
+            yield name, RECORD_SEPARATOR.join(batch)
+
+            name = None
+            batch = []
+            pending = 0
+
+        if name is None:
+            name = reference[0]
+
+        batch.append(reference[1])
+        pending += len(reference[1]) + 1
+
+    if batch:
+        yield name, RECORD_SEPARATOR.join(batch)
+
+
+"""
+# =============================================================================
+
+CREATE SKETCH
+-------------
+
+
+PURPOSE
+-------
+
+Creates an empty count-min sketch of canonical k-mer codes.
+
+
+INPUT
+-----
+
+[INT >= 1] [size]
+    The approximate number of bytes to use. The width of the sketch is the
+    largest power of two that fits.
+
+
+RETURN
+------
+
+[UINT16 ARRAY] [sketch]
+    The sketch, with one row of counters for every SKETCH_MULTIPLIERS hash.
+
+# =============================================================================
+"""
+def createSketch(size):
+
+    itemsize = numpy.dtype(numpy.uint16).itemsize
+    width = max(size // (len(SKETCH_MULTIPLIERS) * itemsize), 2)
+    width = 1 << (width.bit_length() - 1)
+
+    return numpy.zeros((len(SKETCH_MULTIPLIERS), width), dtype=numpy.uint16)
+
+
+"""
+# =============================================================================
+
+HASH SKETCH
+-----------
+
+
+PURPOSE
+-------
+
+Hashes k-mer codes to the counters of a row of a count-min sketch, using
+multiply-shift hashing.
+
+
+INPUT
+-----
+
+[UINT16 ARRAY] [sketch]
+    The sketch.
+
+[UINT64 ARRAY] [codes]
+    The k-mer codes.
+
+[INT >= 0] [row]
+    The row of the sketch.
+
+
+RETURN
+------
+
+[INT ARRAY] [indices]
+    The indices of the counters of the [codes] in the [row].
+
+# =============================================================================
+"""
+def hashSketch(sketch, codes, row):
+
+    shift = numpy.uint64(64 - (sketch.shape[1].bit_length() - 1))
+
+    return ((codes * SKETCH_MULTIPLIERS[row]) >> shift).astype(numpy.intp)
+
+
+"""
+# =============================================================================
+
+UPDATE SKETCH
+-------------
+
+
+PURPOSE
+-------
+
+Adds k-mer codes to a count-min sketch. The counters saturate at
+SKETCH_MAXIMUM.
+
+
+INPUT
+-----
+
+[UINT16 ARRAY] [sketch]
+    The sketch to update.
+
+[UINT64 ARRAY] [codes]
+    The k-mer codes, with one code per occurrence.
+
+
+RETURN
+------
+
+[NONE]
+
+
+POST
+----
+
+Every counter of the [sketch] will be increased by the number of [codes]
+hashed to it.
+
+# =============================================================================
+"""
+def updateSketch(sketch, codes):
+
+    # the counts of a row are as large as the whole sketch
+    for row in range(len(sketch)):
+
+        counts = numpy.bincount(
+            hashSketch(sketch, codes, row), minlength=sketch.shape[1])
+
+        counts += sketch[row]
+        sketch[row] = numpy.minimum(counts, SKETCH_MAXIMUM, out=counts)
+
+
+"""
+# =============================================================================
+
+QUERY SKETCH
+------------
+
+
+PURPOSE
+-------
+
+Estimates the counts of k-mer codes with a count-min sketch. The estimates are
+never smaller than the true counts, unless the counters have saturated.
+
+
+INPUT
+-----
+
+[UINT16 ARRAY] [sketch]
+    The sketch.
+
+[UINT64 ARRAY] [codes]
+    The k-mer codes.
+
+
+RETURN
+------
+
+[UINT16 ARRAY] [estimates]
+    The estimated count of each code.
+
+# =============================================================================
+"""
+def querySketch(sketch, codes):
+
+    estimates = sketch[0][hashSketch(sketch, codes, 0)]
+
+    for row in range(1, len(sketch)):
+
+        estimates = numpy.minimum(
+            estimates, sketch[row][hashSketch(sketch, codes, row)])
+
+    return estimates
+
+
+"""
+# =============================================================================
+
+SIZE SKETCH
+-----------
+
+
+PURPOSE
+-------
+
+Determines the size of a count-min sketch and of the batches of k-mer codes
+added to it, such that building the sketch stays within the memory limit.
+
+
+INPUT
+-----
+
+[INT >= 1 -- OPTIONAL] [memoryLimit]
+    The approximate amount of memory, in megabytes, to use while counting, or
+    None for no limit.
+
+
+RETURN
+------
+
+[(INT >= 1, INT >= 1)] [(size, batchSize)]
+    The approximate number of bytes of the sketch, which is a fraction of the
+    [memoryLimit], and the number of codes to add to the sketch at once. The
+    codes fit in the rest of the [memoryLimit], less the counts of a row of
+    the sketch, which are as large as the sketch itself.
+
+# =============================================================================
+"""
+def sizeSketch(memoryLimit):
+
+    if not memoryLimit:
+        return SKETCH_BYTES_DEFAULT, SKETCH_BATCH_SIZE
+
+    memory = memoryLimit * MEGABYTE
+    size = memory // SKETCH_FRACTION
+    batchSize = min(
+        max((memory - 2 * size) // SKETCH_BYTES_PER_KMER, 1),
+        SKETCH_BATCH_SIZE)
+
+    return size, batchSize
+
+
+"""
+# =============================================================================
+
+BUILD SKETCH
+------------
+
+
+PURPOSE
+-------
+
+Builds a count-min sketch of the canonical k-mers of an input, in a single
+pass over the input.
+
+
+INPUT
+-----
+
+[FILE LOCATION] [inputLocation]
+    The location of the input in FASTA or FASTQ format.
+
+[1 <= INT <= NUMPY_MAXIMUM_K] [k]
+    The k-mer size.
+
+[INT >= 1] [size]
+    The approximate number of bytes to use for the sketch.
+
+[INT >= 1 -- OPTIONAL] [batchSize]
+    The largest number of codes to add to the sketch at once.
+
+
+RETURN
+------
+
+[UINT16 ARRAY] [sketch]
+    The sketch of the codes of all the encodable k-mers of the input.
+
+# =============================================================================
+"""
+def buildSketch(inputLocation, k, size, batchSize=SKETCH_BATCH_SIZE):
+
+    sketch = createSketch(size)
+    codes = []
+    pending = 0
+
+    with Utility.openInput(inputLocation) as inputFile:
+
+        references = batchRecords(
+            Utility.readSequences(inputFile),
+            min(RECORD_BATCH_SIZE, batchSize))
+
+        for name, reference in references:
+
+            for piece in sliceSequence(reference, k, batchSize):
+
+                # the piece does not fit with the pending codes
+                if codes and pending + len(piece) - k + 1 > batchSize:
+
+                    codes = numpy.concatenate(codes)
+                    updateSketch(sketch, codes)
+                    codes = []
+                    pending = 0
+
+                codes.append(countSequenceVectorized(piece, k, None))
+                pending += len(codes[-1])
+
+    if codes:
+        updateSketch(sketch, numpy.concatenate(codes))
+
+    return sketch
+
+
+"""
+# =============================================================================
+
+WRITE SKETCH
+------------
+
+
+PURPOSE
+-------
+
+Writes a count-min sketch to a temporary file, located in the same directory
+as the output, so that several workers may share it. The file may be loaded
+with numpy.load(...).
+
+
+INPUT
+-----
+
+[UINT16 ARRAY] [sketch]
+    The sketch.
+
+[FILE LOCATION] [outputLocation]
+    The output location of the k-mer counts.
+
+
+RETURN
+------
+
+[FILE LOCATION] [sketchLocation]
+    The location of the written sketch file.
+
+# =============================================================================
+"""
+def writeSketch(sketch, outputLocation):
+
+    directory, name = os.path.split(os.path.abspath(outputLocation))
+
+    descriptor, sketchLocation = tempfile.mkstemp(
+        suffix=SKETCH_SUFFIX, prefix=name + ".", dir=directory)
+
+    with os.fdopen(descriptor, "wb") as sketchFile:
+        numpy.save(sketchFile, sketch)
+
+    return sketchLocation
+
+
+"""
+# =============================================================================
+
+COUNT VECTORIZED
+----------------
+
+
+PURPOSE
+-------
+
+Counts the k-mers of several references with the NumPy engine. When the
+pending k-mer codes would grow beyond their capacity, they are counted and
+written to a run file, and counting continues with no pending codes.
+
+When only the presence of the k-mers is recorded, the pending codes are first
+reduced to their distinct codes, and a run is only written when the distinct
+codes still fill more than half of the capacity.
+
+
+INPUT
+-----
+
+[(STRING, STRING) ITERABLE] [references]
+    The (name, sequence) pairs of the references.
+
+[1 <= INT <= NUMPY_MAXIMUM_K] [k]
+    The k-mer size.
+
+[INT >= 1 -- OPTIONAL] [capacity]
+    The largest number of k-mer positions to hold in memory, or None for no
+    limit.
+
+[FILE LOCATION] [outputLocation]
+    The output location of the k-mer counts, beside which runs are written.
+
+[FILE LOCATION LIST] [runs]
+    The list to extend with the locations of written runs.
+
+[UINT16 ARRAY -- OPTIONAL] [sketch]
+    A count-min sketch of the input. When provided, the k-mers whose
+    estimated count is smaller than [minCount] are not counted.
+
+[INT >= 1 -- OPTIONAL] [minCount]
+    The smallest count of a k-mer kept by the [sketch].
+
+[BOOL -- OPTIONAL] [presence]
+    Whether to record only the presence of the k-mers rather than their counts.
+
+
+RETURN
+------
+
+[(UINT64 ARRAY, INT ARRAY, (STRING) -> (INT) DICTIONARY)]
+[(codes, counts, ambiguous)]
+    The sorted and distinct codes of the k-mers counted since the last run was
+    written, their counts, and the k-mers which could not be encoded. The
+    [counts] are None when [presence] is True.
+
+# =============================================================================
+"""
+def countVectorized(
+        references, k, capacity, outputLocation, runs, sketch=None,
+        minCount=MIN_COUNT_DEFAULT, presence=False):
+
+    codes = [numpy.empty(0, dtype=numpy.uint64)]
+    ambiguous = {}
+    pending = 0
+
+    size = max(capacity // PIECES_PER_CAPACITY, 1) if capacity else None
+
+    # iterate all references, joining short records together
+    for name, reference in batchRecords(references, RECORD_BATCH_SIZE):
+
+        for piece in sliceSequence(reference, k, size):
+
+            fits = not capacity or \
+                pending + len(ambiguous) + len(piece) - k + 1 <= capacity
+
+            # discard repeated codes, leaving room for more pieces
+            if not fits and presence:
+
+                codes = [numpy.unique(numpy.concatenate(codes))]
+                pending = len(codes[0])
+                fits = pending + len(ambiguous) <= capacity // 2
+
+            # the piece does not fit with the pending codes
+            if not fits:
+
+                if presence:
+                    unique, counts = codes[0], None
+
+                else:
+                    unique, counts = numpy.unique(
+                        numpy.concatenate(codes), return_counts=True)
+
+                runs.append(writeTableRun(
+                    (unique, counts, ambiguous), k, outputLocation, presence))
+
+                codes = [numpy.empty(0, dtype=numpy.uint64)]
+                ambiguous = {}
+                pending = 0
+
+            pieceCodes = countSequenceVectorized(piece, k, ambiguous)
+
+            # k-mers which are certainly too rare
+            if sketch is not None:
+                pieceCodes = pieceCodes[
+                    querySketch(sketch, pieceCodes) >= minCount]
+
+            codes.append(pieceCodes)
+            pending += len(codes[-1])
+
+    if presence:
+        return numpy.unique(numpy.concatenate(codes)), None, ambiguous
+
+    codes, counts = numpy.unique(
+        numpy.concatenate(codes), return_counts=True)
+
+    return codes, counts, ambiguous
+
+
+"""
+# =============================================================================
+
+COUNT REFERENCES
+----------------
+
+
+PURPOSE
+-------
+
+Counts the k-mers of several references with the requested engine, writing
+sorted runs when the memory limit is reached.
+
+
+INPUT
+-----
+
+[(STRING, STRING) ITERABLE] [references]
+    The (name, sequence) pairs of the references.
+
+[INT >= 1] [k]
+    The k-mer size.
+
+[STRING] [engine]
+    The counting engine; one of ENGINES. The NumPy engine falls back to the
+    dictionary engine when [k] is larger than NUMPY_MAXIMUM_K.
+
+[INT >= 1 -- OPTIONAL] [memoryLimit]
+    The approximate amount of memory, in megabytes, to use while counting, or
+    None for no limit.
+
+[FILE LOCATION] [outputLocation]
+    The output location of the k-mer counts, beside which runs are written.
+
+[FILE LOCATION LIST] [runs]
+    The list to extend with the locations of written runs.
+
+[UINT16 ARRAY -- OPTIONAL] [sketch]
+    A count-min sketch of the input, used to skip k-mers whose estimated count
+    is smaller than [minCount]. This requires [k] to be no larger than
+    NUMPY_MAXIMUM_K.
+
+[INT >= 1 -- OPTIONAL] [minCount]
+    The smallest count of a k-mer kept by the [sketch].
+
+[BOOL -- OPTIONAL] [presence]
+    Whether to record only the presence of the k-mers rather than their counts.
+
+
+RETURN
+------
+
+[(UINT64 ARRAY, INT ARRAY, (STRING) -> (INT) DICTIONARY)]
+[(codes, counts, ambiguous)]
+    The table of the k-mers counted since the last run was written, which may
+    be written with writeTableRun(...) or sorted with sortTable(...). The
+    [counts] are None when [presence] is True.
+
+# =============================================================================
+"""
+def countReferences(
+        references, k, engine, memoryLimit, outputLocation, runs,
+        sketch=None, minCount=MIN_COUNT_DEFAULT, presence=False):
+
+    # NumPy engine
+    if engine == ENGINE_NUMPY and k <= NUMPY_MAXIMUM_K:
+
+        capacity = (memoryLimit * MEGABYTE // NUMPY_BYTES_PER_KMER) \
+            if memoryLimit else None
+
+        return countVectorized(
+            references, k, capacity, outputLocation, runs, sketch, minCount,
+            presence)
+
+    # dictionary engine
+    else:
+
+        capacity = (memoryLimit * MEGABYTE // DICTIONARY_BYTES_PER_KMER) \
+            if memoryLimit else None
+
+        return countDictionary(
+            references, k, capacity, outputLocation, runs, presence, sketch,
+            minCount)
+
+
+"""
+# =============================================================================
+
+INDEX POSITIONS
+---------------
+
+
+PURPOSE
+-------
+
+Counts the k-mer positions in a FASTA or FASTQ file and records checkpoints
+from which the records of the file may be read without reading the file from
+its start. This is the number of k-mers in the file, including repeated
+k-mers. The positions are numbered consecutively through all the records.
+
+A checkpoint is recorded about every CHECKPOINT_SIZE bases, at the start of a
+record or, for FASTA files, at the start of a sequence line within a record.
+The first checkpoint is always the start of the file.
+
+
+INPUT
+-----
+
+[FILE LOCATION] [inputLocation]
+    The location of the input in FASTA or FASTQ format.
+
+[INT >= 1] [k]
+    The k-mer size.
+
+
+RETURN
+------
+
+[(INT, (INT, INT, STRING, INT) LIST)] [(positions, checkpoints)]
+    The number of k-mer positions in all the records of the file, and the
+    (position, offset, name, base) checkpoints of the file, in file order. The
+    [offset] is the position of the checkpoint in the uncompressed file and
+    the [position] is the first k-mer position of the record containing it.
+    When the checkpoint is within a record, the [name] is the name of the
+    record and the [base] is the number of bases of the record preceding the
+    checkpoint. Otherwise, the [name] is None and the [base] is 0.
+
+RuntimeError if the input file does not exist.
+
+# =============================================================================
+"""
+def indexPositions(inputLocation, k):
+
+    if not os.path.isfile(inputLocation):
+        raise RuntimeError(
+            "ERROR: Could not open input file: " + inputLocation + "\n")
+
+    positions = 0       # k-mer positions of the records preceding the record
+    bases = 0           # bases of all the records read
+    last = 0            # bases read at the last checkpoint
+    checkpoints = [(0, 0, None, 0)]
+
+    fastq = None        # whether the file is a FASTQ file
+    name = None         # name of the current FASTA record
+    length = None       # bases of the current record, or None between records
+    quality = None      # quality bases of the current FASTQ record
+
+    offset = 0
+
+    with Utility.openInput(inputLocation) as inputFile:
+
+        for block in Utility.readLineBlocks(inputFile):
+
+            lines = block.split("\n")
+
+            # the terminator of the last line
+            if not lines[-1]:
+                lines.pop()
+
+            for line in lines:
+
+                if fastq is None and line.strip():
+                    fastq = line[:1] == "@"
+
+                # FASTQ record header
+                if fastq and length is None:
+
+                    if line[:1] == "@":
+
+                        if bases - last >= CHECKPOINT_SIZE:
+                            checkpoints.append((positions, offset, None, 0))
+                            last = bases
+
+                        length = 0
+
+                # FASTQ sequence and quality lines
+                elif fastq:
+
+                    if quality is None and line[:1] == "+":
+                        quality = 0
+
+                    elif quality is None:
+                        length += len(line.strip())
+
+                    else:
+                        quality += len(line.strip())
+
+                    # end of record
+                    if quality is not None and quality >= length:
+
+                        positions += max(length - k + 1, 0)
+                        bases += length
+                        length = None
+                        quality = None
+
+                # FASTA record header
+                elif line[:1] == ">":
+
+                    if length is not None:
+                        positions += max(length - k + 1, 0)
+
+                    if bases - last >= CHECKPOINT_SIZE:
+                        checkpoints.append((positions, offset, None, 0))
+                        last = bases
+
+                    tokens = (line[1:]).split()
+                    name = tokens[0] if tokens else ""
+                    length = 0
+
+                # FASTA sequence line
+                elif length is not None:
+
+                    if bases - last >= CHECKPOINT_SIZE:
+                        checkpoints.append((positions, offset, name, length))
+                        last = bases
+
+                    length += len(line.strip())
+                    bases += len(line.strip())
+
+                offset += len(line) + 1
+
+    if not fastq and length is not None:
+        positions += max(length - k + 1, 0)
+
+    return positions, checkpoints
+
+
+"""
+# =============================================================================
+
+GET RANGES
+----------
+
+
+PURPOSE
+-------
+
+Divides the k-mer positions of an input into contiguous ranges of similar size.
+
+
+INPUT
+-----
+
+[INT >= 0] [positions]
+    The number of k-mer positions in the input.
+
+[INT >= 1] [chunks]
+    The largest number of ranges.
+
+
+RETURN
+------
+
+[(INT, INT) LIST] [ranges]
+    The non-empty [start, end) ranges of k-mer positions, in order. There are
+    no ranges when there are no positions.
+
+# =============================================================================
+"""
+def getRanges(positions, chunks):
+
+    size = max(-(-positions // chunks), 1)
+
+    return [
+        (start, min(start + size, positions))
+        for start in range(0, positions, size)]
+
+
+"""
+# =============================================================================
+
+LOCATE RANGE
+------------
+
+
+PURPOSE
+-------
+
+Locates the part of an input containing a range of k-mer positions, using the
+checkpoints of the input.
+
+
+INPUT
+-----
+
+[(INT, INT, STRING, INT) LIST] [checkpoints]
+    The checkpoints of the input, as produced by indexPositions(...).
+
+[INT >= 1] [k]
+    The k-mer size.
+
+[INT >= 0] [start]
+    The first k-mer position of the range.
+
+[INT >= 0] [end]
+    The k-mer position following the range.
+
+
+RETURN
+------
+
+[((INT, INT, STRING, INT), INT)] [(checkpoint, stop)]
+    The last checkpoint preceding every k-mer of the range, from which the
+    range may be read, and the offset at which reading may stop, or None when
+    the range must be read to the end of the input.
+
+# =============================================================================
+"""
+def locateRange(checkpoints, k, start, end):
+
+    # the latest checkpoint preceding the first k-mer of the range
+    first = max(
+        index for index, (position, offset, name, base)
+        in enumerate(checkpoints) if position + base <= start)
+
+    for position, offset, name, base in checkpoints[first + 1:]:
+
+        # the checkpoint follows every base of the range
+        if (name is None and position >= end) or \
+                (name is not None and position + base >= end + k - 1):
+            return checkpoints[first], offset
+
+    return checkpoints[first], None
+
+
+"""
+# =============================================================================
+
+SLICE RANGE
+-----------
+
+
+PURPOSE
+-------
+
+Selects the parts of several references containing a range of k-mer positions.
+The positions are numbered consecutively through all the references, and the
+selected part of a reference extends k-1 bases beyond its last position.
+
+The first reference may be the remainder of a record, when reading started at
+a checkpoint within the record.
+
+
+INPUT
+-----
+
+[(STRING, STRING) ITERABLE] [references]
+    The (name, sequence) pairs of the references.
+
+[INT >= 1] [k]
+    The k-mer size.
+
+[INT >= 0] [start]
+    The first k-mer position of the range.
+
+[INT >= 0] [end]
+    The k-mer position following the range.
+
+[INT >= 0 -- OPTIONAL] [offset]
+    The first k-mer position of the first reference.
+
+[INT >= 0 -- OPTIONAL] [base]
+    The number of bases of the first record preceding its first reference.
+
+
+RETURN
+------
+
+[(STRING, STRING) ITERATOR] [pieces]
+    The (name, sequence) pairs of the reference parts within the range.
+
+# =============================================================================
+"""
+def sliceRange(references, k, start, end, offset=0, base=0):
+
+    for name, sequence in references:
+
+        if offset >= end:
+            return
+
+        positions = max(base + len(sequence) - k + 1, 0)
+
+        first = max(start - offset, base)
+        last = min(end - offset, positions)
+
+        if first < last:
+            yield name, sequence[first - base:last - base + k - 1]
+
+        offset += positions
+        base = 0
+
+
+"""
+# =============================================================================
+
+COUNT RANGE
+-----------
+
+
+PURPOSE
+-------
+
+Counts the k-mers of a range of k-mer positions in a FASTA or FASTQ file and
+writes them to sorted runs. This is the work of a single counting worker. Only
+the part of the input between the [checkpoint] and the [stop] is read.
+
+
+INPUT
+-----
+
+[FILE LOCATION] [inputLocation]
+    The location of the input in FASTA or FASTQ format.
+
+[FILE LOCATION] [outputLocation]
+    The output location of the k-mer counts, beside which runs are written.
+
+[INT >= 1] [k]
+    The k-mer size.
+
+[STRING] [engine]
+    The counting engine; one of ENGINES.
+
+[INT >= 1 -- OPTIONAL] [memoryLimit]
+    The approximate amount of memory, in megabytes, to use while counting, or
+    None for no limit.
+
+[INT >= 0] [start]
+    The first k-mer position of the range.
+
+[INT >= 0] [end]
+    The k-mer position following the range.
+
+[BOOL -- OPTIONAL] [presence]
+    Whether to record only the presence of the k-mers rather than their counts.
+
+[(INT, INT, STRING, INT) -- OPTIONAL] [checkpoint]
+    The checkpoint from which to read the range, as produced by
+    locateRange(...), or None to read from the start of the input.
+
+[INT >= 0 -- OPTIONAL] [stop]
+    The offset at which to stop reading, or None to read to the end of the
+    input.
+
+[FILE LOCATION -- OPTIONAL] [sketchLocation]
+    The location of a count-min sketch of the whole input, as written by
+    writeSketch(...), or None. The sketch is memory-mapped, so that several
+    workers share it.
+
+[INT >= 1 -- OPTIONAL] [minCount]
+    The smallest count of a k-mer kept by the sketch.
+
+
+RETURN
+------
+
+[FILE LOCATION LIST] [runs]
+    The locations of the sorted runs containing the k-mers of the range.
+
+# =============================================================================
+"""
+def countRange(
+        inputLocation, outputLocation, k, engine, memoryLimit, start, end,
+        presence=False, checkpoint=None, stop=None, sketchLocation=None,
+        minCount=MIN_COUNT_DEFAULT):
+
+    position, offset, name, base = checkpoint if checkpoint else \
+        (0, 0, None, 0)
+
+    sketch = numpy.load(sketchLocation, mmap_mode="r") \
+        if sketchLocation else None
+
+    limit = stop - offset if stop is not None else None
+
+    runs = []
+    success = False
+
+    try:
+
+        with Utility.openInput(inputLocation) as inputFile:
+
+            inputFile.seek(offset)
+
+            # continue the record containing the checkpoint
+            if name is not None:
+                references = Utility.parseFASTA(itertools.chain(
+                    [">" + name], Utility.readLines(inputFile, limit)))
+
+            else:
+                references = Utility.readSequences(inputFile, limit)
+
+            table = countReferences(
+                sliceRange(references, k, start, end, position, base), k,
+                engine, memoryLimit, outputLocation, runs, sketch, minCount,
+                presence)
+
+            runs.append(writeTableRun(table, k, outputLocation, presence))
+
+        success = True
+
+    finally:
+
+        # remove the runs of a failed range
+        if not success:
+
+            for runLocation in runs:
+                os.remove(runLocation)
+
+    return runs
+
+
+"""
+# =============================================================================
+
+WRITE K-MERS
+------------
+
+
+PURPOSE
+-------
+
+Writes sorted k-mers to the output files.
+
+
+INPUT
+-----
+
+[(STRING, INT) ITERABLE] [sortedKMers]
+    The k-mers and their counts, in lexicographically sorted order.
+
+[FILE LOCATION] [outputLocation]
+    The output location of the k-mer counts.
+
+[INT >= 1] [k]
+    The k-mer size.
+
+[INT >= 0] [organization]
+    The degree of organization.
+
+[STRING] [outputFormat]
+    The format of the output files; one of BinaryKMers.FORMATS.
+
+[STRING LIST -- OPTIONAL] [splitters]
+    The sorted splitters dividing the k-mers among several output files, or
+    None.
+
+[BOOL -- OPTIONAL] [compress]
+    Whether to compress the text output files with gzip.
+
+[INT >= 1 -- OPTIONAL] [minCount]
+    The smallest count of a written k-mer.
+
+[BOOL -- OPTIONAL] [presence]
+    Whether the k-mers are presence records, which are written without a count.
+
+
+RETURN
+------
+
+[NONE]
+
+
+POST
+----
+
+The k-mers with counts of at least [minCount] will be written to the
+[outputLocation].
+
+# =============================================================================
+"""
+def writeKMers(
+        sortedKMers, outputLocation, k, organization, outputFormat,
+        splitters, compress=False, minCount=MIN_COUNT_DEFAULT,
+        presence=False):
+
+    if minCount > 1 and not presence:
+        sortedKMers = (item for item in sortedKMers if item[1] >= minCount)
+
+    if splitters is not None:
+        writePartitions(
+            sortedKMers, outputLocation, splitters, k, outputFormat, compress,
+            presence)
+
+    elif outputFormat == BinaryKMers.FORMAT_BINARY:
+        writeBinaryFiles(
+            sortedKMers, outputLocation, k, organization, presence)
+
+    elif organization == 0:
+        outputFile = Utility.openOutput(outputLocation, compress)
+        writeSingleFile(sortedKMers, outputFile, presence)
+        outputFile.close()
+
+    else:
+        writeMultipleFiles(
+            sortedKMers, outputLocation, organization, compress, presence)
+
+
+"""
+# =============================================================================
+
+MERGE OUTPUT
+------------
+
+
+PURPOSE
+-------
+
+Merges sorted runs into the output files. No more than MERGE_FAN_IN runs are
+opened at once; larger numbers of runs are first merged into intermediate
+runs. Binary runs written to a single binary output file are merged without
+decoding their k-mers.
+
+
+INPUT
+-----
+
+[FILE LOCATION LIST] [runs]
+    The locations of the sorted runs.
+
+[FILE LOCATION] [outputLocation]
+    The output location of the k-mer counts.
+
+[INT >= 1] [k]
+    The k-mer size.
+
+[INT >= 0] [organization]
+    The degree of organization.
+
+[STRING] [outputFormat]
+    The format of the output files; one of BinaryKMers.FORMATS.
+
+[STRING LIST -- OPTIONAL] [splitters]
+    The sorted splitters dividing the k-mers among several output files, or
+    None.
+
+[BOOL -- OPTIONAL] [compress]
+    Whether to compress the text output files with gzip.
+
+[INT >= 1 -- OPTIONAL] [minCount]
+    The smallest count of a written k-mer.
+
+[BOOL -- OPTIONAL] [presence]
+    Whether the runs contain presence records, which have no count.
+
+
+RETURN
+------
+
+[NONE]
+
+
+POST
+----
+
+The merged k-mers will be written to the [outputLocation]. The runs will have
+been removed and the [runs] list will be empty.
+
+# =============================================================================
+"""
+def mergeOutput(
+        runs, outputLocation, k, organization, outputFormat, splitters,
+        compress=False, minCount=MIN_COUNT_DEFAULT, presence=False):
+
+    try:
+
+        # bound the number of runs opened at once
+        while len(runs) > MERGE_FAN_IN:
+
+            merged = runs[:MERGE_FAN_IN]
+            runs[:] = runs[MERGE_FAN_IN:] + [
+                mergeTableRun(merged, outputLocation, presence)]
+
+            for runLocation in merged:
+                os.remove(runLocation)
+
+        # merge binary runs into a single binary file without decoding them
+        if outputFormat == BinaryKMers.FORMAT_BINARY and organization == 0 \
+                and splitters is None and runs and all(
+                    BinaryKMers.isBinary(location) for location in runs):
+            writeBinaryRuns(runs, outputLocation, minCount, presence)
+
+        else:
+            writeKMers(
+                mergeRuns(runs, presence), outputLocation, k, organization,
+                outputFormat, splitters, compress, minCount, presence)
+
+    finally:
+
+        # remove runs
+        for runLocation in runs:
+            os.remove(runLocation)
+
+        del runs[:]
+
+
+"""
+# =============================================================================
+
+COUNT
+-----
+
+
+PURPOSE
+-------
+
+Counts the k-mers in a file and outputs the k-mer counts.
+
+
+INPUT
+-----
+
+[FILE LOCATION] [inputLocation]
+    The location of the input in FASTA format.
+
+[FILE LOCATION] [outputLocation]
+    The output location of the k-mer counts.
+
+[INT >= 1] [k]
+    The k-mer size.
+
+[INT >= 0] [organization]
+    The degree of organization. This is responsible for the number of output
+    files.
+
+[STRING -- OPTIONAL] [engine]
+    The counting engine; one of ENGINES. The NumPy engine falls back to the
+    dictionary engine when [k] is larger than NUMPY_MAXIMUM_K.
+
+[INT >= 1 -- OPTIONAL] [memoryLimit]
+    The approximate amount of memory, in megabytes, to use while counting, or
+    None for no limit. When the limit is reached, the counted k-mers are
+    written to temporary sorted runs, which are merged into the output.
+
+[STRING -- OPTIONAL] [outputFormat]
+    The format of the output files; one of BinaryKMers.FORMATS.
+
+[STRING LIST -- OPTIONAL] [splitters]
+    The sorted splitters dividing the k-mers among several output files. When
+    these are provided, the degree of [organization] is ignored.
+
+[INT >= 1 -- OPTIONAL] [workers]
+    The number of worker processes. When there is more than one worker, the
+    k-mer positions of the input are divided into ranges which are counted
+    by separate processes, each reading only its part of the input, and their
+    sorted runs are merged into the output. The [memoryLimit] is divided among
+    the workers.
+
+[BOOL -- OPTIONAL] [compress]
+    Whether to compress the output files with gzip. This requires the text
+    [outputFormat].
+
+[INT >= 1 -- OPTIONAL] [minCount]
+    The smallest count of a reported k-mer. When this is larger than 1 and [k]
+    is no larger than NUMPY_MAXIMUM_K, a count-min sketch of the input is
+    built first, and k-mers whose estimated count is smaller than [minCount]
+    are never added to the k-mer table. The sketch, and the batches of k-mers
+    added to it, fit within the [memoryLimit]. The sketch is shared by all
+    the workers, and uses a fraction of the [memoryLimit].
+
+[BOOL -- OPTIONAL] [presence]
+    Whether to record only the presence of the k-mers rather than their
+    counts. The k-mers are then written without a count column. This cannot
+    be combined with a [minCount] larger than 1.
+
+
+RETURN
+------
+
+[NONE]
+
+
+POST
+----
+
+The k-mers located in the input will be output to the [outputLocation] in
+sorted order. Any temporary run files will have been removed.
+
+# =============================================================================
+"""
+def count(
+        inputLocation, outputLocation, k, organization,
+        engine=ENGINE_DEFAULT, memoryLimit=None,
+        outputFormat=FORMAT_DEFAULT, splitters=None, workers=WORKERS_DEFAULT,
+        compress=COMPRESS_DEFAULT, minCount=MIN_COUNT_DEFAULT,
+        presence=PRESENCE_DEFAULT):
+
+    # check input file
+    if not os.path.isfile(inputLocation):
+        raise RuntimeError(
+            "ERROR: Could not open input file: " + inputLocation + "\n")
+
+    if engine not in ENGINES:
+        raise RuntimeError("ERROR: Unknown counting engine: " + str(engine))
+
+    if memoryLimit is not None and memoryLimit < 1:
+        raise RuntimeError("ERROR: The memory limit is out of range.")
+
+    if outputFormat not in BinaryKMers.FORMATS:
+        raise RuntimeError(
+            "ERROR: Unknown k-mer file format: " + str(outputFormat))
+
+    if (outputFormat == BinaryKMers.FORMAT_BINARY and
+            k > BinaryKMers.MAXIMUM_K):
+        raise RuntimeError(
+            "ERROR: The k-mer size is too large for the binary format.")
+
+    if workers < 1:
+        raise RuntimeError("ERROR: The number of workers is out of range.")
+
+    if compress and outputFormat == BinaryKMers.FORMAT_BINARY:
+        raise RuntimeError(
+            "ERROR: Compression is only supported by the text format.")
+
+    if minCount < 1:
+        raise RuntimeError("ERROR: The minimum count is out of range.")
+
+    if presence and minCount > 1:
+        raise RuntimeError(
+            "ERROR: A minimum count requires the k-mer counts.")
+
+    positions, checkpoints = indexPositions(inputLocation, k) \
+        if workers > 1 else (0, [])
+
+    ranges = getRanges(positions, workers)
+
+    sketch = None
+    sketchLocation = None
+
+    # abundance pre-pass
+    if minCount > 1 and minCount <= SKETCH_MAXIMUM and k <= NUMPY_MAXIMUM_K:
+
+        sketchSize, batchSize = sizeSketch(memoryLimit)
+
+        memoryLimit = max(memoryLimit - sketchSize // MEGABYTE, 1) \
+            if memoryLimit else None
+
+        sketch = buildSketch(inputLocation, k, sketchSize, batchSize)
+
+    runs = []
+
+    try:
+
+        # several workers
+        if len(ranges) > 1:
+
+            workerLimit = max(memoryLimit // len(ranges), 1) \
+                if memoryLimit else None
+
+            # share the sketch through a file rather than copying it
+            if sketch is not None:
+                sketchLocation = writeSketch(sketch, outputLocation)
+                sketch = None
+
+            pool = multiprocessing.Pool(processes=len(ranges))
+
+            jobs = [
+                pool.apply_async(countRange, args=(
+                    inputLocation, outputLocation, k, engine, workerLimit,
+                    start, end, presence) +
+                    locateRange(checkpoints, k, start, end) +
+                    (sketchLocation, minCount))
+                for start, end in ranges]
+
+            pool.close()
+            pool.join()
+
+            # keep the runs of successful workers so they are removed
+            for job in jobs:
+
+                if job.successful():
+                    runs += job.get()
+
+            for job in jobs:
+                job.get()
+
+            mergeOutput(
+                runs, outputLocation, k, organization, outputFormat,
+                splitters, compress, minCount, presence)
+
+        # single worker
+        else:
+
+            with Utility.openInput(inputLocation) as inputFile:
+
+                table = countReferences(
+                    Utility.readSequences(inputFile), k, engine, memoryLimit,
+                    outputLocation, runs, sketch, minCount, presence)
+
+                if runs:
+
+                    runs.append(
+                        writeTableRun(table, k, outputLocation, presence))
+                    mergeOutput(
+                        runs, outputLocation, k, organization, outputFormat,
+                        splitters, compress, minCount, presence)
+
+                else:
+
+                    writeKMers(
+                        sortTable(table, k), outputLocation, k, organization,
+                        outputFormat, splitters, compress, minCount, presence)
+
+    finally:
+
+        # remove runs
+        for runLocation in runs:
+            os.remove(runLocation)
+
+        if sketchLocation:
+            os.remove(sketchLocation)
+
+
+"""
+# =============================================================================
+
+PARSE
+
+# =============================================================================
+"""
+def parse(parameters):
+
+    inputLocation = parameters[INPUT]
+    outputLocation = parameters[OUTPUT]
+    k = parameters[KMER]
+
+    organization = parameters[ORGANIZATION] \
+        if parameters[ORGANIZATION] else ORGANIZATION_DEFAULT
+
+    engine = parameters.get(ENGINE) \
+        if parameters.get(ENGINE) else ENGINE_DEFAULT
+
+    memoryLimit = parameters.get(MEMORY_LIMIT)
+
+    outputFormat = parameters.get(FORMAT) \
+        if parameters.get(FORMAT) else FORMAT_DEFAULT
+
+    splitters = Utility.readSplitters(parameters[SPLITTERS]) \
+        if parameters.get(SPLITTERS) else None
+
+    workers = parameters.get(WORKERS) \
+        if parameters.get(WORKERS) else WORKERS_DEFAULT
+
+    compress = parameters.get(COMPRESS) \
+        if parameters.get(COMPRESS) else COMPRESS_DEFAULT
+
+    minCount = parameters.get(MIN_COUNT) \
+        if parameters.get(MIN_COUNT) else MIN_COUNT_DEFAULT
+
+    presence = parameters.get(PRESENCE) \
+        if parameters.get(PRESENCE) else PRESENCE_DEFAULT
+
+    count(
+        inputLocation, outputLocation, k, organization, engine, memoryLimit,
+        outputFormat, splitters, workers, compress, minCount, presence)
+
+
+"""
+# =============================================================================
+
+MAIN
+
+# =============================================================================
+"""
+def main():
+
+    # description
+    parser = argparse.ArgumentParser(description=PROGRAM_DESCRIPTION)
+
+    # input location
+    parser.add_argument(
+        INPUT_SHORT,
+        INPUT_LONG,
+        dest=INPUT,
+        help=INPUT_HELP,
+        type=str, required=True)
+
+    # output location
+    parser.add_argument(
+        OUTPUT_SHORT,
+        OUTPUT_LONG,
+        dest=OUTPUT,
+        help=OUTPUT_HELP,
+        type=str, required=True)
+
+    # k-mer size
+    parser.add_argument(
+        KMER_SHORT,
+        KMER_LONG,
+        dest=KMER,
+        help="k-mer size",
+        type=int, required=True)
+
+    # organization
+    parser.add_argument(
+        ORGANIZATION_LONG,
+        dest=ORGANIZATION,
+        help=ORGANIZATION_HELP,
+        type=int)
+
+    # engine
+    parser.add_argument(
+        ENGINE_LONG,
+        dest=ENGINE,
+        help=ENGINE_HELP,
+        type=str, choices=ENGINES)
+
+    # memory limit
+    parser.add_argument(
+        MEMORY_LIMIT_LONG,
+        dest=MEMORY_LIMIT,
+        help=MEMORY_LIMIT_HELP,
+        type=int)
+
+    # format
+    parser.add_argument(
+        FORMAT_LONG,
+        dest=FORMAT,
+        help=FORMAT_HELP,
+        type=str, choices=BinaryKMers.FORMATS)
+
+    # splitters
+    parser.add_argument(
+        SPLITTERS_LONG,
+        dest=SPLITTERS,
+        help=SPLITTERS_HELP,
+        type=str)
+
+    # workers
+    parser.add_argument(
+        WORKERS_LONG,
+        dest=WORKERS,
+        help=WORKERS_HELP,
+        type=int)
+
+    # compress
+    parser.add_argument(
+        COMPRESS_LONG,
+        dest=COMPRESS,
+        help=COMPRESS_HELP,
+        action='store_true')
+
+    # minimum count
+    parser.add_argument(
+        MIN_COUNT_LONG,
+        dest=MIN_COUNT,
+        help=MIN_COUNT_HELP,
+        type=int)
+
+    # presence
+    parser.add_argument(
+        PRESENCE_LONG,
+        dest=PRESENCE,
+        help=PRESENCE_HELP,
+        action='store_true')
 
     args = parser.parse_args()
     parameters = vars(args)
@@ -32,6 +32,10 @@ import math
 from scipy.misc import comb
 
 import Neptune
+import AggregateStore
+import AggregateKMers
+import AggregateStatistics
+import BinaryKMers
 import CountKMers
 import ExtractSignatures
 import FilterSignatures
@@ -152,6 +156,71 @@ class Execution():
 
         self.organization = parameters.get(CountKMers.ORGANIZATION)
 
+        # -- k-mer counting engine --
+        if (parameters.get(CountKMers.ENGINE) is not None and
+                parameters.get(CountKMers.ENGINE) not in CountKMers.ENGINES):
+            raise RuntimeError("The k-mer counting engine is not recognized.")
+
+        self.engine = parameters.get(CountKMers.ENGINE)
+
+        # -- k-mer aggregation engine --
+        if (parameters.get(Neptune.AGGREGATE_ENGINE) is not None and
+                parameters.get(Neptune.AGGREGATE_ENGINE) not in
+                AggregateKMers.ENGINES):
+            raise RuntimeError(
+                "The k-mer aggregation engine is not recognized.")
+
+        self.aggregateEngine = parameters.get(Neptune.AGGREGATE_ENGINE)
+
+        # -- k-mer counting memory limit --
+        # 1 <= memoryLimit
+        if (parameters.get(CountKMers.MEMORY_LIMIT) is not None and
+                (int(parameters.get(CountKMers.MEMORY_LIMIT)) < 1)):
+            raise RuntimeError("The memory limit is out of range.")
+
+        self.memoryLimit = parameters.get(CountKMers.MEMORY_LIMIT)
+
+        # -- k-mer file format --
+        if (parameters.get(CountKMers.FORMAT) is not None and
+                parameters.get(CountKMers.FORMAT) not in BinaryKMers.FORMATS):
+            raise RuntimeError("The k-mer file format is not recognized.")
+
+        self.kmerFormat = parameters.get(CountKMers.FORMAT)
+
+        # -- k-mer file compression --
+        self.compress = bool(parameters.get(CountKMers.COMPRESS))
+
+        if self.compress and self.kmerFormat == BinaryKMers.FORMAT_BINARY:
+            raise RuntimeError(
+                "Compressed k-mer files require the text k-mer file format.")
+
+        # -- k-mer partitioning --
+        if (parameters.get(Neptune.PARTITIONING) is not None and
+                parameters.get(Neptune.PARTITIONING) not in
+                Neptune.PARTITIONINGS):
+            raise RuntimeError("The k-mer partitioning is not recognized.")
+
+        self.partitioning = parameters.get(Neptune.PARTITIONING) \
+            if parameters.get(Neptune.PARTITIONING) \
+            else Neptune.PARTITIONING_DEFAULT
+
+        self.splitters = None
+        self.partitionSizes = None
+        self.aggregateStatistics = None
+
+        self.aggregateInhits = None
+        self.aggregateExhits = None
+
+        # -- aggregate store --
+        self.storeLocation = os.path.abspath(parameters.get(Neptune.STORE)) \
+            if parameters.get(Neptune.STORE) else None
+
+        self.storePlan = None
+
+        # the store keeps a single k-mer file per genome
+        if self.storeLocation:
+            self.organization = 0
+
         # -- inclusion locations --
         # inclusion exists
         if parameters.get(ExtractSignatures.INCLUSION) is None:
@@ -198,6 +267,11 @@ class Execution():
         elif parameters.get(CountKMers.KMER) is not None:
             self.k = int(parameters.get(CountKMers.KMER))
 
+        # an existing store determines k
+        elif self.storeLocation and \
+                AggregateStore.readManifest(self.storeLocation)[0]:
+            self.k = AggregateStore.readManifest(self.storeLocation)[0]
+
         else:
             self.estimateKMerSize()
 
@@ -248,6 +322,35 @@ class Execution():
         self.aggregateLocation = os.path.abspath(
             os.path.join(self.outputDirectoryLocation, Neptune.AGGREGATE))
 
+        self.indexLocation = os.path.abspath(
+            os.path.join(self.outputDirectoryLocation, Neptune.INDEX))
+
+        # -- presence bitsets --
+        self.presenceLocation = os.path.abspath(
+            os.path.join(self.outputDirectoryLocation, Neptune.BITSETS)) \
+            if parameters.get(Neptune.PRESENCE_BITSETS) else None
+
+        if self.presenceLocation and self.storeLocation:
+            raise RuntimeError(
+                "Presence bitsets are not supported with an aggregate store.")
+
+        if self.presenceLocation and self.k > BinaryKMers.MAXIMUM_K:
+            raise RuntimeError(
+                "Presence bitsets support k-mers no larger than " +
+                str(BinaryKMers.MAXIMUM_K) + ".")
+
+        genomes = len(self.inclusionLocations) + len(self.exclusionLocations)
+
+        if self.presenceLocation and Neptune.getAggregateFanIn(genomes) < \
+                genomes:
+            raise RuntimeError(
+                "Presence bitsets require the genomes to be aggregated in a " +
+                "single level, by at most " +
+                str(Neptune.getAggregateFanIn(genomes)) + " genomes.")
+
+        self.splittersLocation = os.path.abspath(
+            os.path.join(self.kmersOutputDirectory, Neptune.SPLITTERS))
+
         self.logDirectoryLocation = os.path.abspath(
             os.path.join(self.outputDirectoryLocation, Neptune.LOG))
         if not os.path.exists(self.logDirectoryLocation):
@@ -372,21 +475,18 @@ class Execution():
 
         for inclusionLocation in self.inclusionLocations:
 
-            inclusionFile = open(inclusionLocation, 'r')
+            inclusionFile = Utility.openInput(inclusionLocation)
 
             size = 0
             sumGC = 0
             sumAT = 0
             gcContent = 0
 
-            for line in inclusionFile:
+            for name, sequence in Utility.readFASTA(inclusionFile):
 
-                if line[0] != ">":
-                    line = line.strip().upper()
-
-                    size += len(line)
-                    sumGC += line.count('G') + line.count('C')
-                    sumAT += line.count('A') + line.count('T')
+                size += len(sequence)
+                sumGC += sequence.count('G') + sequence.count('C')
+                sumAT += sequence.count('A') + sequence.count('T')
 
             if (sumGC + sumAT) == 0:
                 raise RuntimeError(
@@ -435,6 +535,88 @@ class Execution():
     """
     # =========================================================================
 
+    ESTIMATE AGGREGATE HITS
+    -----------------------
+
+
+    PURPOSE
+    -------
+
+    Resolves the inclusion and exclusion hit thresholds before aggregation, so
+    that the k-mers which cannot be used by any extraction are not aggregated.
+
+    Thresholds specified by the user are used as they are. Otherwise, they are
+    estimated as they are by extraction. Since the estimated inclusion hits
+    depend on the GC-content of each reference, the smallest estimate over all
+    the references is used, which keeps every k-mer any extraction may use.
+
+
+    INPUT
+    -----
+
+    [NONE]
+
+
+    RETURN
+    ------
+
+    [NONE]
+
+
+    POST
+    ----
+
+    The member variables [self.aggregateInhits] and [self.aggregateExhits] are
+    assigned the smallest inclusion and exclusion counts of the k-mers used by
+    extraction.
+
+    # =========================================================================
+    """
+    def estimateAggregateHits(self):
+
+        rate = float(self.rate) if self.rate \
+            else ExtractSignatures.RATE_DEFAULT
+
+        confidence = float(self.confidence) if self.confidence \
+            else ExtractSignatures.CONFIDENCE_DEFAULT
+
+        # INCLUSION
+        if self.inhits:
+            self.aggregateInhits = int(self.inhits)
+
+        else:
+
+            if self.gcContent:
+                gcContents = [float(self.gcContent)]
+
+            else:
+
+                gcContents = []
+
+                for reference in (self.reference or self.inclusionLocations):
+
+                    referenceFile = Utility.openInput(reference)
+                    gcContents.append(Utility.estimateReferenceParameters(
+                        Utility.readFASTA(referenceFile))[1])
+                    referenceFile.close()
+
+            self.aggregateInhits = int(min(
+                ExtractSignatures.estimateInclusionHits(
+                    len(self.inclusionLocations), rate, gcContent, self.k,
+                    confidence)
+                for gcContent in gcContents))
+
+        # EXCLUSION
+        if self.exhits:
+            self.aggregateExhits = int(self.exhits)
+
+        else:
+            self.aggregateExhits = int(ExtractSignatures.estimateExclusionHits(
+                len(self.exclusionLocations), rate, self.k))
+
+    """
+    # =========================================================================
+
     PRODUCE RECEIPT
     ---------------
 
@@ -482,6 +664,8 @@ class Execution():
         self.reportCommandLine(receiptFile)
         self.reportFiles(receiptFile)
         self.reportGeneralParameters(receiptFile)
+        self.reportPartitions(receiptFile)
+        self.reportStatistics(receiptFile)
 
         receiptFile.close()
 
@@ -570,6 +754,14 @@ class Execution():
             "Minimum Exclusion Observations = " +
             str(self.exhits) + "\n")
 
+        receiptFile.write(
+            "Minimum Aggregated Inclusion Observations = " +
+            str(self.aggregateInhits) + "\n")
+
+        receiptFile.write(
+            "Minimum Aggregated Exclusion Observations = " +
+            str(self.aggregateExhits) + "\n")
+
         receiptFile.write(
             "Maximum Gap Size = " +
             str(self.gap) + "\n")
@@ -594,6 +786,38 @@ class Execution():
             "k-mer Organization = " +
             str(self.organization) + "\n")
 
+        receiptFile.write(
+            "k-mer Counting Engine = " +
+            str(self.engine) + "\n")
+
+        receiptFile.write(
+            "k-mer Aggregation Engine = " +
+            str(self.aggregateEngine) + "\n")
+
+        receiptFile.write(
+            "k-mer Counting Memory Limit = " +
+            str(self.memoryLimit) + "\n")
+
+        receiptFile.write(
+            "k-mer File Format = " +
+            str(self.kmerFormat) + "\n")
+
+        receiptFile.write(
+            "k-mer File Compression = " +
+            str(self.compress) + "\n")
+
+        receiptFile.write(
+            "k-mer Partitioning = " +
+            str(self.partitioning) + "\n")
+
+        receiptFile.write(
+            "Presence Bitsets = " +
+            str(self.presenceLocation) + "\n")
+
+        receiptFile.write(
+            "Aggregate Store = " +
+            str(self.storeLocation) + "\n")
+
         receiptFile.write(
             "Reference Size = " +
             str(self.referenceSize) + "\n")
@@ -667,6 +891,115 @@ class Execution():
     """
     # =========================================================================
 
+    REPORT PARTITIONS
+    -----------------
+
+
+    PURPOSE
+    -------
+
+    Reports the sizes of the aggregated k-mer partitions, when the k-mers were
+    organized into partitions.
+
+
+    INPUT
+    -----
+
+    [FILE] [receiptFile] - The open and writable receipt file.
+
+
+    RETURN
+    ------
+
+    [NONE]
+
+
+    POST
+    ----
+
+    The number of k-mers and bytes in each partition will be reported to the
+    execution receipt.
+
+    # =========================================================================
+    """
+    def reportPartitions(self, receiptFile):
+
+        if not self.partitionSizes:
+            return
+
+        receiptFile.write("-- Partitions -- \n")
+        receiptFile.write("\n")
+
+        for tag, kmers, size in self.partitionSizes:
+            receiptFile.write(
+                str(tag) + " = " + str(kmers) + " k-mers, " +
+                str(size) + " bytes\n")
+
+        receiptFile.write("\n")
+
+    """
+    # =========================================================================
+
+    REPORT STATISTICS
+    -----------------
+
+
+    PURPOSE
+    -------
+
+    Reports the statistics of the aggregated k-mers: their number, the bytes
+    written, and the number of k-mers kept by each hit threshold.
+
+
+    INPUT
+    -----
+
+    [FILE] [receiptFile] - The open and writable receipt file.
+
+
+    RETURN
+    ------
+
+    [NONE]
+
+
+    POST
+    ----
+
+    The statistics of the aggregated k-mers will be reported to the execution
+    receipt.
+
+    # =========================================================================
+    """
+    def reportStatistics(self, receiptFile):
+
+        if not self.aggregateStatistics:
+            return
+
+        histogram, partitions = self.aggregateStatistics
+
+        receiptFile.write("-- Aggregated k-mers -- \n")
+        receiptFile.write("\n")
+
+        receiptFile.write(
+            "Aggregated k-mers = " +
+            str(sum(histogram.values())) + "\n")
+
+        receiptFile.write(
+            "Aggregated Bytes = " +
+            str(sum(partition[2] for partition in partitions)) + "\n")
+
+        receiptFile.write("\n")
+
+        AggregateStatistics.reportThresholds(
+            receiptFile, histogram, self.aggregateInhits,
+            self.aggregateExhits)
+
+        receiptFile.write("\n")
+
+    """
+    # =========================================================================
+
     REPORT DRMAA PARAMETERS
     -----------------------
 
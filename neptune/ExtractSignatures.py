@@ -76,13 +76,23 @@ script.py -r inclusion1.fasta -i inclusion/* -e exclusion/*
 
 import math
 import argparse
+import multiprocessing
+import bisect
+import itertools
 import os
 
+import numpy
+
 from Utility import reverseComplement
-from Utility import buildReferences
+from Utility import readFASTA
+from Utility import iterateReferences
 from Utility import estimateReferenceParameters
 
+import AggregateKMers
+import AggregateStatistics
+import BinaryKMers
 import Signature
+import Utility
 
 from scipy.stats import norm
 
@@ -113,7 +123,7 @@ SHORT = "-"
 REFERENCE = "reference"
 REFERENCE_LONG = LONG + REFERENCE
 REFERENCE_SHORT = SHORT + "r"
-REFERENCE_HELP = "The FASTA reference from which to extract signatures."
+REFERENCE_HELP = "The FASTA references from which to extract signatures."
 
 # Inclusion Targets
 INCLUSION = "inclusion"
@@ -131,13 +141,17 @@ EXCLUSION_HELP = "The exclusion targets in FASTA format."
 KMERS = "kmers"
 KMERS_LONG = LONG + KMERS
 KMERS_SHORT = SHORT + "k"
-KMERS_HELP = "The aggregated k-mer file produced by AggregateKMers.py."
+KMERS_HELP = "The aggregated k-mer file produced by AggregateKMers.py, in \
+    either the text or binary format, or the manifest of a partitioned \
+    aggregated k-mer file. Binary k-mers are memory-mapped and searched in \
+    place, rather than loaded into memory."
 
 # Output File
 OUTPUT = "output"
 OUTPUT_LONG = LONG + OUTPUT
 OUTPUT_SHORT = SHORT + "o"
-OUTPUT_HELP = "The location to output candidate signatures in FASTA format."
+OUTPUT_HELP = "The locations to output candidate signatures in FASTA format, \
+    one for each reference, in the same order."
 
 # OPTIONAL ARGUMENTS #
 
@@ -204,6 +218,25 @@ CONFIDENCE_SHORT = SHORT + "c"
 CONFIDENCE_HELP = "The statistical confidence level in decision making \
     involving probabilities when producing candidate signatures."
 
+# Intersect
+INTERSECT = "intersect"
+INTERSECT_LONG = LONG + INTERSECT
+INTERSECT_HELP = "Load only the aggregated k-mers which occur in the \
+    reference. Memory then scales with the size of the reference, rather than \
+    with the number of aggregated k-mers, but the reference is read again."
+INTERSECT_DEFAULT = False
+
+# Workers
+WORKERS = "workers"
+WORKERS_LONG = LONG + WORKERS
+WORKERS_HELP = "The number of processes extracting signatures from the \
+    references at once. The aggregated k-mers are loaded before the processes \
+    are created, so that every process shares them."
+WORKERS_DEFAULT = 1
+
+# The extractions of parse(...), inherited by its worker processes.
+EXTRACTIONS = None
+
 """
 # =============================================================================
 
@@ -220,6 +253,419 @@ class Region():
         self.position = position
 
 
+"""
+# =============================================================================
+
+EXTRACTION
+----------
+
+
+PURPOSE
+-------
+
+The parameters of extracting candidate signatures from a single reference,
+with every estimated parameter resolved.
+
+
+INPUT
+-----
+
+[FILE LOCATION] [referenceLocation]
+    The reference to extract candidates from.
+
+[FILE LOCATION] [outputLocation]
+    The location to write the candidates of the reference.
+
+[INT >= 0] [referenceSize]
+    The size of the reference.
+
+[0 <= FLOAT <= 1] [GC]
+    The average GC content of all the targets.
+
+[INT >= 0] [inhits]
+    The minimum number of inclusion k-mer hits.
+
+[INT >= 0] [exhits]
+    The maximum number of exclusion k-mer hits.
+
+[INT >= 1] [gap]
+    The maximum inclusion k-mer gap size.
+
+[INT >= 1] [size]
+    The minimum size of any candidate.
+
+# =============================================================================
+"""
+class Extraction():
+
+    def __init__(
+            self, referenceLocation, outputLocation, referenceSize, GC,
+            inhits, exhits, gap, size):
+
+        self.referenceLocation = referenceLocation
+        self.outputLocation = outputLocation
+        self.referenceSize = referenceSize
+        self.GC = GC
+        self.inhits = inhits
+        self.exhits = exhits
+        self.gap = gap
+        self.size = size
+
+
+"""
+# =============================================================================
+
+INDEXED K-MERS
+--------------
+
+
+PURPOSE
+-------
+
+The k-mers of a binary aggregated k-mer file, or of every partition of a
+partitioned one, whose inclusion or exclusion count reaches a hit threshold.
+This may be used in place of an inclusion or exclusion k-mer dictionary.
+
+The encoded k-mers and their counts are memory-mapped and searched in place,
+rather than copied into a dictionary, so the operating system shares a single
+copy of the file among every process reading it. Only the few ambiguous
+k-mers, which cannot be encoded, are held in memory.
+
+Encoded reference k-mers may be searched in batches with contains(forward,
+reverse), which finds whether each k-mer or its reverse complement is
+contained, as KMerTable does.
+
+
+INPUT
+-----
+
+[(BinaryKMers.KMers) LIST] [partitions]
+    The binary aggregated k-mers, in k-mer order, with inclusion and exclusion
+    count columns.
+
+[INT] [column]
+    The count column compared with the threshold: 0 for the inclusion counts
+    and 1 for the exclusion counts.
+
+[INT >= 0] [hits]
+    The hit threshold. The k-mers whose count is at least [hits] are
+    contained.
+
+# =============================================================================
+"""
+class IndexedKMers():
+
+    def __init__(self, partitions, column, hits):
+
+        self.partitions = []
+        self.firsts = []
+        self.ambiguous = set()
+        self.size = 0
+
+        self.hits = hits
+
+        for kmers in partitions:
+
+            if len(kmers.codes) > 0:
+
+                counts = kmers.counts[column]
+
+                self.partitions.append((kmers.codes, counts))
+                self.firsts.append(int(kmers.codes[0]))
+                self.size += int(numpy.count_nonzero(counts >= hits))
+
+            for record in kmers.ambiguous:
+
+                if record[column + 1] >= hits:
+                    self.ambiguous.add(record[0])
+
+        self.size += len(self.ambiguous)
+        self.starts = numpy.array(self.firsts, dtype=numpy.uint64)
+
+    def __len__(self):
+
+        return self.size
+
+    def __contains__(self, kmer):
+
+        code = Utility.encodeKMer(kmer)
+
+        if code is None:
+            return kmer in self.ambiguous
+
+        index = bisect.bisect_right(self.firsts, code) - 1
+
+        if index < 0:
+            return False
+
+        codes, counts = self.partitions[index]
+        position = int(numpy.searchsorted(codes, numpy.uint64(code)))
+
+        return position < len(codes) and int(codes[position]) == code and \
+            counts[position] >= self.hits
+
+    def search(self, codes):
+
+        found = numpy.zeros(len(codes), dtype=bool)
+
+        # group the codes by the partition which may contain them
+        owners = numpy.searchsorted(self.starts, codes, side="right") - 1
+        order = numpy.argsort(owners, kind="mergesort")
+        bounds = numpy.searchsorted(
+            owners[order], numpy.arange(len(self.partitions) + 1))
+
+        for index, (partitionCodes, counts) in enumerate(self.partitions):
+
+            selected = order[bounds[index]:bounds[index + 1]]
+
+            if len(selected) == 0:
+                continue
+
+            positions = numpy.minimum(
+                numpy.searchsorted(partitionCodes, codes[selected]),
+                len(partitionCodes) - 1)
+
+            found[selected] = \
+                (partitionCodes[positions] == codes[selected]) & \
+                (counts[positions] >= self.hits)
+
+        return found
+
+    def contains(self, forward, reverse):
+
+        # the file is searched as written, which need not be canonical
+        return self.search(forward) | self.search(reverse)
+
+
+"""
+# =============================================================================
+
+K-MER TABLE
+-----------
+
+
+PURPOSE
+-------
+
+A set of k-mers held as a sorted array of canonical two-bit k-mer codes. This
+may be used in place of an inclusion or exclusion k-mer dictionary, but holds
+eight bytes for every encoded k-mer and treats a k-mer and its reverse
+complement as the same k-mer. Only the few ambiguous k-mers, which cannot be
+encoded, are held as strings.
+
+Encoded reference k-mers are searched in batches with contains(forward,
+reverse), which canonicalizes each k-mer once and finds it with a single
+binary search.
+
+
+INPUT
+-----
+
+[(UINT64 ARRAY) LIST] [codes]
+    The codes of the encoded k-mers, in any order and orientation.
+
+[STRING ITERABLE] [ambiguous]
+    The k-mers which cannot be encoded.
+
+[1 <= INT <= 32] [k]
+    The k-mer size.
+
+# =============================================================================
+"""
+class KMerTable():
+
+    def __init__(self, codes, ambiguous, k):
+
+        codes = numpy.concatenate(
+            [numpy.empty(0, dtype=numpy.uint64)] +
+            [numpy.asarray(array, dtype=numpy.uint64) for array in codes])
+
+        self.codes = numpy.unique(Utility.canonicalizeKMers(codes, k))
+        self.ambiguous = set(ambiguous)
+        self.k = k
+
+    def __len__(self):
+
+        return len(self.codes) + len(self.ambiguous)
+
+    def __contains__(self, kmer):
+
+        code = Utility.encodeKMer(kmer) if len(kmer) == self.k else None
+
+        if code is None:
+            return kmer in self.ambiguous
+
+        return bool(self.search(Utility.canonicalizeKMers([code], self.k))[0])
+
+    def search(self, codes):
+
+        if len(self.codes) == 0:
+            return numpy.zeros(len(codes), dtype=bool)
+
+        positions = numpy.minimum(
+            numpy.searchsorted(self.codes, codes), len(self.codes) - 1)
+
+        return self.codes[positions] == codes
+
+    def contains(self, forward, reverse):
+
+        return self.search(numpy.minimum(forward, reverse))
+
+
+"""
+# =============================================================================
+
+FIND K-MERS
+-----------
+
+
+PURPOSE
+-------
+
+Finds which k-mers of a reference are contained in the exclusion and inclusion
+k-mers, considering each k-mer and its reverse complement.
+
+When the k-mers are KMerTables or IndexedKMers, the reference is encoded and
+searched in batches. The k-mers containing characters which cannot be encoded,
+and all k-mers of dictionaries, are looked up one at a time.
+
+
+INPUT
+-----
+
+[STRING] [reference]
+    The reference sequence.
+
+[INT >= 1] [k]
+    The k-mer size.
+
+[INT >= 0] [n]
+    The number of k-mers to search, starting at the first position of the
+    [reference].
+
+[KMER DICTIONARY or KMerTable or IndexedKMers] [inmers]
+    The inclusion k-mers.
+
+[KMER DICTIONARY or KMerTable or IndexedKMers] [exmers]
+    The exclusion k-mers.
+
+
+RETURN
+------
+
+[(BOOL ARRAY, BOOL ARRAY)] [(excluded, included)]
+    Whether the k-mer starting at each position of the [reference] is
+    contained in the [exmers] and in the [inmers], respectively.
+
+# =============================================================================
+"""
+def findKMers(reference, k, n, inmers, exmers):
+
+    excluded = numpy.zeros(n, dtype=bool)
+    included = numpy.zeros(n, dtype=bool)
+
+    if isinstance(inmers, dict) or isinstance(exmers, dict):
+        positions = range(n)
+
+    else:
+        positions = []
+
+        for start in range(0, n, BinaryKMers.BATCH_SIZE):
+
+            end = min(start + BinaryKMers.BATCH_SIZE, n)
+
+            forward, reverse, masked = Utility.encodeWindows(
+                reference[start:end + k - 1], k)
+
+            excluded[start:end] = exmers.contains(forward, reverse)
+            included[start:end] = inmers.contains(forward, reverse)
+
+            positions += (numpy.flatnonzero(masked) + start).tolist()
+
+    for i in positions:
+
+        # k-mer and reverse complement
+        kmer = reference[i:i + k]
+        reverse = reverseComplement(kmer)
+
+        excluded[i] = kmer in exmers or reverse in exmers
+        included[i] = kmer in inmers or reverse in inmers
+
+    return excluded, included
+
+
+"""
+# =============================================================================
+
+BUILD REGIONS
+-------------
+
+
+PURPOSE
+-------
+
+Builds the candidate signature regions of a reference from the positions of
+its inclusion and exclusion k-mers.
+
+A region is built from a chain of inclusion k-mers. The chain is broken by any
+exclusion k-mer, which takes precedence over inclusion, and by any gap between
+consecutive inclusion k-mers which is too large. A chain from the k-mer at
+position [first] to the k-mer at position [last] forms the region from
+[first] + k - 1 to [last] + 1, which is kept when it is at least [size] long.
+
+
+INPUT
+-----
+
+[BOOL ARRAY] [excluded]
+    Whether the k-mer starting at each position of the reference is an
+    exclusion k-mer.
+
+[BOOL ARRAY] [included]
+    Whether the k-mer starting at each position of the reference is an
+    inclusion k-mer.
+
+[INT >= 1] [k]
+    The k-mer size.
+
+[INT >= 1] [size]
+    The minimum signature size in characters.
+
+[INT >= 1] [gap]
+    The maximum allowable gap size in k-mers.
+
+
+RETURN
+------
+
+[(INT, INT) LIST] [regions]
+    The (start, end) positions of the regions, in reference order.
+
+# =============================================================================
+"""
+def buildRegions(excluded, included, k, size, gap):
+
+    hits = numpy.flatnonzero(included & ~excluded)
+
+    if len(hits) == 0:
+        return []
+
+    exclusions = numpy.cumsum(excluded)
+
+    # consecutive hits with a large gap or an exclusion between them
+    breaks = (numpy.diff(hits) > gap + 2) | \
+        (numpy.diff(exclusions[hits]) > 0)
+
+    firsts = hits[numpy.concatenate(([True], breaks))]
+    lasts = hits[numpy.concatenate((breaks, [True]))]
+
+    starts = firsts + k - 1
+    ends = lasts + 1
+    kept = (ends - starts) >= size
+
+    return zip(starts[kept].tolist(), ends[kept].tolist())
+
+
 """
 # =============================================================================
 
@@ -240,18 +686,22 @@ existence in those dictionaries.
 INPUT
 -----
 
-[STRING ITERABLE] [references]
-    An iterable object of string references. This is intended to correspond to
-    a list of single or multi-fasta files.
+[(STRING, STRING) ITERABLE] [references]
+    The references, as either a dictionary or an iterable of (name, sequence)
+    pairs, such as the records produced by Utility.readFASTA(...). This is
+    intended to correspond to a single or multi-fasta file. The references
+    are consumed one at a time.
 
 [INT >= 1] [k]
     The k-mer size.
 
 [KMER DICTIONARY] [inmers]
-    The inclusion k-mers dictionary.
+    The inclusion k-mers dictionary, or the equivalent KMerTable or
+    IndexedKMers. Dictionaries are converted into KMerTables when k <= 32.
 
 [KMER DICTIONARY] [exmers]
-    The exclusion k-mers dictionary.
+    The exclusion k-mers dictionary, or the equivalent KMerTable or
+    IndexedKMers. Dictionaries are converted into KMerTables when k <= 32.
 
 [INT >= 1] [size]
     The minimum signature size in characters.
@@ -274,7 +724,7 @@ The candidate signatures will be written to the [outputFile].
 def extract(references, k, inmers, exmers, size, gap, outputFile):
 
     # references
-    if references is None or len(references) < 1:
+    if references is None:
         raise RuntimeError("There are no references.")
 
     # 1 <= kmerSize
@@ -301,65 +751,31 @@ def extract(references, k, inmers, exmers, size, gap, outputFile):
     if outputFile is None:
         raise RuntimeError("The output location is not specified.")
 
-    regions = []
-
-    # iterate all references
-    for key in references:
-
-        # next reference
-        ref = references[key]
-
-        # initialize positions
-        start = -1
-        end = -1
-
-        # every kmer in reference
-        for i in range(len(ref.strip()) - k + 1):
-
-            # k-mer and reverse complement
-            kmer = ref[i:i + k]
-            reverse = reverseComplement(kmer)
-
-            # kmer is in exclusion sufficiently -- break chain
-            if kmer in exmers or reverse in exmers:
-
-                # close the region if started:
-                if (end - start) >= size:
-                    region = Region(ref[start:end], key, start)
-                    regions.append(region)
+    # encoded k-mers are searched in batches
+    if k <= BinaryKMers.MAXIMUM_K:
 
-                # end the region regardless:
-                start = -1
-                end = -1
+        if isinstance(inmers, dict):
+            inmers = buildKMerTable(inmers, k)
 
-            # k-mer is in inclusion sufficiently -- build chain
-            # (else -- don't both break and build)
-            elif kmer in inmers or reverse in inmers:
+        if isinstance(exmers, dict):
+            exmers = buildKMerTable(exmers, k)
 
-                # new chain
-                if start < 0 and end < 0:
-                    start = i + k - 1
-                    end = i + 1
+    regions = []
+    total = 0   # number of references
 
-                # hit with something else started
-                if start >= 0 and end >= 0:
+    # iterate all references
+    for key, ref in iterateReferences(references):
 
-                    # gap within size? -- yes
-                    if (i - (end + 1)) <= gap:
-                        end = i + 1
+        total += 1
 
-                    # gap within size? -- no
-                    else:
-                        if (end - start) >= size:
-                            region = Region(ref[start:end], key, start)
-                            regions.append(region)
+        excluded, included = findKMers(
+            ref, k, max(len(ref.strip()) - k + 1, 0), inmers, exmers)
 
-                        start = i + k - 1
-                        end = i + 1
+        for start, end in buildRegions(excluded, included, k, size, gap):
+            regions.append(Region(ref[start:end], key, start))
 
-        if start >= 0 and end > 0 and (end - start) >= size:
-            region = Region(ref[start:end], key, start)
-            regions.append(region)
+    if total < 1:
+        raise RuntimeError("There are no references.")
 
     for i in range(len(regions)):
 
@@ -861,6 +1277,10 @@ INPUT
     observed in the reference before terminating the construction of a
     candidate signature.
 
+[STRING CONTAINER -- OPTIONAL] [kmers]
+    The only k-mers to add to the dictionaries, such as the k-mers of the
+    reference, or None to add every k-mer.
+
 POST:
     The inclusion and exclusion k-mer dictionaries will be filled with all
     k-mers found in the k-mers file with at least [inhits] and at least
@@ -868,13 +1288,17 @@ POST:
 
 # =============================================================================
 """
-def buildKMers(kmerFile, inmers, exmers, inhits, exhits):
+def buildKMers(kmerFile, inmers, exmers, inhits, exhits, kmers=None):
 
     for line in kmerFile:
 
         tokens = line.split()
 
         kmer = tokens[0].strip()
+
+        if kmers is not None and kmer not in kmers:
+            continue
+
         incount = int(tokens[1].strip())
         excount = int(tokens[2].strip())
 
@@ -888,43 +1312,388 @@ def buildKMers(kmerFile, inmers, exmers, inhits, exhits):
 """
 # =============================================================================
 
-REPORT PARAMETERS
------------------
+SPLIT K-MERS
+------------
 
 
 PURPOSE
 -------
 
-This function outputs the parameters to standard output. This can be useful
-for debugging.
+Encodes k-mers, separating those which cannot be encoded.
 
 
 INPUT
 -----
 
-[FILE] [reportFile]
-    The writable file-like object to write the report.
+[STRING LIST] [kmers]
+    The k-mers.
 
-[FILE LOCATION] [referenceLocation]
-    The single reference to extract candidates from.
+[1 <= INT <= 32] [k]
+    The k-mer size.
 
-[INT >= 0] [referenceSize]
-    The size of the reference.
 
-[0 <= FLOAT <= 1] [rate]
-    The rate of mutations and/or errors.
+RETURN
+------
 
-[INT >= 0] [totalInclusion]
-    The number of inclusion genome files.
+[(UINT64 ARRAY, STRING LIST)] [(codes, ambiguous)]
+    The codes of the k-mers which could be encoded and the remaining k-mers.
 
-[INT >= 0] [totalExclusion]
-    The number of exclusion genome files.
+# =============================================================================
+"""
+def splitKMers(kmers, k):
 
-[INT >= 0] [inhits]
-    The minimum number of inclusion k-mer hits.
+    sized = [kmer for kmer in kmers if len(kmer) == k]
+    codes, valid = Utility.encodeKMers(sized, k)
 
-[INT >= 0] [exhits]
-    The maximum number of exclusion k-mer hits.
+    ambiguous = [kmer for kmer in kmers if len(kmer) != k] + \
+        [sized[i] for i in numpy.flatnonzero(~valid)]
+
+    return codes[valid], ambiguous
+
+
+"""
+# =============================================================================
+
+BUILD K-MER TABLE
+-----------------
+
+
+PURPOSE
+-------
+
+Builds a KMerTable from k-mers, such as the keys of an inclusion or exclusion
+k-mer dictionary.
+
+
+INPUT
+-----
+
+[STRING ITERABLE] [kmers]
+    The k-mers.
+
+[1 <= INT <= 32] [k]
+    The k-mer size.
+
+
+RETURN
+------
+
+[KMerTable] [table]
+    The table of the [kmers].
+
+# =============================================================================
+"""
+def buildKMerTable(kmers, k):
+
+    codes, ambiguous = splitKMers(list(kmers), k)
+
+    return KMerTable([codes], ambiguous, k)
+
+
+"""
+# =============================================================================
+
+READ K-MER BATCHES
+------------------
+
+
+PURPOSE
+-------
+
+Reads an aggregated k-mer file, in either format, as batches of encoded k-mers
+and their counts.
+
+
+INPUT
+-----
+
+[FILE LOCATION] [location]
+    The aggregated k-mer file, with inclusion and exclusion count columns.
+
+[1 <= INT <= 32] [k]
+    The k-mer size.
+
+
+RETURN
+------
+
+[(UINT64 ARRAY, ARRAY, ARRAY, TUPLE LIST) ITERATOR]
+[(codes, incounts, excounts, records)]
+    The codes of the encoded k-mers with their inclusion and exclusion counts,
+    and the (kmer, incount, excount) records of the k-mers which cannot be
+    encoded, in batches of at most BinaryKMers.BATCH_SIZE k-mers.
+
+# =============================================================================
+"""
+def readKMerBatches(location, k):
+
+    if BinaryKMers.isBinary(location):
+
+        kmers = BinaryKMers.KMers(location)
+
+        for start in range(0, len(kmers.codes), BinaryKMers.BATCH_SIZE):
+
+            end = start + BinaryKMers.BATCH_SIZE
+
+            yield (
+                numpy.asarray(kmers.codes[start:end]),
+                numpy.asarray(kmers.counts[0][start:end]),
+                numpy.asarray(kmers.counts[1][start:end]), [])
+
+        if kmers.ambiguous:
+            yield (
+                numpy.empty(0, dtype=numpy.uint64), numpy.empty(0),
+                numpy.empty(0), kmers.ambiguous)
+
+        return
+
+    records = BinaryKMers.readRecords(location)
+    batch = list(itertools.islice(records, BinaryKMers.BATCH_SIZE))
+
+    while batch:
+
+        sized = [record for record in batch if len(record[0]) == k]
+        codes, valid = Utility.encodeKMers(
+            [record[0] for record in sized], k)
+
+        counts = numpy.array(
+            [record[1:3] for record in sized], dtype=numpy.int64)
+        counts = counts.reshape(-1, 2)
+
+        yield (
+            codes[valid], counts[valid, 0], counts[valid, 1],
+            [record for record in batch if len(record[0]) != k] +
+            [sized[i] for i in numpy.flatnonzero(~valid)])
+
+        batch = list(itertools.islice(records, BinaryKMers.BATCH_SIZE))
+
+
+"""
+# =============================================================================
+
+FIND REFERENCE K-MERS
+---------------------
+
+
+PURPOSE
+-------
+
+Finds every k-mer of a reference, so that only these k-mers of the aggregated
+k-mers need to be loaded.
+
+
+INPUT
+-----
+
+[(STRING, STRING) ITERABLE] [references]
+    The references, as in extract(...).
+
+[INT >= 1] [k]
+    The k-mer size.
+
+
+RETURN
+------
+
+[KMerTable or STRING SET] [kmers]
+    The k-mers of the [references] and their reverse complements, as a
+    KMerTable, or as a set of strings when k > 32.
+
+# =============================================================================
+"""
+def findReferenceKMers(references, k):
+
+    codes = []
+    ambiguous = set()
+
+    for key, ref in iterateReferences(references):
+
+        n = max(len(ref.strip()) - k + 1, 0)
+
+        if k > BinaryKMers.MAXIMUM_K:
+            positions = range(n)
+
+        else:
+            positions = []
+
+            for start in range(0, n, BinaryKMers.BATCH_SIZE):
+
+                end = min(start + BinaryKMers.BATCH_SIZE, n)
+
+                forward, reverse, masked = Utility.encodeWindows(
+                    ref[start:end + k - 1], k)
+
+                codes.append(numpy.unique(
+                    numpy.minimum(forward, reverse)[~masked]))
+
+                positions += (numpy.flatnonzero(masked) + start).tolist()
+
+        for i in positions:
+
+            kmer = ref[i:i + k]
+
+            ambiguous.add(kmer)
+            ambiguous.add(reverseComplement(kmer))
+
+    if k > BinaryKMers.MAXIMUM_K:
+        return ambiguous
+
+    encoded, ambiguous = splitKMers(list(ambiguous), k)
+
+    return KMerTable(codes + [encoded], ambiguous, k)
+
+
+"""
+# =============================================================================
+
+BUILD K-MER TABLES
+------------------
+
+
+PURPOSE
+-------
+
+Builds the inclusion and exclusion k-mers from the partitions of an aggregated
+k-mer file, keeping the k-mers whose counts reach the hit thresholds.
+
+Binary k-mers are searched in place with IndexedKMers and shared with other
+processes. Otherwise, the k-mers are held in KMerTables, or in dictionaries
+when they are too large to be encoded.
+
+The aggregated k-mers are streamed in batches, so when the k-mers of the
+reference are given, memory scales with the reference rather than with the
+aggregated k-mers.
+
+
+INPUT
+-----
+
+[(FILE LOCATION) LIST] [partitionLocations]
+    The aggregated k-mer files, in k-mer order.
+
+[INT >= 1] [k]
+    The k-mer size.
+
+[INT >= 0] [inhits]
+    The minimum number of inclusion k-mer hits.
+
+[INT >= 0] [exhits]
+    The minimum number of exclusion k-mer hits.
+
+[KMerTable or STRING SET -- OPTIONAL] [reference]
+    The k-mers of the reference, as found by findReferenceKMers(...). When
+    given, only the aggregated k-mers of the reference are kept, and they are
+    always held in KMerTables or dictionaries.
+
+
+RETURN
+------
+
+[(KMER TABLE, KMER TABLE)] [(inmers, exmers)]
+    The inclusion and exclusion k-mers.
+
+# =============================================================================
+"""
+def buildKMerTables(partitionLocations, k, inhits, exhits, reference=None):
+
+    binary = [
+        BinaryKMers.isBinary(location) for location in partitionLocations]
+
+    # binary k-mers are searched in place and shared with other processes
+    if all(binary) and reference is None:
+
+        partitions = [
+            BinaryKMers.KMers(location) for location in partitionLocations]
+
+        return (
+            IndexedKMers(partitions, 0, inhits),
+            IndexedKMers(partitions, 1, exhits))
+
+    if k > BinaryKMers.MAXIMUM_K:
+
+        inmers = {}
+        exmers = {}
+
+        for partitionLocation in partitionLocations:
+
+            kmerFile = Utility.openInput(partitionLocation)
+            buildKMers(kmerFile, inmers, exmers, inhits, exhits, reference)
+            kmerFile.close()
+
+        return inmers, exmers
+
+    columns = [(inhits, [], set()), (exhits, [], set())]
+
+    for partitionLocation in partitionLocations:
+
+        for codes, incounts, excounts, records in \
+                readKMerBatches(partitionLocation, k):
+
+            # only the k-mers of the reference are kept
+            if reference is not None:
+
+                found = reference.search(Utility.canonicalizeKMers(codes, k))
+                codes = codes[found]
+                incounts = incounts[found]
+                excounts = excounts[found]
+
+                records = [
+                    record for record in records
+                    if record[0] in reference.ambiguous]
+
+            for column, (hits, selected, ambiguous) in enumerate(columns):
+
+                counts = incounts if column == 0 else excounts
+
+                selected.append(codes[counts >= hits])
+                ambiguous.update(
+                    record[0] for record in records
+                    if record[column + 1] >= hits)
+
+    return tuple(
+        KMerTable(codes, ambiguous, k) for hits, codes, ambiguous in columns)
+
+
+"""
+# =============================================================================
+
+REPORT PARAMETERS
+-----------------
+
+
+PURPOSE
+-------
+
+This function outputs the parameters to standard output. This can be useful
+for debugging.
+
+
+INPUT
+-----
+
+[FILE] [reportFile]
+    The writable file-like object to write the report.
+
+[FILE LOCATION] [referenceLocation]
+    The single reference to extract candidates from.
+
+[INT >= 0] [referenceSize]
+    The size of the reference.
+
+[0 <= FLOAT <= 1] [rate]
+    The rate of mutations and/or errors.
+
+[INT >= 0] [totalInclusion]
+    The number of inclusion genome files.
+
+[INT >= 0] [totalExclusion]
+    The number of exclusion genome files.
+
+[INT >= 0] [inhits]
+    The minimum number of inclusion k-mer hits.
+
+[INT >= 0] [exhits]
+    The maximum number of exclusion k-mer hits.
 
 [INT >= 1] [k]
     The size of the k-mer.
@@ -941,6 +1710,11 @@ INPUT
 [0 <= FLOAT <= 1] [GC]
     The average GC content of all the targets..
 
+[(INT, INT) -> (INT) DICTIONARY -- OPTIONAL] [histogram]
+    The number of aggregated k-mers with each (incount, excount) pair, as
+    recorded by their statistics (see AggregateStatistics.py), or None. When
+    given, the number of k-mers kept by the hit thresholds is reported.
+
 
 POST
 ----
@@ -952,7 +1726,10 @@ The parameters will be written to [reportFile].
 def reportParameters(
         reportFile, referenceLocation, referenceSize, rate,
         totalInclusion, totalExclusion, inhits, exhits,
-        k, kmerLocation, gap, size, GC):
+        k, kmerLocation, gap, size, GC, histogram=None):
+
+    if histogram is not None:
+        inclusionKept, exclusionKept = AggregateStatistics.countKept(histogram)
 
     reportFile.write("==== Parameterization Report ====\n")
     reportFile.write("\n")
@@ -964,12 +1741,29 @@ def reportParameters(
     reportFile.write("\n")
     reportFile.write("Inclusion Genomes = " + str(totalInclusion) + "\n")
     reportFile.write("Minimum Inclusion Hits = " + str(inhits) + "\n")
+
+    if histogram is not None:
+        reportFile.write(
+            "Inclusion k-mers Kept = " +
+            str(AggregateStatistics.keptBy(inclusionKept, inhits)) + "\n")
+
     reportFile.write("\n")
     reportFile.write("Exclusion Genomes = " + str(totalExclusion) + "\n")
     reportFile.write("Maximum Exclusion Hits = " + str(exhits) + "\n")
+
+    if histogram is not None:
+        reportFile.write(
+            "Exclusion k-mers Kept = " +
+            str(AggregateStatistics.keptBy(exclusionKept, exhits)) + "\n")
+
     reportFile.write("\n")
     reportFile.write("k-mer Size = " + str(k) + "\n")
     reportFile.write("k-mer File = " + str(kmerLocation) + "\n")
+
+    if histogram is not None:
+        reportFile.write(
+            "Aggregated k-mers = " + str(sum(histogram.values())) + "\n")
+
     reportFile.write("\n")
     reportFile.write("Maximum k-mer Gap Size = " + str(gap) + "\n")
     reportFile.write("Minimum Signature Size = " + str(size) + "\n")
@@ -978,24 +1772,56 @@ def reportParameters(
 """
 # =============================================================================
 
-PARSE
+PREPARE EXTRACTION
+------------------
 
-# =============================================================================
-"""
-def parse(parameters):
 
-    # --- Reference ---
-    if not os.path.isfile(parameters[REFERENCE]):
-        raise RuntimeError("ERROR: Could not open the reference file.\n")
+PURPOSE
+-------
 
-    referenceLocation = parameters[REFERENCE]
-    referenceFile = open(referenceLocation, 'r')
-    references = buildReferences(referenceFile)
-    referenceFile.close()
+Resolves the parameters of extracting candidate signatures from a reference,
+estimating those which were not specified.
+
+
+INPUT
+-----
+
+[STRING -> OBJECT DICTIONARY] [parameters]
+    The parameters of the extraction, as in parse(...).
+
+[FILE LOCATION] [referenceLocation]
+    The reference to extract candidates from.
+
+[FILE LOCATION] [outputLocation]
+    The location to write the candidates of the reference.
+
+[0 <= FLOAT <= 1] [rate]
+    The rate of mutations and/or errors.
+
+[0 < FLOAT < 1] [confidence]
+    The statistical confidence.
+
+[INT >= 1] [k]
+    The k-mer size.
+
+
+RETURN
+------
+
+[Extraction] [extraction]
+    The resolved parameters of the extraction.
+
+# =============================================================================
+"""
+def prepareExtraction(
+        parameters, referenceLocation, outputLocation, rate, confidence, k):
 
     # --- Reference Size & GC-Content ---
     if not parameters[REFERENCE_SIZE] or not parameters[GC_CONTENT]:
-        referenceSize, GC = estimateReferenceParameters(references)
+        referenceFile = Utility.openInput(referenceLocation)
+        referenceSize, GC = estimateReferenceParameters(
+            readFASTA(referenceFile))
+        referenceFile.close()
 
     if parameters[REFERENCE_SIZE]:
         referenceSize = parameters[REFERENCE_SIZE]
@@ -1003,23 +1829,6 @@ def parse(parameters):
     if parameters[GC_CONTENT]:
         GC = parameters[GC_CONTENT]
 
-    # --- Rate ---
-    rate = parameters.get(RATE) \
-        if parameters.get(RATE) else RATE_DEFAULT
-
-    # --- Statistical Confidence ---
-    confidence = parameters.get(CONFIDENCE) \
-        if parameters.get(CONFIDENCE) else CONFIDENCE_DEFAULT
-
-    # --- k-mer Size ---
-    if not os.path.isfile(parameters[KMERS]):
-            raise RuntimeError("ERROR: Could not open k-mer file.\n")
-
-    kmerLocation = parameters[KMERS]
-    kmerFile = open(kmerLocation, 'r')
-    k = estimateK(kmerFile)
-    kmerFile.close()
-
     # --- Minimum Inclusion Hits ---
     totalInclusion = len(parameters[INCLUSION])
 
@@ -1038,13 +1847,6 @@ def parse(parameters):
     else:
         exhits = estimateExclusionHits(totalExclusion, rate, k)
 
-    # --- k-mer Tables ---
-    kmerFile = open(parameters[KMERS], 'r')
-    inmers = {}
-    exmers = {}
-    buildKMers(kmerFile, inmers, exmers, inhits, exhits)
-    kmerFile.close()
-
     # --- Gap Size ---
     if parameters[GAP]:
         gap = parameters[GAP]
@@ -1059,19 +1861,253 @@ def parse(parameters):
     else:
         size = estimateSignatureSize(k)
 
+    return Extraction(
+        referenceLocation, outputLocation, referenceSize, GC, inhits, exhits,
+        gap, size)
+
+
+"""
+# =============================================================================
+
+RUN EXTRACTION
+--------------
+
+
+PURPOSE
+-------
+
+Extracts the candidate signatures of a single reference and reports the
+parameters of the extraction.
+
+
+INPUT
+-----
+
+[Extraction] [extraction]
+    The resolved parameters of the extraction.
+
+[STRING -> OBJECT DICTIONARY] [parameters]
+    The parameters of the extraction, as in parse(...).
+
+[(FILE LOCATION) LIST] [partitionLocations]
+    The aggregated k-mer files, in k-mer order.
+
+[INT >= 1] [k]
+    The k-mer size.
+
+[((INT, INT) -> (KMER TABLE, KMER TABLE)) DICTIONARY] [tables]
+    The inclusion and exclusion k-mers for each (inhits, exhits) pair, or None
+    to load only the aggregated k-mers of the reference.
+
+[(INT, INT) -> (INT) DICTIONARY] [histogram]
+    The statistics of the aggregated k-mers, or None.
+
+
+RETURN
+------
+
+[NONE]
+
+
+POST
+----
+
+The candidates of the reference will be written to the output location of
+the [extraction], and its parameters to the same location followed by
+".report".
+
+# =============================================================================
+"""
+def runExtraction(
+        extraction, parameters, partitionLocations, k, tables, histogram):
+
+    rate = parameters.get(RATE) \
+        if parameters.get(RATE) else RATE_DEFAULT
+
+    # --- k-mer Tables ---
+    if tables is None:
+        referenceFile = Utility.openInput(extraction.referenceLocation)
+        reference = findReferenceKMers(readFASTA(referenceFile), k)
+        referenceFile.close()
+
+        inmers, exmers = buildKMerTables(
+            partitionLocations, k, extraction.inhits, extraction.exhits,
+            reference)
+
+    else:
+        inmers, exmers = tables[(extraction.inhits, extraction.exhits)]
+
     # --- Report ---
-    reportLocation = str(parameters[OUTPUT]) + ".report"
+    reportLocation = str(extraction.outputLocation) + ".report"
     reportFile = open(reportLocation, 'w')
     reportParameters(
-        reportFile, referenceLocation, referenceSize, rate,
-        totalInclusion, totalExclusion, inhits, exhits,
-        k, kmerLocation, gap, size, GC)
+        reportFile, extraction.referenceLocation, extraction.referenceSize,
+        rate, len(parameters[INCLUSION]), len(parameters[EXCLUSION]),
+        extraction.inhits, extraction.exhits, k, parameters[KMERS],
+        extraction.gap, extraction.size, extraction.GC, histogram)
     reportFile.close()
 
     # --- Extraction ---
-    outputFile = open(parameters[OUTPUT], 'w')
-    extract(references, k, inmers, exmers, size, gap, outputFile)
+    referenceFile = Utility.openInput(extraction.referenceLocation)
+    outputFile = open(extraction.outputLocation, 'w')
+
+    # the reference may have no inclusion k-mers at all
+    if len(inmers) > 0 or tables is not None:
+        extract(
+            readFASTA(referenceFile), k, inmers, exmers, extraction.size,
+            extraction.gap, outputFile)
+
     outputFile.close()
+    referenceFile.close()
+
+
+"""
+# =============================================================================
+
+RUN EXTRACTION WORKER
+---------------------
+
+
+PURPOSE
+-------
+
+Runs one of the extractions of parse(...) in a worker process. The extractions
+and their k-mer tables are inherited from the parent process, rather than
+copied to the worker.
+
+
+INPUT
+-----
+
+[INT >= 0] [index]
+    The index of the extraction to run.
+
+
+RETURN
+------
+
+[NONE]
+
+
+POST
+----
+
+The extraction will be run, as by runExtraction(...).
+
+# =============================================================================
+"""
+def runExtractionWorker(index):
+
+    extractions, arguments = EXTRACTIONS
+
+    runExtraction(extractions[index], *arguments)
+
+
+"""
+# =============================================================================
+
+PARSE
+
+# =============================================================================
+"""
+def parse(parameters):
+
+    global EXTRACTIONS
+
+    # --- References ---
+    referenceLocations = parameters[REFERENCE]
+    outputLocations = parameters[OUTPUT]
+
+    for referenceLocation in referenceLocations:
+
+        if not os.path.isfile(referenceLocation):
+            raise RuntimeError("ERROR: Could not open the reference file.\n")
+
+    if len(outputLocations) != len(referenceLocations):
+        raise RuntimeError(
+            "ERROR: There must be one output location for every reference.\n")
+
+    # --- Rate ---
+    rate = parameters.get(RATE) \
+        if parameters.get(RATE) else RATE_DEFAULT
+
+    # --- Statistical Confidence ---
+    confidence = parameters.get(CONFIDENCE) \
+        if parameters.get(CONFIDENCE) else CONFIDENCE_DEFAULT
+
+    # --- k-mer Size ---
+    if not os.path.isfile(parameters[KMERS]):
+            raise RuntimeError("ERROR: Could not open k-mer file.\n")
+
+    kmerLocation = parameters[KMERS]
+    partitionLocations = BinaryKMers.readPartitions(kmerLocation)
+
+    k = AggregateKMers.findK(partitionLocations)
+
+    if k is None:
+        raise RuntimeError("ERROR: The k-mer file contains no k-mers.\n")
+
+    # --- Workers ---
+    workers = parameters.get(WORKERS) \
+        if parameters.get(WORKERS) else WORKERS_DEFAULT
+
+    if workers < 1:
+        raise RuntimeError("ERROR: There must be at least one worker.\n")
+
+    # --- Extractions ---
+    extractions = [
+        prepareExtraction(
+            parameters, referenceLocation, outputLocation, rate, confidence,
+            k)
+        for referenceLocation, outputLocation
+        in zip(referenceLocations, outputLocations)]
+
+    # --- k-mer Tables ---
+    intersect = parameters.get(INTERSECT) \
+        if parameters.get(INTERSECT) else INTERSECT_DEFAULT
+
+    tables = None
+
+    # references with the same hit thresholds share their k-mers
+    if not intersect:
+
+        tables = {}
+
+        for extraction in extractions:
+
+            thresholds = (extraction.inhits, extraction.exhits)
+
+            if thresholds not in tables:
+                tables[thresholds] = buildKMerTables(
+                    partitionLocations, k, extraction.inhits,
+                    extraction.exhits)
+
+    # --- Statistics ---
+    statisticsLocation = AggregateStatistics.locate(kmerLocation)
+    histogram = AggregateStatistics.read(statisticsLocation)[0] \
+        if os.path.isfile(statisticsLocation) else None
+
+    # --- Extraction ---
+    arguments = (parameters, partitionLocations, k, tables, histogram)
+
+    if workers == 1 or len(extractions) == 1:
+
+        for extraction in extractions:
+            runExtraction(extraction, *arguments)
+
+        return
+
+    # the workers are forked, inheriting the loaded k-mers
+    EXTRACTIONS = (extractions, arguments)
+    pool = multiprocessing.Pool(processes=min(workers, len(extractions)))
+
+    try:
+        pool.map(runExtractionWorker, range(len(extractions)))
+
+    finally:
+        pool.terminate()
+        pool.join()
+        EXTRACTIONS = None
 
 
 """
@@ -1092,7 +2128,7 @@ def main():
         REFERENCE_LONG,
         dest=REFERENCE,
         help=REFERENCE_HELP,
-        type=str, required=True)
+        type=str, required=True, nargs='+')
 
     parser.add_argument(
         INCLUSION_SHORT,
@@ -1120,7 +2156,7 @@ def main():
         OUTPUT_LONG,
         dest=OUTPUT,
         help=OUTPUT_HELP,
-        type=str, required=True)
+        type=str, required=True, nargs='+')
 
     # OPTIONAL #
 
@@ -1180,6 +2216,18 @@ def main():
         help=CONFIDENCE_HELP,
         type=float, required=False)
 
+    parser.add_argument(
+        INTERSECT_LONG,
+        dest=INTERSECT,
+        help=INTERSECT_HELP,
+        action='store_true')
+
+    parser.add_argument(
+        WORKERS_LONG,
+        dest=WORKERS,
+        help=WORKERS_HELP,
+        type=int, required=False)
+
     args = parser.parse_args()
     parameters = vars(args)
     parse(parameters)
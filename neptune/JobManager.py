@@ -57,6 +57,11 @@ class JobManager:
     FILTER_JOB = "Neptune-FilterSignatures"
     CONSOLIDATE_JOB = "Neptune-ConsolidateSignatures"
 
+    # The greatest number of ExtractSignatures jobs among which the references
+    # are divided, when the job manager does not know how many processes are
+    # available.
+    EXTRACT_GROUPS = 8
+
     ID = 0
 
     """
@@ -163,6 +168,107 @@ class JobManager:
     """
     # =========================================================================
 
+    GET COUNT WORKERS
+    -----------------
+
+
+    PURPOSE
+    -------
+
+    Determines the number of worker processes each CountKMers job should use,
+    given the number of CountKMers jobs which will run together.
+
+
+    INPUT
+    -----
+
+    [1 <= INT] [jobs]
+        The number of CountKMers jobs.
+
+
+    RETURN
+    ------
+
+    [1 <= INT] [workers]
+        The number of worker processes for each CountKMers job. This is 1,
+        unless the job manager knows that more processes are available.
+
+    # =========================================================================
+    """
+    def getCountWorkers(self, jobs):
+
+        return 1
+
+    """
+    # =========================================================================
+
+    GET AGGREGATE RANGES
+    --------------------
+
+
+    PURPOSE
+    -------
+
+    Determines the number of k-mer ranges aggregated by separate
+    AggregateKMers jobs, when there is a single k-mer file per genome.
+
+
+    INPUT
+    -----
+
+    [NONE]
+
+
+    RETURN
+    ------
+
+    [1 <= INT] [ranges]
+        The number of k-mer ranges. This is 1, unless the job manager knows
+        that more processes are available.
+
+    # =========================================================================
+    """
+    def getAggregateRanges(self):
+
+        return 1
+
+    """
+    # =========================================================================
+
+    GET EXTRACT GROUPS
+    ------------------
+
+
+    PURPOSE
+    -------
+
+    Determines the greatest number of ExtractSignatures jobs among which the
+    references are divided. Each job loads the aggregated k-mers once for all
+    of its references.
+
+
+    INPUT
+    -----
+
+    [NONE]
+
+
+    RETURN
+    ------
+
+    [1 <= INT] [groups]
+        The greatest number of extraction jobs. This is EXTRACT_GROUPS, unless
+        the job manager knows how many processes are available.
+
+    # =========================================================================
+    """
+    def getExtractGroups(self):
+
+        return self.EXTRACT_GROUPS
+
+    """
+    # =========================================================================
+
     CREATE COUNT JOB
     ----------------
 
@@ -188,6 +294,27 @@ class JobManager:
     [0 <= INT] [organization]
         The degree of k-mer organization.
 
+    [STRING -- OPTIONAL] [engine]
+        The k-mer counting engine; one of CountKMers.ENGINES.
+
+    [1 <= INT -- OPTIONAL] [memoryLimit]
+        The approximate memory limit of k-mer counting, in megabytes.
+
+    [STRING -- OPTIONAL] [outputFormat]
+        The format of the k-mer files; one of BinaryKMers.FORMATS.
+
+    [FILE LOCATION -- OPTIONAL] [splittersLocation]
+        The file of splitters dividing the k-mers among several files.
+
+    [1 <= INT -- OPTIONAL] [workers]
+        The number of worker processes counting the input.
+
+    [BOOL -- OPTIONAL] [compress]
+        Whether to compress the k-mer files with gzip.
+
+    [BOOL -- OPTIONAL] [presence]
+        Whether to record only the presence of the k-mers, without counts.
+
 
     RETURN
     ------
@@ -199,7 +326,10 @@ class JobManager:
     """
     @abc.abstractmethod
     def createCountJob(
-            self, inputLocation, outputLocation, k, organization):
+            self, inputLocation, outputLocation, k, organization,
+            engine=None, memoryLimit=None, outputFormat=None,
+            splittersLocation=None, workers=None, compress=None,
+            presence=None):
         return
 
     """
@@ -231,6 +361,52 @@ class JobManager:
         The organization tag; used to generate appropriate file names from the
         inclusion and exclusion iterators.
 
+    [STRING -- OPTIONAL] [outputFormat]
+        The format of the aggregated k-mer file; one of BinaryKMers.FORMATS.
+
+    [BOOL -- OPTIONAL] [compress]
+        Whether to compress the aggregated k-mer file with gzip.
+
+    [STRING ITERATOR -- OPTIONAL] [partialLocations]
+        An iterable object of partially aggregated file locations, produced by
+        earlier aggregate jobs. The [tag] applies to these as well.
+
+    [STRING -- OPTIONAL] [start]
+        The smallest k-mer to aggregate, or None to aggregate from the first
+        k-mer. The input files are not deleted when a range is aggregated,
+        since other jobs aggregate the other ranges of the same files.
+
+    [STRING -- OPTIONAL] [end]
+        The k-mer at which aggregation stops, or None to aggregate to the last
+        k-mer.
+
+    [INT >= 0 -- OPTIONAL] [inhits]
+        The minimum inclusion count of the k-mers used by extraction. When
+        given with [exhits], the k-mers which cannot be used by extraction are
+        not written. This must only be given to complete aggregations.
+
+    [INT >= 0 -- OPTIONAL] [exhits]
+        The minimum exclusion count of the k-mers used by extraction.
+
+    [STRING ITERATOR -- OPTIONAL] [removedInclusionLocations]
+        An iterable object of inclusion k-mer file locations to remove from
+        the partially aggregated files. The [tag] applies to these as well.
+
+    [STRING ITERATOR -- OPTIONAL] [removedExclusionLocations]
+        An iterable object of exclusion k-mer file locations to remove from
+        the partially aggregated files. The [tag] applies to these as well.
+
+    [STRING -- OPTIONAL] [engine]
+        The k-mer aggregation engine; one of AggregateKMers.ENGINES.
+
+    [FILE LOCATION -- OPTIONAL] [presenceLocation]
+        The location to write the presence bitsets of the aggregated k-mers,
+        or None. This is not supported with partially aggregated files.
+
+    [BOOL -- OPTIONAL] [statistics]
+        Whether to write the statistics of the aggregated k-mers beside the
+        output, at AggregateStatistics.locate([outputLocation]).
+
 
     RETURN
     ------
@@ -243,7 +419,11 @@ class JobManager:
     @abc.abstractmethod
     def createAggregateJob(
             self, inclusionLocations, exclusionLocations,
-            outputLocation, tag):
+            outputLocation, tag, outputFormat=None, compress=None,
+            partialLocations=None, start=None, end=None, inhits=None,
+            exhits=None, removedInclusionLocations=None,
+            removedExclusionLocations=None, engine=None,
+            presenceLocation=None, statistics=None):
         return
 
     """
@@ -256,14 +436,15 @@ class JobManager:
     PURPOSE
     -------
 
-    Creates an ExtractSignatures job.
+    Creates an ExtractSignatures job, which extracts candidates from several
+    references while loading the aggregated k-mers once.
 
 
     INPUT
     -----
 
-    [FILE LOCATION] [referenceLocation]
-        The location of the reference to extract candidates.
+    [(FILE LOCATION) LIST] [referenceLocations]
+        The locations of the references to extract candidates.
 
     [1 <= INT -- OPTIONAL] [referenceSize]
         The size of the reference.
@@ -298,8 +479,8 @@ class JobManager:
     [FILE LOCATION] [aggregateLocation]
         The location of the aggregation file.
 
-    [FILE LOCATION] [outputLocation]
-        The location of the output file.
+    [(FILE LOCATION) LIST] [outputLocations]
+        The locations of the output files, one for each reference.
 
 
     RETURN
@@ -312,9 +493,9 @@ class JobManager:
     """
     @abc.abstractmethod
     def createExtractJob(
-            self, referenceLocation, referenceSize, rate, inclusion, inhits,
+            self, referenceLocations, referenceSize, rate, inclusion, inhits,
             exclusion, exhits, gap, size, GC, confidence, aggregateLocation,
-            outputLocation):
+            outputLocations):
         return
 
     """
@@ -41,6 +41,7 @@ import sys
 import inspect
 
 import JobManager
+import Utility
 import CountKMers
 import AggregateKMers
 import ExtractSignatures
@@ -382,6 +383,27 @@ class JobManagerDRMAA(JobManager.JobManager):
     [0 <= INT] [organization]
         The degree of organization.
 
+    [STRING -- OPTIONAL] [engine]
+        The k-mer counting engine; one of CountKMers.ENGINES.
+
+    [1 <= INT -- OPTIONAL] [memoryLimit]
+        The approximate memory limit of k-mer counting, in megabytes.
+
+    [STRING -- OPTIONAL] [outputFormat]
+        The format of the k-mer files; one of BinaryKMers.FORMATS.
+
+    [FILE LOCATION -- OPTIONAL] [splittersLocation]
+        The file of splitters dividing the k-mers among several files.
+
+    [1 <= INT -- OPTIONAL] [workers]
+        The number of worker processes counting the input.
+
+    [BOOL -- OPTIONAL] [compress]
+        Whether to compress the k-mer files with gzip.
+
+    [BOOL -- OPTIONAL] [presence]
+        Whether to record only the presence of the k-mers, without counts.
+
 
     RETURN
     ------
@@ -392,7 +414,10 @@ class JobManagerDRMAA(JobManager.JobManager):
     # =========================================================================
     """
     def createCountJob(
-            self, inputLocation, outputLocation, k, organization):
+            self, inputLocation, outputLocation, k, organization,
+            engine=None, memoryLimit=None, outputFormat=None,
+            splittersLocation=None, workers=None, compress=None,
+            presence=None):
 
         # JOB CREATION
         job = self.createPythonJob()
@@ -411,6 +436,27 @@ class JobManagerDRMAA(JobManager.JobManager):
             CountKMers.KMER_LONG, str(k),
             CountKMers.ORGANIZATION_LONG, str(organization)]
 
+        if engine:
+            job.args += [CountKMers.ENGINE_LONG, str(engine)]
+
+        if memoryLimit:
+            job.args += [CountKMers.MEMORY_LIMIT_LONG, str(memoryLimit)]
+
+        if outputFormat:
+            job.args += [CountKMers.FORMAT_LONG, str(outputFormat)]
+
+        if splittersLocation:
+            job.args += [CountKMers.SPLITTERS_LONG, str(splittersLocation)]
+
+        if workers and workers > 1:
+            job.args += [CountKMers.WORKERS_LONG, str(workers)]
+
+        if compress:
+            job.args += [CountKMers.COMPRESS_LONG]
+
+        if presence:
+            job.args += [CountKMers.PRESENCE_LONG]
+
         if self.countSpecification:
             job.nativeSpecification = self.countSpecification
 
@@ -445,6 +491,52 @@ class JobManagerDRMAA(JobManager.JobManager):
         The organization tag; used to generate appropriate file names from the
         inclusion and exclusion iterators.
 
+    [STRING -- OPTIONAL] [outputFormat]
+        The format of the aggregated k-mer file; one of BinaryKMers.FORMATS.
+
+    [BOOL -- OPTIONAL] [compress]
+        Whether to compress the aggregated k-mer file with gzip.
+
+    [STRING ITERATOR -- OPTIONAL] [partialLocations]
+        An iterable object of partially aggregated file locations, produced by
+        earlier aggregate jobs. The [tag] applies to these as well.
+
+    [STRING -- OPTIONAL] [start]
+        The smallest k-mer to aggregate, or None to aggregate from the first
+        k-mer. The input files are not deleted when a range is aggregated,
+        since other jobs aggregate the other ranges of the same files.
+
+    [STRING -- OPTIONAL] [end]
+        The k-mer at which aggregation stops, or None to aggregate to the last
+        k-mer.
+
+    [INT >= 0 -- OPTIONAL] [inhits]
+        The minimum inclusion count of the k-mers used by extraction. When
+        given with [exhits], the k-mers which cannot be used by extraction are
+        not written. This must only be given to complete aggregations.
+
+    [INT >= 0 -- OPTIONAL] [exhits]
+        The minimum exclusion count of the k-mers used by extraction.
+
+    [STRING ITERATOR -- OPTIONAL] [removedInclusionLocations]
+        An iterable object of inclusion k-mer file locations to remove from
+        the partially aggregated files. The [tag] applies to these as well.
+
+    [STRING ITERATOR -- OPTIONAL] [removedExclusionLocations]
+        An iterable object of exclusion k-mer file locations to remove from
+        the partially aggregated files. The [tag] applies to these as well.
+
+    [STRING -- OPTIONAL] [engine]
+        The k-mer aggregation engine; one of AggregateKMers.ENGINES.
+
+    [FILE LOCATION -- OPTIONAL] [presenceLocation]
+        The location to write the presence bitsets of the aggregated k-mers,
+        or None. This is not supported with partially aggregated files.
+
+    [BOOL -- OPTIONAL] [statistics]
+        Whether to write the statistics of the aggregated k-mers beside the
+        output, at AggregateStatistics.locate([outputLocation]).
+
 
     RETURN
     ------
@@ -456,7 +548,11 @@ class JobManagerDRMAA(JobManager.JobManager):
     """
     def createAggregateJob(
             self, inclusionLocations, exclusionLocations,
-            outputLocation, tag):
+            outputLocation, tag, outputFormat=None, compress=None,
+            partialLocations=None, start=None, end=None, inhits=None,
+            exhits=None, removedInclusionLocations=None,
+            removedExclusionLocations=None, engine=None,
+            presenceLocation=None, statistics=None):
 
         # JOB CREATION
         job = self.createPythonJob()
@@ -473,27 +569,92 @@ class JobManagerDRMAA(JobManager.JobManager):
         args.append(os.path.realpath(inspect.getsourcefile(AggregateKMers)))
 
         # INCLUSION
-        args.append(AggregateKMers.INCLUSION_LONG)
+        if inclusionLocations:
 
-        if tag:
-            args += (item + "." + tag for item in inclusionLocations)
-        else:
-            args += inclusionLocations
+            args.append(AggregateKMers.INCLUSION_LONG)
+
+            if tag:
+                args += (item + "." + tag for item in inclusionLocations)
+            else:
+                args += inclusionLocations
 
         # EXCLUSION
-        args.append(AggregateKMers.EXCLUSION_LONG)
+        if exclusionLocations:
 
-        if tag:
-            args += (item + "." + tag for item in exclusionLocations)
-        else:
-            args += exclusionLocations
+            args.append(AggregateKMers.EXCLUSION_LONG)
+
+            if tag:
+                args += (item + "." + tag for item in exclusionLocations)
+            else:
+                args += exclusionLocations
+
+        # PARTIAL
+        if partialLocations:
+
+            args.append(AggregateKMers.PARTIAL_LONG)
+
+            if tag:
+                args += (item + "." + tag for item in partialLocations)
+            else:
+                args += partialLocations
+
+        # REMOVED
+        for option, locations in [
+                (AggregateKMers.REMOVE_INCLUSION_LONG,
+                    removedInclusionLocations),
+                (AggregateKMers.REMOVE_EXCLUSION_LONG,
+                    removedExclusionLocations)]:
+
+            if locations:
+
+                args.append(option)
+
+                if tag:
+                    args += (item + "." + tag for item in locations)
+                else:
+                    args += locations
 
         # OUTPUT
         args.append(AggregateKMers.OUTPUT_LONG)
         args.append(outputLocation)
 
         # DELETE
-        args.append(AggregateKMers.DELETE_LONG)
+        if start is None and end is None:
+            args.append(AggregateKMers.DELETE_LONG)
+
+        # FORMAT
+        if outputFormat:
+            args += [AggregateKMers.FORMAT_LONG, str(outputFormat)]
+
+        # COMPRESS
+        if compress:
+            args.append(AggregateKMers.COMPRESS_LONG)
+
+        # RANGE
+        if start is not None:
+            args += [AggregateKMers.START_LONG, str(start)]
+
+        if end is not None:
+            args += [AggregateKMers.END_LONG, str(end)]
+
+        # HITS
+        if inhits is not None:
+            args += [AggregateKMers.INHITS_LONG, str(inhits)]
+
+        if exhits is not None:
+            args += [AggregateKMers.EXHITS_LONG, str(exhits)]
+
+        # ENGINE
+        if engine:
+            args += [AggregateKMers.ENGINE_LONG, str(engine)]
+
+        # PRESENCE
+        if presenceLocation:
+            args += [AggregateKMers.PRESENCE_LONG, str(presenceLocation)]
+
+        # STATISTICS
+        if statistics:
+            args.append(AggregateKMers.STATISTICS_LONG)
 
         job.args = args
 
@@ -512,13 +673,14 @@ class JobManagerDRMAA(JobManager.JobManager):
     PURPOSE
     -------
 
-    Creates an ExtractSignatures job.
+    Creates an ExtractSignatures job, which extracts candidates from several
+    references while loading the aggregated k-mers once.
 
     INPUT
     -----
 
-    [FILE LOCATION] [referenceLocation]
-        The location of the reference to extract candidates.
+    [(FILE LOCATION) LIST] [referenceLocations]
+        The locations of the references to extract candidates.
 
     [1 <= INT -- OPTIONAL] [referenceSize]
         The size of the reference.
@@ -555,8 +717,8 @@ class JobManagerDRMAA(JobManager.JobManager):
     [FILE LOCATION] [aggregateLocation]
         The location of the aggregation file.
 
-    [FILE LOCATION] [outputLocation]
-        The location of the output file.
+    [(FILE LOCATION) LIST] [outputLocations]
+        The locations of the output files, one for each reference.
 
 
     RETURN
@@ -568,9 +730,9 @@ class JobManagerDRMAA(JobManager.JobManager):
     # =========================================================================
     """
     def createExtractJob(
-            self, referenceLocation, referenceSize, rate, inclusion, inhits,
+            self, referenceLocations, referenceSize, rate, inclusion, inhits,
             exclusion, exhits, gap, size, GC, confidence, aggregateLocation,
-            outputLocation):
+            outputLocations):
 
         # JOB CREATION
         job = self.createPythonJob()
@@ -588,7 +750,7 @@ class JobManagerDRMAA(JobManager.JobManager):
 
         # REFERENCE
         args.append(ExtractSignatures.REFERENCE_LONG)
-        args.append(str(referenceLocation))
+        args += [str(location) for location in referenceLocations]
 
         # REFERENCE SIZE
         if referenceSize:
@@ -646,7 +808,7 @@ class JobManagerDRMAA(JobManager.JobManager):
 
         # OUTPUT
         args.append(ExtractSignatures.OUTPUT_LONG)
-        args.append(str(outputLocation))
+        args += [str(location) for location in outputLocations]
 
         job.args = args
 
@@ -713,7 +875,7 @@ class JobManagerDRMAA(JobManager.JobManager):
 
         for inputLocation in inputLocations:
 
-            inputFile = open(inputLocation, 'r')
+            inputFile = Utility.openInput(inputLocation)
 
             for line in inputFile:
 
@@ -37,8 +37,11 @@ node.
 # =============================================================================
 """
 
+import functools
 import multiprocessing
+import os
 import subprocess
+import threading
 
 import JobManager
 import CountKMers
@@ -47,6 +50,7 @@ import ExtractSignatures
 import FilterSignatures
 import ConsolidateSignatures
 import Database
+import Utility
 
 # DEFAULTS
 
@@ -87,6 +91,7 @@ class JobManagerParallel(JobManager.JobManager):
             self, outputDirectoryLocation, logDirectoryLocation,
             parallel=PROCESSES_DEFAULT):
 
+        self.parallel = parallel
         self.pool = multiprocessing.Pool(processes=parallel)
 
         # JobManager Parent Constructor
@@ -180,6 +185,105 @@ class JobManagerParallel(JobManager.JobManager):
     """
     # =========================================================================
 
+    GET COUNT WORKERS
+    -----------------
+
+
+    PURPOSE
+    -------
+
+    Determines the number of worker processes each CountKMers job should use,
+    such that the processes of the pool are shared among the jobs.
+
+
+    INPUT
+    -----
+
+    [1 <= INT] [jobs]
+        The number of CountKMers jobs.
+
+
+    RETURN
+    ------
+
+    [1 <= INT] [workers]
+        The number of worker processes for each CountKMers job.
+
+    # =========================================================================
+    """
+    def getCountWorkers(self, jobs):
+
+        return max(self.parallel // max(jobs, 1), 1)
+
+    """
+    # =========================================================================
+
+    GET AGGREGATE RANGES
+    --------------------
+
+
+    PURPOSE
+    -------
+
+    Determines the number of k-mer ranges aggregated by separate
+    AggregateKMers jobs, such that every process of the pool aggregates one
+    range.
+
+
+    INPUT
+    -----
+
+    [NONE]
+
+
+    RETURN
+    ------
+
+    [1 <= INT] [ranges]
+        The number of k-mer ranges.
+
+    # =========================================================================
+    """
+    def getAggregateRanges(self):
+
+        return max(self.parallel, 1)
+
+    """
+    # =========================================================================
+
+    GET EXTRACT GROUPS
+    ------------------
+
+
+    PURPOSE
+    -------
+
+    Determines the greatest number of ExtractSignatures jobs among which the
+    references are divided, such that every process of the pool extracts from
+    one group of references.
+
+
+    INPUT
+    -----
+
+    [NONE]
+
+
+    RETURN
+    ------
+
+    [1 <= INT] [groups]
+        The greatest number of extraction jobs.
+
+    # =========================================================================
+    """
+    def getExtractGroups(self):
+
+        return max(self.parallel, 1)
+
+    """
+    # =========================================================================
+
     CREATE COUNT JOB
     ----------------
 
@@ -205,6 +309,30 @@ class JobManagerParallel(JobManager.JobManager):
     [0 <= INT] [organization]
         The degree of k-mer organization.
 
+    [STRING -- OPTIONAL] [engine]
+        The k-mer counting engine; one of CountKMers.ENGINES.
+
+    [1 <= INT -- OPTIONAL] [memoryLimit]
+        The approximate memory limit of k-mer counting, in megabytes.
+
+    [STRING -- OPTIONAL] [outputFormat]
+        The format of the k-mer files; one of BinaryKMers.FORMATS.
+
+    [FILE LOCATION -- OPTIONAL] [splittersLocation]
+        The file of splitters dividing the k-mers among several files.
+
+    [1 <= INT -- OPTIONAL] [workers]
+        The number of worker processes counting the input. When there is more
+        than one worker, the input is divided into ranges which are counted
+        by separate pool processes, and a final pool process merges their
+        sorted runs into the output.
+
+    [BOOL -- OPTIONAL] [compress]
+        Whether to compress the k-mer files with gzip.
+
+    [BOOL -- OPTIONAL] [presence]
+        Whether to record only the presence of the k-mers, without counts.
+
 
     RETURN
     ------
@@ -215,7 +343,30 @@ class JobManagerParallel(JobManager.JobManager):
     # =========================================================================
     """
     def createCountJob(
-            self, inputLocation, outputLocation, k, organization):
+            self, inputLocation, outputLocation, k, organization,
+            engine=None, memoryLimit=None, outputFormat=None,
+            splittersLocation=None, workers=None, compress=None,
+            presence=None):
+
+        positions, checkpoints = \
+            CountKMers.indexPositions(inputLocation, k) \
+            if workers and workers > 1 else (0, [])
+
+        ranges = [
+            (start, end) + CountKMers.locateRange(checkpoints, k, start, end)
+            for start, end in CountKMers.getRanges(positions, workers or 1)]
+
+        if len(ranges) > 1:
+
+            splitters = Utility.readSplitters(splittersLocation) \
+                if splittersLocation else None
+
+            return CountJob(
+                self.pool, inputLocation, outputLocation, k, organization,
+                engine if engine else CountKMers.ENGINE_DEFAULT,
+                max(memoryLimit // len(ranges), 1) if memoryLimit else None,
+                outputFormat if outputFormat else CountKMers.FORMAT_DEFAULT,
+                splitters, bool(compress), bool(presence), ranges)
 
         parameters = {}
 
@@ -223,6 +374,12 @@ class JobManagerParallel(JobManager.JobManager):
         parameters[CountKMers.OUTPUT] = outputLocation
         parameters[CountKMers.KMER] = k
         parameters[CountKMers.ORGANIZATION] = organization
+        parameters[CountKMers.ENGINE] = engine
+        parameters[CountKMers.MEMORY_LIMIT] = memoryLimit
+        parameters[CountKMers.FORMAT] = outputFormat
+        parameters[CountKMers.SPLITTERS] = splittersLocation
+        parameters[CountKMers.COMPRESS] = compress
+        parameters[CountKMers.PRESENCE] = presence
 
         job = self.pool.apply_async(
             submit, args=(CountKMers.parse, [parameters], ))
@@ -257,6 +414,41 @@ class JobManagerParallel(JobManager.JobManager):
         The organization tag; used to generate appropriate file names from the
         inclusion and exclusion iterators.
 
+    [STRING -- OPTIONAL] [outputFormat]
+        The format of the aggregated k-mer file; one of BinaryKMers.FORMATS.
+
+    [BOOL -- OPTIONAL] [compress]
+        Whether to compress the aggregated k-mer file with gzip.
+
+    [STRING ITERATOR -- OPTIONAL] [partialLocations]
+        An iterable object of partially aggregated file locations, produced by
+        earlier aggregate jobs. The [tag] applies to these as well.
+
+    [STRING -- OPTIONAL] [start]
+        The smallest k-mer to aggregate, or None to aggregate from the first
+        k-mer. The input files are not deleted when a range is aggregated,
+        since other jobs aggregate the other ranges of the same files.
+
+    [STRING -- OPTIONAL] [end]
+        The k-mer at which aggregation stops, or None to aggregate to the last
+        k-mer.
+
+    [INT >= 0 -- OPTIONAL] [inhits]
+        The minimum inclusion count of the k-mers used by extraction. When
+        given with [exhits], the k-mers which cannot be used by extraction are
+        not written. This must only be given to complete aggregations.
+
+    [INT >= 0 -- OPTIONAL] [exhits]
+        The minimum exclusion count of the k-mers used by extraction.
+
+    [STRING ITERATOR -- OPTIONAL] [removedInclusionLocations]
+        An iterable object of inclusion k-mer file locations to remove from
+        the partially aggregated files. The [tag] applies to these as well.
+
+    [STRING ITERATOR -- OPTIONAL] [removedExclusionLocations]
+        An iterable object of exclusion k-mer file locations to remove from
+        the partially aggregated files. The [tag] applies to these as well.
+
         This [tag] relates to the following functions:
 
         Utility.getAggregationTags(...)
@@ -264,6 +456,17 @@ class JobManagerParallel(JobManager.JobManager):
         CountKMers.writeMultipleFiles(...)
         Neptune.aggregateMultipleFiles(...)
 
+    [STRING -- OPTIONAL] [engine]
+        The k-mer aggregation engine; one of AggregateKMers.ENGINES.
+
+    [FILE LOCATION -- OPTIONAL] [presenceLocation]
+        The location to write the presence bitsets of the aggregated k-mers,
+        or None. This is not supported with partially aggregated files.
+
+    [BOOL -- OPTIONAL] [statistics]
+        Whether to write the statistics of the aggregated k-mers beside the
+        output, at AggregateStatistics.locate([outputLocation]).
+
 
     RETURN
     ------
@@ -275,7 +478,11 @@ class JobManagerParallel(JobManager.JobManager):
     """
     def createAggregateJob(
             self, inclusionLocations, exclusionLocations,
-            outputLocation, tag):
+            outputLocation, tag, outputFormat=None, compress=None,
+            partialLocations=None, start=None, end=None, inhits=None,
+            exhits=None, removedInclusionLocations=None,
+            removedExclusionLocations=None, engine=None,
+            presenceLocation=None, statistics=None):
 
         parameters = {}
 
@@ -298,11 +505,55 @@ class JobManagerParallel(JobManager.JobManager):
 
         parameters[AggregateKMers.EXCLUSION] = exclusion
 
+        # PARTIAL
+        partial = []
+
+        if tag:
+            partial += (item + "." + tag for item in partialLocations or [])
+        else:
+            partial += partialLocations or []
+
+        parameters[AggregateKMers.PARTIAL] = partial
+
+        # REMOVED
+        for key, locations in [
+                (AggregateKMers.REMOVE_INCLUSION, removedInclusionLocations),
+                (AggregateKMers.REMOVE_EXCLUSION, removedExclusionLocations)]:
+
+            if tag:
+                parameters[key] = [
+                    item + "." + tag for item in locations or []]
+            else:
+                parameters[key] = list(locations or [])
+
         # OUTPUT
         parameters[AggregateKMers.OUTPUT] = outputLocation
 
         # DELETE
-        parameters[AggregateKMers.DELETE] = True
+        parameters[AggregateKMers.DELETE] = start is None and end is None
+
+        # FORMAT
+        parameters[AggregateKMers.FORMAT] = outputFormat
+
+        # COMPRESS
+        parameters[AggregateKMers.COMPRESS] = compress
+
+        # RANGE
+        parameters[AggregateKMers.START] = start
+        parameters[AggregateKMers.END] = end
+
+        # HITS
+        parameters[AggregateKMers.INHITS] = inhits
+        parameters[AggregateKMers.EXHITS] = exhits
+
+        # ENGINE
+        parameters[AggregateKMers.ENGINE] = engine
+
+        # PRESENCE
+        parameters[AggregateKMers.PRESENCE] = presenceLocation
+
+        # STATISTICS
+        parameters[AggregateKMers.STATISTICS] = statistics
 
         job = self.pool.apply_async(
             submit, args=(AggregateKMers.parse, [parameters], ))
@@ -319,14 +570,15 @@ class JobManagerParallel(JobManager.JobManager):
     PURPOSE
     -------
 
-    Creates an ExtractSignatures job.
+    Creates an ExtractSignatures job, which extracts candidates from several
+    references while loading the aggregated k-mers once.
 
 
     INPUT
     -----
 
-    [FILE LOCATION] [referenceLocation]
-        The location of the reference to extract candidates.
+    [(FILE LOCATION) LIST] [referenceLocations]
+        The locations of the references to extract candidates.
 
     [1 <= INT -- OPTIONAL] [referenceSize]
         The size of the reference.
@@ -361,8 +613,8 @@ class JobManagerParallel(JobManager.JobManager):
     [FILE LOCATION] [aggregateLocation]
         The location of the aggregation file.
 
-    [FILE LOCATION] [outputLocation]
-        The location of the output file.
+    [(FILE LOCATION) LIST] [outputLocations]
+        The locations of the output files, one for each reference.
 
 
     RETURN
@@ -374,14 +626,14 @@ class JobManagerParallel(JobManager.JobManager):
     # =========================================================================
     """
     def createExtractJob(
-            self, referenceLocation, referenceSize, rate, inclusion, inhits,
+            self, referenceLocations, referenceSize, rate, inclusion, inhits,
             exclusion, exhits, gap, size, GC, confidence, aggregateLocation,
-            outputLocation):
+            outputLocations):
 
         parameters = {}
 
         # REFERENCE
-        parameters[ExtractSignatures.REFERENCE] = referenceLocation
+        parameters[ExtractSignatures.REFERENCE] = referenceLocations
 
         # REFERENCE SIZE
         parameters[ExtractSignatures.REFERENCE_SIZE] = referenceSize \
@@ -427,7 +679,7 @@ class JobManagerParallel(JobManager.JobManager):
         parameters[ExtractSignatures.KMERS] = aggregateLocation
 
         # OUTPUT
-        parameters[ExtractSignatures.OUTPUT] = outputLocation
+        parameters[ExtractSignatures.OUTPUT] = outputLocations
 
         job = self.pool.apply_async(
             submit, args=(ExtractSignatures.parse, [parameters], ))
@@ -474,7 +726,7 @@ class JobManagerParallel(JobManager.JobManager):
 
         for inputLocation in inputLocations:
 
-            inputFile = open(inputLocation, 'r')
+            inputFile = Utility.openInput(inputLocation)
 
             for line in inputFile:
 
@@ -659,6 +911,203 @@ class JobManagerParallel(JobManager.JobManager):
         return job
 
 
+"""
+# =============================================================================
+
+COUNT JOB
+
+# =============================================================================
+"""
+
+class CountJob:
+
+    """
+    # =========================================================================
+
+    CONSTRUCTOR
+    -----------
+
+
+    PURPOSE
+    -------
+
+    Submits the range counting tasks of a CountKMers job divided among several
+    pool processes. When every range has been counted, the merge task is
+    submitted to the pool.
+
+
+    INPUT
+    -----
+
+    [MULTIPROCESSING POOL] [pool]
+        The pool running the tasks.
+
+    [FILE LOCATION] [inputLocation]
+        The location of the input file.
+
+    [FILE LOCATION] [outputLocation]
+        The location of the output file.
+
+    [1 <= INT] [k]
+        The size of the k-mers.
+
+    [0 <= INT] [organization]
+        The degree of k-mer organization.
+
+    [STRING] [engine]
+        The k-mer counting engine; one of CountKMers.ENGINES.
+
+    [1 <= INT -- OPTIONAL] [memoryLimit]
+        The approximate memory limit of each range counting task, in
+        megabytes.
+
+    [STRING] [outputFormat]
+        The format of the k-mer files; one of BinaryKMers.FORMATS.
+
+    [STRING LIST -- OPTIONAL] [splitters]
+        The splitters dividing the k-mers among several files.
+
+    [BOOL] [compress]
+        Whether to compress the k-mer files with gzip.
+
+    [BOOL] [presence]
+        Whether to record only the presence of the k-mers, without counts.
+
+    [(INT, INT, TUPLE, INT) LIST] [ranges]
+        The (start, end, checkpoint, stop) ranges of k-mer positions counted
+        by separate tasks, and the parts of the input containing them, as
+        produced by CountKMers.locateRange(...).
+
+    # =========================================================================
+    """
+    def __init__(
+            self, pool, inputLocation, outputLocation, k, organization,
+            engine, memoryLimit, outputFormat, splitters, compress, presence,
+            ranges):
+
+        self.pool = pool
+        self.mergeArguments = [
+            outputLocation, k, organization, outputFormat, splitters,
+            compress, CountKMers.MIN_COUNT_DEFAULT, presence]
+
+        self.runs = [None] * len(ranges)
+        self.remaining = len(ranges)
+        self.lock = threading.Lock()
+        self.submitted = threading.Event()
+        self.mergeJob = None
+
+        self.rangeJobs = [
+            pool.apply_async(
+                submit,
+                args=(CountKMers.countRange, [
+                    inputLocation, outputLocation, k, engine, memoryLimit,
+                    start, end, presence, checkpoint, stop], ),
+                callback=functools.partial(self.finishRange, index))
+            for index, (start, end, checkpoint, stop) in enumerate(ranges)]
+
+    """
+    # =========================================================================
+
+    FINISH RANGE
+    ------------
+
+
+    PURPOSE
+    -------
+
+    Records the runs of a counted range and submits the merge task after the
+    last range. This is called by the pool when a range counting task
+    succeeds.
+
+
+    INPUT
+    -----
+
+    [INT] [index]
+        The index of the range.
+
+    [FILE LOCATION LIST] [runs]
+        The sorted runs of the range.
+
+
+    RETURN
+    ------
+
+    [NONE]
+
+    # =========================================================================
+    """
+    def finishRange(self, index, runs):
+
+        with self.lock:
+
+            self.runs[index] = runs
+            self.remaining -= 1
+            finished = self.remaining == 0
+
+        if finished:
+
+            runs = [
+                location for locations in self.runs for location in locations]
+
+            self.mergeJob = self.pool.apply_async(
+                submit,
+                args=(CountKMers.mergeOutput, [runs] + self.mergeArguments, ))
+
+            self.submitted.set()
+
+    """
+    # =========================================================================
+
+    GET
+    ---
+
+
+    PURPOSE
+    -------
+
+    Waits for the job to complete, propagating the exception of any failed
+    task.
+
+
+    INPUT
+    -----
+
+    [NONE]
+
+
+    RETURN
+    ------
+
+    [NONE]
+
+
+    POST
+    ----
+
+    When a range counting task fails, the runs of the other ranges will be
+    removed before the exception is raised.
+
+    # =========================================================================
+    """
+    def get(self):
+
+        for job in self.rangeJobs:
+            job.wait()
+
+        if not all(job.successful() for job in self.rangeJobs):
+
+            for locations in self.runs:
+                for location in locations or []:
+                    os.remove(location)
+
+            for job in self.rangeJobs:
+                job.get()
+
+        self.submitted.wait()
+        self.mergeJob.get()
+
+
 """
 # =============================================================================
 
@@ -721,7 +1170,7 @@ def submit(function, arguments):
     # NOTE: This may only be required in Python 2.7.
 
     try:
-        function(*arguments)
+        return function(*arguments)
 
     except subprocess.CalledProcessError as cpe:
         raise Exception(str(cpe))
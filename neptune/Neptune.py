@@ -31,13 +31,20 @@ __version__ = '1.2.5'
 import time
 
 import os
+import math
 import argparse
+import resource
 import sys
 import shutil
 
 import Execution
 import Utility
+import BinaryKMers
 import CountKMers
+import AggregateKMers
+import AggregateStatistics
+import AggregateStore
+import PresenceBitsets
 import ExtractSignatures
 import FilterSignatures
 
@@ -63,6 +70,7 @@ INCLUSION = "inclusion"
 EXCLUSION = "exclusion"
 
 AGGREGATE = "aggregate.kmers"
+INDEX = "aggregate.index"
 RECEIPT = "receipt.txt"
 CANDIDATES = "candidates"
 FILTERED = "filtered"
@@ -70,6 +78,15 @@ SORTED = "sorted"
 DATABASE = "database"
 CONSOLIDATED = "consolidated"
 LOG = "log"
+SPLITTERS = "splitters.kmers"
+PARTIAL = "partial"
+STORE = "store"
+BITSETS = "presence.bitsets"
+
+# AGGREGATION #
+
+# The largest number of k-mer files aggregated by a single job.
+AGGREGATE_FAN_IN_MAXIMUM = 256
 
 # ARGUMENTS #
 
@@ -113,6 +130,50 @@ PARALLELIZATION_HELP = "The number of processes to run simultaneously. Note \
     that this is only applicable when running Neptune in non-DRMAA mode \
     (default)."
 
+# k-mer partitioning
+PARTITIONING = "partitioning"
+PARTITIONING_LONG = LONG + PARTITIONING
+PARTITIONING_PREFIX = "prefix"
+PARTITIONING_BALANCED = "balanced"
+PARTITIONINGS = [PARTITIONING_PREFIX, PARTITIONING_BALANCED]
+PARTITIONING_DEFAULT = PARTITIONING_PREFIX
+PARTITIONING_HELP = "How the k-mers are divided among the 4^X parallel \
+    aggregation jobs, where X is the degree of organization. The '" + \
+    PARTITIONING_PREFIX + "' partitioning divides the k-mers by their first X \
+    nucleotides, which produces partitions of very different sizes when the \
+    inputs have a skewed nucleotide composition. The '" + \
+    PARTITIONING_BALANCED + "' partitioning divides the k-mers by splitters \
+    selected from a sample of the inputs, which produces partitions of \
+    similar sizes. The default partitioning is '" + PARTITIONING_DEFAULT + "'."
+
+# k-mer aggregation engine
+AGGREGATE_ENGINE = "aggregate-engine"
+AGGREGATE_ENGINE_LONG = LONG + AGGREGATE_ENGINE
+AGGREGATE_ENGINE_HELP = "The k-mer aggregation engine of every aggregation \
+    job. " + AggregateKMers.ENGINE_HELP + " When the k-mers are organized, each \
+    job aggregates a single partition of the k-mers, and so the '" + \
+    AggregateKMers.ENGINE_NUMPY + "' engine holds only that partition in \
+    memory."
+
+# Presence bitsets
+PRESENCE_BITSETS = "presence-bitsets"
+PRESENCE_BITSETS_LONG = LONG + PRESENCE_BITSETS
+PRESENCE_BITSETS_HELP = "Writes the presence bitsets of the aggregated \
+    k-mers beside the aggregated k-mer file. These record which inclusion and \
+    exclusion genomes contain each k-mer, so that the genomes containing all \
+    the k-mers of a signature may be found without alignment (see \
+    PresenceBitsets.py). This requires the genomes to be aggregated in a \
+    single level and is not supported with an aggregate store."
+
+# Aggregate store
+STORE_LONG = LONG + STORE
+STORE_HELP = "The directory of a persistent aggregate store, which records \
+    the aggregated k-mers of the genomes it covers. Only the genomes added to \
+    or removed from the store since its last use are counted and merged into \
+    its aggregation. The store is created when it does not exist. Each \
+    genome is counted into a single k-mer file, regardless of the \
+    organization."
+
 # DRMAA default specification
 DEFAULT_SPECIFICATION = "default-specification"
 DEFAULT_SPECIFICATION_LONG = LONG + DEFAULT_SPECIFICATION
@@ -156,6 +217,99 @@ CONSOLIDATE_SPECIFICATION_HELP = "The DRMAA parameters specific to filtered \
 """
 # =============================================================================
 
+PARTITION K-MERS
+----------------
+
+
+PURPOSE
+-------
+
+Selects the splitters which divide the k-mers into partitions of similar size,
+by sampling k-mers from all inclusion and exclusion files. This is only done
+when the k-mers are organized and balanced partitioning is used.
+
+
+INPUT
+-----
+
+[EXECUTION] [execution]
+    The Execution object containing all of the current execution's parameters.
+
+
+RETURN
+------
+
+[NONE]
+
+
+POST
+----
+
+When balanced partitioning is used, the splitters will be written to the
+splitters file of the [execution] and stored as its [splitters]. Otherwise,
+the [splitters] of the [execution] will be None.
+
+# =============================================================================
+"""
+def partitionKMers(execution):
+
+    execution.splitters = None
+
+    if (not execution.organization or
+            execution.partitioning != PARTITIONING_BALANCED):
+        return
+
+    partitions = int(math.pow(4, execution.organization))
+
+    sample = Utility.sampleKMers(
+        execution.inclusionLocations + execution.exclusionLocations,
+        execution.k, partitions * Utility.SAMPLE_SIZE_PER_PARTITION)
+
+    execution.splitters = Utility.selectSplitters(sample, partitions)
+    Utility.writeSplitters(execution.splitters, execution.splittersLocation)
+
+
+"""
+# =============================================================================
+
+GET PARTITION TAGS
+------------------
+
+
+PURPOSE
+-------
+
+Produces the tags of the k-mer files written for each genome, in the order
+their contents should be concatenated.
+
+
+INPUT
+-----
+
+[EXECUTION] [execution]
+    The Execution object containing all of the current execution's parameters.
+
+
+RETURN
+------
+
+[STRING LIST] [tags]
+    The partition tags when the k-mers are divided by splitters, or the
+    aggregation tags of the degree of organization otherwise.
+
+# =============================================================================
+"""
+def getPartitionTags(execution):
+
+    if execution.splitters is not None:
+        return Utility.getPartitionTags(len(execution.splitters) + 1)
+
+    return Utility.getAggregationTags(execution.organization)
+
+
+"""
+# =============================================================================
+
 COUNT K-MERS
 ------------
 
@@ -189,6 +343,12 @@ POST
 A DRMAA job is submitted for each inclusion and exclusion file. The execution
 will be halted until all the jobs are completed.
 
+Only the presence of each k-mer is recorded, since aggregation ignores the
+k-mer counts.
+
+When an aggregate store is used, only the genomes which are not already in the
+store are counted.
+
 # =============================================================================
 """
 def countKMers(execution):
@@ -199,12 +359,35 @@ def countKMers(execution):
     if not os.path.exists(execution.exclusionOutputDirectory):
         os.makedirs(execution.exclusionOutputDirectory)
 
+    partitionKMers(execution)
+
+    splittersLocation = execution.splittersLocation \
+        if execution.splitters is not None else None
+
+    inclusionLocations = execution.inclusionLocations
+    exclusionLocations = execution.exclusionLocations
+
+    if execution.storeLocation:
+
+        planStore(execution)
+
+        inclusionLocations = [
+            location for role, location, record in execution.storePlan[1]
+            if role == AggregateStore.INCLUSION and record is None]
+        exclusionLocations = [
+            location for role, location, record in execution.storePlan[1]
+            if role == AggregateStore.EXCLUSION and record is None]
+
+    # share the available processes when there are few genomes
+    workers = execution.jobManager.getCountWorkers(
+        len(inclusionLocations) + len(exclusionLocations))
+
     jobs = []
     inclusionKMerLocations = []
     exclusionKMerLocations = []
 
     # INCLUSION
-    for inclusionLocation in execution.inclusionLocations:
+    for inclusionLocation in inclusionLocations:
 
         baseName = os.path.basename(inclusionLocation)
 
@@ -216,11 +399,13 @@ def countKMers(execution):
 
         job = execution.jobManager.createCountJob(
             inclusionLocation, outputLocation,
-            execution.k, execution.organization)
+            execution.k, execution.organization, execution.engine,
+            execution.memoryLimit, execution.kmerFormat, splittersLocation,
+            workers, execution.compress, True)
         jobs.append(job)
 
     # EXCLUSION
-    for exclusionLocation in execution.exclusionLocations:
+    for exclusionLocation in exclusionLocations:
 
         baseName = os.path.basename(exclusionLocation)
 
@@ -232,7 +417,9 @@ def countKMers(execution):
 
         job = execution.jobManager.createCountJob(
             exclusionLocation, outputLocation,
-            execution.k, execution.organization)
+            execution.k, execution.organization, execution.engine,
+            execution.memoryLimit, execution.kmerFormat, splittersLocation,
+            workers, execution.compress, True)
         jobs.append(job)
 
     execution.jobManager.runJobs(jobs)
@@ -278,12 +465,24 @@ POST
 
 A DRMAA job is submitted that aggregates the prepared inclusion and exclusion
 k-mers. The execution of the script will be halted until the job has finished.
+Only the k-mers which may be used by extraction are aggregated. When an
+aggregate store is used, the k-mer files are merged into the store instead,
+and the aggregated k-mers are taken from the store. The statistics of the
+aggregated k-mers are written beside them and kept as the
+[aggregateStatistics] of the [execution].
 
 # =============================================================================
 """
 def aggregateKMers(execution, inclusionKMerLocations, exclusionKMerLocations):
 
-    if execution.organization:
+    execution.estimateAggregateHits()
+
+    if execution.storeLocation:
+
+        updateStore(
+            execution, inclusionKMerLocations, exclusionKMerLocations)
+
+    elif execution.organization:
 
         aggregateMultipleFiles(
             execution,
@@ -294,9 +493,223 @@ def aggregateKMers(execution, inclusionKMerLocations, exclusionKMerLocations):
         aggregateSingleFiles(
             execution, inclusionKMerLocations, exclusionKMerLocations)
 
+    execution.aggregateStatistics = AggregateStatistics.read(
+        AggregateStatistics.locate(execution.aggregateLocation))
+
     shutil.rmtree(execution.kmersOutputDirectory)
 
 
+"""
+# =============================================================================
+
+PLAN STORE
+----------
+
+
+PURPOSE
+-------
+
+Compares the genomes of the aggregate store with the genomes of the execution,
+to determine which genomes must be counted, added to the store, and removed
+from the store.
+
+
+INPUT
+-----
+
+[EXECUTION] [execution]
+    The Execution object containing all of the current execution's parameters.
+
+
+RETURN
+------
+
+[NONE]
+
+
+POST
+----
+
+The [storePlan] of the [execution] will contain the (kept, added, removed)
+plan produced by AggregateStore.planUpdate(...).
+
+RuntimeError if the store was built with a different k-mer size.
+
+# =============================================================================
+"""
+def planStore(execution):
+
+    k, genomes = AggregateStore.readManifest(execution.storeLocation)
+
+    if k is not None and k != execution.k:
+        raise RuntimeError(
+            "The aggregate store was built with k = " + str(k) +
+            ", which differs from k = " + str(execution.k) + ".")
+
+    execution.storePlan = AggregateStore.planUpdate(
+        genomes, execution.inclusionLocations, execution.exclusionLocations)
+
+
+"""
+# =============================================================================
+
+UPDATE STORE
+------------
+
+
+PURPOSE
+-------
+
+Merges the k-mer files of the genomes added to the aggregate store into its
+aggregation, subtracts the k-mer files of the genomes removed from it, and
+then writes the k-mers which may be used by extraction to the aggregated k-mer
+file of the execution.
+
+The k-mer files of the added genomes are kept in the store, so that they may
+be removed later. The stored files given to aggregate jobs, which delete their
+inputs, are hard links in the k-mers output directory.
+
+
+INPUT
+-----
+
+[EXECUTION] [execution]
+    The Execution object containing all of the current execution's parameters.
+
+[(FILE LOCATION) LIST] [inclusionKMerLocations]
+    The k-mer files of the counted inclusion genomes, as produced by
+    countKMers(...).
+
+[(FILE LOCATION) LIST] [exclusionKMerLocations]
+    The k-mer files of the counted exclusion genomes, as produced by
+    countKMers(...).
+
+
+RETURN
+------
+
+[NONE]
+
+
+POST
+----
+
+The aggregate store will cover exactly the genomes of the [execution], and the
+aggregate location of the [execution] will contain its pruned aggregation.
+
+# =============================================================================
+"""
+def updateStore(execution, inclusionKMerLocations, exclusionKMerLocations):
+
+    kept, added, removed = execution.storePlan
+
+    storeDirectory = execution.storeLocation
+    kmersDirectory = os.path.join(storeDirectory, AggregateStore.KMERS)
+    workDirectory = os.path.join(execution.kmersOutputDirectory, STORE)
+    aggregateLocation = os.path.join(
+        storeDirectory, AggregateStore.readAggregate(storeDirectory))
+
+    for directory in [kmersDirectory, workDirectory]:
+
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+    def link(source, purpose):
+
+        location = os.path.join(
+            workDirectory, purpose + "." + os.path.basename(source))
+
+        if os.path.exists(location):
+            os.remove(location)
+
+        AggregateStore.linkFile(source, location)
+
+        return location
+
+    # file names are never reused, even those of interrupted updates
+    names = [genome[1] for genome in kept + removed] + \
+        os.listdir(kmersDirectory)
+    identifier = max(
+        [int(name.split(".")[0]) for name in names
+            if name.split(".")[0].isdigit()] + [-1]) + 1
+
+    counted = iter(inclusionKMerLocations + exclusionKMerLocations)
+
+    genomes = list(kept)
+    inclusion = []
+    exclusion = []
+
+    for role, location, record in added:
+
+        if record is None:
+
+            name = str(identifier) + "." + KMERS
+            identifier += 1
+
+            kmerLocation = next(counted)
+            AggregateStore.linkFile(
+                kmerLocation, os.path.join(kmersDirectory, name))
+
+        else:
+
+            name = record[1]
+            kmerLocation = link(os.path.join(kmersDirectory, name), "added")
+
+        genomes.append(
+            (role, name) + AggregateStore.describeGenome(location) +
+            (location,))
+
+        if role == AggregateStore.INCLUSION:
+            inclusion.append(kmerLocation)
+        else:
+            exclusion.append(kmerLocation)
+
+    removedInclusion = [
+        link(os.path.join(kmersDirectory, genome[1]), "removed")
+        for genome in removed if genome[0] == AggregateStore.INCLUSION]
+    removedExclusion = [
+        link(os.path.join(kmersDirectory, genome[1]), "removed")
+        for genome in removed if genome[0] == AggregateStore.EXCLUSION]
+
+    if added or removed:
+
+        partial = [link(aggregateLocation, "merged")] \
+            if os.path.isfile(aggregateLocation) else []
+
+        updated = AggregateStore.nameAggregate(storeDirectory)
+        aggregateLocation = os.path.join(storeDirectory, updated)
+
+        aggregateLevels(
+            execution, inclusion, exclusion, [None], [aggregateLocation],
+            base=(partial, removedInclusion, removedExclusion), prune=False)
+
+        # the manifest names the updated aggregation, so that both change at
+        # once; an interrupted update leaves the previous store untouched
+        AggregateStore.writeManifest(
+            storeDirectory, execution.k, genomes, updated)
+
+        for name in AggregateStore.listAggregates(storeDirectory):
+
+            if name != updated:
+                os.remove(os.path.join(storeDirectory, name))
+
+        used = set(genome[1] for genome in genomes)
+
+        for genome in removed:
+
+            if genome[1] not in used:
+                os.remove(os.path.join(kmersDirectory, genome[1]))
+
+    # the aggregation of the execution is the pruned aggregation of the store
+    job = execution.jobManager.createAggregateJob(
+        [], [], execution.aggregateLocation, None, execution.kmerFormat,
+        execution.compress, [link(aggregateLocation, "pruned")], None, None,
+        execution.aggregateInhits, execution.aggregateExhits, None, None,
+        execution.aggregateEngine, None, True)
+
+    execution.jobManager.runJobs([job])
+
+
 """
 # =============================================================================
 
@@ -333,39 +746,135 @@ RETURN
 POST
 ----
 
-The k-mer count files are aggregated into a single k-mer count file. The
-execution of the script will be halted until the job has finished.
+The k-mer count files are aggregated into one k-mer count file per partition,
+described by a manifest. The execution of the script will be halted until the
+job has finished.
 
 # =============================================================================
 """
 def aggregateMultipleFiles(execution, inclusionLocations, exclusionLocations):
 
-    jobs = []
-    outputLocations = []
+    tags = getPartitionTags(execution)
+    outputLocations = [execution.aggregateLocation + "." + tag for tag in tags]
 
-    for tag in Utility.getAggregationTags(execution.organization):
+    aggregateLevels(
+        execution, inclusionLocations, exclusionLocations, tags,
+        outputLocations)
 
-        outputLocation = execution.aggregateLocation + "." + tag
-        outputLocations.append(outputLocation)
+    describeAggregates(execution, outputLocations)
+    reportPartitions(execution)
 
-        job = execution.jobManager.createAggregateJob(
-            inclusionLocations, exclusionLocations,
-            outputLocation, tag)
-        jobs.append(job)
 
-    execution.jobManager.runJobs(jobs)
+"""
+# =============================================================================
+
+DESCRIBE AGGREGATES
+-------------------
+
+
+PURPOSE
+-------
+
+Describes the aggregated k-mer files of consecutive k-mer ranges, in order,
+with a manifest written to the aggregate location of the execution. The
+aggregated k-mer files are read in place by signature extraction, rather than
+first being concatenated. Their statistics are combined beside the manifest.
+
+
+INPUT
+-----
+
+[EXECUTION] [execution]
+    The Execution object containing all of the current execution's parameters.
+
+[(FILE LOCATION) LIST] [outputLocations]
+    The locations of the aggregated k-mer files, in k-mer order.
+
+
+RETURN
+------
+
+[NONE]
+
+
+POST
+----
+
+The aggregate location of the [execution] will contain the manifest of the
+aggregated k-mer files, and the statistics of the files will be combined into
+the statistics of the manifest and deleted.
+
+# =============================================================================
+"""
+def describeAggregates(execution, outputLocations):
 
-    aggregateFile = open(execution.aggregateLocation, "w")
+    BinaryKMers.writeManifest(execution.aggregateLocation, outputLocations)
 
-    for location in outputLocations:
+    statisticsLocations = [
+        AggregateStatistics.locate(location) for location in outputLocations]
 
-        tempfile = open(location, "r")
-        aggregateFile.write(tempfile.read())
-        tempfile.close()
+    AggregateStatistics.combine(
+        statisticsLocations,
+        AggregateStatistics.locate(execution.aggregateLocation))
 
+    for location in statisticsLocations:
         os.remove(location)
 
-    aggregateFile.close()
+
+"""
+# =============================================================================
+
+REPORT PARTITIONS
+-----------------
+
+
+PURPOSE
+-------
+
+Reports the balance of the aggregated k-mer partitions to standard output,
+using the number of k-mers and bytes written to each partition, as recorded by
+their statistics.
+
+
+INPUT
+-----
+
+[EXECUTION] [execution]
+    The Execution object containing all of the current execution's parameters.
+
+
+RETURN
+------
+
+[NONE]
+
+
+POST
+----
+
+The [partitionSizes] of the [execution] will contain a (tag, k-mers, bytes)
+tuple for every partition, which will be reported in the receipt.
+
+# =============================================================================
+"""
+def reportPartitions(execution):
+
+    tags = getPartitionTags(execution)
+    partitions = AggregateStatistics.read(
+        AggregateStatistics.locate(execution.aggregateLocation))[1]
+
+    execution.partitionSizes = [
+        (tag, kmers, size)
+        for tag, (name, kmers, size) in zip(tags, partitions)]
+
+    sizes = [size[1] for size in execution.partitionSizes]
+    mean = float(sum(sizes)) / len(sizes)
+
+    print(
+        "Partitions: " + str(len(sizes)) +
+        ", Smallest: " + str(min(sizes)) +
+        ", Largest: " + str(max(sizes)) +
+        ", Imbalance: %.2f" % (max(sizes) / mean if mean else 1.0))
 
 
 """
@@ -404,19 +913,462 @@ RETURN
 POST
 ----
 
-The k-mer count files are aggregated into a single k-mer count file. The
-execution of the script will be halted until the job is finished.
+The k-mer count files are aggregated into a single k-mer count file. When
+more than one process is available, consecutive k-mer ranges are aggregated by
+separate jobs into separate files, described by a manifest. The execution of
+the script will be halted until the jobs are finished.
 
 # =============================================================================
 """
 def aggregateSingleFiles(
         execution, inclusionKMerLocations, exclusionKMerLocations):
 
-    job = execution.jobManager.createAggregateJob(
-        inclusionKMerLocations, exclusionKMerLocations,
-        execution.aggregateLocation, None)
+    ranges = selectAggregateRanges(
+        execution, inclusionKMerLocations + exclusionKMerLocations)
+
+    if len(ranges) == 1:
+
+        aggregateLevels(
+            execution, inclusionKMerLocations, exclusionKMerLocations, [None],
+            [execution.aggregateLocation])
+
+        return
+
+    outputLocations = [
+        execution.aggregateLocation + "." + str(index)
+        for index in range(len(ranges))]
+
+    aggregateLevels(
+        execution, inclusionKMerLocations, exclusionKMerLocations,
+        [None] * len(ranges), outputLocations, ranges)
+
+    describeAggregates(execution, outputLocations)
+
+
+"""
+# =============================================================================
+
+SELECT AGGREGATE RANGES
+-----------------------
+
+
+PURPOSE
+-------
+
+Divides the k-mers into consecutive ranges of similar size, which may be
+aggregated by separate jobs. The splitters between the ranges are selected by
+sampling the sorted k-mer files, which are searched rather than read. When
+none of the k-mer files can be searched, because they are compressed, the
+genomes are sampled instead.
+
+
+INPUT
+-----
+
+[EXECUTION] [execution]
+    The Execution object containing all of the current execution's parameters.
+
+[(FILE LOCATION) LIST] [kmerLocations]
+    The locations of the k-mer files of every genome.
+
+
+RETURN
+------
+
+[(STRING, STRING) LIST] [ranges]
+    The (start, end) k-mer ranges, in order. The start of the first range and
+    the end of the last range are None. There is a single range when only one
+    process is available.
+
+# =============================================================================
+"""
+def selectAggregateRanges(execution, kmerLocations):
+
+    partitions = execution.jobManager.getAggregateRanges()
+
+    if partitions <= 1 or not kmerLocations:
+        return [(None, None)]
+
+    size = partitions * Utility.SAMPLE_SIZE_PER_PARTITION
+    sample = []
+
+    for location in kmerLocations:
+        sample += AggregateKMers.sampleKMers(
+            location, max(size // len(kmerLocations), 1))
+
+    if not sample:
+        sample = Utility.sampleKMers(
+            execution.inclusionLocations + execution.exclusionLocations,
+            execution.k, size)
+
+    splitters = sorted(set(Utility.selectSplitters(sample, partitions)))
+    bounds = [None] + splitters + [None]
+
+    return zip(bounds[:-1], bounds[1:])
+
+
+"""
+# =============================================================================
+
+GET AGGREGATE FAN-IN
+--------------------
+
+
+PURPOSE
+-------
+
+Determines the largest number of k-mer files aggregated by a single job. All
+the genomes are aggregated together when there are few enough of them.
+Otherwise, the fan-in is about the square root of the number of genomes, so
+that the genomes are aggregated in two levels of similar width.
+
+The fan-in never exceeds AGGREGATE_FAN_IN_MAXIMUM or half of the limit on open
+files.
 
-    execution.jobManager.runJobs([job])
+
+INPUT
+-----
+
+[INT >= 1] [genomes]
+    The number of inclusion and exclusion genomes.
+
+
+RETURN
+------
+
+[INT >= 2] [fanIn]
+    The largest number of k-mer files aggregated by a single job.
+
+# =============================================================================
+"""
+def getAggregateFanIn(genomes):
+
+    maximum = AGGREGATE_FAN_IN_MAXIMUM
+
+    limit = resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+
+    if limit != resource.RLIM_INFINITY:
+        maximum = max(min(maximum, limit // 2), 2)
+
+    if genomes <= maximum:
+        return max(genomes, 2)
+
+    return min(max(int(math.ceil(math.sqrt(genomes))), 2), maximum)
+
+
+"""
+# =============================================================================
+
+AGGREGATE LEVELS
+----------------
+
+
+PURPOSE
+-------
+
+Aggregates the k-mer files of the genomes in one or more levels. When there are
+more genomes than the aggregation fan-in, groups of genomes are aggregated by
+separate jobs into partial aggregations, which are aggregated again in groups
+in the following level, until a single group remains. The jobs of each level
+are run in parallel.
+
+
+INPUT
+-----
+
+[EXECUTION] [execution]
+    The Execution object containing all of the current execution's parameters.
+
+[(FILE LOCATION) LIST] [inclusionLocations]
+    A list of inclusion k-mer file output locations.
+
+[(FILE LOCATION) LIST] [exclusionLocations]
+    A list of exclusion k-mer file output locations.
+
+[(STRING) LIST] [tags]
+    The tags of the k-mer files of every genome, or [None] when there is a
+    single k-mer file per genome.
+
+[(FILE LOCATION) LIST] [outputLocations]
+    The aggregated output locations, one for each tag.
+
+[(STRING, STRING) LIST -- OPTIONAL] [ranges]
+    The (start, end) k-mer range aggregated into each output location, or None
+    when every output location aggregates all of the k-mers.
+
+[((FILE LOCATION) LIST, (FILE LOCATION) LIST, (FILE LOCATION) LIST)
+    -- OPTIONAL] [base]
+    The (partial, removed inclusion, removed exclusion) locations of existing
+    aggregations and the k-mer files removed from them, or None. These are
+    aggregated together in the first level, so that no count is ever
+    negative, by a group of their own unless there is a single group of
+    genomes. They are only supported with a single untagged output.
+
+[BOOL -- OPTIONAL] [prune]
+    Whether the final level writes only the k-mers which may be used by
+    extraction.
+
+
+RETURN
+------
+
+[NONE]
+
+
+POST
+----
+
+The k-mer files will be aggregated into the [outputLocations]. The partial
+aggregations are written in the k-mers output directory and deleted once they
+are aggregated. Unless [prune] is False, the final level writes only the k-mers
+which may be used by extraction, according to the hit thresholds of the
+[execution]. When the [execution] requests presence bitsets and the genomes
+are aggregated in a single level, the presence bitsets of the outputs are
+concatenated into the presence location of the [execution]. Unless [prune] is
+False, the statistics of each output are written beside it.
+
+# =============================================================================
+"""
+def aggregateLevels(
+        execution, inclusionLocations, exclusionLocations, tags,
+        outputLocations, ranges=None, base=None, prune=True):
+
+    fanIn = getAggregateFanIn(
+        len(inclusionLocations) + len(exclusionLocations))
+
+    partialDirectory = os.path.join(execution.kmersOutputDirectory, PARTIAL)
+
+    # the first level aggregates groups of genomes
+    locations = [(location, True) for location in inclusionLocations] + \
+        [(location, False) for location in exclusionLocations]
+
+    groups = []
+
+    for start in range(0, len(locations), fanIn):
+
+        group = locations[start:start + fanIn]
+
+        groups.append((
+            [location for location, inclusion in group if inclusion],
+            [location for location, inclusion in group if not inclusion],
+            [], [], []))
+
+    # removed files are aggregated with the aggregations containing them
+    if base and any(base):
+
+        if len(groups) == 1:
+            groups[0] = groups[0][:2] + tuple(base)
+
+        else:
+            groups.append(([], []) + tuple(base))
+
+    level = 0
+
+    while True:
+
+        final = len(groups) == 1
+
+        if not final and not os.path.exists(partialDirectory):
+            os.makedirs(partialDirectory)
+
+        jobs = []
+        partialLocations = []
+
+        # the genomes of a partial aggregation are not known
+        presence = final and level == 0 and prune and \
+            execution.presenceLocation
+        presenceLocations = []
+
+        for index, group in enumerate(groups):
+
+            (inclusion, exclusion, partial,
+                removedInclusion, removedExclusion) = group
+
+            partialLocation = os.path.join(
+                partialDirectory,
+                PARTIAL + "." + str(level) + "." + str(index) + "." + KMERS)
+            partialLocations.append(partialLocation)
+
+            for number, (tag, outputLocation, (start, end)) in enumerate(zip(
+                    tags, outputLocations,
+                    ranges or [(None, None)] * len(tags))):
+
+                # the partial aggregations of each range are kept apart
+                suffix = "." + str(number) if ranges else ""
+
+                # partial counts may still grow, so only the final level prunes
+                inhits = execution.aggregateInhits if final and prune else None
+                exhits = execution.aggregateExhits if final and prune else None
+
+                # only the aggregation used by extraction is described
+                statistics = final and prune
+
+                if not final:
+                    outputLocation = partialLocation + suffix
+                    outputLocation += "." + tag if tag else ""
+
+                presenceLocation = None
+
+                if presence:
+                    presenceLocation = \
+                        execution.presenceLocation + "." + str(number)
+                    presenceLocations.append(presenceLocation)
+
+                job = execution.jobManager.createAggregateJob(
+                    inclusion, exclusion, outputLocation, tag,
+                    execution.kmerFormat, execution.compress,
+                    [location + suffix for location in partial], start, end,
+                    inhits, exhits, removedInclusion, removedExclusion,
+                    execution.aggregateEngine, presenceLocation, statistics)
+                jobs.append(job)
+
+        execution.jobManager.runJobs(jobs)
+
+        # the presence bitsets of the outputs name the genomes
+        if presenceLocations:
+
+            PresenceBitsets.concatenate(
+                presenceLocations, execution.presenceLocation,
+                execution.inclusionLocations, execution.exclusionLocations)
+
+            for location in presenceLocations:
+                os.remove(location)
+
+        if final:
+            break
+
+        # the following level aggregates groups of partial aggregations
+        groups = [
+            ([], [], partialLocations[start:start + fanIn], [], [])
+            for start in range(0, len(partialLocations), fanIn)]
+
+        level += 1
+
+
+"""
+# =============================================================================
+
+BUILD INDEX
+-----------
+
+
+PURPOSE
+-------
+
+Builds the k-mer index used by every extraction job, once. The index holds the
+aggregated k-mers in the binary format, which extraction memory-maps and
+searches in place, so that the operating system shares a single copy among
+every extraction job instead of each job parsing the aggregated k-mers into
+memory of its own.
+
+Aggregated k-mers already written in the binary format are their own index.
+The partitions of a partitioned aggregation are indexed separately and
+described by a manifest. k-mers larger than BinaryKMers.MAXIMUM_K cannot be
+encoded and are not indexed.
+
+
+INPUT
+-----
+
+[EXECUTION] [execution]
+    The Execution object containing all of the current execution's parameters.
+
+
+RETURN
+------
+
+[FILE LOCATION] [indexLocation]
+    The location of the k-mers to be used by extraction: either the index or,
+    when no index is needed or possible, the aggregated k-mers.
+
+
+POST
+----
+
+When the aggregated k-mers are text, their index will be written to the index
+location of the [execution], alongside a copy of their statistics.
+
+# =============================================================================
+"""
+def buildIndex(execution):
+
+    aggregateLocation = execution.aggregateLocation
+    partitionLocations = BinaryKMers.readPartitions(aggregateLocation)
+
+    if execution.k > BinaryKMers.MAXIMUM_K or all(
+            BinaryKMers.isBinary(location) for location in partitionLocations):
+        return aggregateLocation
+
+    if BinaryKMers.isManifest(aggregateLocation):
+
+        # aggregate.kmers.A is indexed as aggregate.index.A
+        indexLocations = [
+            execution.indexLocation +
+            os.path.basename(location)[len(os.path.basename(
+                aggregateLocation)):]
+            for location in partitionLocations]
+
+        for partitionLocation, indexLocation in zip(
+                partitionLocations, indexLocations):
+            BinaryKMers.convert(
+                partitionLocation, indexLocation, BinaryKMers.FORMAT_BINARY)
+
+        BinaryKMers.writeManifest(execution.indexLocation, indexLocations)
+
+    else:
+
+        BinaryKMers.convert(
+            aggregateLocation, execution.indexLocation,
+            BinaryKMers.FORMAT_BINARY)
+
+    statisticsLocation = AggregateStatistics.locate(aggregateLocation)
+
+    if os.path.isfile(statisticsLocation):
+        shutil.copyfile(
+            statisticsLocation,
+            AggregateStatistics.locate(execution.indexLocation))
+
+    return execution.indexLocation
+
+
+"""
+# =============================================================================
+
+GROUP REFERENCES
+----------------
+
+
+PURPOSE
+-------
+
+Divides the references among a number of extraction jobs, so that each job
+loads the k-mer index once for all of its references. The references are
+dealt out in turn, so that the groups differ in size by at most one.
+
+
+INPUT
+-----
+
+[LIST] [references]
+    The references to divide.
+
+[1 <= INT] [groups]
+    The greatest number of groups.
+
+
+RETURN
+------
+
+[(LIST) LIST] [groups]
+    The non-empty groups of references.
+
+# =============================================================================
+"""
+def groupReferences(references, groups):
+
+    count = min(max(groups, 1), len(references))
+
+    return [references[i::count] for i in range(count)]
 
 
 """
@@ -451,10 +1403,12 @@ RETURN
 POST
 ----
 
-A DRMAA job is submitted that extracts signatures from a reference genome
-using information from aggregated k-mer information from inclusion and
-exclusion genomes. The execution of the script will be halted until the job
-has finished.
+Jobs are submitted that extract signatures from the reference genomes using
+information from aggregated k-mer information from inclusion and exclusion
+genomes. The references are grouped into at most as many jobs as the job
+manager determines, and every job shares the k-mer index built by
+buildIndex(...). The execution of the script will be halted until the jobs
+have finished.
 
 # =============================================================================
 """
@@ -463,6 +1417,8 @@ def extractSignatures(execution):
     jobs = []
     outputLocations = []
 
+    kmerLocation = buildIndex(execution)
+
     if execution.reference:
         references = execution.reference
 
@@ -476,12 +1432,19 @@ def extractSignatures(execution):
             os.path.join(execution.candidatesDirectoryLocation, baseName))
         outputLocations.append(outputLocation)
 
+    # each job loads the k-mer index once for all of its references
+    for group in groupReferences(
+            zip(references, outputLocations),
+            execution.jobManager.getExtractGroups()):
+
+        groupLocations, groupOutputs = zip(*group)
+
         job = execution.jobManager.createExtractJob(
-            reference, execution.referenceSize, execution.rate,
+            list(groupLocations), execution.referenceSize, execution.rate,
             execution.inclusionLocations, execution.inhits,
             execution.exclusionLocations, execution.exhits, execution.gap,
             execution.size, execution.gcContent, execution.confidence,
-            execution.aggregateLocation, outputLocation)
+            kmerLocation, list(groupOutputs))
 
         jobs.append(job)
 
@@ -826,6 +1789,54 @@ def main():
         help=CountKMers.ORGANIZATION_HELP,
         type=int, default=3)
 
+    kmers.add_argument(
+        CountKMers.ENGINE_LONG,
+        dest=CountKMers.ENGINE,
+        help=CountKMers.ENGINE_HELP,
+        type=str, choices=CountKMers.ENGINES, required=False)
+
+    kmers.add_argument(
+        CountKMers.MEMORY_LIMIT_LONG,
+        dest=CountKMers.MEMORY_LIMIT,
+        help=CountKMers.MEMORY_LIMIT_HELP,
+        type=int, required=False)
+
+    kmers.add_argument(
+        CountKMers.FORMAT_LONG,
+        dest=CountKMers.FORMAT,
+        help=CountKMers.FORMAT_HELP,
+        type=str, choices=BinaryKMers.FORMATS, required=False)
+
+    kmers.add_argument(
+        PARTITIONING_LONG,
+        dest=PARTITIONING,
+        help=PARTITIONING_HELP,
+        type=str, choices=PARTITIONINGS, default=PARTITIONING_DEFAULT)
+
+    kmers.add_argument(
+        CountKMers.COMPRESS_LONG,
+        dest=CountKMers.COMPRESS,
+        help=CountKMers.COMPRESS_HELP,
+        action='store_true')
+
+    kmers.add_argument(
+        AGGREGATE_ENGINE_LONG,
+        dest=AGGREGATE_ENGINE,
+        help=AGGREGATE_ENGINE_HELP,
+        type=str, choices=AggregateKMers.ENGINES, required=False)
+
+    kmers.add_argument(
+        PRESENCE_BITSETS_LONG,
+        dest=PRESENCE_BITSETS,
+        help=PRESENCE_BITSETS_HELP,
+        action='store_true')
+
+    kmers.add_argument(
+        STORE_LONG,
+        dest=STORE,
+        help=STORE_HELP,
+        type=str, required=False)
+
     # --- FILTERING --- #
     filtering = parser.add_argument_group("FILTERING")
 
@@ -0,0 +1,740 @@
+#!/usr/bin/env python
+
+"""
+# =============================================================================
+
+Copyright Government of Canada 2015-2017
+
+Written by: Eric Marinier, Public Health Agency of Canada,
+    National Microbiology Laboratory
+
+Funded by the National Micriobiology Laboratory and the Genome Canada / Alberta
+    Innovates Bio Solutions project "Listeria Detection and Surveillance
+    using Next Generation Genomics"
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at:
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+# =============================================================================
+"""
+
+"""
+# =============================================================================
+
+This script reads and writes presence bitset files, which record which of the
+aggregated inclusion and exclusion genomes contain each k-mer, and reports
+which genomes contain all the k-mers of candidate sequences.
+
+An aggregated k-mer file only records how many genomes contain each k-mer. A
+presence bitset file records every genome containing each k-mer as one bit of
+a packed bitset, as produced by numpy.packbits, so that the genomes containing
+the k-mers of a sequence may be found without aligning the sequence to every
+genome.
+
+The file is little-endian and begins with a 24-byte header:
+
+magic       4 bytes     The byte 0x89 followed by "NPB".
+version     1 byte      The format version.
+k           1 byte      The k-mer size, no larger than 32.
+reserved    2 bytes     Zero.
+inclusion   4 bytes     The number of inclusion genomes.
+exclusion   4 bytes     The number of exclusion genomes.
+records     8 bytes     The number of k-mers.
+
+The header is followed by the distinct and sorted two-bit k-mer codes, as
+unsigned 64-bit integers, which index the bitsets. These are followed by the
+inclusion bitsets, one row of ceil(inclusion / 8) bytes for each k-mer, and
+then by the exclusion bitsets in the same way. The first genome of a role is
+the most significant bit of the first byte of its rows. The codes and bitsets
+may therefore be memory-mapped and used without being parsed.
+
+The file ends with the genome index, one line for each genome in bit order,
+with the inclusion genomes first:
+
+[role] [genome]
+
+The k-mers containing characters other than A, C, G, or T cannot be encoded
+and are not recorded.
+
+The report contains one line for each candidate, with tab-separated columns:
+
+[candidate] [k-mers] [inclusion genomes] [exclusion genomes]
+
+where the genomes are the comma-separated genomes containing every recorded
+k-mer of the candidate.
+
+USAGE:
+
+script.py -h
+script.py -p PRESENCE -i CANDIDATES -o OUTPUT
+
+EXAMPLE:
+
+script.py -p presence.bitsets -i candidates.fasta -o coverage.txt
+
+# =============================================================================
+"""
+
+import argparse
+import struct
+
+import numpy
+
+import BinaryKMers
+import CountKMers
+import Utility
+
+"""
+# =============================================================================
+
+GLOBALS
+
+# =============================================================================
+"""
+
+PROGRAM_DESCRIPTION = "Reports the inclusion and exclusion genomes which \
+    contain all the k-mers of candidate sequences, according to a presence \
+    bitset file."
+
+# FORMAT
+
+MAGIC = "\x89NPB"
+VERSION = 1
+
+HEADER = struct.Struct("<4sBBHIIQ")
+
+CODE_TYPE = BinaryKMers.CODE_TYPE
+
+# The number of k-mers copied at once.
+BATCH_SIZE = 65536
+
+# GENOME INDEX
+
+INCLUSION = "inclusion"
+EXCLUSION = "exclusion"
+SEPARATOR = "\t"
+
+# ARGUMENTS
+
+LONG = "--"
+SHORT = "-"
+
+# Presence
+PRESENCE = "presence"
+PRESENCE_LONG = LONG + PRESENCE
+PRESENCE_SHORT = SHORT + "p"
+PRESENCE_HELP = "The location of the presence bitset file."
+
+# Input
+INPUT = "input"
+INPUT_LONG = LONG + INPUT
+INPUT_SHORT = SHORT + "i"
+INPUT_HELP = "The location of the candidate sequences, in FASTA format."
+
+# Output
+OUTPUT = "output"
+OUTPUT_LONG = LONG + OUTPUT
+OUTPUT_SHORT = SHORT + "o"
+OUTPUT_HELP = "The location to write the report."
+
+
+"""
+# =============================================================================
+
+PRESENCE
+--------
+
+
+PURPOSE
+-------
+
+The contents of a presence bitset file. The codes and bitsets are
+memory-mapped from the file, rather than read into memory.
+
+
+INPUT
+-----
+
+[FILE LOCATION] [location]
+    The location of the presence bitset file.
+
+
+POST
+----
+
+The [k], [codes], [inclusion], [exclusion], [inclusionNames], and
+[exclusionNames] attributes will describe the contents of the file. The
+[inclusion] and [exclusion] bitsets are arrays with one row of packed bits for
+each code.
+
+# =============================================================================
+"""
+class Presence():
+
+    def __init__(self, location):
+
+        with open(location, 'rb') as inputFile:
+            header = readHeader(inputFile)
+
+        (magic, version, self.k, reserved, inclusion, exclusion,
+            records) = header
+
+        offset = HEADER.size
+
+        self.codes = BinaryKMers.mapArray(location, CODE_TYPE, offset, records)
+        offset += CODE_TYPE.itemsize * records
+
+        self.inclusion = mapBitsets(
+            location, offset, records, getWidth(inclusion))
+        offset += self.inclusion.size
+
+        self.exclusion = mapBitsets(
+            location, offset, records, getWidth(exclusion))
+        offset += self.exclusion.size
+
+        with open(location, 'rb') as inputFile:
+
+            inputFile.seek(offset)
+            genomes = [
+                line.rstrip("\n").split(SEPARATOR, 1) for line in inputFile]
+
+        self.inclusionNames = [
+            name for role, name in genomes if role == INCLUSION]
+        self.exclusionNames = [
+            name for role, name in genomes if role == EXCLUSION]
+
+        if len(self.inclusionNames) != inclusion or \
+                len(self.exclusionNames) != exclusion:
+            raise RuntimeError(
+                "ERROR: Malformed presence bitset genome index: " +
+                str(location))
+
+    def __len__(self):
+
+        return len(self.codes)
+
+
+"""
+# =============================================================================
+
+GET WIDTH
+---------
+
+
+PURPOSE
+-------
+
+Determines the number of bytes of a bitset row.
+
+
+INPUT
+-----
+
+[INT >= 0] [genomes]
+    The number of genomes recorded by the row.
+
+
+RETURN
+------
+
+[INT >= 0] [width]
+    The number of bytes of the row.
+
+# =============================================================================
+"""
+def getWidth(genomes):
+
+    return (genomes + 7) // 8
+
+
+"""
+# =============================================================================
+
+READ HEADER
+-----------
+
+
+PURPOSE
+-------
+
+Reads and validates the header of a presence bitset file.
+
+
+INPUT
+-----
+
+[FILE] [inputFile]
+    The readable presence bitset file, positioned at its start.
+
+
+RETURN
+------
+
+[TUPLE] [header]
+    The (magic, version, k, reserved, inclusion, exclusion, records) fields of
+    the header.
+
+# =============================================================================
+"""
+def readHeader(inputFile):
+
+    block = inputFile.read(HEADER.size)
+
+    if len(block) < HEADER.size or block[:len(MAGIC)] != MAGIC:
+        raise RuntimeError("ERROR: The file is not a presence bitset file.")
+
+    header = HEADER.unpack(block)
+
+    if header[1] != VERSION:
+        raise RuntimeError(
+            "ERROR: The presence bitset file version is not supported: " +
+            str(header[1]))
+
+    return header
+
+
+"""
+# =============================================================================
+
+MAP BITSETS
+-----------
+
+
+PURPOSE
+-------
+
+Memory-maps rows of bytes from a file.
+
+
+INPUT
+-----
+
+[FILE LOCATION] [location]
+    The location of the file.
+
+[INT >= 0] [offset]
+    The byte offset of the first row in the file.
+
+[INT >= 0] [rows]
+    The number of rows.
+
+[INT >= 0] [width]
+    The number of bytes of each row.
+
+
+RETURN
+------
+
+[UINT8 ARRAY] [bitsets]
+    The read-only, memory-mapped rows, as a two-dimensional array.
+
+# =============================================================================
+"""
+def mapBitsets(location, offset, rows, width):
+
+    # empty arrays cannot be mapped
+    if rows * width == 0:
+        return numpy.zeros((rows, width), dtype=numpy.uint8)
+
+    return numpy.memmap(
+        location, dtype=numpy.uint8, mode='r', offset=offset,
+        shape=(rows, width))
+
+
+"""
+# =============================================================================
+
+WRITE
+-----
+
+
+PURPOSE
+-------
+
+Writes a presence bitset file.
+
+
+INPUT
+-----
+
+[FILE LOCATION] [location]
+    The location to write the presence bitset file.
+
+[0 <= INT <= 32] [k]
+    The k-mer size, or 0 when there are no k-mers.
+
+[(UINT64 ARRAY) ITERABLE] [codes]
+    The distinct and sorted k-mer codes, in one or more consecutive blocks.
+
+[(UINT8 ARRAY) ITERABLE] [inclusion]
+    The inclusion bitsets of the [codes], in blocks of the same sizes.
+
+[(UINT8 ARRAY) ITERABLE] [exclusion]
+    The exclusion bitsets of the [codes], in blocks of the same sizes.
+
+[(STRING) LIST] [inclusionNames]
+    The names of the inclusion genomes, in bit order.
+
+[(STRING) LIST] [exclusionNames]
+    The names of the exclusion genomes, in bit order.
+
+
+RETURN
+------
+
+[NONE]
+
+# =============================================================================
+"""
+def write(
+        location, k, codes, inclusion, exclusion, inclusionNames,
+        exclusionNames):
+
+    records = 0
+
+    with open(location, 'wb') as outputFile:
+
+        outputFile.write(HEADER.pack(
+            MAGIC, VERSION, k, 0, len(inclusionNames), len(exclusionNames),
+            0))
+
+        for block in codes:
+
+            outputFile.write(numpy.asarray(block, dtype=CODE_TYPE).tobytes())
+            records += len(block)
+
+        for blocks, names in [
+                (inclusion, inclusionNames), (exclusion, exclusionNames)]:
+
+            for block in blocks:
+
+                block = numpy.asarray(block, dtype=numpy.uint8)
+
+                if block.size and block.shape[1] != getWidth(len(names)):
+                    raise RuntimeError(
+                        "ERROR: The bitsets do not match the genomes.")
+
+                outputFile.write(numpy.ascontiguousarray(block).tobytes())
+
+        for role, names in [
+                (INCLUSION, inclusionNames), (EXCLUSION, exclusionNames)]:
+
+            for name in names:
+                outputFile.write(role + SEPARATOR + str(name) + "\n")
+
+        outputFile.seek(0)
+        outputFile.write(HEADER.pack(
+            MAGIC, VERSION, k, 0, len(inclusionNames), len(exclusionNames),
+            records))
+
+
+"""
+# =============================================================================
+
+CONCATENATE
+-----------
+
+
+PURPOSE
+-------
+
+Concatenates presence bitset files of the same genomes, such that every k-mer
+of a file is larger than every k-mer of the files preceding it. This is the
+case for the presence bitsets of consecutive k-mer ranges.
+
+
+INPUT
+-----
+
+[(FILE LOCATION) LIST] [inputLocations]
+    The locations of the presence bitset files to concatenate, in order.
+
+[FILE LOCATION] [outputLocation]
+    The location to write the concatenated presence bitset file.
+
+[(STRING) LIST -- OPTIONAL] [inclusionNames]
+    The names of the inclusion genomes, or None to use the names of the first
+    file.
+
+[(STRING) LIST -- OPTIONAL] [exclusionNames]
+    The names of the exclusion genomes, or None to use the names of the first
+    file.
+
+
+RETURN
+------
+
+[NONE]
+
+RuntimeError if the files do not record the same number of genomes.
+
+# =============================================================================
+"""
+def concatenate(
+        inputLocations, outputLocation, inclusionNames=None,
+        exclusionNames=None):
+
+    inputs = [Presence(location) for location in inputLocations]
+
+    inclusionNames = inclusionNames if inclusionNames is not None \
+        else inputs[0].inclusionNames
+    exclusionNames = exclusionNames if exclusionNames is not None \
+        else inputs[0].exclusionNames
+
+    for presence in inputs:
+
+        if len(presence.inclusionNames) != len(inclusionNames) or \
+                len(presence.exclusionNames) != len(exclusionNames):
+            raise RuntimeError(
+                "ERROR: The presence bitset files do not record the same " +
+                "genomes.")
+
+    k = max([presence.k for presence in inputs] + [0])
+
+    def blocks(name):
+
+        for presence in inputs:
+
+            array = getattr(presence, name)
+
+            for start in range(0, len(array), BATCH_SIZE):
+                yield array[start:start + BATCH_SIZE]
+
+    write(
+        outputLocation, k, blocks("codes"), blocks("inclusion"),
+        blocks("exclusion"), inclusionNames, exclusionNames)
+
+
+"""
+# =============================================================================
+
+COUNT GENOMES
+-------------
+
+
+PURPOSE
+-------
+
+Counts how many of a set of k-mers each genome contains.
+
+
+INPUT
+-----
+
+[PRESENCE] [presence]
+    The presence bitsets.
+
+[UINT64 ARRAY] [codes]
+    The k-mer codes, which need be neither sorted nor distinct.
+
+
+RETURN
+------
+
+[(INT, INT ARRAY, INT ARRAY)] [(found, inclusionCounts, exclusionCounts)]
+    The number of distinct [codes] recorded by the [presence] bitsets, and the
+    number of these contained by each inclusion and exclusion genome, in bit
+    order.
+
+# =============================================================================
+"""
+def countGenomes(presence, codes):
+
+    codes = numpy.unique(numpy.asarray(codes, dtype=CODE_TYPE))
+
+    indices = numpy.searchsorted(presence.codes, codes)
+
+    # the codes larger than every recorded code are the last codes
+    indices = indices[indices < len(presence.codes)]
+    indices = indices[presence.codes[indices] == codes[:len(indices)]]
+
+    counts = [
+        numpy.unpackbits(bitsets[indices], axis=1)[:, :len(names)].sum(
+            axis=0, dtype=numpy.int64)
+        for bitsets, names in [
+            (presence.inclusion, presence.inclusionNames),
+            (presence.exclusion, presence.exclusionNames)]]
+
+    return len(indices), counts[0], counts[1]
+
+
+"""
+# =============================================================================
+
+FIND GENOMES
+------------
+
+
+PURPOSE
+-------
+
+Finds the genomes containing every recorded k-mer of a sequence. The k-mers of
+the sequence are canonical, as are the aggregated k-mers.
+
+
+INPUT
+-----
+
+[PRESENCE] [presence]
+    The presence bitsets.
+
+[STRING] [sequence]
+    The sequence whose k-mers are located.
+
+
+RETURN
+------
+
+[(INT, (STRING) LIST, (STRING) LIST)] [(found, inclusion, exclusion)]
+    The number of distinct k-mers of the [sequence] recorded by the
+    [presence] bitsets, and the names of the inclusion and exclusion genomes
+    containing all of them.
+
+# =============================================================================
+"""
+def findGenomes(presence, sequence):
+
+    if presence.k < 1:
+        return 0, [], []
+
+    codes = CountKMers.countSequenceVectorized(
+        sequence.upper(), presence.k, None)
+
+    found, inclusionCounts, exclusionCounts = countGenomes(presence, codes)
+
+    if found == 0:
+        return 0, [], []
+
+    inclusion = [
+        presence.inclusionNames[i]
+        for i in numpy.flatnonzero(inclusionCounts == found)]
+    exclusion = [
+        presence.exclusionNames[i]
+        for i in numpy.flatnonzero(exclusionCounts == found)]
+
+    return found, inclusion, exclusion
+
+
+"""
+# =============================================================================
+
+REPORT
+------
+
+
+PURPOSE
+-------
+
+Reports the genomes containing all the k-mers of every candidate.
+
+
+INPUT
+-----
+
+[FILE LOCATION] [presenceLocation]
+    The location of the presence bitset file.
+
+[FILE LOCATION] [inputLocation]
+    The location of the candidates, in FASTA format.
+
+[FILE LOCATION] [outputLocation]
+    The location to write the report.
+
+
+RETURN
+------
+
+[NONE]
+
+
+POST
+----
+
+The report will be written to the [outputLocation].
+
+# =============================================================================
+"""
+def report(presenceLocation, inputLocation, outputLocation):
+
+    presence = Presence(presenceLocation)
+
+    with Utility.openInput(inputLocation) as inputFile, \
+            open(outputLocation, 'w') as outputFile:
+
+        for name, sequence in Utility.readFASTA(inputFile):
+
+            found, inclusion, exclusion = findGenomes(presence, sequence)
+
+            outputFile.write(SEPARATOR.join([
+                name, str(found), ",".join(inclusion),
+                ",".join(exclusion)]) + "\n")
+
+
+"""
+# =============================================================================
+
+PARSE
+
+# =============================================================================
+"""
+def parse(parameters):
+
+    presenceLocation = parameters[PRESENCE]
+    inputLocation = parameters[INPUT]
+    outputLocation = parameters[OUTPUT]
+
+    report(presenceLocation, inputLocation, outputLocation)
+
+
+"""
+# =============================================================================
+
+MAIN
+
+# =============================================================================
+"""
+def main():
+
+    parser = argparse.ArgumentParser(description=PROGRAM_DESCRIPTION)
+
+    parser.add_argument(
+        PRESENCE_SHORT,
+        PRESENCE_LONG,
+        dest=PRESENCE,
+        help=PRESENCE_HELP,
+        type=str, required=True)
+
+    parser.add_argument(
+        INPUT_SHORT,
+        INPUT_LONG,
+        dest=INPUT,
+        help=INPUT_HELP,
+        type=str, required=True)
+
+    parser.add_argument(
+        OUTPUT_SHORT,
+        OUTPUT_LONG,
+        dest=OUTPUT,
+        help=OUTPUT_HELP,
+        type=str, required=True)
+
+    args = parser.parse_args()
+    parameters = vars(args)
+    parse(parameters)
+
+
+"""
+# =============================================================================
+# =============================================================================
+"""
+if __name__ == '__main__':
+
+    main()
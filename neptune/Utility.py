@@ -34,14 +34,43 @@ This script provides shared utility to other scripts.
 # =============================================================================
 """
 
+import bisect
+import gzip
+import itertools
 import math
 import os
 
+import numpy
+
 from Bio.Seq import Seq
 from Bio.Alphabet import generic_dna
 
 AGGREGATE_OTHER = "__OTHER__"
 
+# Two-bit nucleotide encoding. The encoding preserves the lexicographic order
+# of the nucleotides, such that comparing the encodings of two k-mers of the
+# same size is equivalent to comparing the k-mers themselves.
+ENCODING = {"A": 0, "C": 1, "G": 2, "T": 3}
+DECODING = "ACGT"
+
+# Maps every character to its two-bit nucleotide value, or to 4 when the
+# character is not one of A, C, G, or T.
+ENCODING_TABLE = numpy.full(256, 4, dtype=numpy.uint8)
+ENCODING_TABLE[numpy.frombuffer(DECODING, dtype=numpy.uint8)] = numpy.arange(4)
+
+# The number of bytes read at once when reading sequence files.
+READ_BLOCK_SIZE = 1048576
+
+# The number of k-mers sampled for every partition when selecting splitters.
+SAMPLE_SIZE_PER_PARTITION = 1000
+
+# The first bytes of gzip files, including bgzip files.
+GZIP_MAGIC = "\x1f\x8b"
+
+# The gzip compression level of compressed output. Intermediate files favour
+# speed over size.
+COMPRESSION_LEVEL = 1
+
 """
 # =============================================================================
 
@@ -97,6 +126,280 @@ def getAggregationTags(parallelization):
     return tags
 
 
+"""
+# =============================================================================
+
+GET PARTITION TAGS
+------------------
+
+
+PURPOSE
+-------
+
+Produces the tags of the partitions defined by a list of splitters. Unlike the
+aggregation tags, these tags do not describe the k-mers within the partitions.
+
+
+INPUT
+-----
+
+[INT >= 1] [partitions]
+    The number of partitions.
+
+
+RETURN
+------
+
+[STRING LIST] [tags]
+    The partition tags: the zero-padded partition numbers, such that the tags
+    are in the same lexicographic order as the partitions.
+
+# =============================================================================
+"""
+def getPartitionTags(partitions):
+
+    if partitions < 1:
+        raise RuntimeError("The number of partitions is out of range.")
+
+    width = len(str(partitions - 1))
+
+    return [str(i).zfill(width) for i in range(partitions)]
+
+
+"""
+# =============================================================================
+
+GET PARTITION
+-------------
+
+
+PURPOSE
+-------
+
+Determines the partition of a k-mer. Partition i contains the k-mers which are
+no smaller than splitter (i - 1) and smaller than splitter i.
+
+
+INPUT
+-----
+
+[STRING] [kmer]
+    The k-mer to locate.
+
+[STRING LIST] [splitters]
+    The sorted splitters.
+
+
+RETURN
+------
+
+[0 <= INT <= len(splitters)] [partition]
+    The index of the partition containing the [kmer].
+
+# =============================================================================
+"""
+def getPartition(kmer, splitters):
+
+    return bisect.bisect_right(splitters, kmer)
+
+
+"""
+# =============================================================================
+
+SAMPLE K-MERS
+-------------
+
+
+PURPOSE
+-------
+
+Samples canonical k-mers at evenly spaced positions of several FASTA or FASTQ
+files. The spacing is determined from the size of the files, such that
+approximately [size] k-mers are sampled in total, and continues from one record
+to the next, so that many short records, such as reads, are not each sampled.
+
+
+INPUT
+-----
+
+[(FILE LOCATION) LIST] [locations]
+    The FASTA or FASTQ files to sample.
+
+[INT >= 1] [k]
+    The k-mer size.
+
+[INT >= 1] [size]
+    The approximate number of k-mers to sample.
+
+
+RETURN
+------
+
+[STRING LIST] [sample]
+    The sampled canonical k-mers, which are the lexicographically smaller of
+    each sampled k-mer and its reverse complement.
+
+RuntimeError if any of the files does not exist.
+
+# =============================================================================
+"""
+def sampleKMers(locations, k, size):
+
+    for location in locations:
+
+        if not os.path.isfile(location):
+            raise RuntimeError(
+                "The input file does not exist: " + str(location))
+
+    total = sum(os.path.getsize(location) for location in locations)
+    stride = max(total // size, 1)
+
+    sample = []
+    offset = 0      # the position of the next sampled k-mer in the record
+
+    for location in locations:
+
+        with openInput(location) as inputFile:
+
+            for name, sequence in readSequences(inputFile):
+
+                positions = max(len(sequence) - k + 1, 0)
+
+                for i in range(offset, positions, stride):
+
+                    kmer = sequence[i:i + k]
+                    sample.append(min(kmer, reverseComplement(kmer)))
+
+                offset = (offset - positions) % stride
+
+    return sample
+
+
+"""
+# =============================================================================
+
+SELECT SPLITTERS
+----------------
+
+
+PURPOSE
+-------
+
+Selects the splitters which divide a sample of k-mers into partitions of equal
+size.
+
+
+INPUT
+-----
+
+[STRING LIST] [sample]
+    The sample of k-mers.
+
+[INT >= 1] [partitions]
+    The number of partitions.
+
+
+RETURN
+------
+
+[STRING LIST] [splitters]
+    The (partitions - 1) sorted splitters, or no splitters at all when the
+    [sample] is empty.
+
+# =============================================================================
+"""
+def selectSplitters(sample, partitions):
+
+    if partitions < 1:
+        raise RuntimeError("The number of partitions is out of range.")
+
+    if len(sample) == 0:
+        return []
+
+    sample = sorted(sample)
+
+    return [sample[(i * len(sample)) // partitions]
+            for i in range(1, partitions)]
+
+
+"""
+# =============================================================================
+
+WRITE SPLITTERS
+---------------
+
+
+PURPOSE
+-------
+
+Writes splitters to a file, one splitter per line.
+
+
+INPUT
+-----
+
+[STRING LIST] [splitters]
+    The splitters to write.
+
+[FILE LOCATION] [location]
+    The location of the splitters file.
+
+
+RETURN
+------
+
+[NONE]
+
+# =============================================================================
+"""
+def writeSplitters(splitters, location):
+
+    with open(location, 'w') as splittersFile:
+
+        for splitter in splitters:
+            splittersFile.write(splitter + "\n")
+
+
+"""
+# =============================================================================
+
+READ SPLITTERS
+--------------
+
+
+PURPOSE
+-------
+
+Reads splitters from a file written by writeSplitters(...).
+
+
+INPUT
+-----
+
+[FILE LOCATION] [location]
+    The location of the splitters file.
+
+
+RETURN
+------
+
+[STRING LIST] [splitters]
+    The splitters, in sorted order.
+
+# =============================================================================
+"""
+def readSplitters(location):
+
+    with open(location, 'r') as splittersFile:
+
+        splitters = [line.strip() for line in splittersFile if line.strip()]
+
+    if splitters != sorted(splitters):
+        raise RuntimeError("The splitters are not sorted: " + str(location))
+
+    return splitters
+
+
 """
 # =============================================================================
 
@@ -204,89 +507,864 @@ def reverseComplement(sequence):
 """
 # =============================================================================
 
-BUILD REFERENCES
-----------------
+ENCODE K-MER
+------------
 
 
 PURPOSE
 -------
 
-Builds string references (contig pieces) from the reference file.
+Encodes a k-mer as an integer, using two bits per nucleotide. The first
+nucleotide of the k-mer occupies the most significant bits of the encoding.
 
 
 INPUT
 -----
 
-[FILE] [referenceFile]
-    The file from which to build the string reference.
+[STRING] [kmer]
+    The k-mer to encode.
 
 
 RETURN
 ------
 
-[STRING ITERABLE] [references]
-    A list of string references where contigs comprise the different items
-    in the iterable object.
+[INT >= 0 -- OPTIONAL] [code]
+    The two-bit encoding of the [kmer], or None if the [kmer] contains
+    characters other than A, C, G, or T.
 
 # =============================================================================
 """
-def buildReferences(referenceFile):
+def encodeKMer(kmer):
 
-    references = {}
+    code = 0
 
-    # build references
-    for line in referenceFile:
+    for character in kmer:
 
-        # new reference:
-        if line[0] == ">":
-            tokens = (line[1:]).split()
-            referenceName = tokens[0]
+        base = ENCODING.get(character)
 
-            references[referenceName] = ""
+        if base is None:
+            return None
 
-        # continue building reference:
-        else:
-            references[referenceName] += line.strip().upper()
+        code = (code << 2) | base
 
-    return references
+    return code
 
 
 """
 # =============================================================================
 
-ESTIMATE REFERENCE PARAMETERS
+DECODE K-MER
+------------
 
-PURPOSE:
-    Estimates the size of the reference and GC-content from one or more
-    reference fragments.
 
-INPUT:
-    [STRING ITERABLE] [references] - A list of string references.
+PURPOSE
+-------
 
-RETURN:
-    [TUPLE: INT, FLOAT] [size, gcContent] - An estimate for the reference size
-        and GC-content.
+Decodes a two-bit integer encoding of a k-mer back into its sequence.
+
+
+INPUT
+-----
+
+[INT >= 0] [code]
+    The two-bit encoding of the k-mer.
+
+[INT >= 1] [k]
+    The size of the k-mer.
+
+
+RETURN
+------
+
+[STRING] [kmer]
+    The k-mer sequence corresponding to the [code].
 
 # =============================================================================
 """
-def estimateReferenceParameters(references):
+def decodeKMer(code, k):
 
-    if references is None or len(references) < 1:
-        raise RuntimeError("There are no references.")
+    kmer = []
 
-    sumGC = 0
-    sumAT = 0
-    size = 0
+    for i in range(k):
+
+        kmer.append(DECODING[code & 3])
+        code >>= 2
+
+    return "".join(reversed(kmer))
+
+
+"""
+# =============================================================================
+
+ENCODE K-MERS
+-------------
+
+
+PURPOSE
+-------
 
-    for reference in references:
+Encodes several k-mers of the same size at once, using two bits per
+nucleotide, as in encodeKMer(...).
 
-        sumGC += references[reference].count('G') \
-            + references[reference].count('C')
 
-        sumAT += references[reference].count('A') \
-            + references[reference].count('T')
+INPUT
+-----
+
+[STRING LIST] [kmers]
+    The k-mers to encode.
+
+[1 <= INT <= 32] [k]
+    The size of the k-mers.
+
+
+RETURN
+------
+
+[(UINT64 ARRAY, BOOL ARRAY) TUPLE] [(codes, valid)]
+    The two-bit encodings of the [kmers] and whether or not each k-mer could
+    be encoded. The codes of k-mers containing characters other than A, C, G,
+    or T are meaningless.
+
+# =============================================================================
+"""
+def encodeKMers(kmers, k):
+
+    bases = ENCODING_TABLE[
+        numpy.frombuffer("".join(kmers), dtype=numpy.uint8)].reshape(-1, k)
+
+    valid = (bases < 4).all(axis=1)
+    codes = numpy.zeros(len(bases), dtype=numpy.uint64)
+
+    for i in range(k):
+
+        codes <<= numpy.uint64(2)
+        codes |= (bases[:, i] & 3).astype(numpy.uint64)
+
+    return codes, valid
+
+
+"""
+# =============================================================================
+
+DECODE K-MERS
+-------------
+
+
+PURPOSE
+-------
+
+Decodes several k-mer codes of the same size at once back into their sequences,
+as in decodeKMer(...).
+
+
+INPUT
+-----
+
+[UINT64 ARRAY] [codes]
+    The k-mer codes to decode.
 
-        size += len(references[reference])
+[1 <= INT <= 32] [k]
+    The k-mer size.
+
+
+RETURN
+------
+
+[STRING LIST] [kmers]
+    The k-mer sequences, in the same order as the [codes].
+
+# =============================================================================
+"""
+def decodeKMers(codes, k):
+
+    shifts = numpy.arange(2 * (k - 1), -1, -2, dtype=numpy.uint64)
+    values = (numpy.asarray(codes, dtype=numpy.uint64)[:, None] >> shifts) \
+        & numpy.uint64(3)
+
+    characters = numpy.frombuffer(
+        DECODING, dtype=numpy.uint8)[values.astype(numpy.uint8)]
+
+    return characters.view("S" + str(k)).ravel().tolist()
+
+
+"""
+# =============================================================================
+
+ENCODE WINDOWS
+--------------
+
+
+PURPOSE
+-------
+
+Encodes every k-mer of a sequence, and its reverse complement, at once using
+two bits per nucleotide, as in encodeKMer(...).
+
+
+INPUT
+-----
+
+[STRING] [sequence]
+    The sequence to encode.
+
+[1 <= INT <= 32] [k]
+    The size of the k-mers.
+
+
+RETURN
+------
+
+[(UINT64 ARRAY, UINT64 ARRAY, BOOL ARRAY) TUPLE] [(forward, reverse, masked)]
+    The codes of the k-mer starting at every position of the [sequence], the
+    codes of their reverse complements, and whether or not each k-mer contains
+    a character other than A, C, G, or T. The codes of masked k-mers are
+    meaningless.
+
+# =============================================================================
+"""
+def encodeWindows(sequence, k):
+
+    n = max(len(sequence) - k + 1, 0)
+
+    bases = ENCODING_TABLE[numpy.frombuffer(sequence, dtype=numpy.uint8)]
+    invalid = bases > 3
+
+    values = numpy.where(invalid, 0, bases).astype(numpy.uint64)
+    complements = numpy.uint64(3) - values
+
+    forward = numpy.zeros(n, dtype=numpy.uint64)
+    reverse = numpy.zeros(n, dtype=numpy.uint64)
+
+    for j in range(k if n > 0 else 0):
+
+        forward <<= numpy.uint64(2)
+        forward |= values[j:j + n]
+        reverse |= complements[j:j + n] << numpy.uint64(2 * j)
+
+    # windows containing at least one character that cannot be encoded
+    invalidSums = numpy.concatenate(([0], numpy.cumsum(invalid)))
+    masked = (invalidSums[k:k + n] - invalidSums[:n]) > 0
+
+    return forward, reverse, masked
+
+
+"""
+# =============================================================================
+
+CANONICALIZE K-MERS
+-------------------
+
+
+PURPOSE
+-------
+
+Finds the canonical form of several encoded k-mers at once: the lesser of each
+k-mer and its reverse complement. As the encoding preserves order, this is the
+encoding of the lexicographically lesser sequence.
+
+
+INPUT
+-----
+
+[UINT64 ARRAY] [codes]
+    The k-mer codes.
+
+[1 <= INT <= 32] [k]
+    The k-mer size.
+
+
+RETURN
+------
+
+[UINT64 ARRAY] [canonical]
+    The canonical k-mer codes, in the same order as the [codes].
+
+# =============================================================================
+"""
+def canonicalizeKMers(codes, k):
+
+    codes = numpy.asarray(codes, dtype=numpy.uint64)
+    remaining = codes.copy()
+    reverse = numpy.zeros(len(codes), dtype=numpy.uint64)
+
+    for j in range(k):
+
+        reverse <<= numpy.uint64(2)
+        reverse |= numpy.uint64(3) - (remaining & numpy.uint64(3))
+        remaining >>= numpy.uint64(2)
+
+    return numpy.minimum(codes, reverse)
+
+
+"""
+# =============================================================================
+
+IS COMPRESSED
+-------------
+
+
+PURPOSE
+-------
+
+Determines whether a file is gzip compressed. This includes bgzip files, which
+are a series of gzip members.
+
+
+INPUT
+-----
+
+[FILE LOCATION] [location]
+    The location of the file.
+
+
+RETURN
+------
+
+[BOOL] [compressed]
+    Whether the file begins with the gzip magic number.
+
+# =============================================================================
+"""
+def isCompressed(location):
+
+    with open(location, 'rb') as inputFile:
+        return inputFile.read(len(GZIP_MAGIC)) == GZIP_MAGIC
+
+
+"""
+# =============================================================================
+
+OPEN INPUT
+----------
+
+
+PURPOSE
+-------
+
+Opens a file for reading, decompressing it as it is read when it is gzip or
+bgzip compressed.
+
+
+INPUT
+-----
+
+[FILE LOCATION] [location]
+    The location of the file.
+
+
+RETURN
+------
+
+[FILE] [inputFile]
+    The open and readable file, producing the uncompressed contents.
+
+# =============================================================================
+"""
+def openInput(location):
+
+    if isCompressed(location):
+        return gzip.open(location, 'rb')
+
+    return open(location, 'r')
+
+
+"""
+# =============================================================================
+
+OPEN OUTPUT
+-----------
+
+
+PURPOSE
+-------
+
+Opens a file for writing, optionally compressing everything written to it with
+gzip.
+
+
+INPUT
+-----
+
+[FILE LOCATION] [location]
+    The location of the file.
+
+[BOOL -- OPTIONAL] [compress]
+    Whether to compress the file.
+
+
+RETURN
+------
+
+[FILE] [outputFile]
+    The open and writable file.
+
+# =============================================================================
+"""
+def openOutput(location, compress=False):
+
+    if compress:
+        return gzip.open(location, 'wb', COMPRESSION_LEVEL)
+
+    return open(location, 'w')
+
+
+"""
+# =============================================================================
+
+READ LINE BLOCKS
+----------------
+
+
+PURPOSE
+-------
+
+Reads a file in large blocks which end at line boundaries, so that the lines of
+each block can be processed together. Lines which span several blocks are
+joined only once.
+
+
+INPUT
+-----
+
+[FILE] [inputFile]
+    The readable file-like object to read.
+
+[INT >= 1 -- OPTIONAL] [size]
+    The number of bytes to read at once.
+
+[INT >= 0 -- OPTIONAL] [limit]
+    The number of bytes to read from the current position of the file, or None
+    to read to the end of the file.
+
+
+RETURN
+------
+
+[STRING ITERATOR] [blocks]
+    The non-empty blocks of the file. Every block ends with a line terminator,
+    except possibly the last block.
+
+# =============================================================================
+"""
+def readLineBlocks(inputFile, size=READ_BLOCK_SIZE, limit=None):
+
+    pending = []    # pieces of the block currently being read
+
+    while limit is None or limit > 0:
+
+        block = inputFile.read(size if limit is None else min(size, limit))
+
+        if not block:
+            break
+
+        if limit is not None:
+            limit -= len(block)
+
+        end = block.rfind("\n") + 1
+
+        # the block does not complete a line
+        if end == 0:
+            pending.append(block)
+            continue
+
+        pending.append(block[:end])
+        yield "".join(pending)
+        pending = [block[end:]]
+
+    block = "".join(pending)
+
+    if block:
+        yield block
+
+
+"""
+# =============================================================================
+
+READ LINES
+----------
+
+
+PURPOSE
+-------
+
+Reads the lines of a file in large blocks, rather than one line at a time.
+The blocks are read by readLineBlocks(...), so the cost of reading a very long
+line remains linear in its length.
+
+
+INPUT
+-----
+
+[FILE] [inputFile]
+    The readable file-like object to read.
+
+[INT >= 0 -- OPTIONAL] [limit]
+    The number of bytes to read from the current position of the file, or None
+    to read to the end of the file.
+
+
+RETURN
+------
+
+[STRING ITERATOR] [lines]
+    The lines of the file, without their line terminators.
+
+# =============================================================================
+"""
+def readLines(inputFile, limit=None):
+
+    for block in readLineBlocks(inputFile, READ_BLOCK_SIZE, limit):
+
+        lines = block.split("\n")
+
+        # the terminator of the last line
+        if not lines[-1]:
+            lines.pop()
+
+        for line in lines:
+            yield line
+
+
+"""
+# =============================================================================
+
+READ FASTA
+----------
+
+
+PURPOSE
+-------
+
+Reads the records of a FASTA file one at a time. Only one record is held in
+memory at once, and each sequence is built by joining its lines together
+once, rather than by repeated concatenation.
+
+
+INPUT
+-----
+
+[FILE] [fastaFile]
+    The readable file-like object of FASTA records.
+
+
+RETURN
+------
+
+[(STRING, STRING) ITERATOR] [records]
+    The (name, sequence) pairs of the records, in file order. The name is the
+    first word of the record header and the sequence is in upper case.
+
+# =============================================================================
+"""
+def readFASTA(fastaFile):
+
+    return parseFASTA(readLines(fastaFile))
+
+
+"""
+# =============================================================================
+
+PARSE FASTA
+-----------
+
+
+PURPOSE
+-------
+
+Parses the records of FASTA lines one at a time. This is the line-based
+counterpart of readFASTA(...).
+
+
+INPUT
+-----
+
+[STRING ITERABLE] [lines]
+    The lines of FASTA records, without line terminators.
+
+
+RETURN
+------
+
+[(STRING, STRING) ITERATOR] [records]
+    The (name, sequence) pairs of the records, in order. The name is the first
+    word of the record header and the sequence is in upper case.
+
+RuntimeError if there is sequence before the first record header.
+
+# =============================================================================
+"""
+def parseFASTA(lines):
+
+    name = None
+    chunks = []
+
+    for line in lines:
+
+        # new record:
+        if line[:1] == ">":
+
+            if name is not None:
+                yield name, "".join(chunks).upper()
+
+            tokens = (line[1:]).split()
+            name = tokens[0]
+            chunks = []
+
+        # sequence without a header:
+        elif name is None:
+
+            if line.strip():
+                raise RuntimeError("ERROR: Malformed FASTA record: " + line)
+
+        # continue building record:
+        else:
+            chunks.append(line.strip())
+
+    if name is not None:
+        yield name, "".join(chunks).upper()
+
+
+"""
+# =============================================================================
+
+PARSE FASTQ
+-----------
+
+
+PURPOSE
+-------
+
+Parses the records of FASTQ lines one at a time. The quality scores are read
+and discarded. Sequences and quality scores may span several lines.
+
+
+INPUT
+-----
+
+[STRING ITERABLE] [lines]
+    The lines of FASTQ records, without line terminators.
+
+
+RETURN
+------
+
+[(STRING, STRING) ITERATOR] [records]
+    The (name, sequence) pairs of the records, in order. The name is the first
+    word of the record header and the sequence is in upper case.
+
+RuntimeError if the lines are not well-formed FASTQ records.
+
+# =============================================================================
+"""
+def parseFASTQ(lines):
+
+    lines = iter(lines)
+
+    for line in lines:
+
+        if not line.strip():
+            continue
+
+        if line[:1] != "@":
+            raise RuntimeError("ERROR: Malformed FASTQ record: " + line)
+
+        tokens = (line[1:]).split()
+        name = tokens[0] if tokens else ""
+        chunks = []
+
+        # sequence lines, up to the separator
+        for line in lines:
+
+            if line[:1] == "+":
+                break
+
+            chunks.append(line.strip())
+
+        else:
+            raise RuntimeError("ERROR: Truncated FASTQ record: " + name)
+
+        sequence = "".join(chunks)
+        quality = 0
+
+        # quality lines, which may begin with "@"
+        while quality < len(sequence):
+
+            line = next(lines, None)
+
+            if line is None:
+                raise RuntimeError("ERROR: Truncated FASTQ record: " + name)
+
+            quality += len(line.strip())
+
+        yield name, sequence.upper()
+
+
+"""
+# =============================================================================
+
+READ SEQUENCES
+--------------
+
+
+PURPOSE
+-------
+
+Reads the records of a FASTA or FASTQ file one at a time. The format is
+determined by the first character of the file.
+
+
+INPUT
+-----
+
+[FILE] [inputFile]
+    The readable file-like object of FASTA or FASTQ records.
+
+[INT >= 0 -- OPTIONAL] [limit]
+    The number of bytes to read from the current position of the file, or None
+    to read to the end of the file.
+
+
+RETURN
+------
+
+[(STRING, STRING) ITERATOR] [records]
+    The (name, sequence) pairs of the records, in file order. The name is the
+    first word of the record header and the sequence is in upper case.
+
+# =============================================================================
+"""
+def readSequences(inputFile, limit=None):
+
+    lines = readLines(inputFile, limit)
+
+    for first in lines:
+
+        if first.strip():
+            break
+
+    else:
+        return
+
+    lines = itertools.chain([first], lines)
+    records = parseFASTQ(lines) if first[:1] == "@" else parseFASTA(lines)
+
+    for record in records:
+        yield record
+
+
+"""
+# =============================================================================
+
+ITERATE REFERENCES
+------------------
+
+
+PURPOSE
+-------
+
+Iterates the (name, sequence) pairs of references, which may be provided as
+either a dictionary or as an iterable of pairs, such as the records produced
+by readFASTA(...).
+
+
+INPUT
+-----
+
+[(STRING) -> (STRING) DICTIONARY or (STRING, STRING) ITERABLE] [references]
+    The references to iterate.
+
+
+RETURN
+------
+
+[(STRING, STRING) ITERATOR] [references]
+    The (name, sequence) pairs of the references.
+
+# =============================================================================
+"""
+def iterateReferences(references):
+
+    if isinstance(references, dict):
+        return references.iteritems()
+
+    return iter(references)
+
+
+"""
+# =============================================================================
+
+BUILD REFERENCES
+----------------
+
+
+PURPOSE
+-------
+
+Builds string references (contig pieces) from the reference file.
+
+This holds all of the references in memory at once. Prefer readFASTA(...) when
+the references can be processed one at a time.
+
+
+INPUT
+-----
+
+[FILE] [referenceFile]
+    The file from which to build the string reference.
+
+
+RETURN
+------
+
+[(STRING) -> (STRING) DICTIONARY] [references]
+    A dictionary of string references where contigs comprise the different
+    items in the dictionary.
+
+# =============================================================================
+"""
+def buildReferences(referenceFile):
+
+    return dict(readFASTA(referenceFile))
+
+
+"""
+# =============================================================================
+
+ESTIMATE REFERENCE PARAMETERS
+
+PURPOSE:
+    Estimates the size of the reference and GC-content from one or more
+    reference fragments.
+
+INPUT:
+    [(STRING, STRING) ITERABLE] [references] - The references, as either a
+        dictionary or an iterable of (name, sequence) pairs, such as the
+        records produced by readFASTA(...).
+
+RETURN:
+    [TUPLE: INT, FLOAT] [size, gcContent] - An estimate for the reference size
+        and GC-content.
+
+# =============================================================================
+"""
+def estimateReferenceParameters(references):
+
+    if references is None:
+        raise RuntimeError("There are no references.")
+
+    sumGC = 0
+    sumAT = 0
+    size = 0
+    reference = None
+
+    for reference, sequence in iterateReferences(references):
+
+        sumGC += sequence.count('G') + sequence.count('C')
+        sumAT += sequence.count('A') + sequence.count('T')
+        size += len(sequence)
+
+    if reference is None:
+        raise RuntimeError("There are no references.")
 
     if (sumGC + sumAT) == 0:
         raise RuntimeError(
@@ -40,11 +40,311 @@ import unittest
 """
 # =============================================================================
 
-FIND SMALLEST
+READ K-MERS
 
 # =============================================================================
 """
-class TestFindSmallest(unittest.TestCase):
+class TestReadKMers(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_text
+
+    PURPOSE:
+        Tests reading the k-mers of text files in small blocks, with and
+        without count columns, and with lines whose columns differ.
+
+    INPUT:
+        0: "AAA 1\nCCC 2\nGGG 3\nTTT 4\n"
+        1: "AAA\nCCC\nGGG\nTTT"
+        2: "AAA 1\n\nCCC\n  \nGGG 3 4\nTTT 4\n"
+
+    EXPECTED:
+        0-2: ["AAA", "CCC", "GGG", "TTT"]
+
+    # =============================================================================
+    """
+    def test_text(self):
+
+        location = getPath("tests/output/aggregate/read.kmers")
+
+        for contents in [
+                "AAA 1\nCCC 2\nGGG 3\nTTT 4\n",
+                "AAA\nCCC\nGGG\nTTT",
+                "AAA 1\n\nCCC\n  \nGGG 3 4\nTTT 4\n"]:
+
+            with open(location, "w") as kmerFile:
+                kmerFile.write(contents)
+
+            for size in [1, 7, 1024]:
+
+                result = list(readKMers(location, size))
+                self.assertEquals(result, ["AAA", "CCC", "GGG", "TTT"])
+
+        os.remove(location)
+
+    """ 
+    # =============================================================================
+
+    test_binary
+
+    PURPOSE:
+        Tests reading the k-mers of a binary file in small batches, including
+        k-mers which cannot be encoded.
+
+    INPUT:
+        AAA 1, ACN 1, CCC 2, GGG 3, TTT 4
+
+    EXPECTED:
+        ["AAA", "ACN", "CCC", "GGG", "TTT"]
+
+    # =============================================================================
+    """
+    def test_binary(self):
+
+        import neptune.BinaryKMers as BinaryKMers
+
+        location = getPath("tests/output/aggregate/read.bin")
+        kmers = ["AAA", "ACN", "CCC", "GGG", "TTT"]
+
+        BinaryKMers.write([(kmer, 1) for kmer in kmers], location, 1)
+
+        for size in [1, 16, 1024]:
+            self.assertEquals(list(readKMers(location, size)), kmers)
+
+        os.remove(location)
+
+    """ 
+    # =============================================================================
+
+    test_text_range
+
+    PURPOSE:
+        Tests reading the k-mers of a range from uncompressed text files, which
+        are searched, and compressed text files, which are not.
+
+    INPUT:
+        "AAA 1\nCCC 2\nGGG 3\nTTT 4\n"
+
+        [CCC, TTT), [CA, None), [None, AAA), [TTTT, None), [None, None)
+
+    EXPECTED:
+        ["CCC", "GGG"], ["CCC", "GGG", "TTT"], [], [], all k-mers
+
+    # =============================================================================
+    """
+    def test_text_range(self):
+
+        import neptune.Utility as Utility
+
+        location = getPath("tests/output/aggregate/read.kmers")
+        kmers = ["AAA", "CCC", "GGG", "TTT"]
+
+        for compress in [False, True]:
+
+            with Utility.openOutput(location, compress) as kmerFile:
+                kmerFile.write("AAA 1\nCCC 2\nGGG 3\nTTT 4\n")
+
+            for size in [1, 7, 1024]:
+
+                self.assertEquals(
+                    list(readKMers(location, size, "CCC", "TTT")),
+                    ["CCC", "GGG"])
+                self.assertEquals(
+                    list(readKMers(location, size, "CA", None)),
+                    ["CCC", "GGG", "TTT"])
+                self.assertEquals(
+                    list(readKMers(location, size, None, "AAA")), [])
+                self.assertEquals(
+                    list(readKMers(location, size, "TTTT", None)), [])
+                self.assertEquals(
+                    list(readKMers(location, size, None, None)), kmers)
+
+        os.remove(location)
+
+    """ 
+    # =============================================================================
+
+    test_binary_range
+
+    PURPOSE:
+        Tests reading the k-mers of a range from a binary file, including
+        k-mers which cannot be encoded.
+
+    INPUT:
+        AAA 1, ACN 1, CCC 2, GGG 3, TTT 4
+
+        [ACA, GGG), [GA, None), [None, AAA)
+
+    EXPECTED:
+        ["ACN", "CCC"], ["GGG", "TTT"], []
+
+    # =============================================================================
+    """
+    def test_binary_range(self):
+
+        import neptune.BinaryKMers as BinaryKMers
+
+        location = getPath("tests/output/aggregate/read.bin")
+        kmers = ["AAA", "ACN", "CCC", "GGG", "TTT"]
+
+        BinaryKMers.write([(kmer, 1) for kmer in kmers], location, 1)
+
+        for size in [1, 16, 1024]:
+
+            self.assertEquals(
+                list(readKMers(location, size, "ACA", "GGG")), ["ACN", "CCC"])
+            self.assertEquals(
+                list(readKMers(location, size, "GA", None)), ["GGG", "TTT"])
+            self.assertEquals(list(readKMers(location, size, None, "AAA")), [])
+
+        os.remove(location)
+
+"""
+# =============================================================================
+
+SAMPLE K-MERS
+
+# =============================================================================
+"""
+class TestSampleKMers(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_simple
+
+    PURPOSE:
+        Tests sampling k-mers from sorted text, compressed text, and binary
+        files.
+
+    INPUT:
+        AAA 1, CCC 2, GGG 3, TTT 4
+
+        size = 2, 4, 10
+
+    EXPECTED:
+        ["AAA", "GGG"], all k-mers, and all k-mers, except that compressed
+        files are not sampled.
+
+    # =============================================================================
+    """
+    def test_simple(self):
+
+        import neptune.BinaryKMers as BinaryKMers
+        import neptune.Utility as Utility
+
+        textLocation = getPath("tests/output/aggregate/sample.kmers")
+        binaryLocation = getPath("tests/output/aggregate/sample.bin")
+        kmers = ["AAA", "CCC", "GGG", "TTT"]
+
+        with open(textLocation, "w") as kmerFile:
+            kmerFile.write("AAA 1\nCCC 2\nGGG 3\nTTT 4\n")
+
+        BinaryKMers.write(
+            [(kmer, 1) for kmer in kmers], binaryLocation, 1)
+
+        for location in [textLocation, binaryLocation]:
+
+            self.assertEquals(sampleKMers(location, 2), ["AAA", "GGG"])
+            self.assertEquals(sampleKMers(location, 4), kmers)
+            self.assertEquals(sampleKMers(location, 10), kmers)
+
+        with Utility.openOutput(textLocation, True) as kmerFile:
+            kmerFile.write("AAA 1\nCCC 2\nGGG 3\nTTT 4\n")
+
+        self.assertEquals(sampleKMers(textLocation, 2), [])
+
+        os.remove(textLocation)
+        os.remove(binaryLocation)
+
+"""
+# =============================================================================
+
+AGGREGATE RECORDS
+
+# =============================================================================
+"""
+class TestAggregateRecords(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_simple
+
+    PURPOSE:
+        Tests aggregating k-mer iterators, including empty iterators and
+        k-mers shared by inclusion and exclusion files.
+
+    INPUT:
+        inclusion: [AAA, CCC], [], [AAA, GGG]
+        exclusion: [CCC, GGG, TTT], [AAA]
+
+    EXPECTED:
+        [(AAA, 2, 1), (CCC, 1, 1), (GGG, 1, 1), (TTT, 0, 1)]
+
+    # =============================================================================
+    """
+    def test_simple(self):
+
+        inclusionFiles = [iter(["AAA", "CCC"]), iter([]), iter(["AAA", "GGG"])]
+        exclusionFiles = [iter(["CCC", "GGG", "TTT"]), iter(["AAA"])]
+
+        result = list(aggregateRecords(inclusionFiles, exclusionFiles))
+        expected = [
+            ("AAA", 2, 1), ("CCC", 1, 1), ("GGG", 1, 1), ("TTT", 0, 1)]
+
+        self.assertEquals(result, expected)
+
+    """ 
+    # =============================================================================
+
+    test_many
+
+    PURPOSE:
+        Tests aggregating many k-mer iterators.
+
+    INPUT:
+        100 inclusion iterators, alternating between:
+            AAA, CCC
+            CCC, TTT
+
+        100 exclusion iterators, every third of which is:
+            AAA, GGG
+
+        and the others:
+            GGG
+
+    EXPECTED:
+        [(AAA, 50, 34), (CCC, 100, 0), (GGG, 0, 100), (TTT, 50, 0)]
+
+    # =============================================================================
+    """
+    def test_many(self):
+
+        inclusionFiles = [
+            iter(["AAA", "CCC"] if i % 2 else ["CCC", "TTT"])
+            for i in range(100)]
+        exclusionFiles = [
+            iter(["AAA", "GGG"] if i % 3 == 0 else ["GGG"])
+            for i in range(100)]
+
+        result = list(aggregateRecords(inclusionFiles, exclusionFiles))
+        expected = [
+            ("AAA", 50, 34), ("CCC", 100, 0), ("GGG", 0, 100),
+            ("TTT", 50, 0)]
+
+        self.assertEquals(result, expected)
+
+"""
+# =============================================================================
+
+AGGREGATE
+
+# =============================================================================
+"""
+class TestAggregate(unittest.TestCase):
 
     """ 
     # =============================================================================
@@ -52,278 +352,857 @@ class TestFindSmallest(unittest.TestCase):
     test_simple
 
     PURPOSE:
-        Tests a simple use case of finding the smallest element in a list.
+        Tests a simple k-mer aggregation use case.
 
     INPUT:
-        strings = ["a", "b", "c"], SENTINEL = "~"
+
+        IN1: aggregate1.kmers:
+        AAA
+        CAA
+        GAA
+        TAA
+
+        IN2: aggregate2.kmers:
+        AAA
+        TAA
+
+        EX1: aggregate3.kmers:
+        CAA
+        GAA
+
+        EX2: aggregate4.kmers:
+        TAA
 
     EXPECTED:
-        "a"
+
+        OUT:
+        AAA 2 0
+        CAA 1 1
+        GAA 1 1
+        TAA 2 1
 
     # =============================================================================
     """
     def test_simple(self):
 
-        strings = ["a", "b", "c"]
-        SENTINEL = "~"
+        aggregateLocation1 = "tests/data/aggregate/aggregate1.kmers"
+        aggregateLocation2 = "tests/data/aggregate/aggregate2.kmers"
+        aggregateLocation3 = "tests/data/aggregate/aggregate3.kmers"
+        aggregateLocation4 = "tests/data/aggregate/aggregate4.kmers"
+
+        inclusionLocations = [aggregateLocation1, aggregateLocation2]
+        exclusionLocations = [aggregateLocation3, aggregateLocation4]
+        outputLocation = "tests/output/aggregate/kmers.out"
+        delete = False
+
+        aggregate(inclusionLocations, exclusionLocations, outputLocation, delete)
+
+        # check the output
+        with open(outputLocation, "r") as myfile:
+
+            result = myfile.read()
+            expected = "AAA 2 0\nCAA 1 1\nGAA 1 1\nTAA 2 1\n"
+            self.assertEquals(result, expected)
+
+        os.remove(outputLocation)
+
+    """ 
+    # =============================================================================
+
+    test_binary
+
+    PURPOSE:
+        Tests aggregating binary k-mer files with text k-mer files and writing
+        binary output.
+
+    INPUT:
+
+        IN1: aggregate1.kmers, as a binary file
+        IN2: aggregate2.kmers
+
+        EX1: aggregate3.kmers, as a binary file
+        EX2: aggregate4.kmers
+
+    EXPECTED:
+
+        OUT (binary):
+        AAA 2 0
+        CAA 1 1
+        GAA 1 1
+        TAA 2 1
+
+    # =============================================================================
+    """
+    def test_binary(self):
+
+        import neptune.BinaryKMers as BinaryKMers
+
+        binaryLocation1 = getPath("tests/output/aggregate/aggregate1.bin")
+        binaryLocation3 = getPath("tests/output/aggregate/aggregate3.bin")
+
+        BinaryKMers.convert("tests/data/aggregate/aggregate1.kmers", binaryLocation1, BinaryKMers.FORMAT_BINARY)
+        BinaryKMers.convert("tests/data/aggregate/aggregate3.kmers", binaryLocation3, BinaryKMers.FORMAT_BINARY)
 
-        result = findSmallest(strings, SENTINEL)
-        expected = "a"
+        inclusionLocations = [binaryLocation1, "tests/data/aggregate/aggregate2.kmers"]
+        exclusionLocations = [binaryLocation3, "tests/data/aggregate/aggregate4.kmers"]
+        outputLocation = getPath("tests/output/aggregate/kmers.out")
+        delete = False
+
+        aggregate(inclusionLocations, exclusionLocations, outputLocation, delete, BinaryKMers.FORMAT_BINARY)
+
+        self.assertTrue(BinaryKMers.isBinary(outputLocation))
+
+        result = list(BinaryKMers.readRecords(outputLocation))
+        expected = [("AAA", 2, 0), ("CAA", 1, 1), ("GAA", 1, 1), ("TAA", 2, 1)]
         self.assertEquals(result, expected)
 
+        os.remove(binaryLocation1)
+        os.remove(binaryLocation3)
+        os.remove(outputLocation)
+
     """ 
     # =============================================================================
 
-    test_empty_strings
+    test_compressed
 
     PURPOSE:
-        Tests finding the SENTINEL when all strings in the list are empty.
+        Tests aggregating gzip compressed k-mer files with uncompressed k-mer
+        files and writing compressed output.
 
     INPUT:
-        strings = ["", "", ""], SENTINEL = "~"
+
+        IN1: aggregate1.kmers, compressed
+        IN2: aggregate2.kmers
+
+        EX1: aggregate3.kmers, compressed
+        EX2: aggregate4.kmers
 
     EXPECTED:
-        "~"
+
+        OUT (compressed):
+        AAA 2 0
+        CAA 1 1
+        GAA 1 1
+        TAA 2 1
 
     # =============================================================================
     """
-    def test_empty_strings(self):
+    def test_compressed(self):
+
+        import gzip
+        import neptune.Utility as Utility
+
+        compressedLocation1 = getPath("tests/output/aggregate/aggregate1.kmers.gz")
+        compressedLocation3 = getPath("tests/output/aggregate/aggregate3.kmers.gz")
+
+        for location, compressedLocation in [
+                ("tests/data/aggregate/aggregate1.kmers", compressedLocation1),
+                ("tests/data/aggregate/aggregate3.kmers", compressedLocation3)]:
+
+            with open(location, "r") as inputFile:
+                with gzip.open(compressedLocation, "wb") as outputFile:
+                    outputFile.write(inputFile.read())
+
+        inclusionLocations = [compressedLocation1, "tests/data/aggregate/aggregate2.kmers"]
+        exclusionLocations = [compressedLocation3, "tests/data/aggregate/aggregate4.kmers"]
+        outputLocation = getPath("tests/output/aggregate/kmers.out")
+        delete = False
+
+        aggregate(inclusionLocations, exclusionLocations, outputLocation, delete, FORMAT_DEFAULT, True)
+
+        self.assertTrue(Utility.isCompressed(outputLocation))
+
+        with gzip.open(outputLocation, "rb") as outputFile:
+            result = outputFile.read()
+
+        expected = "AAA 2 0\nCAA 1 1\nGAA 1 1\nTAA 2 1\n"
+        self.assertEquals(result, expected)
+
+        os.remove(compressedLocation1)
+        os.remove(compressedLocation3)
+        os.remove(outputLocation)
+
+    """ 
+    # =============================================================================
+
+    test_compressed_binary
+
+    PURPOSE:
+        Tests requesting compressed binary output.
+
+    EXPECTED:
+
+        RuntimeError
+
+    # =============================================================================
+    """
+    def test_compressed_binary(self):
+
+        inclusionLocations = ["tests/data/aggregate/aggregate1.kmers"]
+        exclusionLocations = ["tests/data/aggregate/aggregate3.kmers"]
+        outputLocation = getPath("tests/output/aggregate/kmers.out")
+
+        with self.assertRaises(RuntimeError):
+            aggregate(inclusionLocations, exclusionLocations, outputLocation, False, "binary", True)
+
+    """ 
+    # =============================================================================
+
+    test_all_inclusion
+
+    PURPOSE:
+        Tests aggregation when there are inclusion files, but no exclusion files.
+
+    INPUT:
+
+        IN1: aggregate1.kmers:
+        AAA
+        CAA
+        GAA
+        TAA
+
+        IN2: aggregate2.kmers:
+        AAA
+        TAA
+
+    EXPECTED:
+
+        OUT:
+        AAA 2 0
+        CAA 1 0
+        GAA 1 0
+        TAA 2 0
+
+    # =============================================================================
+    """
+    def test_all_inclusion(self):
+
+        aggregateLocation1 = "tests/data/aggregate/aggregate1.kmers"
+        aggregateLocation2 = "tests/data/aggregate/aggregate2.kmers"
+
+        inclusionLocations = [aggregateLocation1, aggregateLocation2]
+        exclusionLocations = []
+        outputLocation = "tests/output/aggregate/kmers.out"
+        delete = False
+
+        aggregate(inclusionLocations, exclusionLocations, outputLocation, delete)
+
+        # check the output
+        with open(outputLocation, "r") as myfile:
+
+            result = myfile.read()
+            expected = "AAA 2 0\nCAA 1 0\nGAA 1 0\nTAA 2 0\n"
+            self.assertEquals(result, expected)
+
+        os.remove(outputLocation)
+
+    """ 
+    # =============================================================================
+
+    test_all_exclusion
+
+    PURPOSE:
+        Tests aggregation when there are exclusion files, but not inclusion files.
+
+    INPUT:
+
+        EX1: aggregate3.kmers:
+        CAA
+        GAA
+
+        EX2: aggregate4.kmers:
+        TAA
+
+    EXPECTED:
+
+        OUT:
+        CAA 0 1
+        GAA 0 1
+        TAA 0 1
+
+    # =============================================================================
+    """
+    def test_all_exclusion(self):
+
+        aggregateLocation3 = "tests/data/aggregate/aggregate3.kmers"
+        aggregateLocation4 = "tests/data/aggregate/aggregate4.kmers"
+
+        inclusionLocations = []
+        exclusionLocations = [aggregateLocation3, aggregateLocation4]
+        outputLocation = "tests/output/aggregate/kmers.out"
+        delete = False
+
+        aggregate(inclusionLocations, exclusionLocations, outputLocation, delete)
+
+        # check the output
+        with open(outputLocation, "r") as myfile:
+
+            result = myfile.read()
+            expected = "CAA 0 1\nGAA 0 1\nTAA 0 1\n"
+            self.assertEquals(result, expected)
+
+        os.remove(outputLocation)
+        
+
+    """ 
+    # =============================================================================
+
+    test_nothing
+
+    PURPOSE:
+        Tests aggregation when there are neither inclusion or exclusion input
+        files.
+
+    INPUT:
+        [NONE]
+
+    EXPECTED:
+        [EMPTY STRING] ("")
+
+    # =============================================================================
+    """
+    def test_nothing(self):
+
+        inclusionLocations = []
+        exclusionLocations = []
+        outputLocation = "tests/output/aggregate/kmers.out"
+        delete = False
+
+        aggregate(inclusionLocations, exclusionLocations, outputLocation, delete)
+
+        # check the output
+        with open(outputLocation, "r") as myfile:
+
+            result = myfile.read()
+            expected = ""
+            self.assertEquals(result, expected)
+
+        os.remove(outputLocation)
+
+    """ 
+    # =============================================================================
+
+    test_partial
+
+    PURPOSE:
+        Tests aggregating partial aggregations of the inputs in both formats,
+        compressed and uncompressed, with and without further inputs.
+
+    INPUT:
+
+        PARTIAL1: IN1 with EX1
+        PARTIAL2: IN2 with EX2
+
+    EXPECTED:
+
+        PARTIAL1 and PARTIAL2: the aggregation of IN1, IN2, EX1, and EX2
+        PARTIAL1 with IN2 and EX2: the aggregation of IN1, IN2, EX1, and EX2
+
+    # =============================================================================
+    """
+    def test_partial(self):
+
+        import neptune.BinaryKMers as BinaryKMers
+
+        directory = "tests/data/aggregate/"
+        partialLocation1 = getPath("tests/output/aggregate/partial1.kmers")
+        partialLocation2 = getPath("tests/output/aggregate/partial2.kmers")
+        outputLocation = getPath("tests/output/aggregate/kmers.out")
+
+        expected = "AAA 2 0\nCAA 1 1\nGAA 1 1\nTAA 2 1\n"
+
+        for outputFormat, compress in [
+                (BinaryKMers.FORMAT_TEXT, False),
+                (BinaryKMers.FORMAT_TEXT, True),
+                (BinaryKMers.FORMAT_BINARY, False)]:
+
+            aggregate([directory + "aggregate1.kmers"],
+                [directory + "aggregate3.kmers"], partialLocation1, False,
+                outputFormat, compress)
+            aggregate([directory + "aggregate2.kmers"],
+                [directory + "aggregate4.kmers"], partialLocation2, False,
+                outputFormat, compress)
+
+            aggregate([], [], outputLocation, True, BinaryKMers.FORMAT_TEXT,
+                False, [partialLocation1, partialLocation2])
+
+            with open(outputLocation, "r") as myfile:
+                self.assertEquals(myfile.read(), expected)
+
+            self.assertFalse(os.path.isfile(partialLocation1))
+            self.assertFalse(os.path.isfile(partialLocation2))
+
+            aggregate([directory + "aggregate1.kmers"],
+                [directory + "aggregate3.kmers"], partialLocation1, False,
+                outputFormat, compress)
+
+            aggregate([directory + "aggregate2.kmers"],
+                [directory + "aggregate4.kmers"], outputLocation, False,
+                BinaryKMers.FORMAT_TEXT, False, [partialLocation1])
+
+            with open(outputLocation, "r") as myfile:
+                self.assertEquals(myfile.read(), expected)
+
+            os.remove(partialLocation1)
+            os.remove(outputLocation)
+
+    """ 
+    # =============================================================================
+
+    test_partial_missing
+
+    PURPOSE:
+        Tests aggregating a partial aggregation which does not exist.
+
+    EXPECTED:
+        RuntimeError
+
+    # =============================================================================
+    """
+    def test_partial_missing(self):
+
+        outputLocation = getPath("tests/output/aggregate/kmers.out")
+
+        with self.assertRaises(RuntimeError):
+            aggregate([], [], outputLocation, False, FORMAT_DEFAULT, False,
+                ["tests/data/aggregate/missing.kmers"])
+
+    """ 
+    # =============================================================================
+
+    test_range
+
+    PURPOSE:
+        Tests aggregating consecutive k-mer ranges separately, in every format,
+        and concatenating the ranges.
+
+    INPUT:
+        The inputs of test_simple.
+
+        [None, CAA), [CAA, TAA), [TAA, None)
+
+    EXPECTED:
+        "AAA 2 0\n", "CAA 1 1\nGAA 1 1\n", "TAA 2 1\n"
+
+        The concatenated ranges are the complete aggregation and the inputs
+        are not deleted.
+
+    # =============================================================================
+    """
+    def test_range(self):
+
+        import neptune.BinaryKMers as BinaryKMers
+
+        directory = "tests/data/aggregate/"
+        inclusionLocations = [
+            directory + "aggregate1.kmers", directory + "aggregate2.kmers"]
+        exclusionLocations = [
+            directory + "aggregate3.kmers", directory + "aggregate4.kmers"]
+        outputLocation = getPath("tests/output/aggregate/kmers.out")
+
+        ranges = [(None, "CAA"), ("CAA", "TAA"), ("TAA", None)]
+        expected = ["AAA 2 0\n", "CAA 1 1\nGAA 1 1\n", "TAA 2 1\n"]
+
+        for (start, end), result in zip(ranges, expected):
+
+            aggregate(inclusionLocations, exclusionLocations,
+                outputLocation, False, FORMAT_DEFAULT, False, [], start, end)
+
+            with open(outputLocation, "r") as myfile:
+                self.assertEquals(myfile.read(), result)
+
+        rangeLocations = [outputLocation + "." + str(index)
+            for index in range(len(ranges))]
+
+        for outputFormat, compress in [
+                (BinaryKMers.FORMAT_TEXT, True),
+                (BinaryKMers.FORMAT_BINARY, False)]:
+
+            for (start, end), location in zip(ranges, rangeLocations):
+                aggregate(inclusionLocations, exclusionLocations, location,
+                    False, outputFormat, compress, [], start, end)
+
+            if outputFormat == BinaryKMers.FORMAT_BINARY:
+                BinaryKMers.concatenate(rangeLocations, outputLocation)
+
+            else:
+
+                with open(outputLocation, "wb") as outputFile:
+
+                    for location in rangeLocations:
+                        with open(location, "rb") as rangeFile:
+                            outputFile.write(rangeFile.read())
+
+            records = list(BinaryKMers.readRecords(outputLocation))
+            self.assertEquals(records, [
+                ("AAA", 2, 0), ("CAA", 1, 1), ("GAA", 1, 1), ("TAA", 2, 1)])
+
+            for location in rangeLocations:
+                os.remove(location)
+
+        for location in inclusionLocations + exclusionLocations:
+            self.assertTrue(os.path.isfile(location))
+
+        os.remove(outputLocation)
+
+    """ 
+    # =============================================================================
+
+    test_hits
+
+    PURPOSE:
+        Tests aggregating with inclusion and exclusion hit thresholds.
+
+    INPUT:
+        The inputs of test_simple.
+
+        inhits = 2, exhits = 2
+        inhits = 2, exhits = None
+
+    EXPECTED:
+        "AAA 2 0\nTAA 2 1\n"
+        "AAA 2 0\nCAA 1 1\nGAA 1 1\nTAA 2 1\n"
+
+        Only the k-mers used by extraction are written when both thresholds
+        are given.
+
+    # =============================================================================
+    """
+    def test_hits(self):
+
+        directory = "tests/data/aggregate/"
+        inclusionLocations = [
+            directory + "aggregate1.kmers", directory + "aggregate2.kmers"]
+        exclusionLocations = [
+            directory + "aggregate3.kmers", directory + "aggregate4.kmers"]
+        outputLocation = getPath("tests/output/aggregate/kmers.out")
+
+        aggregate(inclusionLocations, exclusionLocations, outputLocation,
+            False, FORMAT_DEFAULT, False, [], None, None, 2, 2)
+
+        with open(outputLocation, "r") as myfile:
+            self.assertEquals(myfile.read(), "AAA 2 0\nTAA 2 1\n")
+
+        aggregate(inclusionLocations, exclusionLocations, outputLocation,
+            False, FORMAT_DEFAULT, False, [], None, None, 2, None)
+
+        with open(outputLocation, "r") as myfile:
+            self.assertEquals(myfile.read(),
+                "AAA 2 0\nCAA 1 1\nGAA 1 1\nTAA 2 1\n")
+
+        os.remove(outputLocation)
+
+    """ 
+    # =============================================================================
+
+    test_remove
+
+    PURPOSE:
+        Tests removing inclusion and exclusion files from a partial
+        aggregation.
+
+    INPUT:
+
+        PARTIAL: IN1, IN2 with EX1, EX2
+        REMOVED INCLUSION: IN2
+        REMOVED EXCLUSION: EX2
+
+    EXPECTED:
+
+        The aggregation of IN1 with EX1:
+        AAA 1 0
+        CAA 1 1
+        GAA 1 1
+        TAA 1 0
+
+    # =============================================================================
+    """
+    def test_remove(self):
+
+        directory = "tests/data/aggregate/"
+        partialLocation = getPath("tests/output/aggregate/partial.kmers")
+        outputLocation = getPath("tests/output/aggregate/kmers.out")
+
+        aggregate(
+            [directory + "aggregate1.kmers", directory + "aggregate2.kmers"],
+            [directory + "aggregate3.kmers", directory + "aggregate4.kmers"],
+            partialLocation, False)
+
+        aggregate([], [], outputLocation, False, FORMAT_DEFAULT, False,
+            [partialLocation], None, None, None, None,
+            [directory + "aggregate2.kmers"], [directory + "aggregate4.kmers"])
+
+        with open(outputLocation, "r") as myfile:
+            self.assertEquals(myfile.read(), "AAA 1 0\nCAA 1 1\nGAA 1 1\nTAA 1 0\n")
+
+        # removing every file leaves nothing
+        aggregate([], [], outputLocation, False, FORMAT_DEFAULT, False,
+            [partialLocation], None, None, None, None,
+            [directory + "aggregate1.kmers", directory + "aggregate2.kmers"],
+            [directory + "aggregate3.kmers", directory + "aggregate4.kmers"])
 
-        strings = ["", "", ""]
-        SENTINEL = "~"
+        with open(outputLocation, "r") as myfile:
+            self.assertEquals(myfile.read(), "")
 
-        result = findSmallest(strings, SENTINEL)
-        expected = SENTINEL
-        self.assertEquals(result, expected)
+        os.remove(partialLocation)
+        os.remove(outputLocation)
 
     """ 
     # =============================================================================
 
-    test_mix
+    test_engine
 
     PURPOSE:
-        Tests finding the smallest element in a list containing a mix of empty and
-        non-empty strings.
+        Tests that the NumPy engine produces the same aggregation as the heap
+        engine, in both formats, with ambiguous k-mers, partial and removed
+        files, ranges, and hit thresholds.
 
     INPUT:
-        strings = ["c", "", "a"], SENTINEL = "~"
-
-    EXPECTED:
-        "a"
-
-    # =============================================================================
-    """
-    def test_mix(self):
 
-        strings = ["c", "", "a"]
-        SENTINEL = "~"
+        IN1: aggregate1.kmers, as a binary file
+        IN2: aggregate2.kmers, with the ambiguous k-mers ANA and NAA
 
-        result = findSmallest(strings, SENTINEL)
-        expected = "a"
-        self.assertEquals(result, expected)
-
-"""
-# =============================================================================
+        EX1: aggregate3.kmers
+        EX2: aggregate4.kmers, with the ambiguous k-mer NAA
 
-AGGREGATE
+    EXPECTED:
 
-# =============================================================================
-"""
-class TestAggregate(unittest.TestCase):
+        The outputs of both engines are identical.
 
-    """ 
     # =============================================================================
+    """
+    def test_engine(self):
 
-    test_simple
+        import neptune.BinaryKMers as BinaryKMers
 
-    PURPOSE:
-        Tests a simple k-mer aggregation use case.
+        directory = "tests/data/aggregate/"
+        binaryLocation = getPath("tests/output/aggregate/aggregate1.bin")
+        ambiguousLocation1 = getPath("tests/output/aggregate/ambiguous1.kmers")
+        ambiguousLocation2 = getPath("tests/output/aggregate/ambiguous2.kmers")
+        partialLocation = getPath("tests/output/aggregate/partial.kmers")
+        outputLocation = getPath("tests/output/aggregate/kmers.out")
 
-    INPUT:
+        BinaryKMers.convert(directory + "aggregate1.kmers", binaryLocation, BinaryKMers.FORMAT_BINARY)
 
-        IN1: aggregate1.kmers:
-        AAA
-        CAA
-        GAA
-        TAA
+        with open(ambiguousLocation1, "w") as myfile:
+            myfile.write("AAA\nANA\nNAA\nTAA\n")
 
-        IN2: aggregate2.kmers:
-        AAA
-        TAA
+        with open(ambiguousLocation2, "w") as myfile:
+            myfile.write("NAA\nTAA\n")
 
-        EX1: aggregate3.kmers:
-        CAA
-        GAA
+        inclusionLocations = [binaryLocation, ambiguousLocation1]
+        exclusionLocations = [directory + "aggregate3.kmers", ambiguousLocation2]
 
-        EX2: aggregate4.kmers:
-        TAA
+        aggregate(inclusionLocations, exclusionLocations, partialLocation, False)
 
-    EXPECTED:
+        cases = [
+            (inclusionLocations, exclusionLocations, [], None, None, None, None, [], []),
+            (inclusionLocations, exclusionLocations, [], "C", "NZ", None, None, [], []),
+            (inclusionLocations, exclusionLocations, [], None, None, 2, 2, [], []),
+            ([], [], [partialLocation], None, None, None, None, [ambiguousLocation1], []),
+            ([directory + "aggregate2.kmers"], [], [partialLocation], "B", None, 1, 2, [], [ambiguousLocation2])]
 
-        OUT:
-        AAA 2 0
-        CAA 1 1
-        GAA 1 1
-        TAA 2 1
+        for outputFormat in BinaryKMers.FORMATS:
 
-    # =============================================================================
-    """
-    def test_simple(self):
+            for case in cases:
 
-        aggregateLocation1 = "tests/data/aggregate/aggregate1.kmers"
-        aggregateLocation2 = "tests/data/aggregate/aggregate2.kmers"
-        aggregateLocation3 = "tests/data/aggregate/aggregate3.kmers"
-        aggregateLocation4 = "tests/data/aggregate/aggregate4.kmers"
+                results = []
 
-        inclusionLocations = [aggregateLocation1, aggregateLocation2]
-        exclusionLocations = [aggregateLocation3, aggregateLocation4]
-        outputLocation = "tests/output/aggregate/kmers.out"
-        delete = False
+                for engine in ENGINES:
 
-        aggregate(inclusionLocations, exclusionLocations, outputLocation, delete)
+                    aggregate(case[0], case[1], outputLocation, False,
+                        outputFormat, False, case[2], case[3], case[4],
+                        case[5], case[6], case[7], case[8], engine)
 
-        # check the output
-        with open(outputLocation, "r") as myfile:
+                    results.append(list(BinaryKMers.readRecords(outputLocation)))
 
-            result = myfile.read()
-            expected = "AAA 2 0\nCAA 1 1\nGAA 1 1\nTAA 2 1\n"
-            self.assertEquals(result, expected)
+                self.assertEquals(results[0], results[1])
 
+        self.assertEquals(results[0], [("CAA", 1, 1), ("GAA", 1, 1), ("NAA", 1, 0), ("TAA", 3, 0)])
+
+        os.remove(binaryLocation)
+        os.remove(ambiguousLocation1)
+        os.remove(ambiguousLocation2)
+        os.remove(partialLocation)
         os.remove(outputLocation)
 
     """ 
     # =============================================================================
 
-    test_all_inclusion
+    test_presence
 
     PURPOSE:
-        Tests aggregation when there are inclusion files, but no exclusion files.
+        Tests writing the presence bitsets of the aggregated k-mers.
 
     INPUT:
 
-        IN1: aggregate1.kmers:
-        AAA
-        CAA
-        GAA
-        TAA
+        IN1: aggregate1.kmers
+        IN2: aggregate2.kmers
 
-        IN2: aggregate2.kmers:
-        AAA
-        TAA
+        EX1: aggregate3.kmers
+        EX2: aggregate4.kmers
 
     EXPECTED:
 
-        OUT:
-        AAA 2 0
-        CAA 1 0
-        GAA 1 0
-        TAA 2 0
+        AAA: IN1, IN2
+        CAA: IN1, EX1
+        GAA: IN1, EX1
+        TAA: IN1, IN2, EX2
+
+        With inhits = 2 and exhits = 2, only AAA and TAA are written, but all
+        four k-mers are recorded by the bitsets.
+
+        Presence bitsets cannot be written from partial aggregations.
 
     # =============================================================================
     """
-    def test_all_inclusion(self):
+    def test_presence(self):
 
-        aggregateLocation1 = "tests/data/aggregate/aggregate1.kmers"
-        aggregateLocation2 = "tests/data/aggregate/aggregate2.kmers"
+        import neptune.PresenceBitsets as PresenceBitsets
 
-        inclusionLocations = [aggregateLocation1, aggregateLocation2]
-        exclusionLocations = []
-        outputLocation = "tests/output/aggregate/kmers.out"
-        delete = False
+        directory = "tests/data/aggregate/"
+        inclusionLocations = [
+            directory + "aggregate1.kmers", directory + "aggregate2.kmers"]
+        exclusionLocations = [
+            directory + "aggregate3.kmers", directory + "aggregate4.kmers"]
+        outputLocation = getPath("tests/output/aggregate/kmers.out")
+        presenceLocation = getPath("tests/output/aggregate/kmers.bitsets")
 
-        aggregate(inclusionLocations, exclusionLocations, outputLocation, delete)
+        aggregate(inclusionLocations, exclusionLocations, outputLocation,
+            False, presenceLocation=presenceLocation)
 
-        # check the output
         with open(outputLocation, "r") as myfile:
+            self.assertEquals(myfile.read(),
+                "AAA 2 0\nCAA 1 1\nGAA 1 1\nTAA 2 1\n")
 
-            result = myfile.read()
-            expected = "AAA 2 0\nCAA 1 0\nGAA 1 0\nTAA 2 0\n"
-            self.assertEquals(result, expected)
+        presence = PresenceBitsets.Presence(presenceLocation)
+
+        self.assertEquals(presence.k, 3)
+        self.assertEquals(presence.inclusion.tolist(), [[0xC0], [0x80], [0x80], [0xC0]])
+        self.assertEquals(presence.exclusion.tolist(), [[0x00], [0x80], [0x80], [0x40]])
+        self.assertEquals(presence.inclusionNames, inclusionLocations)
+        self.assertEquals(presence.exclusionNames, exclusionLocations)
+
+        del presence
+
+        # the k-mers removed by the hit thresholds are still recorded
+        aggregate(inclusionLocations, exclusionLocations, outputLocation,
+            False, inhits=2, exhits=2, presenceLocation=presenceLocation)
+
+        with open(outputLocation, "r") as myfile:
+            self.assertEquals(myfile.read(), "AAA 2 0\nTAA 2 1\n")
+
+        presence = PresenceBitsets.Presence(presenceLocation)
+
+        self.assertEquals(len(presence), 4)
+        self.assertEquals(presence.inclusion.tolist(), [[0xC0], [0x80], [0x80], [0xC0]])
+        self.assertEquals(presence.exclusion.tolist(), [[0x00], [0x80], [0x80], [0x40]])
+
+        del presence
+
+        with self.assertRaises(RuntimeError):
+            aggregate([], [], outputLocation, False, FORMAT_DEFAULT, False,
+                [outputLocation], presenceLocation=presenceLocation)
 
         os.remove(outputLocation)
+        os.remove(presenceLocation)
 
     """ 
     # =============================================================================
 
-    test_all_exclusion
+    test_statistics
 
     PURPOSE:
-        Tests aggregation when there are exclusion files, but not inclusion files.
+        Tests that both engines write the statistics of the written k-mers
+        beside the output, in both formats.
 
     INPUT:
 
-        EX1: aggregate3.kmers:
-        CAA
-        GAA
+        IN1: aggregate1.kmers
+        IN2: aggregate2.kmers
 
-        EX2: aggregate4.kmers:
-        TAA
+        EX1: aggregate3.kmers
+        EX2: aggregate4.kmers
+
+        inhits = 2
+        exhits = 2
 
     EXPECTED:
 
-        OUT:
-        CAA 0 1
-        GAA 0 1
-        TAA 0 1
+        The histogram of the statistics counts the written records, and the
+        statistics describe the number of records and bytes written.
 
     # =============================================================================
     """
-    def test_all_exclusion(self):
+    def test_statistics(self):
 
-        aggregateLocation3 = "tests/data/aggregate/aggregate3.kmers"
-        aggregateLocation4 = "tests/data/aggregate/aggregate4.kmers"
+        import neptune.AggregateStatistics as AggregateStatistics
+        import neptune.BinaryKMers as BinaryKMers
 
-        inclusionLocations = []
-        exclusionLocations = [aggregateLocation3, aggregateLocation4]
-        outputLocation = "tests/output/aggregate/kmers.out"
-        delete = False
+        directory = "tests/data/aggregate/"
+        inclusionLocations = [directory + "aggregate1.kmers", directory + "aggregate2.kmers"]
+        exclusionLocations = [directory + "aggregate3.kmers", directory + "aggregate4.kmers"]
+        outputLocation = getPath("tests/output/aggregate/kmers.out")
+        statisticsLocation = outputLocation + AggregateStatistics.EXTENSION
 
-        aggregate(inclusionLocations, exclusionLocations, outputLocation, delete)
+        for outputFormat in BinaryKMers.FORMATS:
 
-        # check the output
-        with open(outputLocation, "r") as myfile:
+            for engine in ENGINES:
 
-            result = myfile.read()
-            expected = "CAA 0 1\nGAA 0 1\nTAA 0 1\n"
-            self.assertEquals(result, expected)
+                aggregate(inclusionLocations, exclusionLocations, outputLocation, False,
+                    outputFormat, False, [], None, None, 2, 2, [], [], engine, None, True)
+
+                records = list(BinaryKMers.readRecords(outputLocation))
+                histogram, partitions = AggregateStatistics.read(statisticsLocation)
+
+                expected = {}
+
+                for record in records:
+                    expected[record[1:]] = expected.get(record[1:], 0) + 1
+
+                self.assertTrue(records)
+                self.assertEquals(histogram, expected)
+                self.assertEquals(partitions, [("kmers.out", len(records), os.path.getsize(outputLocation))])
 
         os.remove(outputLocation)
-        
+        os.remove(statisticsLocation)
+
+"""
+# =============================================================================
+
+READ PARTIAL
+
+# =============================================================================
+"""
+class TestReadPartial(unittest.TestCase):
 
     """ 
     # =============================================================================
 
-    test_nothing
+    test_malformed
 
     PURPOSE:
-        Tests aggregation when there are neither inclusion or exclusion input
-        files.
+        Tests reading a k-mer file which is not an aggregation.
 
     INPUT:
-        [NONE]
+        "AAA 1\nCCC 2\n"
 
     EXPECTED:
-        [EMPTY STRING] ("")
+        RuntimeError
 
     # =============================================================================
     """
-    def test_nothing(self):
-
-        inclusionLocations = []
-        exclusionLocations = []
-        outputLocation = "tests/output/aggregate/kmers.out"
-        delete = False
+    def test_malformed(self):
 
-        aggregate(inclusionLocations, exclusionLocations, outputLocation, delete)
+        location = getPath("tests/output/aggregate/malformed.kmers")
 
-        # check the output
-        with open(outputLocation, "r") as myfile:
+        with open(location, "w") as kmerFile:
+            kmerFile.write("AAA 1\nCCC 2\n")
 
-            result = myfile.read()
-            expected = ""
-            self.assertEquals(result, expected)
+        with self.assertRaises(RuntimeError):
+            list(readPartial(location))
 
-        os.remove(outputLocation)
+        os.remove(location)
 
 """
 # =============================================================================
@@ -557,6 +1436,162 @@ class TestMain(unittest.TestCase):
 
         os.remove(outputLocation)
 
+    """ 
+    # =============================================================================
+
+    test_partial
+
+    PURPOSE:
+        Tests aggregating only partial aggregations from the main function.
+
+    INPUT:
+
+        PARTIAL1: IN1 with EX1
+        PARTIAL2: IN2 with EX2
+
+    EXPECTED:
+
+        OUT:
+        AAA 2 0
+        CAA 1 1
+        GAA 1 1
+        TAA 2 1
+
+    # =============================================================================
+    """
+    def test_partial(self):
+
+        directory = "tests/data/aggregate/"
+        partialLocation1 = getPath("tests/output/aggregate/partial1.kmers")
+        partialLocation2 = getPath("tests/output/aggregate/partial2.kmers")
+        outputLocation = getPath("tests/output/aggregate/kmers.out")
+
+        aggregate([directory + "aggregate1.kmers"],
+            [directory + "aggregate3.kmers"], partialLocation1, False)
+        aggregate([directory + "aggregate2.kmers"],
+            [directory + "aggregate4.kmers"], partialLocation2, False)
+
+        sys.argv[1:] = [PARTIAL_LONG, partialLocation1, partialLocation2,
+            OUTPUT_LONG, outputLocation,
+            DELETE_LONG]
+
+        main()
+
+        with open(outputLocation, "r") as myfile:
+            self.assertEquals(myfile.read(), "AAA 2 0\nCAA 1 1\nGAA 1 1\nTAA 2 1\n")
+
+        os.remove(outputLocation)
+
+    """ 
+    # =============================================================================
+
+    test_no_input
+
+    PURPOSE:
+        Tests the main function without any inclusion, exclusion, or partial
+        inputs.
+
+    EXPECTED:
+        SystemExit
+
+    # =============================================================================
+    """
+    def test_no_input(self):
+
+        outputLocation = getPath("tests/output/aggregate/kmers.out")
+
+        sys.argv[1:] = [OUTPUT_LONG, outputLocation]
+
+        with self.assertRaises(SystemExit):
+            main()
+
+    """ 
+    # =============================================================================
+
+    test_range
+
+    PURPOSE:
+        Tests the main function with a k-mer range.
+
+    INPUT:
+        The inputs of test_simple.
+
+        --start CAA --end TAA
+
+    EXPECTED:
+        "CAA 1 1\nGAA 1 1\n"
+
+    # =============================================================================
+    """
+    def test_range(self):
+
+        directory = "tests/data/aggregate/"
+        outputLocation = getPath("tests/output/aggregate/kmers.out")
+
+        sys.argv[1:] = [
+            INCLUSION_LONG, directory + "aggregate1.kmers",
+            directory + "aggregate2.kmers",
+            EXCLUSION_LONG, directory + "aggregate3.kmers",
+            directory + "aggregate4.kmers",
+            OUTPUT_LONG, outputLocation,
+            START_LONG, "CAA",
+            END_LONG, "TAA"]
+
+        main()
+
+        with open(outputLocation, "r") as myfile:
+            self.assertEquals(myfile.read(), "CAA 1 1\nGAA 1 1\n")
+
+        os.remove(outputLocation)
+
+    """ 
+    # =============================================================================
+
+    test_hits
+
+    PURPOSE:
+        Tests the main function with inclusion and exclusion hit thresholds.
+
+    INPUT:
+        The inputs of test_simple.
+
+        --inhits 1 --exhits 1
+
+    EXPECTED:
+        "AAA 2 0\nCAA 1 1\nGAA 1 1\nTAA 2 1\n"
+
+        --inhits 3 --exhits 1
+
+    EXPECTED:
+        "CAA 1 1\nGAA 1 1\nTAA 2 1\n"
+
+    # =============================================================================
+    """
+    def test_hits(self):
+
+        directory = "tests/data/aggregate/"
+        outputLocation = getPath("tests/output/aggregate/kmers.out")
+
+        for inhits, expected in [
+                ("1", "AAA 2 0\nCAA 1 1\nGAA 1 1\nTAA 2 1\n"),
+                ("3", "CAA 1 1\nGAA 1 1\nTAA 2 1\n")]:
+
+            sys.argv[1:] = [
+                INCLUSION_LONG, directory + "aggregate1.kmers",
+                directory + "aggregate2.kmers",
+                EXCLUSION_LONG, directory + "aggregate3.kmers",
+                directory + "aggregate4.kmers",
+                OUTPUT_LONG, outputLocation,
+                INHITS_LONG, inhits,
+                EXHITS_LONG, "1"]
+
+            main()
+
+            with open(outputLocation, "r") as myfile:
+                self.assertEquals(myfile.read(), expected)
+
+        os.remove(outputLocation)
+
 if __name__ == '__main__':
     
     unittest.main()
@@ -0,0 +1,457 @@
+#!/usr/bin/env python
+
+"""
+# =============================================================================
+
+Copyright Government of Canada 2015-2017
+
+Written by: Eric Marinier, Public Health Agency of Canada,
+    National Microbiology Laboratory
+
+Funded by the National Micriobiology Laboratory and the Genome Canada / Alberta
+    Innovates Bio Solutions project "Listeria Detection and Surveillance
+    using Next Generation Genomics"
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at:
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+# =============================================================================
+"""
+
+
+import os
+import sys
+
+from TestingUtility import *
+prepareSystemPath()
+
+from neptune.BinaryKMers import *
+
+import numpy
+import unittest
+
+""" 
+# =============================================================================
+
+WRITE
+
+# =============================================================================
+"""
+class TestWrite(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_simple
+
+    PURPOSE:
+        Tests writing and reading back a binary k-mer file, including ambiguous
+        k-mers.
+
+    INPUT:
+
+        records = [("AAC", 1, 0), ("ACG", 6, 300), ("GTN", 2, 0), ("TTT", 1, 2)]
+
+    EXPECTED:
+
+        k = 3, columns = 2, width = 2 bytes
+        codes = [AAC, ACG, TTT]
+        ambiguous = [("GTN", 2, 0)]
+        The records are read back in the same order.
+
+    # =============================================================================
+    """
+    def test_simple(self):
+
+        outputLocation = getPath("tests/output/binary/simple.bin")
+        records = [("AAC", 1, 0), ("ACG", 6, 300), ("GTN", 2, 0), ("TTT", 1, 2)]
+
+        write(records, outputLocation, 2)
+
+        self.assertTrue(isBinary(outputLocation))
+
+        kmers = KMers(outputLocation)
+
+        self.assertEquals(kmers.k, 3)
+        self.assertEquals(kmers.columns, 2)
+        self.assertEquals(kmers.codes.tolist(), [1, 6, 63])
+        self.assertEquals(kmers.counts[0].tolist(), [1, 6, 1])
+        self.assertEquals(kmers.counts[1].tolist(), [0, 300, 2])
+        self.assertEquals(kmers.counts[0].dtype, numpy.dtype("<u2"))
+        self.assertEquals(kmers.ambiguous, [("GTN", 2, 0)])
+        self.assertEquals(len(kmers), 4)
+
+        self.assertEquals(list(readRecords(outputLocation)), records)
+
+        os.remove(outputLocation)
+
+    """ 
+    # =============================================================================
+
+    test_empty
+
+    PURPOSE:
+        Tests writing a binary k-mer file without any k-mers.
+
+    INPUT:
+
+        records = []
+
+    EXPECTED:
+
+        The file contains only the header and no records are read.
+
+    # =============================================================================
+    """
+    def test_empty(self):
+
+        outputLocation = getPath("tests/output/binary/empty.bin")
+
+        write([], outputLocation, 1)
+
+        self.assertEquals(os.path.getsize(outputLocation), HEADER.size)
+        self.assertEquals(list(readRecords(outputLocation)), [])
+
+        os.remove(outputLocation)
+
+    """ 
+    # =============================================================================
+
+    test_large_k
+
+    PURPOSE:
+        Tests writing k-mers which are too large for the binary format.
+
+    INPUT:
+
+        k = 33
+
+    EXPECTED:
+
+        RuntimeError
+
+    # =============================================================================
+    """
+    def test_large_k(self):
+
+        outputLocation = getPath("tests/output/binary/large.bin")
+
+        with self.assertRaises(RuntimeError):
+            write([("A" * 33, 1)], outputLocation, 1)
+
+""" 
+# =============================================================================
+
+READ RECORDS
+
+# =============================================================================
+"""
+class TestReadRecords(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_text
+
+    PURPOSE:
+        Tests reading the records of a text k-mer file.
+
+    INPUT:
+
+        AAA 2 0
+        CAA 1 1
+
+    EXPECTED:
+
+        [("AAA", 2, 0), ("CAA", 1, 1)]
+
+    # =============================================================================
+    """
+    def test_text(self):
+
+        inputLocation = getPath("tests/output/binary/text.kmers")
+
+        with open(inputLocation, "w") as inputFile:
+            inputFile.write("AAA 2 0\nCAA 1 1\n")
+
+        self.assertFalse(isBinary(inputLocation))
+        self.assertEquals(
+            list(readRecords(inputLocation)), [("AAA", 2, 0), ("CAA", 1, 1)])
+
+        os.remove(inputLocation)
+
+""" 
+# =============================================================================
+
+CONCATENATE
+
+# =============================================================================
+"""
+class TestConcatenate(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_simple
+
+    PURPOSE:
+        Tests concatenating organized binary k-mer files.
+
+    INPUT:
+
+        A: ("AAA", 1, 0), ("ACN", 1, 1)
+        C: ("CCC", 2, 0)
+        __OTHER__: ("NNN", 0, 3)
+
+    EXPECTED:
+
+        [("AAA", 1, 0), ("ACN", 1, 1), ("CCC", 2, 0), ("NNN", 0, 3)]
+
+    # =============================================================================
+    """
+    def test_simple(self):
+
+        locations = [
+            getPath("tests/output/binary/concatenate.A"),
+            getPath("tests/output/binary/concatenate.C"),
+            getPath("tests/output/binary/concatenate.__OTHER__")]
+        outputLocation = getPath("tests/output/binary/concatenate.bin")
+
+        write([("AAA", 1, 0), ("ACN", 1, 1)], locations[0], 2)
+        write([("CCC", 2, 0)], locations[1], 2)
+        write([("NNN", 0, 3)], locations[2], 2)
+
+        concatenate(locations, outputLocation)
+
+        result = list(readRecords(outputLocation))
+        expected = [("AAA", 1, 0), ("ACN", 1, 1), ("CCC", 2, 0), ("NNN", 0, 3)]
+
+        self.assertEquals(result, expected)
+
+        for location in locations + [outputLocation]:
+            os.remove(location)
+
+""" 
+# =============================================================================
+
+COUNT RECORDS
+
+# =============================================================================
+"""
+class TestCountRecords(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_formats
+
+    PURPOSE:
+        Tests counting the records of binary and text k-mer files.
+
+    INPUT:
+
+        ("AAA", 1, 0), ("ACN", 1, 1), ("CCC", 2, 0)
+
+    EXPECTED:
+
+        3 records in both formats.
+
+    # =============================================================================
+    """
+    def test_formats(self):
+
+        records = [("AAA", 1, 0), ("ACN", 1, 1), ("CCC", 2, 0)]
+        binaryLocation = getPath("tests/output/binary/count.bin")
+        textLocation = getPath("tests/output/binary/count.kmers")
+
+        write(records, binaryLocation, 2)
+
+        with open(textLocation, "w") as textFile:
+            textFile.write("AAA 1 0\nACN 1 1\nCCC 2 0\n")
+
+        self.assertEquals(countRecords(binaryLocation), 3)
+        self.assertEquals(countRecords(textLocation), 3)
+
+        os.remove(binaryLocation)
+        os.remove(textLocation)
+
+""" 
+# =============================================================================
+
+MANIFEST
+
+# =============================================================================
+"""
+class TestManifest(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_partitions
+
+    PURPOSE:
+        Tests reading and counting the records of a partitioned k-mer file
+        with partitions in both formats.
+
+    INPUT:
+
+        A (binary): ("AAA", 1, 0), ("ACN", 1, 1)
+        C (text): CCC 2 0
+
+    EXPECTED:
+
+        [("AAA", 1, 0), ("ACN", 1, 1), ("CCC", 2, 0)] and 3 records.
+
+    # =============================================================================
+    """
+    def test_partitions(self):
+
+        locations = [
+            getPath("tests/output/binary/partitioned.A"),
+            getPath("tests/output/binary/partitioned.C")]
+        manifestLocation = getPath("tests/output/binary/partitioned.kmers")
+
+        write([("AAA", 1, 0), ("ACN", 1, 1)], locations[0], 2)
+
+        with open(locations[1], "w") as textFile:
+            textFile.write("CCC 2 0\n")
+
+        writeManifest(manifestLocation, locations)
+
+        with open(manifestLocation, "r") as manifestFile:
+            self.assertEquals(
+                manifestFile.read(),
+                "#partitions\npartitioned.A\npartitioned.C\n")
+
+        self.assertTrue(isManifest(manifestLocation))
+        self.assertFalse(isManifest(locations[0]))
+        self.assertFalse(isManifest(locations[1]))
+        self.assertFalse(isBinary(manifestLocation))
+
+        self.assertEquals(readPartitions(manifestLocation), locations)
+        self.assertEquals(readPartitions(locations[0]), [locations[0]])
+
+        result = list(readRecords(manifestLocation))
+        expected = [("AAA", 1, 0), ("ACN", 1, 1), ("CCC", 2, 0)]
+
+        self.assertEquals(result, expected)
+        self.assertEquals(countRecords(manifestLocation), 3)
+
+        for location in locations + [manifestLocation]:
+            os.remove(location)
+
+    """ 
+    # =============================================================================
+
+    test_missing_partition
+
+    PURPOSE:
+        Tests that a manifest listing a missing partition is rejected.
+
+    INPUT:
+
+        #partitions
+        DOES_NOT_EXIST
+
+    EXPECTED:
+
+        RuntimeError
+
+    # =============================================================================
+    """
+    def test_missing_partition(self):
+
+        manifestLocation = getPath("tests/output/binary/partitioned.kmers")
+
+        with open(manifestLocation, "w") as manifestFile:
+            manifestFile.write("#partitions\nDOES_NOT_EXIST\n")
+
+        with self.assertRaises(RuntimeError):
+            readPartitions(manifestLocation)
+
+        os.remove(manifestLocation)
+
+""" 
+# =============================================================================
+
+MAIN
+
+# =============================================================================
+"""
+class TestMain(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_round_trip
+
+    PURPOSE:
+        Tests converting a text k-mer file to binary and back to text.
+
+    INPUT:
+
+        tests/data/extract/simple.kmers
+
+    EXPECTED:
+
+        The converted text file is identical to the original.
+
+    # =============================================================================
+    """
+    def test_round_trip(self):
+
+        inputLocation = "tests/data/extract/simple.kmers"
+        binaryLocation = getPath("tests/output/binary/simple.bin")
+        textLocation = getPath("tests/output/binary/simple.kmers")
+
+        sys.argv[1:] = [INPUT_LONG, inputLocation, OUTPUT_LONG, binaryLocation, FORMAT_LONG, FORMAT_BINARY]
+        main()
+
+        self.assertTrue(isBinary(binaryLocation))
+
+        sys.argv[1:] = [INPUT_LONG, binaryLocation, OUTPUT_LONG, textLocation, FORMAT_LONG, FORMAT_TEXT]
+        main()
+
+        with open(inputLocation, "r") as inputFile:
+            with open(textLocation, "r") as textFile:
+                self.assertEquals(textFile.read(), inputFile.read())
+
+        os.remove(binaryLocation)
+        os.remove(textLocation)
+
+    """ 
+    # =============================================================================
+
+    test_missing_input
+
+    PURPOSE:
+        Tests converting a file which does not exist.
+
+    INPUT:
+
+        tests/data/this_file_does_not_exist.fake
+
+    EXPECTED:
+
+        RuntimeError
+
+    # =============================================================================
+    """
+    def test_missing_input(self):
+
+        sys.argv[1:] = [INPUT_LONG, "tests/data/this_file_does_not_exist.fake", OUTPUT_LONG, getPath("tests/output/binary/missing.bin"), FORMAT_LONG, FORMAT_BINARY]
+
+        with self.assertRaises(RuntimeError):
+            main()
+
+if __name__ == '__main__':
+    
+    unittest.main()
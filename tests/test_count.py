@@ -36,6 +36,7 @@ prepareSystemPath()
 from neptune.CountKMers import *
 from neptune.Utility import *
 
+import numpy
 import unittest
 
 """ 
@@ -184,6 +185,1612 @@ class TestCount(unittest.TestCase):
             outputName = outputLocation + "." + tag
             os.remove(outputName)
 
+    """ 
+    # =============================================================================
+
+    test_ambiguous
+
+    PURPOSE:
+        Tests counting k-mers in sequences containing characters other than A,
+        C, G, or T.
+
+    INPUT:
+
+        count2.fasta:
+        >0
+        ACGTNACGTACGTT
+        >1
+        nnnnnnnnnn
+        
+         k = 3
+
+    EXPECTED:
+
+        count2.kmers:
+        AAC 1
+        ACG 6
+        GTA 2
+        GTN 2
+        NNN 8
+        TNA 1
+
+    # =============================================================================
+    """
+    def test_ambiguous(self):
+
+        inputLocation = "tests/data/count/count2.fasta"
+        outputLocation = getPath("tests/output/count/count2.kmers")
+        k = 3
+        parallelization = 0
+
+        count(inputLocation, outputLocation, k, parallelization)
+
+        with open (outputLocation, "r") as myfile:
+
+            result = myfile.read()
+            expected = "AAC 1\nACG 6\nGTA 2\nGTN 2\nNNN 8\nTNA 1\n"
+            self.assertEquals(result, expected)
+
+        os.remove(outputLocation)
+
+    """ 
+    # =============================================================================
+
+    test_numpy_engine
+
+    PURPOSE:
+        Tests that the NumPy engine produces the same output as the dictionary
+        engine, while writing to one file.
+
+    INPUT:
+
+        count1.fasta, count2.fasta
+        
+         k = 7, k = 3
+
+    EXPECTED:
+
+        The same output as the dictionary engine.
+
+    # =============================================================================
+    """
+    def test_numpy_engine(self):
+
+        for inputLocation, k in [
+                ("tests/data/count/count1.fasta", 7),
+                ("tests/data/count/count2.fasta", 3)]:
+
+            dictionaryLocation = getPath("tests/output/count/dictionary.kmers")
+            numpyLocation = getPath("tests/output/count/numpy.kmers")
+
+            count(inputLocation, dictionaryLocation, k, 0, ENGINE_DICTIONARY)
+            count(inputLocation, numpyLocation, k, 0, ENGINE_NUMPY)
+
+            with open(dictionaryLocation, "r") as dictionaryFile:
+                with open(numpyLocation, "r") as numpyFile:
+                    self.assertEquals(numpyFile.read(), dictionaryFile.read())
+
+            os.remove(dictionaryLocation)
+            os.remove(numpyLocation)
+
+    """ 
+    # =============================================================================
+
+    test_numpy_engine_large_k
+
+    PURPOSE:
+        Tests that the NumPy engine falls back to the dictionary engine when k
+        is too large for its codes.
+
+    INPUT:
+
+        >0
+        ACGT repeated 12 times
+
+         k = 33
+
+    EXPECTED:
+
+        The same output as the dictionary engine.
+
+    # =============================================================================
+    """
+    def test_numpy_engine_large_k(self):
+
+        inputLocation = getPath("tests/output/count/large.fasta")
+        dictionaryLocation = getPath("tests/output/count/dictionary.kmers")
+        numpyLocation = getPath("tests/output/count/numpy.kmers")
+
+        with open(inputLocation, "w") as inputFile:
+            inputFile.write(">0\n" + "ACGT" * 12 + "\n")
+
+        count(inputLocation, dictionaryLocation, 33, 0, ENGINE_DICTIONARY)
+        count(inputLocation, numpyLocation, 33, 0, ENGINE_NUMPY)
+
+        with open(dictionaryLocation, "r") as dictionaryFile:
+            with open(numpyLocation, "r") as numpyFile:
+                self.assertEquals(numpyFile.read(), dictionaryFile.read())
+
+        os.remove(inputLocation)
+        os.remove(dictionaryLocation)
+        os.remove(numpyLocation)
+
+    """ 
+    # =============================================================================
+
+    test_unknown_engine
+
+    PURPOSE:
+        Tests counting with an unknown engine.
+
+    INPUT:
+
+        engine = "unknown"
+
+    EXPECTED:
+
+        RuntimeError
+
+    # =============================================================================
+    """
+    def test_unknown_engine(self):
+
+        inputLocation = "tests/data/count/count1.fasta"
+        outputLocation = getPath("tests/output/count/count1.kmers")
+
+        with self.assertRaises(RuntimeError):
+            count(inputLocation, outputLocation, 7, 0, "unknown")
+
+    """ 
+    # =============================================================================
+
+    test_memory_limit
+
+    PURPOSE:
+        Tests counting with a memory limit small enough that the k-mer table is
+        spilled to several runs, with both engines.
+
+    INPUT:
+
+        count2.fasta
+        
+         k = 3, a capacity of 4 k-mers
+
+    EXPECTED:
+
+        count2.kmers:
+        AAC 1
+        ACG 6
+        GTA 2
+        GTN 2
+        NNN 8
+        TNA 1
+
+        No run files remain.
+
+    # =============================================================================
+    """
+    def test_memory_limit(self):
+
+        import neptune.CountKMers
+
+        inputLocation = "tests/data/count/count2.fasta"
+        outputLocation = getPath("tests/output/count/count2.kmers")
+        k = 3
+
+        dictionaryBytes = neptune.CountKMers.DICTIONARY_BYTES_PER_KMER
+        numpyBytes = neptune.CountKMers.NUMPY_BYTES_PER_KMER
+
+        neptune.CountKMers.DICTIONARY_BYTES_PER_KMER = MEGABYTE // 4
+        neptune.CountKMers.NUMPY_BYTES_PER_KMER = MEGABYTE // 4
+
+        try:
+            for engine in ENGINES:
+
+                count(inputLocation, outputLocation, k, 0, engine, 1)
+
+                with open (outputLocation, "r") as myfile:
+
+                    result = myfile.read()
+                    expected = "AAC 1\nACG 6\nGTA 2\nGTN 2\nNNN 8\nTNA 1\n"
+                    self.assertEquals(result, expected)
+
+                os.remove(outputLocation)
+
+                runs = [name for name in os.listdir(os.path.dirname(outputLocation))
+                    if name.endswith(RUN_SUFFIX)]
+                self.assertEquals(runs, [])
+
+        finally:
+            neptune.CountKMers.DICTIONARY_BYTES_PER_KMER = dictionaryBytes
+            neptune.CountKMers.NUMPY_BYTES_PER_KMER = numpyBytes
+
+    """ 
+    # =============================================================================
+
+    test_memory_limit_out_of_range
+
+    PURPOSE:
+        Tests counting with a memory limit which is out of range.
+
+    INPUT:
+
+        memoryLimit = 0
+
+    EXPECTED:
+
+        RuntimeError
+
+    # =============================================================================
+    """
+    def test_memory_limit_out_of_range(self):
+
+        inputLocation = "tests/data/count/count1.fasta"
+        outputLocation = getPath("tests/output/count/count1.kmers")
+
+        with self.assertRaises(RuntimeError):
+            count(inputLocation, outputLocation, 7, 0, ENGINE_DEFAULT, 0)
+
+    """ 
+    # =============================================================================
+
+    test_binary_format
+
+    PURPOSE:
+        Tests writing binary k-mer files, with and without organization.
+
+    INPUT:
+
+        count2.fasta
+        
+         k = 3, organization = 0 and 1
+
+    EXPECTED:
+
+        The binary files contain the same k-mers as the text files.
+
+    # =============================================================================
+    """
+    def test_binary_format(self):
+
+        import neptune.BinaryKMers as BinaryKMers
+
+        inputLocation = "tests/data/count/count2.fasta"
+        textLocation = getPath("tests/output/count/text.kmers")
+        binaryLocation = getPath("tests/output/count/binary.kmers")
+        k = 3
+
+        for organization in [0, 1]:
+
+            count(inputLocation, textLocation, k, organization, ENGINE_NUMPY,
+                None, BinaryKMers.FORMAT_TEXT)
+            count(inputLocation, binaryLocation, k, organization, ENGINE_NUMPY,
+                None, BinaryKMers.FORMAT_BINARY)
+
+            tags = [""] if organization == 0 else \
+                ["." + tag for tag in getAggregationTags(organization)]
+
+            for tag in tags:
+
+                self.assertTrue(BinaryKMers.isBinary(binaryLocation + tag))
+                self.assertEquals(
+                    list(BinaryKMers.readRecords(binaryLocation + tag)),
+                    list(BinaryKMers.readRecords(textLocation + tag)))
+
+                os.remove(textLocation + tag)
+                os.remove(binaryLocation + tag)
+
+    """ 
+    # =============================================================================
+
+    test_binary_format_large_k
+
+    PURPOSE:
+        Tests writing binary k-mer files with k-mers which are too large for the
+        binary format.
+
+    INPUT:
+
+        k = 33
+
+    EXPECTED:
+
+        RuntimeError
+
+    # =============================================================================
+    """
+    def test_binary_format_large_k(self):
+
+        inputLocation = "tests/data/count/count1.fasta"
+        outputLocation = getPath("tests/output/count/count1.kmers")
+
+        with self.assertRaises(RuntimeError):
+            count(inputLocation, outputLocation, 33, 0, ENGINE_DEFAULT, None,
+                "binary")
+
+    """ 
+    # =============================================================================
+
+    test_splitters
+
+    PURPOSE:
+        Tests dividing the k-mers into partitions with splitters, in both
+        formats.
+
+    INPUT:
+
+        count2.fasta
+
+         k = 3, splitters = ["CAA", "GTA"]
+
+    EXPECTED:
+
+        The partitions contain every k-mer of the unorganized output, in order,
+        and each k-mer is in the partition selected by the splitters.
+
+    # =============================================================================
+    """
+    def test_splitters(self):
+
+        import neptune.BinaryKMers as BinaryKMers
+
+        inputLocation = "tests/data/count/count2.fasta"
+        expectedLocation = getPath("tests/output/count/expected.kmers")
+        outputLocation = getPath("tests/output/count/partitioned.kmers")
+        splitters = ["CAA", "GTA"]
+        k = 3
+
+        count(inputLocation, expectedLocation, k, 0)
+        expected = list(BinaryKMers.readRecords(expectedLocation))
+
+        for outputFormat in BinaryKMers.FORMATS:
+
+            count(inputLocation, outputLocation, k, 1, ENGINE_DEFAULT, None,
+                outputFormat, splitters)
+
+            result = []
+
+            for index, tag in enumerate(getPartitionTags(3)):
+
+                records = list(BinaryKMers.readRecords(outputLocation + "." + tag))
+
+                for record in records:
+                    self.assertEquals(getPartition(record[0], splitters), index)
+
+                result += records
+                os.remove(outputLocation + "." + tag)
+
+            self.assertEquals(result, expected)
+
+        os.remove(expectedLocation)
+
+    """ 
+    # =============================================================================
+
+    test_workers
+
+    PURPOSE:
+        Tests counting with several worker processes, with both engines.
+
+    INPUT:
+
+        count2.fasta
+
+         k = 3, workers = 2 to 5
+
+    EXPECTED:
+
+        The output is identical to counting with a single worker, and no runs
+        remain.
+
+    # =============================================================================
+    """
+    def test_workers(self):
+
+        inputLocation = "tests/data/count/count2.fasta"
+        expectedLocation = getPath("tests/output/count/expected.kmers")
+        outputLocation = getPath("tests/output/count/workers.kmers")
+        k = 3
+
+        for engine in ENGINES:
+
+            count(inputLocation, expectedLocation, k, 0, engine)
+
+            with open(expectedLocation, "r") as expectedFile:
+                expected = expectedFile.read()
+
+            for workers in range(2, 6):
+
+                count(inputLocation, outputLocation, k, 0, engine, None,
+                    FORMAT_DEFAULT, None, workers)
+
+                with open(outputLocation, "r") as outputFile:
+                    self.assertEquals(outputFile.read(), expected)
+
+                os.remove(outputLocation)
+
+            os.remove(expectedLocation)
+
+        self.assertFalse([name for name in os.listdir(getPath("tests/output/count"))
+            if name.endswith(RUN_SUFFIX)])
+
+    """ 
+    # =============================================================================
+
+    test_workers_out_of_range
+
+    PURPOSE:
+        Tests counting with no workers.
+
+    INPUT:
+
+        workers = 0
+
+    EXPECTED:
+
+        RuntimeError
+
+    # =============================================================================
+    """
+    def test_workers_out_of_range(self):
+
+        inputLocation = "tests/data/count/count1.fasta"
+        outputLocation = getPath("tests/output/count/count1.kmers")
+
+        with self.assertRaises(RuntimeError):
+            count(inputLocation, outputLocation, 7, 0, ENGINE_DEFAULT, None,
+                FORMAT_DEFAULT, None, 0)
+
+    """ 
+    # =============================================================================
+
+    test_compressed
+
+    PURPOSE:
+        Tests counting a gzip compressed input and writing compressed output,
+        with and without organization.
+
+    INPUT:
+
+        count2.fasta, compressed
+
+         k = 3, organization = 0 and 1
+
+    EXPECTED:
+
+        The compressed output contains the same k-mers as the output of the
+        uncompressed input.
+
+    # =============================================================================
+    """
+    def test_compressed(self):
+
+        import gzip
+
+        inputLocation = "tests/data/count/count2.fasta"
+        compressedLocation = getPath("tests/output/count/count2.fasta.gz")
+        expectedLocation = getPath("tests/output/count/expected.kmers")
+        outputLocation = getPath("tests/output/count/compressed.kmers")
+        k = 3
+
+        with open(inputLocation, "r") as inputFile:
+            with gzip.open(compressedLocation, "wb") as outputFile:
+                outputFile.write(inputFile.read())
+
+        for organization in [0, 1]:
+
+            count(inputLocation, expectedLocation, k, organization)
+            count(compressedLocation, outputLocation, k, organization,
+                ENGINE_DEFAULT, None, FORMAT_DEFAULT, None, 1, True)
+
+            tags = [""] if organization == 0 else \
+                ["." + tag for tag in getAggregationTags(organization)]
+
+            for tag in tags:
+
+                self.assertTrue(isCompressed(outputLocation + tag))
+
+                with open(expectedLocation + tag, "r") as expectedFile:
+                    with gzip.open(outputLocation + tag, "rb") as outputFile:
+                        self.assertEquals(outputFile.read(), expectedFile.read())
+
+                os.remove(expectedLocation + tag)
+                os.remove(outputLocation + tag)
+
+        os.remove(compressedLocation)
+
+    """ 
+    # =============================================================================
+
+    test_fastq
+
+    PURPOSE:
+        Tests counting the k-mers of FASTQ reads, with and without a minimum
+        count, with both engines.
+
+    INPUT:
+
+        reads.fastq
+
+         k = 5, minCount = 1 and 3
+
+    EXPECTED:
+
+        minCount = 1: all k-mers, including the ambiguous k-mers of read3
+        minCount = 3: ACGTA 6, CGTAC 6
+
+    # =============================================================================
+    """
+    def test_fastq(self):
+
+        inputLocation = "tests/data/count/reads.fastq"
+        outputLocation = getPath("tests/output/count/reads.kmers")
+
+        for engine in ENGINES:
+
+            count(inputLocation, outputLocation, 5, 0, engine)
+
+            with open(outputLocation, "r") as outputFile:
+                self.assertEquals(outputFile.read(),
+                    "ACGTA 6\nCCCCN 1\nCCCNC 1\nCCNCC 1\nCGTAC 6\nCNCCC 1\nGGGGN 1\n")
+
+            count(inputLocation, outputLocation, 5, 0, engine, None,
+                FORMAT_DEFAULT, None, 1, False, 3)
+
+            with open(outputLocation, "r") as outputFile:
+                self.assertEquals(outputFile.read(), "ACGTA 6\nCGTAC 6\n")
+
+            os.remove(outputLocation)
+
+    """ 
+    # =============================================================================
+
+    test_min_count
+
+    PURPOSE:
+        Tests that a minimum count produces the same k-mers as filtering the
+        complete counts, with a memory limit, several workers, and a sketch
+        small enough to have many collisions.
+
+    INPUT:
+
+        reads of a random sequence, with errors
+
+         k = 7, minCount = 2
+
+    EXPECTED:
+
+        The k-mers of the complete counts with counts of at least 2.
+
+    # =============================================================================
+    """
+    def test_min_count(self):
+
+        import random
+        import neptune.CountKMers as CountKMers
+
+        random.seed(1)
+        genome = "".join(random.choice("ACGT") for i in range(300))
+
+        inputLocation = getPath("tests/output/count/reads.fastq")
+        outputLocation = getPath("tests/output/count/reads.kmers")
+
+        with open(inputLocation, "w") as inputFile:
+
+            for i in range(60):
+
+                start = random.randint(0, len(genome) - 30)
+                read = list(genome[start:start + 30])
+                read[random.randint(0, 29)] = random.choice("ACGTN")
+                inputFile.write("@" + str(i) + "\n" + "".join(read) + "\n+\n" + "I" * 30 + "\n")
+
+        count(inputLocation, outputLocation, 7, 0, ENGINE_NUMPY)
+
+        with open(outputLocation, "r") as outputFile:
+            expected = "".join(line for line in outputFile if int(line.split()[1]) >= 2)
+
+        sketchSize = CountKMers.SKETCH_BYTES_DEFAULT
+        CountKMers.SKETCH_BYTES_DEFAULT = 64
+
+        try:
+
+            for engine, memoryLimit, workers in [
+                    (ENGINE_NUMPY, None, 1), (ENGINE_NUMPY, 1, 1),
+                    (ENGINE_NUMPY, None, 3), (ENGINE_DICTIONARY, None, 1),
+                    (ENGINE_DICTIONARY, 1, 1), (ENGINE_DICTIONARY, None, 3)]:
+
+                count(inputLocation, outputLocation, 7, 0, engine, memoryLimit,
+                    FORMAT_DEFAULT, None, workers, False, 2)
+
+                with open(outputLocation, "r") as outputFile:
+                    self.assertEquals(outputFile.read(), expected)
+
+        finally:
+
+            CountKMers.SKETCH_BYTES_DEFAULT = sketchSize
+
+        os.remove(inputLocation)
+        os.remove(outputLocation)
+
+    """ 
+    # =============================================================================
+
+    test_min_count_out_of_range
+
+    PURPOSE:
+        Tests counting with a minimum count of 0.
+
+    EXPECTED:
+
+        RuntimeError
+
+    # =============================================================================
+    """
+    def test_min_count_out_of_range(self):
+
+        inputLocation = "tests/data/count/count1.fasta"
+        outputLocation = getPath("tests/output/count/count1.kmers")
+
+        with self.assertRaises(RuntimeError):
+            count(inputLocation, outputLocation, 7, 0, ENGINE_DEFAULT, None,
+                FORMAT_DEFAULT, None, 1, False, 0)
+
+    """ 
+    # =============================================================================
+
+    test_presence
+
+    PURPOSE:
+        Tests recording only the presence of k-mers, with both engines, a
+        memory limit, several workers, organization, and both formats.
+
+    INPUT:
+
+        count2.fasta
+
+         k = 3, presence = True
+
+    EXPECTED:
+
+        The k-mers of the counted output, without counts. Binary files have no
+        count columns.
+
+    # =============================================================================
+    """
+    def test_presence(self):
+
+        import neptune.CountKMers
+        import neptune.BinaryKMers as BinaryKMers
+
+        inputLocation = "tests/data/count/count2.fasta"
+        outputLocation = getPath("tests/output/count/count2.kmers")
+        k = 3
+
+        expected = "AAC\nACG\nGTA\nGTN\nNNN\nTNA\n"
+
+        dictionaryBytes = neptune.CountKMers.DICTIONARY_BYTES_PER_KMER
+        numpyBytes = neptune.CountKMers.NUMPY_BYTES_PER_KMER
+
+        neptune.CountKMers.DICTIONARY_BYTES_PER_KMER = MEGABYTE // 4
+        neptune.CountKMers.NUMPY_BYTES_PER_KMER = MEGABYTE // 4
+
+        try:
+
+            for engine in ENGINES:
+
+                for memoryLimit, workers in [(None, 1), (1, 1), (None, 3), (1, 3)]:
+
+                    count(inputLocation, outputLocation, k, 0, engine,
+                        memoryLimit, FORMAT_DEFAULT, None, workers, False, 1,
+                        True)
+
+                    with open(outputLocation, "r") as myfile:
+                        self.assertEquals(myfile.read(), expected)
+
+                    os.remove(outputLocation)
+
+                    runs = [name for name in os.listdir(os.path.dirname(outputLocation))
+                        if name.endswith(RUN_SUFFIX)]
+                    self.assertEquals(runs, [])
+
+        finally:
+
+            neptune.CountKMers.DICTIONARY_BYTES_PER_KMER = dictionaryBytes
+            neptune.CountKMers.NUMPY_BYTES_PER_KMER = numpyBytes
+
+        # organization
+        count(inputLocation, outputLocation, k, 1, ENGINE_NUMPY, None,
+            FORMAT_DEFAULT, None, 1, False, 1, True)
+
+        with open(outputLocation + ".G", "r") as myfile:
+            self.assertEquals(myfile.read(), "GTA\nGTN\n")
+
+        for tag in getAggregationTags(1):
+            os.remove(outputLocation + "." + tag)
+
+        # binary format
+        count(inputLocation, outputLocation, k, 0, ENGINE_NUMPY, None,
+            BinaryKMers.FORMAT_BINARY, None, 1, False, 1, True)
+
+        self.assertEquals(BinaryKMers.KMers(outputLocation).columns, 0)
+        self.assertEquals(
+            [record[0] for record in BinaryKMers.readRecords(outputLocation)],
+            expected.split())
+
+        os.remove(outputLocation)
+
+    """ 
+    # =============================================================================
+
+    test_presence_min_count
+
+    PURPOSE:
+        Tests recording only the presence of k-mers with a minimum count.
+
+    EXPECTED:
+
+        RuntimeError
+
+    # =============================================================================
+    """
+    def test_presence_min_count(self):
+
+        inputLocation = "tests/data/count/count1.fasta"
+        outputLocation = getPath("tests/output/count/count1.kmers")
+
+        with self.assertRaises(RuntimeError):
+            count(inputLocation, outputLocation, 7, 0, ENGINE_DEFAULT, None,
+                FORMAT_DEFAULT, None, 1, False, 2, True)
+
+    """ 
+    # =============================================================================
+
+    test_compressed_binary
+
+    PURPOSE:
+        Tests requesting compressed binary output.
+
+    EXPECTED:
+
+        RuntimeError
+
+    # =============================================================================
+    """
+    def test_compressed_binary(self):
+
+        inputLocation = "tests/data/count/count1.fasta"
+        outputLocation = getPath("tests/output/count/count1.kmers")
+
+        with self.assertRaises(RuntimeError):
+            count(inputLocation, outputLocation, 7, 0, ENGINE_DEFAULT, None,
+                "binary", None, 1, True)
+
+""" 
+# =============================================================================
+
+RANGES
+
+# =============================================================================
+"""
+class TestRanges(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_get_ranges
+
+    PURPOSE:
+        Tests dividing k-mer positions into ranges.
+
+    INPUT:
+
+        positions = 10, chunks = 1, 3, 20
+        positions = 0, chunks = 4
+
+    EXPECTED:
+
+        [(0, 10)]
+        [(0, 4), (4, 8), (8, 10)]
+        [(0, 1), (1, 2), ... (9, 10)]
+        []
+
+    # =============================================================================
+    """
+    def test_get_ranges(self):
+
+        self.assertEquals(getRanges(10, 1), [(0, 10)])
+        self.assertEquals(getRanges(10, 3), [(0, 4), (4, 8), (8, 10)])
+        self.assertEquals(getRanges(10, 20), [(i, i + 1) for i in range(10)])
+        self.assertEquals(getRanges(0, 4), [])
+
+    """ 
+    # =============================================================================
+
+    test_index_positions
+
+    PURPOSE:
+        Tests counting the k-mer positions of a file.
+
+    INPUT:
+
+        count2.fasta: 14 and 10 bases
+
+        k = 3
+
+    EXPECTED:
+
+        12 + 8 = 20
+
+        The only checkpoint is the start of the file.
+
+    # =============================================================================
+    """
+    def test_index_positions(self):
+
+        positions, checkpoints = indexPositions(
+            "tests/data/count/count2.fasta", 3)
+
+        self.assertEquals(positions, 20)
+        self.assertEquals(checkpoints, [(0, 0, None, 0)])
+
+        positions, checkpoints = indexPositions(
+            "tests/data/count/count2.fasta", 12)
+
+        self.assertEquals(positions, 3)
+
+    """ 
+    # =============================================================================
+
+    test_index_missing
+
+    PURPOSE:
+        Tests indexing a file which does not exist.
+
+    INPUT:
+
+        tests/data/count/missing.fasta
+
+    EXPECTED:
+
+        A RuntimeError is raised.
+
+    # =============================================================================
+    """
+    def test_index_missing(self):
+
+        with self.assertRaises(RuntimeError):
+            indexPositions("tests/data/count/missing.fasta", 3)
+
+    """ 
+    # =============================================================================
+
+    test_checkpoints
+
+    PURPOSE:
+        Tests that counting a range from its checkpoint finds the same k-mers
+        as counting the range from the start of the file.
+
+    INPUT:
+
+        multi-line FASTA and FASTQ records
+
+        CHECKPOINT_SIZE = 4, k = 3 and 5
+
+    EXPECTED:
+
+        Every range of every division of the positions has the same k-mers
+        with and without its checkpoint.
+
+    # =============================================================================
+    """
+    def test_checkpoints(self):
+
+        import neptune.CountKMers as CountKMers
+
+        contents = [
+            ">0\nACGTA\nCGTTG\nCA\n>1\nGG\n>2\nTTTTACGT\nACGAAC\n",
+            "@0\nACGTACGTTG\n+\nIIIIIIIIII\n@1\nGGA\n+\n@II\n" +
+            "@2\nTTTTACGTAC\n+\nIIIIIIIIII\n"]
+
+        inputLocation = getPath("tests/output/count/checkpoints.fasta")
+        outputLocation = getPath("tests/output/count/checkpoints.kmers")
+
+        size = CountKMers.CHECKPOINT_SIZE
+        CountKMers.CHECKPOINT_SIZE = 4
+
+        try:
+
+            for content in contents:
+
+                with open(inputLocation, "w") as inputFile:
+                    inputFile.write(content)
+
+                for k in [3, 5]:
+
+                    positions, checkpoints = indexPositions(inputLocation, k)
+                    self.assertTrue(len(checkpoints) > 1)
+
+                    for workers in range(1, positions + 1):
+
+                        for start, end in getRanges(positions, workers):
+
+                            unlocated = countRange(
+                                inputLocation, outputLocation, k,
+                                ENGINE_NUMPY, None, start, end)
+                            located = countRange(
+                                inputLocation, outputLocation, k,
+                                ENGINE_NUMPY, None, start, end, False,
+                                *locateRange(checkpoints, k, start, end))
+
+                            self.assertEquals(
+                                list(mergeRuns(located)),
+                                list(mergeRuns(unlocated)))
+
+                            for run in unlocated + located:
+                                os.remove(run)
+
+        finally:
+
+            CountKMers.CHECKPOINT_SIZE = size
+            os.remove(inputLocation)
+
+    """ 
+    # =============================================================================
+
+    test_slice_range
+
+    PURPOSE:
+        Tests selecting the parts of references within a range of positions.
+
+    INPUT:
+
+        references = ("0", "ACGTAC"), ("1", "GG"), ("2", "TTTTT")
+
+        k = 3
+
+    EXPECTED:
+
+        The pieces overlap by k - 1 bases and skip references which are too
+        short.
+
+    # =============================================================================
+    """
+    def test_slice_range(self):
+
+        references = [("0", "ACGTAC"), ("1", "GG"), ("2", "TTTTT")]
+
+        self.assertEquals(
+            list(sliceRange(references, 3, 0, 7)),
+            [("0", "ACGTAC"), ("2", "TTTTT")])
+        self.assertEquals(
+            list(sliceRange(references, 3, 2, 5)),
+            [("0", "GTAC"), ("2", "TTT")])
+        self.assertEquals(
+            list(sliceRange(references, 3, 5, 7)),
+            [("2", "TTTT")])
+        self.assertEquals(list(sliceRange(references, 3, 7, 7)), [])
+
+        # continuing from the third base of the first reference
+        self.assertEquals(
+            list(sliceRange([("0", "TAC"), ("2", "TTTTT")], 3, 3, 7, 0, 3)),
+            [("0", "TAC"), ("2", "TTTTT")])
+        self.assertEquals(
+            list(sliceRange([("2", "TTTTT")], 3, 5, 7, 4)),
+            [("2", "TTTT")])
+
+""" 
+# =============================================================================
+
+SKETCH
+
+# =============================================================================
+"""
+class TestSketch(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_estimates
+
+    PURPOSE:
+        Tests that the estimates of a small count-min sketch are never smaller
+        than the true counts.
+
+    INPUT:
+
+        1000 random codes in a sketch of 64 bytes
+
+    EXPECTED:
+
+        Every estimate is at least the true count, and the estimates of an
+        empty sketch are 0.
+
+    # =============================================================================
+    """
+    def test_estimates(self):
+
+        numpy.random.seed(1)
+        codes = numpy.random.randint(0, 200, 1000).astype(numpy.uint64)
+
+        sketch = createSketch(64)
+        self.assertEquals(sketch.shape, (4, 8))
+        self.assertTrue((querySketch(sketch, codes) == 0).all())
+
+        updateSketch(sketch, codes)
+
+        unique, counts = numpy.unique(codes, return_counts=True)
+        self.assertTrue((querySketch(sketch, unique) >= counts).all())
+
+    """ 
+    # =============================================================================
+
+    test_size_sketch
+
+    PURPOSE:
+        Tests that the sketch and its batches fit within the memory limit.
+
+    INPUT:
+
+        memory limits of 1, 16 and 4096 megabytes, and no limit
+
+    EXPECTED:
+
+        The sketch, the counts of one of its rows, and a batch of codes use no
+        more than the memory limit.
+
+    # =============================================================================
+    """
+    def test_size_sketch(self):
+
+        import neptune.CountKMers as CountKMers
+
+        for memoryLimit in [1, 16, 4096]:
+
+            size, batchSize = sizeSketch(memoryLimit)
+
+            self.assertEquals(size, memoryLimit * CountKMers.MEGABYTE // 4)
+            self.assertTrue(
+                2 * size + batchSize * CountKMers.SKETCH_BYTES_PER_KMER <=
+                memoryLimit * CountKMers.MEGABYTE)
+
+        self.assertEquals(
+            sizeSketch(None),
+            (CountKMers.SKETCH_BYTES_DEFAULT, CountKMers.SKETCH_BATCH_SIZE))
+
+    """ 
+    # =============================================================================
+
+    test_table_size
+
+    PURPOSE:
+        Tests that the sketch keeps the rare k-mers out of the k-mer table of
+        both engines.
+
+    INPUT:
+
+        20 copies of a 200 base sequence and 200 distinct random sequences
+
+        a sketch of 4 megabytes, k = 11, minCount = 2
+
+    EXPECTED:
+
+        With the sketch, the table holds every k-mer with a count of at least
+        2, and fewer than a fiftieth of the k-mers of the table without the
+        sketch.
+
+    # =============================================================================
+    """
+    def test_table_size(self):
+
+        import random
+
+        random.seed(2)
+        repeated = "".join(random.choice("ACGT") for i in range(200))
+
+        references = [(str(i), repeated) for i in range(20)] + [
+            (str(i), "".join(random.choice("ACGT") for j in range(200)))
+            for i in range(20, 220)]
+
+        sketch = createSketch(4194304)
+        updateSketch(sketch, numpy.concatenate([
+            countSequenceVectorized(reference, 11, None)
+            for name, reference in references]))
+
+        for engine in ENGINES:
+
+            codes, counts, ambiguous = countReferences(
+                references, 11, engine, None, None, [])
+            filtered = countReferences(
+                references, 11, engine, None, None, [], sketch, 2)[0]
+
+            self.assertTrue(set(codes[counts >= 2]) <= set(filtered))
+            self.assertTrue(len(filtered) < len(codes) // 50)
+
+    """ 
+    # =============================================================================
+
+    test_batch_records
+
+    PURPOSE:
+        Tests joining short records and counting the joined records.
+
+    INPUT:
+
+        ("0", "ACGT"), ("1", "CCCC"), ("2", "GGGGGGGG"), ("3", "TT")
+
+        size = 10, k = 3
+
+    EXPECTED:
+
+        ("0", "ACGT\nCCCC"), ("2", "GGGGGGGG"), ("3", "TT")
+
+        No k-mer spans the separator.
+
+    # =============================================================================
+    """
+    def test_batch_records(self):
+
+        records = [("0", "ACGT"), ("1", "CCCC"), ("2", "GGGGGGGG"), ("3", "TT")]
+        batches = list(batchRecords(records, 10))
+
+        self.assertEquals(
+            batches, [("0", "ACGT\nCCCC"), ("2", "GGGGGGGG"), ("3", "TT")])
+
+        ambiguous = {}
+        codes = countSequenceVectorized("ACGT\nCCNC", 3, ambiguous)
+
+        self.assertEquals(sorted(decodeKMers(codes, 3)), ["ACG", "ACG"])
+        self.assertEquals(ambiguous, {"CCN": 1, "CNC": 1})
+
+""" 
+# =============================================================================
+
+SLICE SEQUENCE
+
+# =============================================================================
+"""
+class TestSliceSequence(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_simple
+
+    PURPOSE:
+        Tests slicing a sequence into overlapping pieces.
+
+    INPUT:
+
+        sequence = "ACGTACGTAC"
+        k = 3
+        size = 3
+
+    EXPECTED:
+
+        ["ACGTA", "TACGT", "GTAC"]
+
+    # =============================================================================
+    """
+    def test_simple(self):
+
+        result = list(sliceSequence("ACGTACGTAC", 3, 3))
+        expected = ["ACGTA", "TACGT", "GTAC"]
+
+        self.assertEquals(result, expected)
+
+    """ 
+    # =============================================================================
+
+    test_no_size
+
+    PURPOSE:
+        Tests that a sequence is not sliced when there is no piece size.
+
+    INPUT:
+
+        sequence = "ACGTACGTAC"
+        k = 3
+        size = None
+
+    EXPECTED:
+
+        ["ACGTACGTAC"]
+
+    # =============================================================================
+    """
+    def test_no_size(self):
+
+        result = list(sliceSequence("ACGTACGTAC", 3, None))
+
+        self.assertEquals(result, ["ACGTACGTAC"])
+
+""" 
+# =============================================================================
+
+MERGE RUNS
+
+# =============================================================================
+"""
+class TestMergeRuns(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_simple
+
+    PURPOSE:
+        Tests merging runs which share k-mers.
+
+    INPUT:
+
+        run 1: AAA 1, CCC 2
+        run 2: AAA 3, GGG 1
+
+    EXPECTED:
+
+        [("AAA", 4), ("CCC", 2), ("GGG", 1)]
+
+    # =============================================================================
+    """
+    def test_simple(self):
+
+        outputLocation = getPath("tests/output/count/merge.kmers")
+
+        runs = [
+            writeRun([("AAA", 1), ("CCC", 2)], outputLocation),
+            writeRun([("AAA", 3), ("GGG", 1)], outputLocation)]
+
+        result = list(mergeRuns(runs))
+        expected = [("AAA", 4), ("CCC", 2), ("GGG", 1)]
+
+        self.assertEquals(result, expected)
+
+        for run in runs:
+            os.remove(run)
+
+    """ 
+    # =============================================================================
+
+    test_presence
+
+    PURPOSE:
+        Tests merging runs of presence records which share k-mers.
+
+    INPUT:
+
+        run 1: AAA, CCC
+        run 2: AAA, GGG
+
+    EXPECTED:
+
+        [("AAA",), ("CCC",), ("GGG",)]
+
+    # =============================================================================
+    """
+    def test_presence(self):
+
+        outputLocation = getPath("tests/output/count/merge.kmers")
+
+        runs = [
+            writeRun([("AAA",), ("CCC",)], outputLocation, True),
+            writeRun([("AAA",), ("GGG",)], outputLocation, True)]
+
+        result = list(mergeRuns(runs, True))
+        expected = [("AAA",), ("CCC",), ("GGG",)]
+
+        self.assertEquals(result, expected)
+
+        for run in runs:
+            os.remove(run)
+
+    """ 
+    # =============================================================================
+
+    test_binary
+
+    PURPOSE:
+        Tests merging binary runs of encoded and ambiguous k-mers, in windows
+        smaller than the runs.
+
+    INPUT:
+
+        run 1: AAA 1, CCC 2, ANA 1
+        run 2: AAA 3, GGG 1, TTT 2, ANA 2, GGN 1
+
+        MERGE_BATCH_SIZE = 2
+
+    EXPECTED:
+
+        [("AAA", 4), ("ANA", 3), ("CCC", 2), ("GGG", 1), ("GGN", 1),
+            ("TTT", 2)]
+
+        The presence records are the same k-mers. Written with a minimum count
+        of 2, the binary file has only the k-mers with counts of at least 2.
+
+    # =============================================================================
+    """
+    def test_binary(self):
+
+        import neptune.CountKMers as CountKMers
+
+        outputLocation = getPath("tests/output/count/merge.kmers")
+
+        tables = [
+            ({encodeKMer("AAA"): 1, encodeKMer("CCC"): 2}, {"ANA": 1}),
+            ({encodeKMer("AAA"): 3, encodeKMer("GGG"): 1,
+                encodeKMer("TTT"): 2}, {"ANA": 2, "GGN": 1})]
+
+        expected = [
+            ("AAA", 4), ("ANA", 3), ("CCC", 2), ("GGG", 1), ("GGN", 1),
+            ("TTT", 2)]
+
+        size = CountKMers.MERGE_BATCH_SIZE
+        CountKMers.MERGE_BATCH_SIZE = 2
+
+        try:
+
+            for presence in [False, True]:
+
+                runs = [
+                    writeTableRun(
+                        tableKMers(kmers, ambiguous, 3), 3, outputLocation,
+                        presence)
+                    for kmers, ambiguous in tables]
+
+                result = list(mergeRuns(runs, presence))
+
+                if presence:
+                    self.assertEquals(
+                        result, [(kmer,) for kmer, count in expected])
+
+                else:
+                    self.assertEquals(result, expected)
+
+                    # merge into a binary file without the rare k-mers
+                    writeBinaryRuns(runs, outputLocation, 2)
+
+                    self.assertEquals(
+                        sorted(BinaryKMers.readRecords(outputLocation)),
+                        [item for item in expected if item[1] >= 2])
+
+                    os.remove(outputLocation)
+
+                for run in runs:
+                    os.remove(run)
+
+        finally:
+
+            CountKMers.MERGE_BATCH_SIZE = size
+
+""" 
+# =============================================================================
+
+COUNT SEQUENCE
+
+# =============================================================================
+"""
+class TestCountSequence(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_simple
+
+    PURPOSE:
+        Tests a simple use case of counting the k-mers in a sequence.
+
+    INPUT:
+
+        sequence = "ACGTACGTACGT"
+        k = 7
+
+    EXPECTED:
+
+        kmers:
+        ACGTACG 4
+        GTACGTA 2
+
+        ambiguous:
+        NONE
+
+    # =============================================================================
+    """
+    def test_simple(self):
+
+        kmers = {}
+        ambiguous = {}
+
+        countSequence("ACGTACGTACGT", 7, kmers, ambiguous)
+
+        expected = {encodeKMer("ACGTACG"): 4, encodeKMer("GTACGTA"): 2}
+        self.assertEquals(kmers, expected)
+        self.assertEquals(ambiguous, {})
+
+    """ 
+    # =============================================================================
+
+    test_ambiguous
+
+    PURPOSE:
+        Tests counting k-mers in a sequence containing a character other than A,
+        C, G, or T.
+
+    INPUT:
+
+        sequence = "ACGTNAC"
+        k = 3
+
+    EXPECTED:
+
+        kmers:
+        ACG 2
+
+        ambiguous:
+        GTN 2
+        TNA 1
+
+    # =============================================================================
+    """
+    def test_ambiguous(self):
+
+        kmers = {}
+        ambiguous = {}
+
+        countSequence("ACGTNAC", 3, kmers, ambiguous)
+
+        self.assertEquals(kmers, {encodeKMer("ACG"): 2})
+        self.assertEquals(ambiguous, {"GTN": 2, "TNA": 1})
+
+""" 
+# =============================================================================
+
+COUNT SEQUENCE VECTORIZED
+
+# =============================================================================
+"""
+class TestCountSequenceVectorized(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_simple
+
+    PURPOSE:
+        Tests computing the canonical k-mer codes of a sequence.
+
+    INPUT:
+
+        sequence = "ACGTACGTACGT"
+        k = 7
+
+    EXPECTED:
+
+        codes:
+        ACGTACG x4
+        GTACGTA x2
+
+    # =============================================================================
+    """
+    def test_simple(self):
+
+        ambiguous = {}
+
+        codes = countSequenceVectorized("ACGTACGTACGT", 7, ambiguous)
+
+        expected = sorted(
+            [encodeKMer("ACGTACG")] * 4 + [encodeKMer("GTACGTA")] * 2)
+        self.assertEquals(sorted(codes.tolist()), expected)
+        self.assertEquals(ambiguous, {})
+
+    """ 
+    # =============================================================================
+
+    test_ambiguous
+
+    PURPOSE:
+        Tests that windows containing characters other than A, C, G, or T are
+        masked and counted by their sequence.
+
+    INPUT:
+
+        sequence = "ACGTNAC"
+        k = 3
+
+    EXPECTED:
+
+        codes:
+        ACG x2
+
+        ambiguous:
+        GTN 2
+        TNA 1
+
+    # =============================================================================
+    """
+    def test_ambiguous(self):
+
+        ambiguous = {}
+
+        codes = countSequenceVectorized("ACGTNAC", 3, ambiguous)
+
+        self.assertEquals(codes.tolist(), [encodeKMer("ACG")] * 2)
+        self.assertEquals(ambiguous, {"GTN": 2, "TNA": 1})
+
+    """ 
+    # =============================================================================
+
+    test_short
+
+    PURPOSE:
+        Tests a sequence shorter than k.
+
+    INPUT:
+
+        sequence = "ACG"
+        k = 5
+
+    EXPECTED:
+
+        codes:
+        NONE
+
+    # =============================================================================
+    """
+    def test_short(self):
+
+        ambiguous = {}
+
+        codes = countSequenceVectorized("ACG", 5, ambiguous)
+
+        self.assertEquals(len(codes), 0)
+        self.assertEquals(ambiguous, {})
+
+""" 
+# =============================================================================
+
+SORT TABLE
+
+# =============================================================================
+"""
+class TestSortTable(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_simple
+
+    PURPOSE:
+        Tests sorting encoded and ambiguous k-mers together.
+
+    INPUT:
+
+        kmers:
+        AAC 1
+        GTA 2
+
+        ambiguous:
+        GTN 2
+        ANA 1
+
+    EXPECTED:
+
+        AAC 1
+        ANA 1
+        GTA 2
+        GTN 2
+
+    # =============================================================================
+    """
+    def test_simple(self):
+
+        kmers = {encodeKMer("GTA"): 2, encodeKMer("AAC"): 1}
+        ambiguous = {"GTN": 2, "ANA": 1}
+
+        result = list(sortTable(tableKMers(kmers, ambiguous, 3), 3))
+        expected = [("AAC", 1), ("ANA", 1), ("GTA", 2), ("GTN", 2)]
+
+        self.assertEquals(result, expected)
+
 """ 
 # =============================================================================
 
@@ -281,6 +1888,161 @@ class TestMain(unittest.TestCase):
     """ 
     # =============================================================================
 
+    test_splitters
+
+    PURPOSE:
+        Tests the main function with a splitters file.
+
+    INPUT:
+
+        input: "tests/data/count/count1.fasta"
+
+        k = 7
+
+        splitters = ["CGTACGT"]
+
+    EXPECTED:
+
+        count1.kmers.0:
+        ACGTACG 4
+
+        count1.kmers.1:
+        GTACGTA 2
+
+    # =============================================================================
+    """
+    """ 
+    # =============================================================================
+
+    test_workers
+
+    PURPOSE:
+        Tests the main function with several workers.
+
+    INPUT:
+
+        input: "tests/data/count/count1.fasta"
+
+        k = 7
+
+        workers = 3
+
+    EXPECTED:
+
+        count1.kmers:
+        ACGTACG 4
+        GTACGTA 2
+
+    # =============================================================================
+    """
+    def test_workers(self):
+
+        outputLocation = getPath("tests/output/count/count1.kmers")
+
+        sys.argv[1:] = ["-i", "tests/data/count/count1.fasta", "-o", outputLocation, KMER_LONG, "7", WORKERS_LONG, "3"]
+        main()
+
+        with open (outputLocation, "r") as myfile:
+
+            result = myfile.read()
+            expected = "ACGTACG 4\nGTACGTA 2\n"
+            self.assertEquals(result, expected)
+
+        os.remove(outputLocation)
+
+    """ 
+    # =============================================================================
+
+    test_min_count
+
+    PURPOSE:
+        Tests the main function with FASTQ input and a minimum count.
+
+    INPUT:
+
+        input: "tests/data/count/reads.fastq"
+
+        k = 5
+
+        min-count = 3
+
+    EXPECTED:
+
+        reads.kmers:
+        ACGTA 6
+        CGTAC 6
+
+    # =============================================================================
+    """
+    def test_min_count(self):
+
+        outputLocation = getPath("tests/output/count/reads.kmers")
+
+        sys.argv[1:] = ["-i", "tests/data/count/reads.fastq", "-o", outputLocation, KMER_LONG, "5", ENGINE_LONG, ENGINE_NUMPY, MIN_COUNT_LONG, "3"]
+        main()
+
+        with open(outputLocation, "r") as myfile:
+            self.assertEquals(myfile.read(), "ACGTA 6\nCGTAC 6\n")
+
+        os.remove(outputLocation)
+
+    """ 
+    # =============================================================================
+
+    test_presence
+
+    PURPOSE:
+        Tests the main function recording only the presence of k-mers.
+
+    INPUT:
+
+        input: "tests/data/count/reads.fastq"
+
+        k = 5
+
+        presence
+
+    EXPECTED:
+
+        reads.kmers: the k-mers of reads.fastq, without counts
+
+    # =============================================================================
+    """
+    def test_presence(self):
+
+        outputLocation = getPath("tests/output/count/reads.kmers")
+
+        sys.argv[1:] = ["-i", "tests/data/count/reads.fastq", "-o", outputLocation, KMER_LONG, "5", PRESENCE_LONG]
+        main()
+
+        with open(outputLocation, "r") as myfile:
+            self.assertEquals(myfile.read(),
+                "ACGTA\nCCCCN\nCCCNC\nCCNCC\nCGTAC\nCNCCC\nGGGGN\n")
+
+        os.remove(outputLocation)
+
+    def test_splitters(self):
+
+        outputLocation = getPath("tests/output/count/count1.kmers")
+        splittersLocation = getPath("tests/output/count/splitters.kmers")
+
+        writeSplitters(["CGTACGT"], splittersLocation)
+
+        sys.argv[1:] = ["-i", "tests/data/count/count1.fasta", "-o", outputLocation, KMER_LONG, "7", ORGANIZATION_LONG, "1", SPLITTERS_LONG, splittersLocation]
+        main()
+
+        with open(outputLocation + ".0", "r") as myfile:
+            self.assertEquals(myfile.read(), "ACGTACG 4\n")
+
+        with open(outputLocation + ".1", "r") as myfile:
+            self.assertEquals(myfile.read(), "GTACGTA 2\n")
+
+        for location in [outputLocation + ".0", outputLocation + ".1", splittersLocation]:
+            os.remove(location)
+
+    """ 
+    # =============================================================================
+
     test_simple
 
     PURPOSE:
@@ -324,6 +2086,84 @@ class TestMain(unittest.TestCase):
     """ 
     # =============================================================================
 
+    test_engine
+
+    PURPOSE:
+        Tests the main function with the NumPy engine.
+
+    INPUT:
+
+        input: "tests/data/count/count1.fasta"
+
+        k = 7
+
+        engine = numpy
+
+    EXPECTED:
+
+        count1.kmers:
+        ACGTACG 4
+        GTACGTA 2
+
+    # =============================================================================
+    """
+    def test_engine(self):
+
+        outputLocation = getPath("tests/output/count/count1.kmers")
+
+        sys.argv[1:] = ["-i", "tests/data/count/count1.fasta", "-o", outputLocation, KMER_LONG, "7", ENGINE_LONG, ENGINE_NUMPY]
+        main()
+
+        with open (outputLocation, "r") as myfile:
+
+            result = myfile.read()
+            expected = "ACGTACG 4\nGTACGTA 2\n"
+            self.assertEquals(result, expected)
+
+        os.remove(outputLocation)
+
+    """ 
+    # =============================================================================
+
+    test_memory_limit
+
+    PURPOSE:
+        Tests the main function with a memory limit.
+
+    INPUT:
+
+        input: "tests/data/count/count1.fasta"
+
+        k = 7
+
+        memory-limit = 1
+
+    EXPECTED:
+
+        count1.kmers:
+        ACGTACG 4
+        GTACGTA 2
+
+    # =============================================================================
+    """
+    def test_memory_limit(self):
+
+        outputLocation = getPath("tests/output/count/count1.kmers")
+
+        sys.argv[1:] = ["-i", "tests/data/count/count1.fasta", "-o", outputLocation, KMER_LONG, "7", MEMORY_LIMIT_LONG, "1"]
+        main()
+
+        with open (outputLocation, "r") as myfile:
+
+            result = myfile.read()
+            expected = "ACGTACG 4\nGTACGTA 2\n"
+            self.assertEquals(result, expected)
+
+        os.remove(outputLocation)
+
+    """ 
+    # =============================================================================
+
     test_missing_input
 
     PURPOSE:
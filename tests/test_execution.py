@@ -752,6 +752,87 @@ class EstimateKMerSize(unittest.TestCase):
             execution = Execution(jobManager, parameters)
             execution.estimateKMerSize()
 
+""" 
+# =============================================================================
+
+ESTIMATE AGGREGATE HITS
+
+# =============================================================================
+"""
+class EstimateAggregateHits(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_specified
+
+    PURPOSE:
+        Tests resolving the hit thresholds when they are specified.
+
+    INPUT:
+
+        inhits = 1
+        exhits = 2
+
+    EXPECTED:
+        aggregateInhits = 1
+        aggregateExhits = 2
+
+    # =============================================================================
+    """
+    def test_specified(self):
+
+        jobManager = buildParallelJobManager()
+
+        parameters = DefaultArgs().parameters
+
+        execution = Execution(jobManager, parameters)
+        execution.estimateAggregateHits()
+
+        self.assertEquals(execution.aggregateInhits, 1)
+        self.assertEquals(execution.aggregateExhits, 2)
+
+    """ 
+    # =============================================================================
+
+    test_estimated
+
+    PURPOSE:
+        Tests estimating the hit thresholds from the GC-content of the
+        reference, as extraction does.
+
+    INPUT:
+
+        inhits = None
+        exhits = None
+        GC = None
+
+    EXPECTED:
+        The thresholds estimated by extraction for the reference.
+
+    # =============================================================================
+    """
+    def test_estimated(self):
+
+        jobManager = buildParallelJobManager()
+
+        parameters = DefaultArgs().parameters
+        parameters[ExtractSignatures.INHITS] = None
+        parameters[ExtractSignatures.EXHITS] = None
+        parameters[ExtractSignatures.GC_CONTENT] = None
+
+        execution = Execution(jobManager, parameters)
+        execution.estimateAggregateHits()
+
+        referenceFile = Utility.openInput(getPath("tests/data/execution/simple.fasta"))
+        GC = Utility.estimateReferenceParameters(Utility.readFASTA(referenceFile))[1]
+        referenceFile.close()
+
+        self.assertEquals(execution.aggregateInhits,
+            ExtractSignatures.estimateInclusionHits(1, 0.01, GC, 5, 0.95))
+        self.assertEquals(execution.aggregateExhits,
+            ExtractSignatures.estimateExclusionHits(1, 0.01, 5))
+
 if __name__ == '__main__':
     
     unittest.main()
@@ -1048,6 +1048,177 @@ class TestExtract(unittest.TestCase):
 """
 # =============================================================================
 
+BUILD REGIONS
+
+# =============================================================================
+"""
+
+# The per-position region building that buildRegions(...) replaces.
+def loopRegions(excluded, included, k, size, gap):
+
+    regions = []
+
+    start = -1
+    end = -1
+
+    for i in range(len(excluded)):
+
+        if excluded[i]:
+
+            if (end - start) >= size:
+                regions.append((start, end))
+
+            start = -1
+            end = -1
+
+        elif included[i]:
+
+            if start < 0 and end < 0:
+                start = i + k - 1
+                end = i + 1
+
+            if (i - (end + 1)) <= gap:
+                end = i + 1
+
+            else:
+                if (end - start) >= size:
+                    regions.append((start, end))
+
+                start = i + k - 1
+                end = i + 1
+
+    if start >= 0 and end > 0 and (end - start) >= size:
+        regions.append((start, end))
+
+    return regions
+
+class TestBuildRegions(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_simple
+
+    PURPOSE:
+        Tests building regions from chains of inclusion k-mers.
+
+    INPUT:
+        0:
+
+        included: positions 0-3, 6, 12-14, 16-17
+        excluded: position 15
+
+        k = 3, size = 2, gap = 2
+
+    EXPECTED:
+        0: (2, 7), (14, 15) is too small, (18, 18) is too small
+
+    # =============================================================================
+    """
+    def test_simple(self):
+
+        import numpy
+
+        included = numpy.zeros(18, dtype=bool)
+        included[[0, 1, 2, 3, 6, 12, 13, 14, 16, 17]] = True
+
+        excluded = numpy.zeros(18, dtype=bool)
+        excluded[15] = True
+
+        self.assertEquals(buildRegions(excluded, included, 3, 2, 2), [(2, 7)])
+        self.assertEquals(buildRegions(excluded, included, 3, 1, 2), [(2, 7), (14, 15)])
+        self.assertEquals(buildRegions(excluded, numpy.zeros(18, dtype=bool), 3, 1, 2), [])
+
+    """ 
+    # =============================================================================
+
+    test_extract_cases
+
+    PURPOSE:
+        Tests that the regions built from the references and k-mers of the
+        extraction tests match those of the per-position region building.
+
+    INPUT:
+        0: trivial
+        1: small gap
+        2: large gap
+        3: start
+        4: end
+        5: no signature
+
+    EXPECTED:
+        0-5: buildRegions(...) == loopRegions(...)
+
+    # =============================================================================
+    """
+    def test_extract_cases(self):
+
+        kmers = ["AAA", "AAC", "ACC", "CAA", "CCA"]
+
+        cases = [
+            ("CCCCCAAAAACCCCC", kmers, ["CCC"]),
+            ("CCCCCAAAAATAAAAACCCCC", kmers, ["CCC"]),
+            ("CCCCCAAAAATATATATAAAAACCCCC", kmers, ["CCC"]),
+            ("AAAAACCCCC", kmers, ["CCC"]),
+            ("CCCCCAAAAA", kmers, ["CCC"]),
+            ("CCCCCAACCCCC", ["AAA"], ["CCC", "CCA", "CAA", "AAC", "ACC"])]
+
+        k = 3
+
+        for reference, inkmers, exkmers in cases:
+
+            inmers = buildKMerTable(inkmers, k)
+            exmers = buildKMerTable(exkmers, k)
+
+            excluded, included = findKMers(
+                reference, k, len(reference) - k + 1, inmers, exmers)
+
+            for size, gap in [(2, 4), (1, 1), (3, 2), (5, 8)]:
+
+                self.assertEquals(
+                    buildRegions(excluded, included, k, size, gap),
+                    loopRegions(excluded, included, k, size, gap))
+
+    """ 
+    # =============================================================================
+
+    test_random
+
+    PURPOSE:
+        Tests that the regions built from random inclusion and exclusion
+        k-mers match those of the per-position region building.
+
+    INPUT:
+        0: 200 random sets of k-mers positions, sizes, and gaps
+
+    EXPECTED:
+        0: buildRegions(...) == loopRegions(...)
+
+    # =============================================================================
+    """
+    def test_random(self):
+
+        import numpy
+
+        generator = numpy.random.RandomState(1)
+
+        for trial in range(200):
+
+            n = generator.randint(0, 200)
+            excluded = generator.random_sample(n) < generator.random_sample() * 0.2
+            included = generator.random_sample(n) < generator.random_sample()
+
+            k = generator.randint(1, 12)
+            size = generator.randint(1, 20)
+            gap = generator.randint(1, 10)
+
+            self.assertEquals(
+                buildRegions(excluded, included, k, size, gap),
+                loopRegions(excluded, included, k, size, gap))
+
+"""
+# =============================================================================
+
 ESTIMATE SIGNATURE SIZE
 
 # =============================================================================
@@ -1462,46 +1633,125 @@ class TestBuildKMers(unittest.TestCase):
 """
 # =============================================================================
 
-REPORT PARAMETERS
+BUILD K-MER TABLES
 
 # =============================================================================
 """
-class TestReportParameters(unittest.TestCase):
+class TestBuildKMerTables(unittest.TestCase):
 
     """ 
     # =============================================================================
 
-    test_run
+    test_mixed
 
     PURPOSE:
-        Tests the report function causes no errors. This test does not contain
-        asserts because of the verbosity of the output.
+        Tests building the k-mer tables from a partitioned aggregated k-mer
+        file with both binary and text partitions.
 
     INPUT:
         0: 
 
+        A (binary): AAA 3 4, ACA 4 3
+        C (text): CAA 3 4, CCA 3 3, CNA 5 0
+
+        inhits = 4, exhits = 4
+
     EXPECTED:
-        0: [NO CRASH]
+        0: 
+
+        inmers: ACA CNA
+        exmers: AAA CAA
 
     # =============================================================================
     """
-    def test_run(self):
+    def test_mixed(self):
 
-        buff = StringIO.StringIO()
+        import neptune.BinaryKMers as BinaryKMers
 
-        reportParameters(buff, "A.fasta", 12, 0.01, 
-		    3, 3, 2, 2, 3, "some.kmers", 5, 6, 0.5)
+        locations = [
+            getPath("tests/output/extract/kmers.bin.A"),
+            getPath("tests/output/extract/kmers.bin.C")]
 
-        buff.close()
+        BinaryKMers.write([("AAA", 3, 4), ("ACA", 4, 3)], locations[0], 2)
+
+        with open(locations[1], "w") as kmerFile:
+            kmerFile.write("CAA 3 4\nCCA 3 3\nCNA 5 0\n")
+
+        inmers, exmers = buildKMerTables(locations, 3, 4, 4)
+
+        self.assertTrue(isinstance(inmers, KMerTable))
+        self.assertTrue(isinstance(exmers, KMerTable))
+
+        queries = ["AAA", "ACA", "CAA", "CCA", "CNA", "TGT", "TTG", "NNN"]
+
+        self.assertEquals([query for query in queries if query in inmers], ["ACA", "CNA", "TGT"])
+        self.assertEquals([query for query in queries if query in exmers], ["AAA", "CAA", "TTG"])
+
+        self.assertEquals(len(inmers), 2)
+        self.assertEquals(len(exmers), 2)
+
+        for location in locations:
+            os.remove(location)
+
+    """ 
+    # =============================================================================
+
+    test_reference
+
+    PURPOSE:
+        Tests building the k-mer tables with only the aggregated k-mers of a
+        reference, in either orientation.
+
+    INPUT:
+        0: 
+
+        A (binary): AAA 3 4, ACA 4 3
+        C (text): CAA 3 4, CCA 3 3, CNA 5 0
+
+        reference: TGTTGG
+
+        inhits = 3, exhits = 3
+
+    EXPECTED:
+        0: 
+
+        inmers: ACA CAA CCA
+        exmers: ACA CAA CCA
+
+    # =============================================================================
+    """
+    def test_reference(self):
+
+        import neptune.BinaryKMers as BinaryKMers
+
+        locations = [
+            getPath("tests/output/extract/kmers.bin.A"),
+            getPath("tests/output/extract/kmers.bin.C")]
+
+        BinaryKMers.write([("AAA", 3, 4), ("ACA", 4, 3)], locations[0], 2)
+
+        with open(locations[1], "w") as kmerFile:
+            kmerFile.write("CAA 3 4\nCCA 3 3\nCNA 5 0\n")
+
+        reference = findReferenceKMers([("0", "TGTTGG")], 3)
+        inmers, exmers = buildKMerTables(locations, 3, 3, 3, reference)
+
+        queries = ["AAA", "ACA", "CAA", "CCA", "CNA"]
+
+        self.assertEquals([query for query in queries if query in inmers], ["ACA", "CAA", "CCA"])
+        self.assertEquals([query for query in queries if query in exmers], ["ACA", "CAA", "CCA"])
+
+        for location in locations:
+            os.remove(location)
 
 """
 # =============================================================================
 
-MAIN
+FIND REFERENCE K-MERS
 
 # =============================================================================
 """
-class TestMain(unittest.TestCase):
+class TestFindReferenceKMers(unittest.TestCase):
 
     """ 
     # =============================================================================
@@ -1509,53 +1759,695 @@ class TestMain(unittest.TestCase):
     test_simple
 
     PURPOSE:
-        Tests a simple example.
+        Tests finding the k-mers of references, including k-mers which cannot
+        be encoded.
 
     INPUT:
-        0:
+        0: k = 3
 
-        simple.fasta:
-        >0
-        ACGTACGTACGT
+        references:
+        ACGTN
+        TTT
 
-        alternative.fasta:
-        >0
-        ATATATATATAT
+    EXPECTED:
+        0: ACG CGT TTT AAA GTN NAC
 
-        simple.kmers:
-        ACGTA 4 0
-        CGTAC 4 0
+    # =============================================================================
+    """
+    def test_simple(self):
+
+        kmers = findReferenceKMers([("0", "ACGTN"), ("1", "TTT")], 3)
+
+        queries = ["ACG", "CGT", "TTT", "AAA", "GTN", "NAC", "GTA", "NNN"]
+
+        self.assertEquals(
+            [query for query in queries if query in kmers],
+            ["ACG", "CGT", "TTT", "AAA", "GTN", "NAC"])
+
+    """ 
+    # =============================================================================
+
+    test_large
+
+    PURPOSE:
+        Tests finding the k-mers of a reference when the k-mers are too large
+        to be encoded.
+
+    INPUT:
+        0: k = 33
+
+        reference: A * 33 + C
 
     EXPECTED:
-        0:
+        0: A * 33, A * 32 + C, and their reverse complements
 
-        >0 score=0.0000 in=0.0000 ex=0.0000 len=4 ref=0 pos=4
-        ACGT
+    # =============================================================================
+    """
+    def test_large(self):
+
+        kmers = findReferenceKMers([("0", "A" * 33 + "C")], 33)
+
+        self.assertEquals(
+            kmers, set(["A" * 33, "T" * 33, "A" * 32 + "C", "G" + "T" * 32]))
+
+"""
+# =============================================================================
+
+K-MER TABLE
+
+# =============================================================================
+"""
+class TestKMerTable(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_contains
+
+    PURPOSE:
+        Tests that the encoded k-mers of a reference are found in a k-mer
+        table in either orientation, including when the table holds k-mers
+        which are not canonical.
+
+    INPUT:
+        0: 
+
+        table: ACG, TTT, GGA, NAC
+
+        reference: AAACGTCCNA
+
+    EXPECTED:
+        0: 
+
+        AAA: yes (reverse of TTT)
+        AAC: no
+        ACG: yes
+        CGT: yes (reverse of ACG)
+        GTC: no
+        TCC: yes (reverse of GGA)
+        CCN: no
+        CNA: no
 
     # =============================================================================
     """
-    def test_simple(self):
+    def test_contains(self):
 
-        outputLocation = getPath("tests/output/extract/temp.out")
+        table = buildKMerTable(["ACG", "TTT", "GGA", "NAC"], 3)
 
-        sys.argv[1:] = [
-            REFERENCE_LONG, "tests/data/extract/simple.fasta",
-            INCLUSION_LONG, "tests/data/extract/simple.fasta",
-            EXCLUSION_LONG, "tests/data/extract/alternative.fasta",
-            KMERS_LONG, "tests/data/extract/simple.kmers",
-            SIZE_LONG, "4",
-            OUTPUT_LONG, outputLocation
-            ]
+        forward, reverse, masked = Utility.encodeWindows("AAACGTCCNA", 3)
+        found = table.contains(forward, reverse)
 
-        main()
+        self.assertEquals(
+            found[~masked].tolist(), [True, False, True, True, False, True])
+        self.assertEquals(masked.tolist(), [False] * 6 + [True, True])
 
-        with open (outputLocation, "r") as myfile:
+        self.assertTrue("NAC" in table)
+        self.assertTrue("TCC" in table)
+        self.assertFalse("GTN" in table)
+        self.assertEquals(len(table), 4)
 
-            result = myfile.read()
-            expected = ">0 score=0.0000 in=0.0000 ex=0.0000 len=4 ref=0 pos=4\nACGT\n"
-            self.assertEquals(result, expected)
+    """ 
+    # =============================================================================
 
-        os.remove(outputLocation)
+    test_empty
+
+    PURPOSE:
+        Tests that nothing is found in an empty k-mer table.
+
+    INPUT:
+        0: 
+
+        table: (empty)
+
+        reference: ACGTA
+
+    EXPECTED:
+        0: 
+
+        nothing found
+
+    # =============================================================================
+    """
+    def test_empty(self):
+
+        table = buildKMerTable({}, 3)
+
+        forward, reverse, masked = Utility.encodeWindows("ACGTA", 3)
+
+        self.assertEquals(table.contains(forward, reverse).tolist(), [False] * 3)
+        self.assertEquals(len(table), 0)
+
+"""
+# =============================================================================
+
+INDEXED K-MERS
+
+# =============================================================================
+"""
+class TestIndexedKMers(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_simple
+
+    PURPOSE:
+        Tests that the indexed k-mers of a partitioned binary aggregated k-mer
+        file contain the same k-mers as the dictionaries built from it.
+
+    INPUT:
+        0: 
+
+        A: AAA 3 4, ACA 4 3
+        C: CAA 3 4, CCA 3 3, CNA 5 0
+        G: (empty)
+
+        inhits = 4, exhits = 4
+
+    EXPECTED:
+        0: 
+
+        inmers: ACA CNA
+        exmers: AAA CAA
+
+    # =============================================================================
+    """
+    def test_simple(self):
+
+        import neptune.BinaryKMers as BinaryKMers
+
+        locations = [
+            getPath("tests/output/extract/kmers.bin.A"),
+            getPath("tests/output/extract/kmers.bin.C"),
+            getPath("tests/output/extract/kmers.bin.G")]
+
+        BinaryKMers.write([("AAA", 3, 4), ("ACA", 4, 3)], locations[0], 2)
+        BinaryKMers.write([("CAA", 3, 4), ("CCA", 3, 3), ("CNA", 5, 0)], locations[1], 2)
+        BinaryKMers.write([], locations[2], 2)
+
+        partitions = [BinaryKMers.KMers(location) for location in locations]
+
+        inmers = IndexedKMers(partitions, 0, 4)
+        exmers = IndexedKMers(partitions, 1, 4)
+
+        queries = ["AAA", "ACA", "CAA", "CCA", "CNA", "AAC", "TTT", "NNN", "acA"]
+
+        self.assertEquals([query for query in queries if query in inmers], ["ACA", "CNA"])
+        self.assertEquals([query for query in queries if query in exmers], ["AAA", "CAA"])
+
+        self.assertEquals(len(inmers), 2)
+        self.assertEquals(len(exmers), 2)
+
+        forward, reverse, masked = Utility.encodeWindows("AAACAATTGT", 3)
+
+        # AAA AAC ACA CAA AAT ATT TTG TGT
+        self.assertEquals(
+            inmers.contains(forward, reverse).tolist(),
+            [False, False, True, False, False, False, False, True])
+        self.assertEquals(
+            exmers.contains(forward, reverse).tolist(),
+            [True, False, False, True, False, False, True, False])
+
+        del partitions, inmers, exmers
+
+        for location in locations:
+            os.remove(location)
+
+"""
+# =============================================================================
+
+REPORT PARAMETERS
+
+# =============================================================================
+"""
+class TestReportParameters(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_run
+
+    PURPOSE:
+        Tests the report function causes no errors. This test does not contain
+        asserts because of the verbosity of the output.
+
+    INPUT:
+        0: 
+
+    EXPECTED:
+        0: [NO CRASH]
+
+    # =============================================================================
+    """
+    def test_run(self):
+
+        buff = StringIO.StringIO()
+
+        reportParameters(buff, "A.fasta", 12, 0.01, 
+		    3, 3, 2, 2, 3, "some.kmers", 5, 6, 0.5)
+
+        buff.close()
+
+    """ 
+    # =============================================================================
+
+    test_statistics
+
+    PURPOSE:
+        Tests that the report includes the number of k-mers kept by the hit
+        thresholds when the statistics of the aggregated k-mers are given.
+
+    INPUT:
+        0: {(1, 0): 2, (2, 1): 1, (0, 3): 1}, inhits = 2, exhits = 2
+
+    EXPECTED:
+        0: 1 inclusion k-mer, 1 exclusion k-mer, and 4 aggregated k-mers
+
+    # =============================================================================
+    """
+    def test_statistics(self):
+
+        buff = StringIO.StringIO()
+
+        reportParameters(buff, "A.fasta", 12, 0.01,
+            3, 3, 2, 2, 3, "some.kmers", 5, 6, 0.5, {(1, 0): 2, (2, 1): 1, (0, 3): 1})
+
+        result = buff.getvalue()
+
+        self.assertTrue("Inclusion k-mers Kept = 1\n" in result)
+        self.assertTrue("Exclusion k-mers Kept = 1\n" in result)
+        self.assertTrue("Aggregated k-mers = 4\n" in result)
+
+        buff.close()
+
+"""
+# =============================================================================
+
+MAIN
+
+# =============================================================================
+"""
+class TestMain(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_simple
+
+    PURPOSE:
+        Tests a simple example.
+
+    INPUT:
+        0:
+
+        simple.fasta:
+        >0
+        ACGTACGTACGT
+
+        alternative.fasta:
+        >0
+        ATATATATATAT
+
+        simple.kmers:
+        ACGTA 4 0
+        CGTAC 4 0
+
+    EXPECTED:
+        0:
+
+        >0 score=0.0000 in=0.0000 ex=0.0000 len=4 ref=0 pos=4
+        ACGT
+
+    # =============================================================================
+    """
+    def test_simple(self):
+
+        outputLocation = getPath("tests/output/extract/temp.out")
+
+        sys.argv[1:] = [
+            REFERENCE_LONG, "tests/data/extract/simple.fasta",
+            INCLUSION_LONG, "tests/data/extract/simple.fasta",
+            EXCLUSION_LONG, "tests/data/extract/alternative.fasta",
+            KMERS_LONG, "tests/data/extract/simple.kmers",
+            SIZE_LONG, "4",
+            OUTPUT_LONG, outputLocation
+            ]
+
+        main()
+
+        with open (outputLocation, "r") as myfile:
+
+            result = myfile.read()
+            expected = ">0 score=0.0000 in=0.0000 ex=0.0000 len=4 ref=0 pos=4\nACGT\n"
+            self.assertEquals(result, expected)
+
+        os.remove(outputLocation)
+
+    """ 
+    # =============================================================================
+
+    test_partitioned
+
+    PURPOSE:
+        Tests extracting with a partitioned aggregated k-mer file, where the
+        first partition is empty.
+
+    INPUT:
+        0:
+
+        simple.fasta:
+        >0
+        ACGTACGTACGT
+
+        alternative.fasta:
+        >0
+        ATATATATATAT
+
+        partitions:
+        (empty)
+        ACGTA 4 0
+        CGTAC 4 0 (binary)
+
+    EXPECTED:
+        0:
+
+        >0 score=0.0000 in=0.0000 ex=0.0000 len=4 ref=0 pos=4
+        ACGT
+
+    # =============================================================================
+    """
+    def test_partitioned(self):
+
+        outputLocation = getPath("tests/output/extract/temp.out")
+        manifestLocation = getPath("tests/output/extract/temp.kmers")
+        partitionLocations = [
+            getPath("tests/output/extract/temp.kmers.0"),
+            getPath("tests/output/extract/temp.kmers.1"),
+            getPath("tests/output/extract/temp.kmers.2")]
+
+        open(partitionLocations[0], "w").close()
+
+        with open(partitionLocations[1], "w") as partitionFile:
+            partitionFile.write("ACGTA 4 0\n")
+
+        BinaryKMers.write([("CGTAC", 4, 0)], partitionLocations[2], 2)
+        BinaryKMers.writeManifest(manifestLocation, partitionLocations)
+
+        sys.argv[1:] = [
+            REFERENCE_LONG, "tests/data/extract/simple.fasta",
+            INCLUSION_LONG, "tests/data/extract/simple.fasta",
+            EXCLUSION_LONG, "tests/data/extract/alternative.fasta",
+            KMERS_LONG, manifestLocation,
+            SIZE_LONG, "4",
+            OUTPUT_LONG, outputLocation
+            ]
+
+        main()
+
+        with open (outputLocation, "r") as myfile:
+
+            result = myfile.read()
+            expected = ">0 score=0.0000 in=0.0000 ex=0.0000 len=4 ref=0 pos=4\nACGT\n"
+            self.assertEquals(result, expected)
+
+        for location in partitionLocations + [manifestLocation, outputLocation]:
+            os.remove(location)
+
+    """ 
+    # =============================================================================
+
+    test_binary
+
+    PURPOSE:
+        Tests extracting with a binary aggregated k-mer file, which is searched
+        in place.
+
+    INPUT:
+        0:
+
+        simple.fasta:
+        >0
+        ACGTACGTACGT
+
+        alternative.fasta:
+        >0
+        ATATATATATAT
+
+        simple.kmers, in the binary format:
+        ACGTA 4 0
+        CGTAC 4 0
+
+    EXPECTED:
+        0:
+
+        >0 score=0.0000 in=0.0000 ex=0.0000 len=4 ref=0 pos=4
+        ACGT
+
+    # =============================================================================
+    """
+    def test_binary(self):
+
+        outputLocation = getPath("tests/output/extract/temp.out")
+        kmerLocation = getPath("tests/output/extract/temp.bin")
+
+        BinaryKMers.convert("tests/data/extract/simple.kmers", kmerLocation, BinaryKMers.FORMAT_BINARY)
+
+        sys.argv[1:] = [
+            REFERENCE_LONG, "tests/data/extract/simple.fasta",
+            INCLUSION_LONG, "tests/data/extract/simple.fasta",
+            EXCLUSION_LONG, "tests/data/extract/alternative.fasta",
+            KMERS_LONG, kmerLocation,
+            SIZE_LONG, "4",
+            OUTPUT_LONG, outputLocation
+            ]
+
+        main()
+
+        with open (outputLocation, "r") as myfile:
+
+            result = myfile.read()
+            expected = ">0 score=0.0000 in=0.0000 ex=0.0000 len=4 ref=0 pos=4\nACGT\n"
+            self.assertEquals(result, expected)
+
+        os.remove(kmerLocation)
+        os.remove(outputLocation)
+
+    """ 
+    # =============================================================================
+
+    test_intersect
+
+    PURPOSE:
+        Tests extracting with only the aggregated k-mers which occur in the
+        reference, from both text and binary aggregated k-mer files.
+
+    INPUT:
+        0: simple.kmers, text
+        1: simple.kmers, binary
+
+        simple.fasta:
+        >0
+        ACGTACGTACGT
+
+        alternative.fasta:
+        >0
+        ATATATATATAT
+
+        simple.kmers:
+        ACGTA 4 0
+        CGTAC 4 0
+
+    EXPECTED:
+        0-1:
+
+        >0 score=0.0000 in=0.0000 ex=0.0000 len=4 ref=0 pos=4
+        ACGT
+
+    # =============================================================================
+    """
+    def test_intersect(self):
+
+        outputLocation = getPath("tests/output/extract/temp.out")
+        kmerLocation = getPath("tests/output/extract/temp.bin")
+
+        BinaryKMers.convert("tests/data/extract/simple.kmers", kmerLocation, BinaryKMers.FORMAT_BINARY)
+
+        for location in ["tests/data/extract/simple.kmers", kmerLocation]:
+
+            sys.argv[1:] = [
+                REFERENCE_LONG, "tests/data/extract/simple.fasta",
+                INCLUSION_LONG, "tests/data/extract/simple.fasta",
+                EXCLUSION_LONG, "tests/data/extract/alternative.fasta",
+                KMERS_LONG, location,
+                SIZE_LONG, "4",
+                INTERSECT_LONG,
+                OUTPUT_LONG, outputLocation
+                ]
+
+            main()
+
+            with open (outputLocation, "r") as myfile:
+
+                result = myfile.read()
+                expected = ">0 score=0.0000 in=0.0000 ex=0.0000 len=4 ref=0 pos=4\nACGT\n"
+                self.assertEquals(result, expected)
+
+        os.remove(kmerLocation)
+        os.remove(outputLocation)
+
+    """ 
+    # =============================================================================
+
+    test_intersect_empty
+
+    PURPOSE:
+        Tests extracting with only the aggregated k-mers which occur in the
+        reference, when the reference has no inclusion k-mers.
+
+    INPUT:
+        0:
+
+        alternative.fasta:
+        >0
+        ATATATATATAT
+
+        simple.kmers:
+        ACGTA 4 0
+        CGTAC 4 0
+
+    EXPECTED:
+        0: no candidates
+
+    # =============================================================================
+    """
+    def test_intersect_empty(self):
+
+        outputLocation = getPath("tests/output/extract/temp.out")
+
+        sys.argv[1:] = [
+            REFERENCE_LONG, "tests/data/extract/alternative.fasta",
+            INCLUSION_LONG, "tests/data/extract/simple.fasta",
+            EXCLUSION_LONG, "tests/data/extract/alternative.fasta",
+            KMERS_LONG, "tests/data/extract/simple.kmers",
+            SIZE_LONG, "4",
+            INTERSECT_LONG,
+            OUTPUT_LONG, outputLocation
+            ]
+
+        main()
+
+        with open (outputLocation, "r") as myfile:
+            self.assertEquals(myfile.read(), "")
+
+        os.remove(outputLocation)
+
+    """ 
+    # =============================================================================
+
+    test_multiple
+
+    PURPOSE:
+        Tests extracting from several references with one loading of the
+        aggregated k-mers, both in one process and with several workers.
+
+    INPUT:
+        0: workers = 1
+        1: workers = 2
+
+        references = simple.fasta, alternative.fasta
+
+        simple.fasta:
+        >0
+        ACGTACGTACGT
+
+        alternative.fasta:
+        >0
+        ATATATATATAT
+
+        simple.kmers:
+        ACGTA 4 0
+        CGTAC 4 0
+
+    EXPECTED:
+        0-1:
+
+        simple.fasta:
+        >0 score=0.0000 in=0.0000 ex=0.0000 len=4 ref=0 pos=4
+        ACGT
+
+        alternative.fasta: no candidates
+
+    # =============================================================================
+    """
+    def test_multiple(self):
+
+        outputLocations = [
+            getPath("tests/output/extract/temp.out.0"),
+            getPath("tests/output/extract/temp.out.1")]
+
+        for workers in ["1", "2"]:
+
+            sys.argv[1:] = [
+                REFERENCE_LONG, "tests/data/extract/simple.fasta",
+                "tests/data/extract/alternative.fasta",
+                INCLUSION_LONG, "tests/data/extract/simple.fasta",
+                EXCLUSION_LONG, "tests/data/extract/alternative.fasta",
+                KMERS_LONG, "tests/data/extract/simple.kmers",
+                SIZE_LONG, "4",
+                WORKERS_LONG, workers,
+                OUTPUT_LONG, outputLocations[0], outputLocations[1]
+                ]
+
+            main()
+
+            with open (outputLocations[0], "r") as myfile:
+
+                result = myfile.read()
+                expected = ">0 score=0.0000 in=0.0000 ex=0.0000 len=4 ref=0 pos=4\nACGT\n"
+                self.assertEquals(result, expected)
+
+            with open (outputLocations[1], "r") as myfile:
+                self.assertEquals(myfile.read(), "")
+
+            for location in outputLocations:
+                os.remove(location)
+
+    """ 
+    # =============================================================================
+
+    test_mismatched_outputs
+
+    PURPOSE:
+        Tests there is a RuntimeError when the number of outputs differs from
+        the number of references.
+
+    INPUT:
+        0:
+
+        references = simple.fasta, alternative.fasta
+        outputs = temp.out
+
+    EXPECTED:
+        0: RuntimeError
+
+    # =============================================================================
+    """
+    def test_mismatched_outputs(self):
+
+        outputLocation = getPath("tests/output/extract/temp.out")
+
+        sys.argv[1:] = [
+            REFERENCE_LONG, "tests/data/extract/simple.fasta",
+            "tests/data/extract/alternative.fasta",
+            INCLUSION_LONG, "tests/data/extract/simple.fasta",
+            EXCLUSION_LONG, "tests/data/extract/alternative.fasta",
+            KMERS_LONG, "tests/data/extract/simple.kmers",
+            SIZE_LONG, "4",
+            OUTPUT_LONG, outputLocation
+            ]
+
+        with self.assertRaises(RuntimeError):
+            main()
 
     """ 
     # =============================================================================
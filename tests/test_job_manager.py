@@ -38,6 +38,7 @@ from neptune.JobManager import *
 from neptune.JobManagerDRMAA import JobManagerDRMAA
 from neptune.JobManagerParallel import JobManagerParallel
 
+import neptune.BinaryKMers as BinaryKMers
 import neptune.CountKMers as CountKMers
 import neptune.AggregateKMers as AggregateKMers
 import neptune.ExtractSignatures as ExtractSignatures
@@ -211,6 +212,85 @@ class TestRunJobs(unittest.TestCase):
 
         os.remove(outputLocation)
 
+    def test_numpy_engine(self):
+
+        outputDirectoryLocation = getPath("tests/output/manager/output")
+        logDirectoryLocation = getPath("tests/output/manager/log")
+        jobManager = JobManagerParallel(outputDirectoryLocation, logDirectoryLocation)
+
+        inputLocation = getPath("tests/data/manager/simple.fasta")
+        outputLocation = getPath("tests/output/manager/temp.out")
+        k = 7
+        organization = 0
+        engine = CountKMers.ENGINE_NUMPY
+
+        job = jobManager.createCountJob(inputLocation, outputLocation, k, organization, engine)
+
+        jobManager.runJobs([job])
+
+        with open (outputLocation, "r") as myfile:
+            result = myfile.read()
+
+        expected = "ACGTACG 4\nGTACGTA 2\n"
+
+        self.assertEquals(result, expected)
+
+        os.remove(outputLocation)
+
+    def test_workers(self):
+
+        outputDirectoryLocation = getPath("tests/output/manager/output")
+        logDirectoryLocation = getPath("tests/output/manager/log")
+        jobManager = JobManagerParallel(outputDirectoryLocation, logDirectoryLocation, 4)
+
+        inputLocation = getPath("tests/data/manager/simple.fasta")
+        outputLocation = getPath("tests/output/manager/temp.out")
+        k = 7
+        organization = 0
+        workers = jobManager.getCountWorkers(1)
+
+        self.assertEquals(workers, 4)
+
+        job = jobManager.createCountJob(inputLocation, outputLocation, k, organization, None, None, None, None, workers)
+
+        jobManager.runJobs([job])
+
+        with open (outputLocation, "r") as myfile:
+            result = myfile.read()
+
+        expected = "ACGTACG 4\nGTACGTA 2\n"
+
+        self.assertEquals(result, expected)
+        self.assertFalse([name for name in os.listdir(os.path.dirname(outputLocation)) if name.endswith(CountKMers.RUN_SUFFIX)])
+
+        os.remove(outputLocation)
+
+    def test_presence(self):
+
+        outputDirectoryLocation = getPath("tests/output/manager/output")
+        logDirectoryLocation = getPath("tests/output/manager/log")
+        jobManager = JobManagerParallel(outputDirectoryLocation, logDirectoryLocation, 4)
+
+        inputLocation = getPath("tests/data/manager/simple.fasta")
+        outputLocation = getPath("tests/output/manager/temp.out")
+        k = 7
+        organization = 0
+
+        for workers in [1, 4]:
+
+            job = jobManager.createCountJob(inputLocation, outputLocation, k, organization, None, None, None, None, workers, None, True)
+
+            jobManager.runJobs([job])
+
+            with open (outputLocation, "r") as myfile:
+                result = myfile.read()
+
+            expected = "ACGTACG\nGTACGTA\n"
+
+            self.assertEquals(result, expected)
+
+            os.remove(outputLocation)
+
 class TestCreateJob(unittest.TestCase):
 
     def test_simple(self):
@@ -257,6 +337,188 @@ class TestCreateCountJob(unittest.TestCase):
             self.assertEquals(job.args[1:], args)
             self.assertEquals(job.nativeSpecification, specification)
 
+    def test_engine(self):
+
+        with drmaa.Session() as session:
+
+            outputDirectoryLocation = getPath("tests/output")
+            logDirectoryLocation = getPath("tests/output/log")
+
+            jobManager = JobManagerDRMAA(outputDirectoryLocation, logDirectoryLocation, session, None)
+
+            inputLocation = "tests/data/manager/simple.fasta"
+            outputLocation = getPath("tests/output/manager/temp.out")
+            k = 7
+            organization = 0
+            engine = CountKMers.ENGINE_NUMPY
+
+            job = jobManager.createCountJob(inputLocation, outputLocation, k, organization, engine)
+
+            args = [
+                CountKMers.INPUT_LONG, str(inputLocation),
+                CountKMers.OUTPUT_LONG, str(outputLocation),
+                CountKMers.KMER_LONG, str(k),
+                CountKMers.ORGANIZATION_LONG, str(organization),
+                CountKMers.ENGINE_LONG, str(engine)]
+
+            self.assertEquals(job.args[1:], args)
+
+    def test_memory_limit(self):
+
+        with drmaa.Session() as session:
+
+            outputDirectoryLocation = getPath("tests/output")
+            logDirectoryLocation = getPath("tests/output/log")
+
+            jobManager = JobManagerDRMAA(outputDirectoryLocation, logDirectoryLocation, session, None)
+
+            inputLocation = "tests/data/manager/simple.fasta"
+            outputLocation = getPath("tests/output/manager/temp.out")
+            k = 7
+            organization = 0
+            memoryLimit = 512
+
+            job = jobManager.createCountJob(inputLocation, outputLocation, k, organization, None, memoryLimit)
+
+            args = [
+                CountKMers.INPUT_LONG, str(inputLocation),
+                CountKMers.OUTPUT_LONG, str(outputLocation),
+                CountKMers.KMER_LONG, str(k),
+                CountKMers.ORGANIZATION_LONG, str(organization),
+                CountKMers.MEMORY_LIMIT_LONG, str(memoryLimit)]
+
+            self.assertEquals(job.args[1:], args)
+
+    def test_format(self):
+
+        with drmaa.Session() as session:
+
+            outputDirectoryLocation = getPath("tests/output")
+            logDirectoryLocation = getPath("tests/output/log")
+
+            jobManager = JobManagerDRMAA(outputDirectoryLocation, logDirectoryLocation, session, None)
+
+            inputLocation = "tests/data/manager/simple.fasta"
+            outputLocation = getPath("tests/output/manager/temp.out")
+            k = 7
+            organization = 0
+            outputFormat = BinaryKMers.FORMAT_BINARY
+
+            job = jobManager.createCountJob(inputLocation, outputLocation, k, organization, None, None, outputFormat)
+
+            args = [
+                CountKMers.INPUT_LONG, str(inputLocation),
+                CountKMers.OUTPUT_LONG, str(outputLocation),
+                CountKMers.KMER_LONG, str(k),
+                CountKMers.ORGANIZATION_LONG, str(organization),
+                CountKMers.FORMAT_LONG, str(outputFormat)]
+
+            self.assertEquals(job.args[1:], args)
+
+    def test_splitters(self):
+
+        with drmaa.Session() as session:
+
+            outputDirectoryLocation = getPath("tests/output")
+            logDirectoryLocation = getPath("tests/output/log")
+
+            jobManager = JobManagerDRMAA(outputDirectoryLocation, logDirectoryLocation, session, None)
+
+            inputLocation = "tests/data/manager/simple.fasta"
+            outputLocation = getPath("tests/output/manager/temp.out")
+            k = 7
+            organization = 1
+            splittersLocation = getPath("tests/output/manager/splitters.kmers")
+
+            job = jobManager.createCountJob(inputLocation, outputLocation, k, organization, None, None, None, splittersLocation)
+
+            args = [
+                CountKMers.INPUT_LONG, str(inputLocation),
+                CountKMers.OUTPUT_LONG, str(outputLocation),
+                CountKMers.KMER_LONG, str(k),
+                CountKMers.ORGANIZATION_LONG, str(organization),
+                CountKMers.SPLITTERS_LONG, str(splittersLocation)]
+
+            self.assertEquals(job.args[1:], args)
+
+    def test_workers(self):
+
+        with drmaa.Session() as session:
+
+            outputDirectoryLocation = getPath("tests/output")
+            logDirectoryLocation = getPath("tests/output/log")
+
+            jobManager = JobManagerDRMAA(outputDirectoryLocation, logDirectoryLocation, session, None)
+
+            inputLocation = "tests/data/manager/simple.fasta"
+            outputLocation = getPath("tests/output/manager/temp.out")
+            k = 7
+            organization = 0
+            workers = 4
+
+            self.assertEquals(jobManager.getCountWorkers(1), 1)
+
+            job = jobManager.createCountJob(inputLocation, outputLocation, k, organization, None, None, None, None, workers)
+
+            args = [
+                CountKMers.INPUT_LONG, str(inputLocation),
+                CountKMers.OUTPUT_LONG, str(outputLocation),
+                CountKMers.KMER_LONG, str(k),
+                CountKMers.ORGANIZATION_LONG, str(organization),
+                CountKMers.WORKERS_LONG, str(workers)]
+
+            self.assertEquals(job.args[1:], args)
+
+    def test_compress(self):
+
+        with drmaa.Session() as session:
+
+            outputDirectoryLocation = getPath("tests/output")
+            logDirectoryLocation = getPath("tests/output/log")
+
+            jobManager = JobManagerDRMAA(outputDirectoryLocation, logDirectoryLocation, session, None)
+
+            inputLocation = "tests/data/manager/simple.fasta"
+            outputLocation = getPath("tests/output/manager/temp.out")
+            k = 7
+            organization = 0
+
+            job = jobManager.createCountJob(inputLocation, outputLocation, k, organization, None, None, None, None, None, True)
+
+            args = [
+                CountKMers.INPUT_LONG, str(inputLocation),
+                CountKMers.OUTPUT_LONG, str(outputLocation),
+                CountKMers.KMER_LONG, str(k),
+                CountKMers.ORGANIZATION_LONG, str(organization),
+                CountKMers.COMPRESS_LONG]
+
+            self.assertEquals(job.args[1:], args)
+
+    def test_presence(self):
+
+        with drmaa.Session() as session:
+
+            outputDirectoryLocation = getPath("tests/output")
+            logDirectoryLocation = getPath("tests/output/log")
+
+            jobManager = JobManagerDRMAA(outputDirectoryLocation, logDirectoryLocation, session, None)
+
+            inputLocation = "tests/data/manager/simple.fasta"
+            outputLocation = getPath("tests/output/manager/temp.out")
+            k = 7
+            organization = 0
+
+            job = jobManager.createCountJob(inputLocation, outputLocation, k, organization, None, None, None, None, None, None, True)
+
+            args = [
+                CountKMers.INPUT_LONG, str(inputLocation),
+                CountKMers.OUTPUT_LONG, str(outputLocation),
+                CountKMers.KMER_LONG, str(k),
+                CountKMers.ORGANIZATION_LONG, str(organization),
+                CountKMers.PRESENCE_LONG]
+
+            self.assertEquals(job.args[1:], args)
+
 class TestCreateAggregateJob(unittest.TestCase):
 
     def test_simple(self):
@@ -317,6 +579,150 @@ class TestCreateAggregateJob(unittest.TestCase):
             self.assertEquals(job.args[1:], args)
             self.assertEquals(job.nativeSpecification, specification)
 
+    def test_partial(self):
+
+        with drmaa.Session() as session:
+
+            outputDirectoryLocation = getPath("tests/output/manager")
+            logDirectoryLocation = getPath("tests/output/manager/log")
+
+            jobManager = JobManagerDRMAA(outputDirectoryLocation, logDirectoryLocation, session, None)
+
+            partialLocations = ["tests/output/manager/partial.0.0.kmers", "tests/output/manager/partial.0.1.kmers"]
+            outputLocation = getPath("tests/output/manager/temp.out")
+            tag = "A"
+
+            job = jobManager.createAggregateJob([], [], outputLocation, tag, None, None, partialLocations)
+
+            args = [
+                AggregateKMers.PARTIAL_LONG, partialLocations[0] + "." + tag, partialLocations[1] + "." + tag,
+                AggregateKMers.OUTPUT_LONG, outputLocation,
+                AggregateKMers.DELETE_LONG]
+
+            self.assertEquals(job.args[1:], args)
+
+    def test_range(self):
+
+        with drmaa.Session() as session:
+
+            outputDirectoryLocation = getPath("tests/output/manager")
+            logDirectoryLocation = getPath("tests/output/manager/log")
+
+            jobManager = JobManagerDRMAA(outputDirectoryLocation, logDirectoryLocation, session, None)
+
+            inclusionLocations = ["tests/data/manager/simple.fasta"]
+            exclusionLocations = ["tests/data/manager/alternative.fasta"]
+            outputLocation = getPath("tests/output/manager/temp.out")
+
+            job = jobManager.createAggregateJob(inclusionLocations, exclusionLocations, outputLocation, None, None, None, None, "CAA", "TAA")
+
+            args = [
+                AggregateKMers.INCLUSION_LONG, "tests/data/manager/simple.fasta",
+                AggregateKMers.EXCLUSION_LONG, "tests/data/manager/alternative.fasta",
+                AggregateKMers.OUTPUT_LONG, outputLocation,
+                AggregateKMers.START_LONG, "CAA",
+                AggregateKMers.END_LONG, "TAA"]
+
+            self.assertEquals(job.args[1:], args)
+
+    def test_hits(self):
+
+        with drmaa.Session() as session:
+
+            outputDirectoryLocation = getPath("tests/output/manager")
+            logDirectoryLocation = getPath("tests/output/manager/log")
+
+            jobManager = JobManagerDRMAA(outputDirectoryLocation, logDirectoryLocation, session, None)
+
+            inclusionLocations = ["tests/data/manager/simple.fasta"]
+            exclusionLocations = ["tests/data/manager/alternative.fasta"]
+            outputLocation = getPath("tests/output/manager/temp.out")
+
+            job = jobManager.createAggregateJob(inclusionLocations, exclusionLocations, outputLocation, None, None, None, None, None, None, 2, 1)
+
+            args = [
+                AggregateKMers.INCLUSION_LONG, "tests/data/manager/simple.fasta",
+                AggregateKMers.EXCLUSION_LONG, "tests/data/manager/alternative.fasta",
+                AggregateKMers.OUTPUT_LONG, outputLocation,
+                AggregateKMers.DELETE_LONG,
+                AggregateKMers.INHITS_LONG, "2",
+                AggregateKMers.EXHITS_LONG, "1"]
+
+            self.assertEquals(job.args[1:], args)
+
+    def test_engine(self):
+
+        with drmaa.Session() as session:
+
+            outputDirectoryLocation = getPath("tests/output/manager")
+            logDirectoryLocation = getPath("tests/output/manager/log")
+
+            jobManager = JobManagerDRMAA(outputDirectoryLocation, logDirectoryLocation, session, None)
+
+            inclusionLocations = ["tests/data/manager/simple.fasta"]
+            exclusionLocations = ["tests/data/manager/alternative.fasta"]
+            outputLocation = getPath("tests/output/manager/temp.out")
+
+            job = jobManager.createAggregateJob(inclusionLocations, exclusionLocations, outputLocation, None, engine=AggregateKMers.ENGINE_NUMPY)
+
+            args = [
+                AggregateKMers.INCLUSION_LONG, "tests/data/manager/simple.fasta",
+                AggregateKMers.EXCLUSION_LONG, "tests/data/manager/alternative.fasta",
+                AggregateKMers.OUTPUT_LONG, outputLocation,
+                AggregateKMers.DELETE_LONG,
+                AggregateKMers.ENGINE_LONG, AggregateKMers.ENGINE_NUMPY]
+
+            self.assertEquals(job.args[1:], args)
+
+    def test_presence(self):
+
+        with drmaa.Session() as session:
+
+            outputDirectoryLocation = getPath("tests/output/manager")
+            logDirectoryLocation = getPath("tests/output/manager/log")
+
+            jobManager = JobManagerDRMAA(outputDirectoryLocation, logDirectoryLocation, session, None)
+
+            inclusionLocations = ["tests/data/manager/simple.fasta"]
+            exclusionLocations = ["tests/data/manager/alternative.fasta"]
+            outputLocation = getPath("tests/output/manager/temp.out")
+            presenceLocation = getPath("tests/output/manager/temp.bitsets")
+
+            job = jobManager.createAggregateJob(inclusionLocations, exclusionLocations, outputLocation, None, presenceLocation=presenceLocation)
+
+            args = [
+                AggregateKMers.INCLUSION_LONG, "tests/data/manager/simple.fasta",
+                AggregateKMers.EXCLUSION_LONG, "tests/data/manager/alternative.fasta",
+                AggregateKMers.OUTPUT_LONG, outputLocation,
+                AggregateKMers.DELETE_LONG,
+                AggregateKMers.PRESENCE_LONG, presenceLocation]
+
+            self.assertEquals(job.args[1:], args)
+
+    def test_statistics(self):
+
+        with drmaa.Session() as session:
+
+            outputDirectoryLocation = getPath("tests/output/manager")
+            logDirectoryLocation = getPath("tests/output/manager/log")
+
+            jobManager = JobManagerDRMAA(outputDirectoryLocation, logDirectoryLocation, session, None)
+
+            inclusionLocations = ["tests/data/manager/simple.fasta"]
+            exclusionLocations = ["tests/data/manager/alternative.fasta"]
+            outputLocation = getPath("tests/output/manager/temp.out")
+
+            job = jobManager.createAggregateJob(inclusionLocations, exclusionLocations, outputLocation, None, statistics=True)
+
+            args = [
+                AggregateKMers.INCLUSION_LONG, "tests/data/manager/simple.fasta",
+                AggregateKMers.EXCLUSION_LONG, "tests/data/manager/alternative.fasta",
+                AggregateKMers.OUTPUT_LONG, outputLocation,
+                AggregateKMers.DELETE_LONG,
+                AggregateKMers.STATISTICS_LONG]
+
+            self.assertEquals(job.args[1:], args)
+
 class TestCreateExtractJob(unittest.TestCase):
 
     def test_simple(self):
@@ -330,7 +736,7 @@ class TestCreateExtractJob(unittest.TestCase):
             jobManager = JobManagerDRMAA(outputDirectoryLocation, logDirectoryLocation, session, None)
             jobManager.setExtractSpecification(specification)
 
-            referenceLocation = "tests/data/manager/simple.fasta"
+            referenceLocations = ["tests/data/manager/simple.fasta", "tests/data/manager/alternative.fasta"]
             referenceSize = 12
             rate = 0.01
             inclusion = ["tests/data/manager/simple.fasta", "tests/data/manager/alternative.fasta"]
@@ -342,13 +748,13 @@ class TestCreateExtractJob(unittest.TestCase):
             GC = 0.5
             confidence = 0.95
             aggregateLocation = "tests/data/manager/simple.kmers"
-            outputLocation = getPath("tests/output/manager/temp.out")
+            outputLocations = [getPath("tests/output/manager/temp.out"), getPath("tests/output/manager/temp2.out")]
 
-            job = jobManager.createExtractJob(referenceLocation, referenceSize, rate, inclusion, inhits, 
-		        exclusion, exhits, gap, size, GC, confidence, aggregateLocation, outputLocation)
+            job = jobManager.createExtractJob(referenceLocations, referenceSize, rate, inclusion, inhits, 
+		        exclusion, exhits, gap, size, GC, confidence, aggregateLocation, outputLocations)
 
             args = [
-			    ExtractSignatures.REFERENCE_LONG, str(referenceLocation), 
+			    ExtractSignatures.REFERENCE_LONG, "tests/data/manager/simple.fasta", "tests/data/manager/alternative.fasta", 
 			    ExtractSignatures.REFERENCE_SIZE_LONG, str(referenceSize), 
 			    ExtractSignatures.RATE_LONG, str(rate), 
 			    ExtractSignatures.INCLUSION_LONG, "tests/data/manager/simple.fasta", "tests/data/manager/alternative.fasta",
@@ -360,7 +766,7 @@ class TestCreateExtractJob(unittest.TestCase):
                 ExtractSignatures.GC_LONG, str(GC),
                 ExtractSignatures.CONFIDENCE_LONG, str(confidence),
                 ExtractSignatures.KMERS_LONG, aggregateLocation,
-                ExtractSignatures.OUTPUT_LONG, outputLocation]
+                ExtractSignatures.OUTPUT_LONG, outputLocations[0], outputLocations[1]]
 
             self.assertEquals(job.outputPath, ":" + os.path.join(logDirectoryLocation, "Neptune-ExtractSignatures1.o"))
             self.assertEquals(job.errorPath, ":" + os.path.join(logDirectoryLocation, "Neptune-ExtractSignatures1.e"))
@@ -125,6 +125,308 @@ def setCommandLineArguments(parameters):
 """
 # =============================================================================
 
+TEST GET AGGREGATE FAN-IN
+
+# =============================================================================
+"""
+class TestGetAggregateFanIn(unittest.TestCase):
+
+    """
+    # =========================================================================
+
+    test_simple
+
+    PURPOSE:
+        Tests the fan-in of few and many genomes.
+
+    INPUT:
+        genomes = 1, 20, AGGREGATE_FAN_IN_MAXIMUM, 2500, 10^6
+
+    EXPECT:
+        Few genomes are aggregated together. Many genomes are aggregated in
+        groups of about their square root, up to AGGREGATE_FAN_IN_MAXIMUM.
+
+    # =========================================================================
+    """
+    def test_simple(self):
+
+        import neptune.Neptune as Neptune
+
+        maximum = Neptune.AGGREGATE_FAN_IN_MAXIMUM
+        Neptune.AGGREGATE_FAN_IN_MAXIMUM = 100
+
+        try:
+            self.assertEquals(getAggregateFanIn(1), 2)
+            self.assertEquals(getAggregateFanIn(20), 20)
+            self.assertEquals(getAggregateFanIn(100), 100)
+            self.assertEquals(getAggregateFanIn(2500), 50)
+            self.assertEquals(getAggregateFanIn(1000000), 100)
+
+        finally:
+            Neptune.AGGREGATE_FAN_IN_MAXIMUM = maximum
+
+"""
+# =============================================================================
+
+TEST SELECT AGGREGATE RANGES
+
+# =============================================================================
+"""
+class TestSelectAggregateRanges(unittest.TestCase):
+
+    class JobManager():
+
+        def __init__(self, ranges):
+
+            self.ranges = ranges
+
+        def getAggregateRanges(self):
+
+            return self.ranges
+
+    class Execution():
+
+        def __init__(
+                self, ranges, inclusionLocations=[], exclusionLocations=[],
+                k=None):
+
+            self.jobManager = TestSelectAggregateRanges.JobManager(ranges)
+            self.inclusionLocations = inclusionLocations
+            self.exclusionLocations = exclusionLocations
+            self.k = k
+
+    """
+    # =========================================================================
+
+    test_simple
+
+    PURPOSE:
+        Tests selecting the k-mer ranges of sorted k-mer files.
+
+    INPUT:
+        AAA, CCC, GGG, TTT
+
+        ranges = 1, 2
+
+    EXPECT:
+        [(None, None)], [(None, "GGG"), ("GGG", None)]
+
+    # =========================================================================
+    """
+    def test_simple(self):
+
+        location = getPath("tests/output/ranges.kmers")
+
+        with open(location, "w") as kmerFile:
+            kmerFile.write("AAA 1\nCCC 1\nGGG 1\nTTT 1\n")
+
+        self.assertEquals(
+            selectAggregateRanges(self.Execution(1), [location]),
+            [(None, None)])
+        self.assertEquals(
+            selectAggregateRanges(self.Execution(2), [location]),
+            [(None, "GGG"), ("GGG", None)])
+
+        os.remove(location)
+
+    """
+    # =========================================================================
+
+    test_compressed
+
+    PURPOSE:
+        Tests selecting the k-mer ranges of compressed k-mer files, which are
+        selected by sampling the genomes, of which one is in FASTQ format.
+
+    INPUT:
+        a compressed k-mer file
+
+        inclusion: count1.fasta
+        exclusion: reads.fastq
+
+        k = 3, ranges = 2
+
+    EXPECT:
+        [(None, "CCC"), ("CCC", None)]
+
+    # =========================================================================
+    """
+    def test_compressed(self):
+
+        import gzip
+
+        location = getPath("tests/output/ranges.kmers.gz")
+
+        kmerFile = gzip.open(location, "w")
+        kmerFile.write("AAA 1\nCCC 1\nGGG 1\nTTT 1\n")
+        kmerFile.close()
+
+        execution = self.Execution(
+            2, ["tests/data/count/count1.fasta"],
+            ["tests/data/count/reads.fastq"], 3)
+
+        self.assertEquals(
+            selectAggregateRanges(execution, [location]),
+            [(None, "CCC"), ("CCC", None)])
+
+        os.remove(location)
+
+"""
+# =============================================================================
+
+TEST GROUP REFERENCES
+
+# =============================================================================
+"""
+class TestGroupReferences(unittest.TestCase):
+
+    """
+    # =========================================================================
+
+    test_simple
+
+    PURPOSE:
+        Tests dividing references among extraction jobs.
+
+    INPUT:
+        references = 0, 1, 2, 3, 4
+
+        groups = 1, 2, 10
+
+    EXPECT:
+        [[0, 1, 2, 3, 4]], [[0, 2, 4], [1, 3]], [[0], [1], [2], [3], [4]]
+
+    # =========================================================================
+    """
+    def test_simple(self):
+
+        references = [0, 1, 2, 3, 4]
+
+        self.assertEquals(
+            groupReferences(references, 1), [[0, 1, 2, 3, 4]])
+        self.assertEquals(
+            groupReferences(references, 2), [[0, 2, 4], [1, 3]])
+        self.assertEquals(
+            groupReferences(references, 10), [[0], [1], [2], [3], [4]])
+
+    """
+    # =========================================================================
+
+    test_empty
+
+    PURPOSE:
+        Tests dividing no references.
+
+    INPUT:
+        references = (empty)
+
+        groups = 4
+
+    EXPECT:
+        [] (no jobs)
+
+    # =========================================================================
+    """
+    def test_empty(self):
+
+        self.assertEquals(groupReferences([], 4), [])
+
+"""
+# =============================================================================
+
+TEST BUILD INDEX
+
+# =============================================================================
+"""
+class TestBuildIndex(unittest.TestCase):
+
+    class Execution():
+
+        def __init__(self, k):
+
+            self.k = k
+            self.aggregateLocation = getPath("tests/output/aggregate.kmers")
+            self.indexLocation = getPath("tests/output/aggregate.index")
+
+    """
+    # =========================================================================
+
+    test_partitioned
+
+    PURPOSE:
+        Tests indexing the text partitions of a partitioned aggregation.
+
+    INPUT:
+        aggregate.kmers.A: AAA 2 0, ANA 1 1
+        aggregate.kmers.C: CAA 1 2
+
+    EXPECT:
+        aggregate.index, a manifest of the binary aggregate.index.A and
+        aggregate.index.C, with the same records.
+
+    # =========================================================================
+    """
+    def test_partitioned(self):
+
+        execution = self.Execution(3)
+        locations = [
+            execution.aggregateLocation + ".A",
+            execution.aggregateLocation + ".C"]
+
+        with open(locations[0], "w") as kmerFile:
+            kmerFile.write("AAA 2 0\nANA 1 1\n")
+
+        with open(locations[1], "w") as kmerFile:
+            kmerFile.write("CAA 1 2\n")
+
+        BinaryKMers.writeManifest(execution.aggregateLocation, locations)
+
+        self.assertEquals(buildIndex(execution), execution.indexLocation)
+
+        indexLocations = BinaryKMers.readPartitions(execution.indexLocation)
+
+        self.assertEquals(indexLocations, [
+            execution.indexLocation + ".A", execution.indexLocation + ".C"])
+        self.assertTrue(all(
+            BinaryKMers.isBinary(location) for location in indexLocations))
+        self.assertEquals(
+            list(BinaryKMers.readRecords(execution.indexLocation)),
+            [("AAA", 2, 0), ("ANA", 1, 1), ("CAA", 1, 2)])
+
+        for location in locations + indexLocations + [
+                execution.aggregateLocation, execution.indexLocation]:
+            os.remove(location)
+
+    """
+    # =========================================================================
+
+    test_binary
+
+    PURPOSE:
+        Tests that binary aggregated k-mers are their own index.
+
+    INPUT:
+        aggregate.kmers, in the binary format: AAA 2 0
+
+    EXPECT:
+        aggregate.kmers, and no index is written.
+
+    # =========================================================================
+    """
+    def test_binary(self):
+
+        execution = self.Execution(3)
+
+        BinaryKMers.write([("AAA", 2, 0)], execution.aggregateLocation, 2)
+
+        self.assertEquals(buildIndex(execution), execution.aggregateLocation)
+        self.assertFalse(os.path.exists(execution.indexLocation))
+
+        os.remove(execution.aggregateLocation)
+
+"""
+# =============================================================================
+
 TEST MAIN
 
 # =============================================================================
@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+
+"""
+# =============================================================================
+
+Copyright Government of Canada 2015-2017
+
+Written by: Eric Marinier, Public Health Agency of Canada,
+    National Microbiology Laboratory
+
+Funded by the National Micriobiology Laboratory and the Genome Canada / Alberta
+    Innovates Bio Solutions project "Listeria Detection and Surveillance
+    using Next Generation Genomics"
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at:
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+# =============================================================================
+"""
+
+import os
+import sys
+
+import numpy
+
+from TestingUtility import *
+prepareSystemPath()
+
+from neptune.PresenceBitsets import *
+
+import neptune.Utility as Utility
+
+import unittest
+
+""" 
+# =============================================================================
+
+WRITE
+
+# =============================================================================
+"""
+class TestWrite(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_simple
+
+    PURPOSE:
+        Tests writing and reading back presence bitsets.
+
+    INPUT:
+
+        k-mers: AAA CAA GAA TAA
+        inclusion genomes: i0 i1 ... i8
+        exclusion genomes: e0
+
+        AAA is in every inclusion genome, CAA is in i8 and e0, GAA is in no
+        genome, and TAA is in i0.
+
+    EXPECTED:
+
+        The same k, codes, bitsets, and genome names are read back.
+
+    # =============================================================================
+    """
+    def test_simple(self):
+
+        location = getPath("tests/output/presence/simple.bitsets")
+
+        codes, valid = Utility.encodeKMers(["AAA", "CAA", "GAA", "TAA"], 3)
+        inclusion = numpy.packbits(numpy.array([
+            [1] * 9, [0] * 8 + [1], [0] * 9, [1] + [0] * 8],
+            dtype=numpy.uint8), axis=1)
+        exclusion = numpy.packbits(numpy.array(
+            [[0], [1], [0], [0]], dtype=numpy.uint8), axis=1)
+        inclusionNames = ["i" + str(i) for i in range(9)]
+
+        write(location, 3, [codes[:2], codes[2:]],
+            [inclusion[:2], inclusion[2:]], [exclusion[:2], exclusion[2:]],
+            inclusionNames, ["e0"])
+
+        presence = Presence(location)
+
+        self.assertEquals(presence.k, 3)
+        self.assertEquals(len(presence), 4)
+        self.assertEquals(presence.codes.tolist(), codes.tolist())
+        self.assertEquals(presence.inclusion.tolist(), inclusion.tolist())
+        self.assertEquals(presence.exclusion.tolist(), exclusion.tolist())
+        self.assertEquals(presence.inclusionNames, inclusionNames)
+        self.assertEquals(presence.exclusionNames, ["e0"])
+
+        del presence
+        os.remove(location)
+
+    """ 
+    # =============================================================================
+
+    test_empty
+
+    PURPOSE:
+        Tests writing and reading back presence bitsets without k-mers.
+
+    EXPECTED:
+
+        There are no k-mers, and the genome names are read back.
+
+    # =============================================================================
+    """
+    def test_empty(self):
+
+        location = getPath("tests/output/presence/empty.bitsets")
+
+        write(location, 0, [], [], [], ["i0"], [])
+
+        presence = Presence(location)
+
+        self.assertEquals(len(presence), 0)
+        self.assertEquals(presence.inclusion.shape, (0, 1))
+        self.assertEquals(presence.exclusion.shape, (0, 0))
+        self.assertEquals(presence.inclusionNames, ["i0"])
+        self.assertEquals(presence.exclusionNames, [])
+
+        os.remove(location)
+
+""" 
+# =============================================================================
+
+CONCATENATE
+
+# =============================================================================
+"""
+class TestConcatenate(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_simple
+
+    PURPOSE:
+        Tests concatenating the presence bitsets of consecutive k-mer ranges
+        and renaming their genomes.
+
+    INPUT:
+
+        FIRST: AAA (i0), CAA (i1, e0)
+        SECOND: TAA (i0, i1)
+
+    EXPECTED:
+
+        AAA (a), CAA (b, c), TAA (a, b)
+
+    # =============================================================================
+    """
+    def test_simple(self):
+
+        firstLocation = getPath("tests/output/presence/first.bitsets")
+        secondLocation = getPath("tests/output/presence/second.bitsets")
+        outputLocation = getPath("tests/output/presence/output.bitsets")
+
+        codes, valid = Utility.encodeKMers(["AAA", "CAA", "TAA"], 3)
+
+        write(firstLocation, 3, [codes[:2]],
+            [numpy.array([[0x80], [0x40]], dtype=numpy.uint8)],
+            [numpy.array([[0x00], [0x80]], dtype=numpy.uint8)],
+            ["i0", "i1"], ["e0"])
+
+        write(secondLocation, 3, [codes[2:]],
+            [numpy.array([[0xC0]], dtype=numpy.uint8)],
+            [numpy.array([[0x00]], dtype=numpy.uint8)],
+            ["i0", "i1"], ["e0"])
+
+        concatenate([firstLocation, secondLocation], outputLocation,
+            ["a", "b"], ["c"])
+
+        presence = Presence(outputLocation)
+
+        self.assertEquals(presence.codes.tolist(), codes.tolist())
+        self.assertEquals(presence.inclusion.tolist(), [[0x80], [0x40], [0xC0]])
+        self.assertEquals(presence.exclusion.tolist(), [[0x00], [0x80], [0x00]])
+        self.assertEquals(presence.inclusionNames, ["a", "b"])
+        self.assertEquals(presence.exclusionNames, ["c"])
+
+        del presence
+        os.remove(firstLocation)
+        os.remove(secondLocation)
+        os.remove(outputLocation)
+
+    """ 
+    # =============================================================================
+
+    test_mismatch
+
+    PURPOSE:
+        Tests concatenating presence bitsets of different genomes.
+
+    EXPECTED:
+
+        A RuntimeError is raised.
+
+    # =============================================================================
+    """
+    def test_mismatch(self):
+
+        firstLocation = getPath("tests/output/presence/first.bitsets")
+        secondLocation = getPath("tests/output/presence/second.bitsets")
+        outputLocation = getPath("tests/output/presence/output.bitsets")
+
+        write(firstLocation, 0, [], [], [], ["i0"], [])
+        write(secondLocation, 0, [], [], [], ["i0", "i1"], [])
+
+        with self.assertRaises(RuntimeError):
+            concatenate([firstLocation, secondLocation], outputLocation)
+
+        os.remove(firstLocation)
+        os.remove(secondLocation)
+
+""" 
+# =============================================================================
+
+FIND GENOMES
+
+# =============================================================================
+"""
+class TestFindGenomes(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_simple
+
+    PURPOSE:
+        Tests finding the genomes which contain every k-mer of a sequence.
+
+    INPUT:
+
+        k-mers: AAA (i0, i1), CAA (i0, e0), TAA (i0, i1, e0)
+
+        SEQUENCES:
+            TAAA: TAA, AAA
+            TTGAA: TTG (CAA), TGA (TCA), GAA
+            GGG: GGG (CCC)
+
+    EXPECTED:
+
+        TAAA: 2 k-mers, contained by i0 and i1
+        TTGAA: 1 k-mer, contained by i0 and e0
+        GGG: no k-mers
+
+    # =============================================================================
+    """
+    def test_simple(self):
+
+        location = getPath("tests/output/presence/simple.bitsets")
+
+        codes, valid = Utility.encodeKMers(["AAA", "CAA", "TAA"], 3)
+
+        write(location, 3, [codes],
+            [numpy.array([[0xC0], [0x80], [0xC0]], dtype=numpy.uint8)],
+            [numpy.array([[0x00], [0x80], [0x80]], dtype=numpy.uint8)],
+            ["i0", "i1"], ["e0"])
+
+        presence = Presence(location)
+
+        self.assertEquals(findGenomes(presence, "TAAA"), (2, ["i0", "i1"], []))
+        self.assertEquals(findGenomes(presence, "TTGAA"), (1, ["i0"], ["e0"]))
+        self.assertEquals(findGenomes(presence, "GGG"), (0, [], []))
+
+        found, inclusionCounts, exclusionCounts = countGenomes(
+            presence, codes[[0, 0, 2]])
+
+        self.assertEquals(found, 2)
+        self.assertEquals(inclusionCounts.tolist(), [2, 2])
+        self.assertEquals(exclusionCounts.tolist(), [1])
+
+        del presence
+        os.remove(location)
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+
+"""
+# =============================================================================
+
+Copyright Government of Canada 2015-2017
+
+Written by: Eric Marinier, Public Health Agency of Canada,
+    National Microbiology Laboratory
+
+Funded by the National Micriobiology Laboratory and the Genome Canada / Alberta
+    Innovates Bio Solutions project "Listeria Detection and Surveillance
+    using Next Generation Genomics"
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at:
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+# =============================================================================
+"""
+
+
+import os
+import sys
+import StringIO
+
+import numpy
+
+from TestingUtility import *
+prepareSystemPath()
+
+from neptune.AggregateStatistics import *
+
+import unittest
+
+""" 
+# =============================================================================
+
+TALLY
+
+# =============================================================================
+"""
+class TestTally(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_simple
+
+    PURPOSE:
+        Tests that records and arrays are tallied into the same histogram.
+
+    INPUT:
+
+        (incount, excount): (1, 0), (2, 1), (1, 0), (0, 3)
+
+    EXPECTED:
+
+        {(1, 0): 2, (2, 1): 1, (0, 3): 1}
+
+    # =============================================================================
+    """
+    def test_simple(self):
+
+        incounts = [1, 2, 1, 0]
+        excounts = [0, 1, 0, 3]
+        expected = {(1, 0): 2, (2, 1): 1, (0, 3): 1}
+
+        histogram = {}
+        records = [("A", incount, excount) for incount, excount in zip(incounts, excounts)]
+
+        self.assertEquals(list(tallyRecords(records, histogram)), records)
+        self.assertEquals(histogram, expected)
+
+        histogram = {}
+        tallyArrays(numpy.array(incounts, dtype=numpy.uint16), numpy.array(excounts, dtype=numpy.uint8), histogram)
+        tallyArrays(numpy.array([], dtype=numpy.uint16), numpy.array([], dtype=numpy.uint8), histogram)
+
+        self.assertEquals(histogram, expected)
+
+""" 
+# =============================================================================
+
+COMBINE
+
+# =============================================================================
+"""
+class TestCombine(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_simple
+
+    PURPOSE:
+        Tests combining the statistics of two partitions.
+
+    INPUT:
+
+        A: {(1, 0): 2, (2, 1): 1}, 3 k-mers, 30 bytes
+        C: {(1, 0): 1}, 1 k-mer, 10 bytes
+
+    EXPECTED:
+
+        {(1, 0): 3, (2, 1): 1} with both partitions, in order.
+
+    # =============================================================================
+    """
+    def test_simple(self):
+
+        locations = [
+            getPath("tests/output/statistics/partition.A.stats"),
+            getPath("tests/output/statistics/partition.C.stats")]
+        outputLocation = getPath("tests/output/statistics/partition.stats")
+
+        write(locations[0], {(1, 0): 2, (2, 1): 1}, [("partition.A", 3, 30)])
+        write(locations[1], {(1, 0): 1}, [("partition.C", 1, 10)])
+
+        combine(locations, outputLocation)
+
+        histogram, partitions = read(outputLocation)
+
+        self.assertEquals(histogram, {(1, 0): 3, (2, 1): 1})
+        self.assertEquals(partitions, [("partition.A", 3, 30), ("partition.C", 1, 10)])
+
+        for location in locations + [outputLocation]:
+            os.remove(location)
+
+    """ 
+    # =============================================================================
+
+    test_malformed
+
+    PURPOSE:
+        Tests that a malformed statistics file is rejected.
+
+    INPUT:
+
+        #statistics
+        counts 1 0
+
+    EXPECTED:
+
+        RuntimeError
+
+    # =============================================================================
+    """
+    def test_malformed(self):
+
+        location = getPath("tests/output/statistics/malformed.stats")
+
+        with open(location, "w") as statisticsFile:
+            statisticsFile.write("#statistics\ncounts\t1\t0\n")
+
+        with self.assertRaises(RuntimeError):
+            read(location)
+
+        os.remove(location)
+
+""" 
+# =============================================================================
+
+COUNT KEPT
+
+# =============================================================================
+"""
+class TestCountKept(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_simple
+
+    PURPOSE:
+        Tests counting the k-mers kept by every threshold.
+
+    INPUT:
+
+        {(1, 0): 2, (2, 1): 1, (0, 3): 1}
+
+    EXPECTED:
+
+        inclusion: [4, 3, 1]
+        exclusion: [4, 2, 1, 1]
+
+    # =============================================================================
+    """
+    def test_simple(self):
+
+        histogram = {(1, 0): 2, (2, 1): 1, (0, 3): 1}
+
+        inclusionKept, exclusionKept = countKept(histogram)
+
+        self.assertEquals(inclusionKept, [4, 3, 1])
+        self.assertEquals(exclusionKept, [4, 2, 1, 1])
+
+        self.assertEquals(keptBy(inclusionKept, 1.5), 1)
+        self.assertEquals(keptBy(inclusionKept, 2), 1)
+        self.assertEquals(keptBy(inclusionKept, 3), 0)
+        self.assertEquals(keptBy(exclusionKept, 0), 4)
+
+        self.assertEquals(countKept({}), ([0], [0]))
+
+    """ 
+    # =============================================================================
+
+    test_report
+
+    PURPOSE:
+        Tests reporting the k-mers kept by the thresholds no smaller than those
+        of the aggregation.
+
+    INPUT:
+
+        {(1, 0): 2, (2, 1): 1, (0, 3): 1}
+        inhits = 2, exhits = 1
+
+    EXPECTED:
+
+        Inclusion Hits 2 = 1 k-mers
+        Exclusion Hits 1 = 2 k-mers
+        Exclusion Hits 2 = 1 k-mers
+        Exclusion Hits 3 = 1 k-mers
+
+    # =============================================================================
+    """
+    def test_report(self):
+
+        buff = StringIO.StringIO()
+
+        reportThresholds(buff, {(1, 0): 2, (2, 1): 1, (0, 3): 1}, 2, 1)
+
+        expected = "Inclusion Hits 2 = 1 k-mers\n" + \
+            "Exclusion Hits 1 = 2 k-mers\n" + \
+            "Exclusion Hits 2 = 1 k-mers\n" + \
+            "Exclusion Hits 3 = 1 k-mers\n"
+
+        self.assertEquals(buff.getvalue(), expected)
+
+        buff.close()
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -0,0 +1,364 @@
+#!/usr/bin/env python
+
+"""
+# =============================================================================
+
+Copyright Government of Canada 2015-2017
+
+Written by: Eric Marinier, Public Health Agency of Canada,
+    National Microbiology Laboratory
+
+Funded by the National Micriobiology Laboratory and the Genome Canada / Alberta
+    Innovates Bio Solutions project "Listeria Detection and Surveillance
+    using Next Generation Genomics"
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at:
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+# =============================================================================
+"""
+
+
+
+import os
+import sys
+
+from TestingUtility import *
+prepareSystemPath()
+
+from neptune.AggregateStore import *
+
+import unittest
+
+""" 
+# =============================================================================
+
+MANIFEST
+
+# =============================================================================
+"""
+class TestManifest(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_simple
+
+    PURPOSE:
+        Tests writing and reading back the manifest of a store.
+
+    INPUT:
+
+        k = 7
+        genomes = [
+            (inclusion, "0.kmers", 12, 100, "/data/a.fasta"),
+            (exclusion, "1.kmers", 30, 200, "/data/b c.fasta")]
+
+    EXPECTED:
+
+        The same k and genomes are read back.
+
+    # =============================================================================
+    """
+    def test_simple(self):
+
+        directory = getPath("tests/output/store")
+        genomes = [
+            (INCLUSION, "0.kmers", 12, 100, "/data/a.fasta"),
+            (EXCLUSION, "1.kmers", 30, 200, "/data/b c.fasta")]
+
+        writeManifest(directory, 7, genomes)
+
+        self.assertEquals(readManifest(directory), (7, genomes))
+
+        os.remove(os.path.join(directory, MANIFEST))
+
+    """ 
+    # =============================================================================
+
+    test_missing
+
+    PURPOSE:
+        Tests reading the manifest of a store which does not exist yet.
+
+    EXPECTED:
+
+        (None, [])
+
+    # =============================================================================
+    """
+    def test_missing(self):
+
+        directory = getPath("tests/output/store/missing")
+
+        self.assertEquals(readManifest(directory), (None, []))
+
+    """ 
+    # =============================================================================
+
+    test_malformed
+
+    PURPOSE:
+        Tests reading a manifest with an unknown genome role.
+
+    EXPECTED:
+
+        RuntimeError
+
+    # =============================================================================
+    """
+    def test_malformed(self):
+
+        directory = getPath("tests/output/store")
+        location = os.path.join(directory, MANIFEST)
+
+        with open(location, "w") as manifestFile:
+            manifestFile.write("k\t7\nother\t0.kmers\t1\t1\t/data/a.fasta\n")
+
+        with self.assertRaises(RuntimeError):
+            readManifest(directory)
+
+        os.remove(location)
+
+    """ 
+    # =============================================================================
+
+    test_aggregate
+
+    PURPOSE:
+        Tests reading the aggregation named by a manifest, and by the manifest
+        of an older store, which does not name one.
+
+    INPUT:
+
+        A manifest naming "aggregate.3.kmers".
+        A manifest without an aggregate line.
+
+    EXPECTED:
+
+        "aggregate.3.kmers", then AGGREGATE; the genomes are read back either
+        way.
+
+    # =============================================================================
+    """
+    def test_aggregate(self):
+
+        directory = getPath("tests/output/store")
+        location = os.path.join(directory, MANIFEST)
+        genomes = [(INCLUSION, "0.kmers", 12, 100, "/data/a.fasta")]
+
+        writeManifest(directory, 7, genomes, "aggregate.3.kmers")
+
+        self.assertEquals(readAggregate(directory), "aggregate.3.kmers")
+        self.assertEquals(readManifest(directory), (7, genomes))
+
+        with open(location, "w") as manifestFile:
+            manifestFile.write(
+                "k\t7\ninclusion\t0.kmers\t12\t100\t/data/a.fasta\n")
+
+        self.assertEquals(readAggregate(directory), AGGREGATE)
+        self.assertEquals(readManifest(directory), (7, genomes))
+
+        os.remove(location)
+
+""" 
+# =============================================================================
+
+NAME AGGREGATE
+
+# =============================================================================
+"""
+class TestNameAggregate(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_names
+
+    PURPOSE:
+        Tests listing and naming the aggregations of a store, as its updates
+        write them.
+
+    INPUT:
+
+        A store holding no aggregation, then "aggregate.kmers" and
+        "aggregate.2.kmers", along with unrelated files.
+
+    EXPECTED:
+
+        "aggregate.0.kmers", then "aggregate.3.kmers"; only the aggregations
+        are listed.
+
+    # =============================================================================
+    """
+    def test_names(self):
+
+        directory = getPath("tests/output/store/names")
+
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self.assertEquals(listAggregates(directory), [])
+        self.assertEquals(nameAggregate(directory), "aggregate.0.kmers")
+
+        names = [AGGREGATE, "aggregate.2.kmers", "aggregate.x.kmers",
+            "aggregate.2.kmers.tmp", MANIFEST]
+
+        for name in names:
+            open(os.path.join(directory, name), "w").close()
+
+        self.assertEquals(
+            listAggregates(directory), ["aggregate.2.kmers", AGGREGATE])
+        self.assertEquals(nameAggregate(directory), "aggregate.3.kmers")
+
+        for name in names:
+            os.remove(os.path.join(directory, name))
+
+""" 
+# =============================================================================
+
+PLAN UPDATE
+
+# =============================================================================
+"""
+class TestPlanUpdate(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_simple
+
+    PURPOSE:
+        Tests planning an update which keeps, adds, removes, and changes the
+        role of genomes.
+
+    INPUT:
+
+        STORE: inclusion A, inclusion B, exclusion C
+        EXECUTION: inclusion A, inclusion D, exclusion B
+
+    EXPECTED:
+
+        kept = [A]
+        added = [(inclusion, D, None), (exclusion, B, B)]
+        removed = [B, C]
+
+    # =============================================================================
+    """
+    def test_simple(self):
+
+        locations = []
+
+        for name in ["A", "B", "C", "D"]:
+
+            location = getPath("tests/output/store/" + name + ".fasta")
+            locations.append(location)
+
+            with open(location, "w") as genomeFile:
+                genomeFile.write(">" + name + "\nACGT\n")
+
+        A, B, C, D = locations
+
+        genomes = [
+            (INCLUSION, "0.kmers") + describeGenome(A) + (A,),
+            (INCLUSION, "1.kmers") + describeGenome(B) + (B,),
+            (EXCLUSION, "2.kmers") + describeGenome(C) + (C,)]
+
+        kept, added, removed = planUpdate(genomes, [A, D], [B])
+
+        self.assertEquals(kept, [genomes[0]])
+        self.assertEquals(added, [(INCLUSION, D, None), (EXCLUSION, B, genomes[1])])
+        self.assertEquals(removed, [genomes[1], genomes[2]])
+
+        for location in locations:
+            os.remove(location)
+
+    """ 
+    # =============================================================================
+
+    test_changed
+
+    PURPOSE:
+        Tests planning an update when a stored genome has changed.
+
+    INPUT:
+
+        STORE: inclusion A, with a different size
+        EXECUTION: inclusion A
+
+    EXPECTED:
+
+        kept = []
+        added = [(inclusion, A, None)]
+        removed = [A]
+
+    # =============================================================================
+    """
+    def test_changed(self):
+
+        location = getPath("tests/output/store/A.fasta")
+
+        with open(location, "w") as genomeFile:
+            genomeFile.write(">A\nACGT\n")
+
+        size, modified = describeGenome(location)
+        genomes = [(INCLUSION, "0.kmers", size + 1, modified, location)]
+
+        kept, added, removed = planUpdate(genomes, [location], [])
+
+        self.assertEquals(kept, [])
+        self.assertEquals(added, [(INCLUSION, location, None)])
+        self.assertEquals(removed, genomes)
+
+        os.remove(location)
+
+""" 
+# =============================================================================
+
+LINK FILE
+
+# =============================================================================
+"""
+class TestLinkFile(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_simple
+
+    PURPOSE:
+        Tests that a linked file remains after its source is removed.
+
+    EXPECTED:
+
+        The destination has the contents of the source.
+
+    # =============================================================================
+    """
+    def test_simple(self):
+
+        source = getPath("tests/output/store/source.kmers")
+        destination = getPath("tests/output/store/destination.kmers")
+
+        with open(source, "w") as sourceFile:
+            sourceFile.write("AAA\nCCC\n")
+
+        linkFile(source, destination)
+        os.remove(source)
+
+        with open(destination, "r") as destinationFile:
+            self.assertEquals(destinationFile.read(), "AAA\nCCC\n")
+
+        os.remove(destination)
+
+if __name__ == '__main__':
+    
+    unittest.main()
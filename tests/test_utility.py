@@ -35,6 +35,7 @@ prepareSystemPath()
 
 from neptune.Utility import *
 
+import numpy
 import unittest
 
 """ 
@@ -380,6 +381,687 @@ class TestReverseComplement(unittest.TestCase):
 """ 
 # =============================================================================
 
+ENCODE K-MER
+
+# =============================================================================
+"""
+class TestEncodeKMer(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_simple
+
+    PURPOSE:
+        Tests the encoding of simple k-mers.
+
+    INPUT:
+        0: "A"
+        1: "ACGT"
+        2: "TTT"
+
+    EXPECTED:
+        0: 0
+        1: 27
+        2: 63
+
+    # =============================================================================
+    """
+    def test_simple(self):
+
+        self.assertEquals(encodeKMer("A"), 0)
+        self.assertEquals(encodeKMer("ACGT"), 27)
+        self.assertEquals(encodeKMer("TTT"), 63)
+
+    """ 
+    # =============================================================================
+
+    test_order
+
+    PURPOSE:
+        Tests that the encoding preserves the lexicographic order of k-mers.
+
+    INPUT:
+        0: all k-mers of size 3, in lexicographic order
+
+    EXPECTED:
+        0: increasing encodings
+
+    # =============================================================================
+    """
+    def test_order(self):
+
+        kmers = [generateSequence(i, 3) for i in range(64)]
+        codes = [encodeKMer(kmer) for kmer in kmers]
+
+        self.assertEquals(codes, sorted(codes))
+        self.assertEquals(codes, range(64))
+
+    """ 
+    # =============================================================================
+
+    test_ambiguous
+
+    PURPOSE:
+        Tests the encoding of k-mers containing characters other than A, C, G,
+        or T.
+
+    INPUT:
+        0: "ACN"
+        1: "acg"
+
+    EXPECTED:
+        0: None
+        1: None
+
+    # =============================================================================
+    """
+    def test_ambiguous(self):
+
+        self.assertEquals(encodeKMer("ACN"), None)
+        self.assertEquals(encodeKMer("acg"), None)
+
+""" 
+# =============================================================================
+
+DECODE K-MER
+
+# =============================================================================
+"""
+class TestDecodeKMer(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_simple
+
+    PURPOSE:
+        Tests the decoding of simple k-mers.
+
+    INPUT:
+        0: 0, k = 1
+        1: 27, k = 4
+        2: 27, k = 6
+
+    EXPECTED:
+        0: "A"
+        1: "ACGT"
+        2: "AAACGT"
+
+    # =============================================================================
+    """
+    def test_simple(self):
+
+        self.assertEquals(decodeKMer(0, 1), "A")
+        self.assertEquals(decodeKMer(27, 4), "ACGT")
+        self.assertEquals(decodeKMer(27, 6), "AAACGT")
+
+    """ 
+    # =============================================================================
+
+    test_round_trip
+
+    PURPOSE:
+        Tests that decoding reverses encoding.
+
+    INPUT:
+        0: "GATTACA"
+
+    EXPECTED:
+        0: "GATTACA"
+
+    # =============================================================================
+    """
+    def test_round_trip(self):
+
+        kmer = "GATTACA"
+
+        self.assertEquals(decodeKMer(encodeKMer(kmer), len(kmer)), kmer)
+
+""" 
+# =============================================================================
+
+ENCODE K-MERS
+
+# =============================================================================
+"""
+class TestEncodeKMers(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_simple
+
+    PURPOSE:
+        Tests encoding several k-mers at once, including an ambiguous k-mer.
+
+    INPUT:
+
+        kmers = ["AAAA", "ACGT", "ANGT", "TTTT"]
+        k = 4
+
+    EXPECTED:
+
+        codes = [AAAA, ACGT, ?, TTTT]
+        valid = [True, True, False, True]
+
+    # =============================================================================
+    """
+    def test_simple(self):
+
+        kmers = ["AAAA", "ACGT", "ANGT", "TTTT"]
+
+        codes, valid = encodeKMers(kmers, 4)
+
+        self.assertEquals(valid.tolist(), [True, True, False, True])
+        self.assertEquals(
+            codes[valid].tolist(),
+            [encodeKMer("AAAA"), encodeKMer("ACGT"), encodeKMer("TTTT")])
+
+""" 
+# =============================================================================
+
+DECODE K-MERS
+
+# =============================================================================
+"""
+class TestDecodeKMers(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_simple
+
+    PURPOSE:
+        Tests decoding an array of k-mer codes.
+
+    INPUT:
+
+        codes = [AAAA, ACGT, TTTT]
+        k = 4
+
+    EXPECTED:
+
+        ["AAAA", "ACGT", "TTTT"]
+
+    # =============================================================================
+    """
+    def test_simple(self):
+
+        kmers = ["AAAA", "ACGT", "TTTT"]
+        codes = numpy.array([encodeKMer(kmer) for kmer in kmers], dtype=numpy.uint64)
+
+        self.assertEquals(decodeKMers(codes, 4), kmers)
+
+""" 
+# =============================================================================
+
+ENCODE WINDOWS
+
+# =============================================================================
+"""
+class TestEncodeWindows(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_simple
+
+    PURPOSE:
+        Tests encoding every k-mer of a sequence and its reverse complement.
+
+    INPUT:
+
+        sequence = "ACGNTT"
+        k = 3
+
+    EXPECTED:
+
+        forward = [ACG, CGN, GNT, NTT]
+        reverse = [CGT, NCG, ANC, AAN]
+        masked = [False, True, True, True]
+
+    # =============================================================================
+    """
+    def test_simple(self):
+
+        forward, reverse, masked = encodeWindows("ACGNTT", 3)
+
+        self.assertEquals(masked.tolist(), [False, True, True, True])
+        self.assertEquals(int(forward[0]), encodeKMer("ACG"))
+        self.assertEquals(int(reverse[0]), encodeKMer("CGT"))
+
+    """ 
+    # =============================================================================
+
+    test_short
+
+    PURPOSE:
+        Tests encoding a sequence shorter than the k-mer size.
+
+    INPUT:
+
+        sequence = "AC"
+        k = 3
+
+    EXPECTED:
+
+        no k-mers
+
+    # =============================================================================
+    """
+    def test_short(self):
+
+        forward, reverse, masked = encodeWindows("AC", 3)
+
+        self.assertEquals(len(forward), 0)
+        self.assertEquals(len(reverse), 0)
+        self.assertEquals(len(masked), 0)
+
+""" 
+# =============================================================================
+
+CANONICALIZE K-MERS
+
+# =============================================================================
+"""
+class TestCanonicalizeKMers(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_simple
+
+    PURPOSE:
+        Tests finding the lesser of k-mers and their reverse complements.
+
+    INPUT:
+
+        codes = [TTT, ACG, GGA, CGT]
+        k = 3
+
+    EXPECTED:
+
+        [AAA, ACG, GGA, ACG]
+
+    # =============================================================================
+    """
+    def test_simple(self):
+
+        codes = numpy.array(
+            [encodeKMer(kmer) for kmer in ["TTT", "ACG", "GGA", "CGT"]],
+            dtype=numpy.uint64)
+
+        self.assertEquals(
+            decodeKMers(canonicalizeKMers(codes, 3), 3),
+            ["AAA", "ACG", "GGA", "ACG"])
+
+""" 
+# =============================================================================
+
+READ LINES
+
+# =============================================================================
+"""
+class TestReadLines(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_block_boundaries
+
+    PURPOSE:
+        Tests reading lines which span several blocks.
+
+    INPUT:
+        0: "AC\\nGTACGTACGT\\n\\nTT" with a block size of 4
+
+    EXPECTED:
+        0: ["AC", "GTACGTACGT", "", "TT"]
+
+    # =============================================================================
+    """
+    def test_block_boundaries(self):
+
+        import neptune.Utility
+
+        blockSize = neptune.Utility.READ_BLOCK_SIZE
+        neptune.Utility.READ_BLOCK_SIZE = 4
+
+        try:
+            inputFile = StringIO.StringIO("AC\nGTACGTACGT\n\nTT")
+            result = list(readLines(inputFile))
+
+        finally:
+            neptune.Utility.READ_BLOCK_SIZE = blockSize
+
+        self.assertEquals(result, ["AC", "GTACGTACGT", "", "TT"])
+
+    """ 
+    # =============================================================================
+
+    test_trailing_newline
+
+    PURPOSE:
+        Tests that a trailing newline does not produce an empty line.
+
+    INPUT:
+        0: "AC\\nGT\\n"
+
+    EXPECTED:
+        0: ["AC", "GT"]
+
+    # =============================================================================
+    """
+    def test_trailing_newline(self):
+
+        inputFile = StringIO.StringIO("AC\nGT\n")
+
+        self.assertEquals(list(readLines(inputFile)), ["AC", "GT"])
+
+    """ 
+    # =============================================================================
+
+    test_line_blocks
+
+    PURPOSE:
+        Tests reading blocks which end at line boundaries.
+
+    INPUT:
+        0: "AC\nGTACGTACGT\n\nTT" with a block size of 4
+        1: "AC\nGT\n" with a block size of 4
+
+    EXPECTED:
+        0: ["AC\n", "GTACGTACGT\n\n", "TT"]
+        1: ["AC\n", "GT\n"]
+
+    # =============================================================================
+    """
+    def test_line_blocks(self):
+
+        inputFile = StringIO.StringIO("AC\nGTACGTACGT\n\nTT")
+        self.assertEquals(list(readLineBlocks(inputFile, 4)),
+            ["AC\n", "GTACGTACGT\n\n", "TT"])
+
+        inputFile = StringIO.StringIO("AC\nGT\n")
+        self.assertEquals(list(readLineBlocks(inputFile, 4)), ["AC\n", "GT\n"])
+
+""" 
+# =============================================================================
+
+READ FASTA
+
+# =============================================================================
+"""
+class TestReadSequences(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_fastq
+
+    PURPOSE:
+        Tests reading FASTQ records, including multi-line records and quality
+        lines beginning with "@".
+
+    INPUT:
+        0: fastqFile =
+            @read1 first
+            ACGTacgtAC
+            +
+            IIIIIIIIII
+            @read2
+            ACGTACG
+            TAC
+            +read2
+            @IIIIIII
+            III
+
+    EXPECTED:
+        0: [("read1", "ACGTACGTAC"), ("read2", "ACGTACGTAC")]
+
+    # =============================================================================
+    """
+    def test_fastq(self):
+
+        fastqFile = StringIO.StringIO(
+            "@read1 first\nACGTacgtAC\n+\nIIIIIIIIII\n"
+            "@read2\nACGTACG\nTAC\n+read2\n@IIIIIII\nIII\n")
+
+        result = list(readSequences(fastqFile))
+        expected = [("read1", "ACGTACGTAC"), ("read2", "ACGTACGTAC")]
+
+        self.assertEquals(result, expected)
+
+    """ 
+    # =============================================================================
+
+    test_fasta
+
+    PURPOSE:
+        Tests reading FASTA records and empty files.
+
+    INPUT:
+        0: "\n>0\nACGT\n>1\nGG\n"
+        1: ""
+
+    EXPECTED:
+        0: [("0", "ACGT"), ("1", "GG")]
+        1: []
+
+    # =============================================================================
+    """
+    def test_fasta(self):
+
+        fastaFile = StringIO.StringIO("\n>0\nACGT\n>1\nGG\n")
+        self.assertEquals(
+            list(readSequences(fastaFile)), [("0", "ACGT"), ("1", "GG")])
+
+        self.assertEquals(list(readSequences(StringIO.StringIO(""))), [])
+
+    """ 
+    # =============================================================================
+
+    test_malformed_fastq
+
+    PURPOSE:
+        Tests reading truncated FASTQ records.
+
+    INPUT:
+        0: "@read1\nACGT\n"
+        1: "@read1\nACGT\n+\nII\n"
+
+    EXPECTED:
+        0: RuntimeError
+        1: RuntimeError
+
+    # =============================================================================
+    """
+    def test_malformed_fastq(self):
+
+        with self.assertRaises(RuntimeError):
+            list(readSequences(StringIO.StringIO("@read1\nACGT\n")))
+
+        with self.assertRaises(RuntimeError):
+            list(readSequences(StringIO.StringIO("@read1\nACGT\n+\nII\n")))
+
+class TestOpenInput(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_bgzip
+
+    PURPOSE:
+        Tests reading FASTA records from a file compressed as several gzip
+        members, as written by bgzip.
+
+    INPUT:
+        0: member 1 = ">0\nACGT\n", member 2 = "TTTT\n>1\nGGGG\n"
+
+    EXPECTED:
+        0: [("0", "ACGTTTTT"), ("1", "GGGG")]
+
+    # =============================================================================
+    """
+    def test_bgzip(self):
+
+        import gzip
+
+        location = getPath("tests/output/utility/members.fasta.gz")
+
+        with open(location, "wb") as outputFile:
+
+            for member in [">0\nACGT\n", "TTTT\n>1\nGGGG\n"]:
+
+                memberFile = gzip.GzipFile(fileobj=outputFile, mode="wb")
+                memberFile.write(member)
+                memberFile.close()
+
+        self.assertTrue(isCompressed(location))
+
+        with openInput(location) as inputFile:
+            result = list(readFASTA(inputFile))
+
+        self.assertEquals(result, [("0", "ACGTTTTT"), ("1", "GGGG")])
+
+        os.remove(location)
+
+    """ 
+    # =============================================================================
+
+    test_uncompressed
+
+    PURPOSE:
+        Tests reading an uncompressed file and writing files with and without
+        compression.
+
+    INPUT:
+        0: "AAA 1 0\n", compress = False and True
+
+    EXPECTED:
+        0: The contents are read back unchanged, and only the compressed file
+           is compressed.
+
+    # =============================================================================
+    """
+    def test_uncompressed(self):
+
+        location = getPath("tests/output/utility/lines.kmers")
+
+        for compress in [False, True]:
+
+            with openOutput(location, compress) as outputFile:
+                outputFile.write("AAA 1 0\n")
+
+            self.assertEquals(isCompressed(location), compress)
+
+            with openInput(location) as inputFile:
+                self.assertEquals(inputFile.read(), "AAA 1 0\n")
+
+            os.remove(location)
+
+class TestReadFASTA(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_simple
+
+    PURPOSE:
+        Tests reading a multi-record, multi-line FASTA file.
+
+    INPUT:
+        0: fastaFile = 
+            >0 first record
+            ACGTacgt
+            TTTT
+            >1
+            GGGG
+
+    EXPECTED:
+        0: [("0", "ACGTACGTTTTT"), ("1", "GGGG")]
+
+    # =============================================================================
+    """
+    def test_simple(self):
+
+        fastaFile = StringIO.StringIO()
+        fastaFile.write(">0 first record\n")
+        fastaFile.write("ACGTacgt\n")
+        fastaFile.write("TTTT\n")
+        fastaFile.write(">1\n")
+        fastaFile.write("GGGG")
+        fastaFile.seek(0)
+
+        result = list(readFASTA(fastaFile))
+        expected = [("0", "ACGTACGTTTTT"), ("1", "GGGG")]
+
+        self.assertEquals(result, expected)
+
+    """ 
+    # =============================================================================
+
+    test_generator
+
+    PURPOSE:
+        Tests that records are produced one at a time, before the file has been
+        read entirely.
+
+    INPUT:
+        0: fastaFile = 
+            >0
+            ACGT
+            >1
+            TTTT
+
+    EXPECTED:
+        0: ("0", "ACGT")
+
+    # =============================================================================
+    """
+    def test_generator(self):
+
+        fastaFile = StringIO.StringIO(">0\nACGT\n>1\nTTTT\n")
+
+        records = readFASTA(fastaFile)
+
+        self.assertEquals(next(records), ("0", "ACGT"))
+        self.assertEquals(next(records), ("1", "TTTT"))
+
+        with self.assertRaises(StopIteration):
+            next(records)
+
+    """ 
+    # =============================================================================
+
+    test_no_header
+
+    PURPOSE:
+        Tests that sequence before the first record header is not silently
+        dropped.
+
+    INPUT:
+        0: fastaFile = 
+            ACGT
+            >0
+            TTTT
+
+    EXPECTED:
+        0: RuntimeError
+
+    # =============================================================================
+    """
+    def test_no_header(self):
+
+        fastaFile = StringIO.StringIO("ACGT\n>0\nTTTT\n")
+
+        with self.assertRaises(RuntimeError):
+            list(readFASTA(fastaFile))
+
+""" 
+# =============================================================================
+
 BUILD REFERENCES
 
 # =============================================================================
@@ -623,6 +1305,32 @@ class TestEstimateReferenceParameters(unittest.TestCase):
     """ 
     # =============================================================================
 
+    test_records
+
+    PURPOSE:
+        Test references provided as FASTA records.
+
+    INPUT:
+        0: references = readFASTA(">1\\nACGTACGTACGT\\n>2\\nAAAA\\n")
+
+    EXPECTED:
+        0: size = 16, gcContent = 0.375
+
+    # =============================================================================
+    """
+    def test_records(self):
+
+        references = readFASTA(
+            StringIO.StringIO(">1\nACGTACGTACGT\n>2\nAAAA\n"))
+
+        size, gcContent = estimateReferenceParameters(references)
+
+        self.assertEquals(size, 16)
+        self.assertAlmostEquals(gcContent, 0.375, 5)
+
+    """ 
+    # =============================================================================
+
     test_no_references
 
     PURPOSE:
@@ -644,6 +1352,202 @@ class TestEstimateReferenceParameters(unittest.TestCase):
         with self.assertRaises(RuntimeError):
             size, gcContent = estimateReferenceParameters(references)
 
+""" 
+# =============================================================================
+
+PARTITIONS
+
+# =============================================================================
+"""
+class TestPartitions(unittest.TestCase):
+
+    """ 
+    # =============================================================================
+
+    test_get_partition_tags
+
+    PURPOSE:
+        Tests that partition tags sort in the same order as the partitions.
+
+    INPUT:
+
+        partitions = 1, 3, 12
+
+    EXPECTED:
+
+        ["0"], ["0", "1", "2"], ["00", "01", ..., "11"]
+
+    # =============================================================================
+    """
+    def test_get_partition_tags(self):
+
+        self.assertEquals(getPartitionTags(1), ["0"])
+        self.assertEquals(getPartitionTags(3), ["0", "1", "2"])
+
+        tags = getPartitionTags(12)
+
+        self.assertEquals(tags[0], "00")
+        self.assertEquals(tags[11], "11")
+        self.assertEquals(tags, sorted(tags))
+
+    """ 
+    # =============================================================================
+
+    test_get_partition
+
+    PURPOSE:
+        Tests selecting the partition of k-mers.
+
+    INPUT:
+
+        splitters = ["CAA", "GTA"]
+
+    EXPECTED:
+
+        AAA -> 0, CAA -> 1, CNA -> 1, GTA -> 2, TTT -> 2
+
+    # =============================================================================
+    """
+    def test_get_partition(self):
+
+        splitters = ["CAA", "GTA"]
+
+        self.assertEquals(getPartition("AAA", splitters), 0)
+        self.assertEquals(getPartition("CAA", splitters), 1)
+        self.assertEquals(getPartition("CNA", splitters), 1)
+        self.assertEquals(getPartition("GTA", splitters), 2)
+        self.assertEquals(getPartition("TTT", splitters), 2)
+        self.assertEquals(getPartition("TTT", []), 0)
+
+    """ 
+    # =============================================================================
+
+    test_select_splitters
+
+    PURPOSE:
+        Tests selecting splitters which divide a sample evenly.
+
+    INPUT:
+
+        sample = 8 k-mers, partitions = 4
+
+    EXPECTED:
+
+        Every partition contains 2 k-mers of the sample.
+
+    # =============================================================================
+    """
+    def test_select_splitters(self):
+
+        sample = ["AAA", "AAC", "AAG", "AAT", "ACA", "ACC", "TTA", "TTT"]
+        splitters = selectSplitters(list(reversed(sample)), 4)
+
+        self.assertEquals(splitters, ["AAG", "ACA", "TTA"])
+
+        sizes = [0] * 4
+
+        for kmer in sample:
+            sizes[getPartition(kmer, splitters)] += 1
+
+        self.assertEquals(sizes, [2, 2, 2, 2])
+
+        self.assertEquals(selectSplitters([], 4), [])
+        self.assertEquals(selectSplitters(sample, 1), [])
+
+    """ 
+    # =============================================================================
+
+    test_splitters_file
+
+    PURPOSE:
+        Tests writing and reading a splitters file.
+
+    INPUT:
+
+        ["CAA", "GTA"] and the unsorted ["GTA", "CAA"]
+
+    EXPECTED:
+
+        The sorted splitters are read back; the unsorted splitters raise a
+        RuntimeError.
+
+    # =============================================================================
+    """
+    def test_splitters_file(self):
+
+        location = getPath("tests/output/utility/splitters.kmers")
+
+        writeSplitters(["CAA", "GTA"], location)
+        self.assertEquals(readSplitters(location), ["CAA", "GTA"])
+
+        with open(location, "w") as splittersFile:
+            splittersFile.write("GTA\nCAA\n")
+
+        with self.assertRaises(RuntimeError):
+            readSplitters(location)
+
+        os.remove(location)
+
+    """ 
+    # =============================================================================
+
+    test_sample_kmers
+
+    PURPOSE:
+        Tests sampling canonical k-mers from a FASTA file.
+
+    INPUT:
+
+        count1.fasta: ACGTACGTACGT
+
+        k = 7, size = 100
+
+    EXPECTED:
+
+        All 6 canonical k-mers of the sequence.
+
+    # =============================================================================
+    """
+    def test_sample_kmers(self):
+
+        sample = sampleKMers(["tests/data/count/count1.fasta"], 7, 100)
+
+        self.assertEquals(len(sample), 6)
+        self.assertEquals(
+            sorted(set(sample)), ["ACGTACG", "GTACGTA"])
+
+    """ 
+    # =============================================================================
+
+    test_sample_reads
+
+    PURPOSE:
+        Tests sampling canonical k-mers from a FASTQ file of short reads.
+
+    INPUT:
+
+        reads.fastq: ACGTACGTAC, ACGTACGTAC, GGGGNGGGG (105 bytes)
+
+        k = 3
+
+    EXPECTED:
+
+        With size = 100, every k-mer of the reads is sampled.
+
+        With size = 5, the stride of 21 positions continues across the 23
+        positions of the reads, so only ACG, at position 0 of the first read,
+        and GGG, at position 5 of the third read, are sampled, rather than the
+        first k-mer of every read.
+
+    # =============================================================================
+    """
+    def test_sample_reads(self):
+
+        location = "tests/data/count/reads.fastq"
+
+        self.assertEquals(len(sampleKMers([location], 3, 100)), 8 + 8 + 7)
+        self.assertEquals(sampleKMers([location], 3, 5), ["ACG", "CCC"])
+
 if __name__ == '__main__':
     
     unittest.main()   